@@ -0,0 +1,155 @@
+"""
+===================================================================
+ГРАНИЦЫ ВЫХОДА - ОЦЕНКА ОПТИМУМА БЕЗ ВЕНГЕРСКОГО АЛГОРИТМА
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    relative_loss_percent эвристик считается от точного решения
+    (венгерский алгоритм, O(n³)). Для очень больших n или многих матриц
+    это слишком дорого. Здесь за O(n·m) на проход вычисляются границы
+    оптимума S* = max_σ Σ_j S[σ(j), j]:
+
+    Верхние (S* <= UB):
+        column_bound - сумма максимумов столбцов: на каждом этапе лучшая
+                       партия, без запрета повторов
+        row_bound    - сумма максимумов строк: каждая партия на лучшем
+                       для неё этапе, без запрета совпадения этапов
+        dual_bound   - двойственная задача: любые потенциалы u (партии),
+                       v (этапы) с u_i + v_j >= S[i, j] дают
+                       S* <= Σ u + Σ v. Стартовые потенциалы - от
+                       максимумов столбцов и строк с одним проходом
+                       покоординатного спуска:
+                           u_i = max_j (S[i, j] - v_j)
+                           v_j = max_i (S[i, j] - u_i)
+                       Дальше несколько проходов субградиентного спуска по
+                       v (лагранжева релаксация ограничений этапов) с шагом
+                       Поляка к нижней границе. Граница допустима при
+                       любом v, берётся лучшая из пройденных.
+    Нижняя (LB <= S*): лучшая из эвристик - любое допустимое решение.
+
+    Гарантированный разрыв эвристики с выходом h:
+        (UB - h) / UB · 100 >= (S* - h) / S* · 100 = relative_loss_percent
+    (при h > 0). Если гарантированный разрыв мал, эвристике можно
+    доверять без точного решения.
+
+ИСПОЛЬЗОВАНИЕ:
+    from algorithms.bounds import yield_bounds, guaranteed_gap_percent
+
+    bounds = yield_bounds(S, {'greedy': 152.1, 'thrifty': 140.3})
+    bounds['upper_bound'], bounds['lower_bound'], bounds['lower_bound_strategy']
+    guaranteed_gap_percent(bounds['upper_bound'], 152.1)
+
+    Функции границ принимают и стопку матриц (K, n, m) - тогда
+    возвращают массив из K значений.
+
+    Через API: /optimize и /multi_optimize добавляют "upper_bound" и
+    "guaranteed_gap_percent"; с "exact": false венгерский алгоритм не
+    запускается (см. app.py).
+
+ВАЖНО:
+    - Прямоугольные S (n партий × m этапов) поддерживаются: используются
+      k = min(n, m) лучших столбцов/строк, а потенциалы стороны, которая
+      занята не полностью, не отрицательны.
+    - Двойственная граница не обязательно равна S* (несколько проходов,
+      а не решение двойственной задачи), но всегда допустима. Без нижней
+      границы субградиентные проходы не выполняются.
+===================================================================
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_DUAL_PASSES = 20
+
+
+def _top_sum(values: np.ndarray, k: int) -> np.ndarray:
+    """Sum of the k largest entries along the last axis."""
+    if k >= values.shape[-1]:
+        return values.sum(axis=-1)
+    return np.sort(values, axis=-1)[..., -k:].sum(axis=-1)
+
+
+def column_bound(S: np.ndarray):
+    """Sum of the best min(n, m) column maxima."""
+    S = np.asarray(S, dtype=np.float64)
+    return _top_sum(S.max(axis=-2), min(S.shape[-2:]))
+
+
+def row_bound(S: np.ndarray):
+    """Sum of the best min(n, m) row maxima."""
+    S = np.asarray(S, dtype=np.float64)
+    return _top_sum(S.max(axis=-1), min(S.shape[-2:]))
+
+
+def dual_bound(S: np.ndarray, passes: int = DEFAULT_DUAL_PASSES, lower_bound=None):
+    """
+    Σu + Σv for dual-feasible potentials. Two sweeps of coordinate
+    descent (from the column and the row start), then, if `lower_bound`
+    (a feasible yield) is given, `passes` subgradient steps on v with the
+    Polyak step (L - lower_bound) / |g|².
+    """
+    S = np.asarray(S, dtype=np.float64)
+    n, m = S.shape[-2:]
+    # Строки (партии) при n > m заняты не все: u >= 0; этапы при m > n: v >= 0
+    u_floor = 0.0 if n > m else -np.inf
+    v_floor = 0.0 if m > n else -np.inf
+
+    def rows_step(v):
+        return np.maximum((S - v[..., None, :]).max(axis=-1), u_floor)
+
+    def cols_step(u):
+        return np.maximum((S - u[..., :, None]).max(axis=-2), v_floor)
+
+    v = np.maximum(S.max(axis=-2), v_floor)
+    u = rows_step(v)
+    best = u.sum(axis=-1) + v.sum(axis=-1)
+    u_start = np.maximum(S.max(axis=-1), u_floor)
+    best = np.minimum(best, u_start.sum(axis=-1) + cols_step(u_start).sum(axis=-1))
+    if lower_bound is None:
+        return best
+
+    # L(v) = Σv + Σ_i max(u_floor, max_j(S[i, j] - v_j)) - граница при любом v;
+    # субградиент по v_j: 1 - число партий, выбравших этап j
+    target = np.asarray(lower_bound, dtype=np.float64)
+    for _ in range(passes):
+        R = S - v[..., None, :]
+        chosen = R.argmax(axis=-1)
+        u = np.take_along_axis(R, chosen[..., None], axis=-1)[..., 0]
+        value = np.maximum(u, u_floor).sum(axis=-1) + v.sum(axis=-1)
+        best = np.minimum(best, value)
+        picks = (chosen[..., None] == np.arange(m)) & (u > u_floor)[..., None]
+        g = 1.0 - picks.sum(axis=-2)
+        if m > n:
+            g[(v <= 0) & (g > 0)] = 0.0
+        norm = (g * g).sum(axis=-1)
+        step = np.where(norm > 0, np.maximum(value - target, 0.0) / np.maximum(norm, 1.0), 0.0)
+        v = np.maximum(v - step[..., None] * g, v_floor)
+    return best
+
+
+def yield_bounds(S: np.ndarray, heuristic_yields: Optional[Dict[str, float]] = None,
+                 passes: int = DEFAULT_DUAL_PASSES) -> dict:
+    """
+    Upper bounds of the optimal yield of one S matrix and, if heuristic
+    yields are given, the best of them as the lower bound.
+    """
+    bounds = {
+        'column_bound': float(column_bound(S)),
+        'row_bound': float(row_bound(S)),
+    }
+    name = max(heuristic_yields, key=heuristic_yields.get) if heuristic_yields else None
+    lower = float(heuristic_yields[name]) if name is not None else None
+    bounds['dual_bound'] = float(dual_bound(S, passes, lower))
+    bounds['upper_bound'] = min(bounds.values())
+    if name is not None:
+        bounds['lower_bound'] = lower
+        bounds['lower_bound_strategy'] = name
+    return bounds
+
+
+def guaranteed_gap_percent(upper_bound: float, value: float) -> Optional[float]:
+    """Upper bound of the relative loss vs the optimum, in percent (None unless both are positive)."""
+    if upper_bound <= 0 or value <= 0:
+        return None
+    return max(0.0, (upper_bound - value) / upper_bound * 100)
@@ -0,0 +1,196 @@
+"""
+===================================================================
+НЕСКОЛЬКО ЗАВОДОВ - РАСПРЕДЕЛЕНИЕ ПАРТИЙ ПО (ЗАВОД, ЭТАП)
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Базовая модель - один завод, одна партия массы M за этап. Здесь P
+    заводов берут партии из общих буртов; у завода p своя масса партии
+    M_p и своё число этапов m_p. Каждая пара (завод p, этап j) - "слот",
+    всего слотов Σ m_p. Этапы синхронны, поэтому выход партии i в слоте
+    (p, j) - S[i, j], а сахар в массе - S[i, j] · M_p (Optimizer.
+    calculate_final_mass). Задача - назначить партии слотам (каждую не
+    более одного раза) с максимальной итоговой массой:
+
+        W[i, (p, j)] = S[i, j] · M_p,   S - матрица n × max m_p
+
+СТРАТЕГИИ:
+    - Эвристики Optimizer (greedy, thrifty, thrifty_greedy,
+      greedy_thrifty, tkg, random) идут по слотам в порядке времени:
+      этап за этапом, внутри этапа - заводы по убыванию массы (крупному
+      заводу при жадном выборе достаётся лучшая партия). Умножение на
+      M_p не меняет argmax в столбце, поэтому стратегии работают на
+      S[:, этап слота] без изменений. ν задаётся в этапах: переключение
+      на этапе max m_p - ν для всех заводов.
+    - optimal - одна прямоугольная задача о назначениях n × Σ m_p на W
+      (linear_sum_assignment, без дополнения до квадратной). Память и
+      время растут как n · (Σ m_p)²; предел - MAX_EXACT_SLOTS.
+    - decomposed - декомпозиция по времени (скользящий горизонт):
+      этапы делятся на блоки; для блока решается задача о назначениях
+      "свободные партии × слоты блока и lookahead следующих блоков",
+      фиксируются только слоты текущего блока. Каждая подзадача -
+      n × (окно слотов), поэтому задача с тысячами слотов решается за
+      секунды, а окно с заглядыванием вперёд не даёт блоку забрать
+      партии, которые выгоднее переработать позже. Если окно покрывает
+      весь горизонт, результат совпадает с optimal.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.models import Plant
+    from algorithms.multiplant import solve_multi_plant
+
+    plants = [Plant('north', mass=1000.0, stages=20), Plant('south', mass=600.0, stages=15)]
+    result = solve_multi_plant(S, plants, 'decomposed')   # S: n × 20
+    result['schedule']['north']     # партия на каждом этапе завода (-1 - нет)
+    result['final_mass'], result['yield']
+
+    Через API: POST /multi_plant (см. app.py)
+
+ВАЖНО:
+    - Если партий меньше, чем слотов, часть слотов остаётся пустой (-1):
+      эвристики заполняют самые ранние слоты, точное решение выбирает
+      слоты само.
+    - "yield" - сумма S[i, j] по занятым слотам (как в Optimizer),
+      "final_mass" - Σ S[i, j] / 100 · M_p · d; optimal и decomposed
+      максимизируют final_mass.
+===================================================================
+"""
+
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models import Plant
+from .optimizer import Optimizer, load_linear_sum_assignment
+from .scaling import STUDY_STRATEGIES
+
+# Эвристики берутся из STUDY_STRATEGIES; notoptimal для заводов не имеет смысла
+PLANT_HEURISTICS = ('greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'tkg', 'random')
+PLANT_STRATEGIES = PLANT_HEURISTICS + ('optimal', 'decomposed')
+
+# Ограничение точного решения: матрица n × слоты и O(n · слоты²) времени
+MAX_EXACT_SLOTS = 3000
+
+# Декомпозиция: целевое число слотов в блоке
+DEFAULT_BLOCK_SLOTS = 256
+
+
+def slot_layout(plants: Sequence[Plant]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (plant index, stage) of every slot in processing order: stage by
+    stage, heavier plants first within a stage (ties keep input order).
+    """
+    by_mass = sorted(range(len(plants)), key=lambda p: -plants[p].mass)
+    horizon = max((plant.stages for plant in plants), default=0)
+    slot_plant, slot_stage = [], []
+    for j in range(horizon):
+        for p in by_mass:
+            if j < plants[p].stages:
+                slot_plant.append(p)
+                slot_stage.append(j)
+    return np.array(slot_plant, dtype=np.int64), np.array(slot_stage, dtype=np.int64)
+
+
+def validate_plants(plants: Sequence[Plant], S: np.ndarray) -> None:
+    if not plants:
+        raise ValueError("at least one plant is required")
+    names = [plant.name for plant in plants]
+    if len(set(names)) != len(names):
+        raise ValueError("plant names must be unique")
+    for plant in plants:
+        if not plant.mass > 0 or not isinstance(plant.stages, int) or plant.stages < 1:
+            raise ValueError(f"plant {plant.name}: mass must be positive and stages a positive integer")
+    horizon = max(plant.stages for plant in plants)
+    if S.ndim != 2 or S.shape[1] < horizon:
+        raise ValueError(f"S must have at least {horizon} stage columns")
+
+
+def _solve_exact(S: np.ndarray, masses: np.ndarray, slot_plant: np.ndarray,
+                 slot_stage: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Maximum-mass assignment of `rows` (batches) to `cols` (slots); returns matched (rows, cols)."""
+    width = len(cols)
+    if len(rows) > width:
+        # В оптимуме слот получает одну из `width` лучших для него партий: иначе одна
+        # из них свободна и обмен не уменьшает массу. Слоты одного этапа различаются
+        # только множителем M_p, поэтому кандидаты считаются по этапам.
+        stages = np.unique(slot_stage[cols])
+        top = np.argpartition(-S[np.ix_(rows, stages)], width - 1, axis=0)[:width]
+        rows = rows[np.unique(top)]
+    W = S[np.ix_(rows, slot_stage[cols])] * masses[slot_plant[cols]]
+    r, c = load_linear_sum_assignment()(W, maximize=True)
+    return rows[r], cols[c]
+
+
+def _decomposed(S: np.ndarray, masses: np.ndarray, slot_plant: np.ndarray, slot_stage: np.ndarray,
+                block_stages: int, lookahead: int) -> np.ndarray:
+    assignment = np.full(len(slot_stage), -1, dtype=np.int64)
+    available = np.ones(S.shape[0], dtype=bool)
+    horizon = int(slot_stage[-1]) + 1 if len(slot_stage) else 0
+    for start in range(0, horizon, block_stages):
+        rows = np.flatnonzero(available)
+        if not rows.size:
+            break
+        stop = start + block_stages
+        window = np.flatnonzero((slot_stage >= start) & (slot_stage < stop + lookahead * block_stages))
+        matched_rows, matched_cols = _solve_exact(S, masses, slot_plant, slot_stage, rows, window)
+        # Фиксируем только слоты текущего блока; остальные пересчитаются со следующим окном
+        commit = slot_stage[matched_cols] < stop
+        assignment[matched_cols[commit]] = matched_rows[commit]
+        available[matched_rows[commit]] = False
+    return assignment
+
+
+def solve_multi_plant(S: np.ndarray, plants: Sequence[Plant], strategy: str = 'optimal',
+                      nu: Optional[int] = None, block_stages: Optional[int] = None,
+                      lookahead: int = 1, rng: Optional[random.Random] = None) -> dict:
+    """
+    Assign batches (rows of S) to the (plant, stage) slots with `strategy`;
+    `rng` is passed to the 'random' heuristic.
+    Returns {'schedule': {plant: [batch per stage]}, 'yield', 'final_mass',
+    'slots', 'assigned', 'elapsed_seconds'}.
+    """
+    S = np.asarray(S, dtype=np.float64)
+    validate_plants(plants, S)
+    if strategy not in PLANT_STRATEGIES:
+        raise ValueError(f"strategy must be one of: {', '.join(PLANT_STRATEGIES)}")
+    masses = np.array([plant.mass for plant in plants], dtype=np.float64)
+    slot_plant, slot_stage = slot_layout(plants)
+    horizon = int(slot_stage[-1]) + 1
+
+    started = time.perf_counter()
+    if strategy == 'optimal':
+        if len(slot_stage) > MAX_EXACT_SLOTS:
+            raise ValueError(f"optimal is limited to {MAX_EXACT_SLOTS} slots; use 'decomposed'")
+        assignment = np.full(len(slot_stage), -1, dtype=np.int64)
+        rows, cols = _solve_exact(S, masses, slot_plant, slot_stage,
+                                  np.arange(S.shape[0]), np.arange(len(slot_stage)))
+        assignment[cols] = rows
+    elif strategy == 'decomposed':
+        if block_stages is None:
+            block_stages = max(1, DEFAULT_BLOCK_SLOTS // len(plants))
+        if block_stages < 1 or lookahead < 0:
+            raise ValueError("block_stages must be positive and lookahead non-negative")
+        assignment = _decomposed(S, masses, slot_plant, slot_stage, block_stages, lookahead)
+    else:
+        nu = horizon // 2 if nu is None else nu
+        # ν в этапах -> число слотов начиная с этапа переключения
+        nu_slots = int(np.count_nonzero(slot_stage >= horizon - nu))
+        perm, _ = STUDY_STRATEGIES[strategy](S[:, slot_stage], nu_slots, rng)
+        assignment = np.asarray(perm, dtype=np.int64)
+    elapsed = time.perf_counter() - started
+
+    used = assignment >= 0
+    values = np.zeros(len(assignment))
+    values[used] = S[assignment[used], slot_stage[used]]
+    schedule: Dict[str, List[int]] = {plant.name: [-1] * plant.stages for plant in plants}
+    for slot in range(len(assignment)):
+        schedule[plants[slot_plant[slot]].name][slot_stage[slot]] = int(assignment[slot])
+    return {
+        'schedule': schedule,
+        'yield': float(values.sum()),
+        'final_mass': float(Optimizer.calculate_final_mass(values[used], masses[slot_plant[used]]).sum()),
+        'slots': int(len(assignment)),
+        'assigned': int(used.sum()),
+        'elapsed_seconds': elapsed,
+    }
@@ -0,0 +1,627 @@
+"""
+===================================================================
+ОПЕРАТИВНОЕ ПЛАНИРОВАНИЕ - СКОЛЬЗЯЩИЙ ГОРИЗОНТ С ДООПТИМИЗАЦИЕЙ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Optimizer решает задачу один раз по полной матрице S n×n. На заводе
+    план меняется по ходу кампании: после каждого этапа одна партия уже
+    переработана, по оставшимся партиям приходят новые замеры (строка S
+    пересчитывается), в кампанию добавляются новые партии. Полное
+    повторное решение венгерским алгоритмом - O(m³) на каждый этап.
+
+    RollingScheduler хранит состояние кампании (текущий этап, какие
+    партии и на каких этапах переработаны, актуальная матрица S) и после
+    каждого события доводит план на оставшийся горизонт до оптимума,
+    переиспользуя предыдущее решение:
+
+        событие                          работа IncrementalAssignment
+        -------------------------------  -------------------------------
+        этап выполнен по плану           удалить пару (партия, этап) -
+                                         решение остаётся оптимальным
+        этап выполнен с другой партией   один кратчайший путь
+        новый замер партии (строка S)    один кратчайший путь
+        новая партия (+1 этап горизонта) один кратчайший путь
+
+    Кратчайший увеличивающий путь (Jonker-Volgenant / Crouse) с
+    потенциалами u, v - O(m²) в худшем случае, на практике путь короткий,
+    а каждый шаг векторизован numpy. Для m ~ 1000 решение на этапе
+    занимает миллисекунды вместо сотен миллисекунд полного решения.
+
+    Эвристики Optimizer (greedy, thrifty, thrifty_greedy, ...) работают
+    так же: план на оставшиеся этапы - стратегия на подматрице
+    S[оставшиеся партии, оставшиеся этапы] с тем же абсолютным этапом
+    переключения n - nu. Эвристики последовательны, поэтому после этапа
+    "по плану" остаток плана не меняется и пересчитывается только после
+    новых замеров или партий.
+
+ИСПОЛЬЗОВАНИЕ:
+    from algorithms.online import RollingScheduler
+
+    scheduler = RollingScheduler(S, strategy='optimal')
+    scheduler.update_batch(3, new_yields)      # замер: выходы партии 3 на этапах t..T-1
+    batch = scheduler.add_batch(row, column)   # новая партия и новый этап
+    decision = scheduler.step()                # {'stage': t, 'batch': i, 'yield': ...}
+    scheduler.schedule()                       # план и прогноз на оставшийся горизонт
+    scheduler.sensitivity()                    # допустимые ошибки замеров (только optimal)
+
+    Сессии API хранит OnlineSessions: в памяти процесса или, с папкой,
+    ещё и в файлах: состояние при старте (state.npz, core/checkpoint.py)
+    и журнал событий - по файлу <версия>.json на изменение.
+
+    Через API: POST /online/start и др. (см. app.py)
+
+ВАЖНО:
+    - Индексы партий и этапов абсолютные: партия 0 - первая строка
+      исходной S, новые партии получают номера n, n+1, ...
+    - Горизонт квадратный: число оставшихся партий равно числу
+      оставшихся этапов, поэтому новая партия добавляет этап в конец.
+    - 'optimal' и 'notoptimal' ведутся инкрементально; эвристики
+      пересчитываются целиком при изменении данных.
+    - state()/from_state() сохраняют и восстанавливают всё состояние,
+      включая потенциалы, так что продолженное планирование остаётся
+      инкрементальным.
+    - Событие пишется на диск строками замеров (O(n)), а не матрицами:
+      сохранение этапа стоит столько же, сколько его решение. Процесс,
+      отставший от журнала (другой воркер serving.py), применяет к своей
+      копии только недостающие события.
+    - Версия сессии - сравнение с обменом: файл версии создаётся
+      атомарно (os.link) и только если его ещё нет, поэтому из двух
+      одновременных изменений одной сессии сохраняется одно, второе
+      получает отказ. Внутри процесса изменения одной сессии идут по
+      очереди (locked()).
+===================================================================
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.checkpoint import Checkpoint
+from .scaling import STUDY_STRATEGIES
+from .sensitivity import sensitivity_from_duals
+
+# Стратегии, которые ведутся инкрементальным решателем: имя -> максимизация
+INCREMENTAL_STRATEGIES = {'optimal': True, 'notoptimal': False}
+
+
+class IncrementalAssignment:
+    """
+    Assignment of active rows to active columns with dual potentials,
+    kept optimal under row/column removal, row updates and growth.
+    """
+
+    def __init__(self, W: np.ndarray, maximize: bool = True):
+        W = np.asarray(W, dtype=np.float64)
+        if W.ndim != 2 or W.shape[0] != W.shape[1]:
+            raise ValueError("weight matrix must be square")
+        if not np.all(np.isfinite(W)):
+            raise ValueError("weight matrix must be finite")
+        n = W.shape[0]
+        self.sign = -1.0 if maximize else 1.0
+        self._cost = self.sign * W
+        self.u = np.zeros(n)
+        self.v = np.zeros(n)
+        self.col4row = np.full(n, -1, dtype=np.int64)
+        self.row4col = np.full(n, -1, dtype=np.int64)
+        self.active_rows = np.ones(n, dtype=bool)
+        self.active_cols = np.ones(n, dtype=bool)
+        self.augmentations = 0
+        if n:
+            self._initial_solution()
+
+    @property
+    def size(self) -> int:
+        return int(self.active_rows.sum())
+
+    def _initial_solution(self) -> None:
+        # Редукция столбцов и строк, жадное назначение по нулевым
+        # приведённым стоимостям, затем кратчайшие пути для остальных строк
+        c = self._cost
+        self.v = c.min(axis=0)
+        reduced = c - self.v
+        self.u = reduced.min(axis=1)
+        tight = reduced == self.u[:, None]
+        for i in range(c.shape[0]):
+            for j in np.flatnonzero(tight[i]):
+                if self.row4col[j] == -1:
+                    self.row4col[j] = i
+                    self.col4row[i] = j
+                    break
+        for i in np.flatnonzero(self.col4row == -1):
+            self._augment(int(i))
+
+    def _augment(self, start: int) -> None:
+        """Shortest augmenting path from the free row `start`; restores a perfect optimal matching."""
+        c, u, v = self._cost, self.u, self.v
+        width = c.shape[1]
+        remaining = self.active_cols.copy()
+        costs = np.full(width, np.inf)
+        path = np.full(width, -1, dtype=np.int64)
+        scanned_rows = []
+        scanned_cols = []
+        i = start
+        min_val = 0.0
+        while True:
+            scanned_rows.append(i)
+            reduced = min_val + c[i] - u[i] - v
+            better = remaining & (reduced < costs)
+            path[better] = i
+            costs[better] = reduced[better]
+            candidates = np.where(remaining, costs, np.inf)
+            j = int(np.argmin(candidates))
+            min_val = candidates[j]
+            if not np.isfinite(min_val):
+                raise ValueError("no augmenting path: rows and columns are unbalanced")
+            if self.row4col[j] != -1:
+                # при равенстве предпочесть свободный столбец - путь заканчивается раньше
+                ties = np.flatnonzero(candidates == min_val)
+                free = ties[self.row4col[ties] == -1]
+                if free.size:
+                    j = int(free[0])
+            remaining[j] = False
+            scanned_cols.append(j)
+            if self.row4col[j] == -1:
+                sink = j
+                break
+            i = int(self.row4col[j])
+
+        # Потенциалы: приведённые стоимости остаются неотрицательными,
+        # рёбра пути становятся нулевыми
+        u[start] += min_val
+        rows = np.array(scanned_rows[1:], dtype=np.int64)
+        if rows.size:
+            u[rows] += min_val - costs[self.col4row[rows]]
+        cols = np.array(scanned_cols, dtype=np.int64)
+        v[cols] -= min_val - costs[cols]
+
+        j = sink
+        while True:
+            i = int(path[j])
+            self.row4col[j] = i
+            self.col4row[i], j = j, self.col4row[i]
+            if i == start:
+                break
+        self.augmentations += 1
+
+    def assignment(self) -> Dict[int, int]:
+        """Active column -> assigned row."""
+        return {int(j): int(self.row4col[j]) for j in np.flatnonzero(self.active_cols)}
+
+    def weight(self, row: int, col: int) -> float:
+        return float(self.sign * self._cost[row, col])
+
+    def remove(self, row: int, col: int) -> None:
+        """
+        Drop an active row and column. If they were matched to each other
+        the remaining solution stays optimal; otherwise their former partners
+        are re-matched with one augmenting path.
+        """
+        if not (self.active_rows[row] and self.active_cols[col]):
+            raise ValueError("row or column is not active")
+        partner_col = int(self.col4row[row])
+        partner_row = int(self.row4col[col])
+        self.active_rows[row] = False
+        self.active_cols[col] = False
+        self.col4row[row] = -1
+        self.row4col[col] = -1
+        if partner_col != col:
+            self.row4col[partner_col] = -1
+            self.col4row[partner_row] = -1
+            self._augment(partner_row)
+
+    def update_row(self, row: int, weights: np.ndarray) -> None:
+        """Replace the weights of an active row on the active columns."""
+        if not self.active_rows[row]:
+            raise ValueError("row is not active")
+        cols = np.flatnonzero(self.active_cols)
+        self._cost[row, cols] = self.sign * np.asarray(weights, dtype=np.float64)
+        col = int(self.col4row[row])
+        self.row4col[col] = -1
+        self.col4row[row] = -1
+        self.u[row] = np.min(self._cost[row, cols] - self.v[cols])
+        self._augment(row)
+
+    def add(self, row_weights: np.ndarray, col_weights: np.ndarray) -> Tuple[int, int]:
+        """
+        Append one row and one column. `row_weights` covers the active
+        columns plus the new one (last); `col_weights` covers the active rows.
+        Returns (new row, new column).
+        """
+        rows = np.flatnonzero(self.active_rows)
+        cols = np.flatnonzero(self.active_cols)
+        if len(row_weights) != cols.size + 1 or len(col_weights) != rows.size:
+            raise ValueError("weights do not match the active rows and columns")
+        r, s = self._grow()
+        c = self._cost
+        c[rows, s] = self.sign * np.asarray(col_weights, dtype=np.float64)
+        c[r, np.append(cols, s)] = self.sign * np.asarray(row_weights, dtype=np.float64)
+        self.v[s] = np.min(c[rows, s] - self.u[rows]) if rows.size else 0.0
+        cols = np.append(cols, s)
+        self.u[r] = np.min(c[r, cols] - self.v[cols])
+        self._augment(r)
+        return r, s
+
+    def _grow(self) -> Tuple[int, int]:
+        r, s = self._cost.shape
+        self._cost = np.pad(self._cost, ((0, 1), (0, 1)))
+        self.u = np.append(self.u, 0.0)
+        self.v = np.append(self.v, 0.0)
+        self.col4row = np.append(self.col4row, -1)
+        self.row4col = np.append(self.row4col, -1)
+        self.active_rows = np.append(self.active_rows, True)
+        self.active_cols = np.append(self.active_cols, True)
+        return r, s
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Potentials and matching; the weights are not included (see from_state)."""
+        return {'u': self.u, 'v': self.v, 'col4row': self.col4row,
+                'row4col': self.row4col, 'active_rows': self.active_rows,
+                'active_cols': self.active_cols, 'sign': np.array(self.sign)}
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], W: np.ndarray) -> 'IncrementalAssignment':
+        """Restore from state() and the current weight matrix `W`."""
+        solver = cls.__new__(cls)
+        solver.sign = float(arrays['sign'])
+        solver._cost = solver.sign * np.array(W, dtype=np.float64)
+        solver.u = np.array(arrays['u'], dtype=np.float64)
+        solver.v = np.array(arrays['v'], dtype=np.float64)
+        solver.col4row = np.array(arrays['col4row'], dtype=np.int64)
+        solver.row4col = np.array(arrays['row4col'], dtype=np.int64)
+        solver.active_rows = np.array(arrays['active_rows'], dtype=bool)
+        solver.active_cols = np.array(arrays['active_cols'], dtype=bool)
+        solver.augmentations = 0
+        return solver
+
+
+class RollingScheduler:
+    """Campaign state and the plan for the remaining horizon under one strategy."""
+
+    def __init__(self, S: np.ndarray, strategy: str = 'optimal', nu: Optional[int] = None):
+        S = np.array(S, dtype=np.float64)
+        if S.ndim != 2 or S.shape[0] != S.shape[1] or S.shape[0] < 1:
+            raise ValueError("S must be a non-empty square matrix")
+        if not np.all(np.isfinite(S)):
+            raise ValueError("S must be finite")
+        if strategy not in STUDY_STRATEGIES:
+            raise ValueError(f"strategy must be one of: {', '.join(STUDY_STRATEGIES)}")
+        n = S.shape[0]
+        self.S = S
+        self.strategy = strategy
+        self.nu = n // 2 if nu is None else int(nu)
+        if not 0 <= self.nu <= n:
+            raise ValueError("nu must be in [0, n]")
+        self.stage = 0
+        self.processed: List[Tuple[int, int, float]] = []  # (этап, партия, выход)
+        self._remaining = np.ones(n, dtype=bool)
+        self._plan: Optional[List[int]] = None
+        self._solver = None
+        if strategy in INCREMENTAL_STRATEGIES:
+            self._solver = IncrementalAssignment(S, maximize=INCREMENTAL_STRATEGIES[strategy])
+
+    @property
+    def horizon(self) -> int:
+        return self.S.shape[1]
+
+    @property
+    def finished(self) -> bool:
+        return self.stage >= self.horizon
+
+    def remaining_batches(self) -> List[int]:
+        return [int(i) for i in np.flatnonzero(self._remaining)]
+
+    def plan(self) -> List[int]:
+        """Batch planned for every remaining stage t, t+1, ..., T-1."""
+        if self._solver is not None:
+            assignment = self._solver.assignment()
+            return [assignment[j] for j in range(self.stage, self.horizon)]
+        if self._plan is None:
+            rows = np.flatnonzero(self._remaining)
+            sub = self.S[np.ix_(rows, np.arange(self.stage, self.horizon))]
+            perm, _ = STUDY_STRATEGIES[self.strategy](sub, min(self.nu, len(rows)))
+            self._plan = [int(rows[p]) for p in perm]
+        return self._plan
+
+    def _check_batch(self, batch: int) -> None:
+        # bool и float сравниваются с int как равные (True == 1, 1.0 == 1), но индексом не являются
+        if (isinstance(batch, bool) or not isinstance(batch, (int, np.integer))
+                or not (0 <= batch < self.S.shape[0]) or not self._remaining[batch]):
+            raise ValueError(f"batch {batch} is not waiting for processing")
+
+    def update_batch(self, batch: int, yields: Sequence[float]) -> None:
+        """New measurement: yields of `batch` at the remaining stages t..T-1."""
+        self._check_batch(batch)
+        batch = int(batch)
+        yields = np.asarray(yields, dtype=np.float64)
+        if yields.shape != (self.horizon - self.stage,) or not np.all(np.isfinite(yields)):
+            raise ValueError(f"yields must be {self.horizon - self.stage} finite numbers")
+        self.S[batch, self.stage:] = yields
+        if self._solver is not None:
+            self._solver.update_row(batch, yields)
+        self._plan = None
+
+    def add_batch(self, yields: Sequence[float], extension: Sequence[float]) -> int:
+        """
+        Add a batch and extend the horizon by one stage. `yields` - the new
+        batch at stages t..T (T is the new last stage); `extension` - the
+        waiting batches (remaining_batches() order) at stage T.
+        Returns the new batch index.
+        """
+        m = self.horizon - self.stage
+        yields = np.asarray(yields, dtype=np.float64)
+        extension = np.asarray(extension, dtype=np.float64)
+        if yields.shape != (m + 1,) or extension.shape != (m,):
+            raise ValueError(f"yields must have {m + 1} values and extension {m}")
+        if not (np.all(np.isfinite(yields)) and np.all(np.isfinite(extension))):
+            raise ValueError("yields must be finite")
+        batch = self.S.shape[0]
+        self.S = np.pad(self.S, ((0, 1), (0, 1)))
+        self.S[batch, self.stage:] = yields
+        self.S[self._remaining.nonzero()[0], self.horizon - 1] = extension
+        self._remaining = np.append(self._remaining, True)
+        if self._solver is not None:
+            self._solver.add(yields, extension)
+        self._plan = None
+        return batch
+
+    def step(self, batch: Optional[int] = None) -> dict:
+        """
+        Process the current stage with the planned batch (or with `batch`,
+        if the plant deviated from the plan) and move to the next stage.
+        """
+        if self.finished:
+            raise ValueError("campaign is finished")
+        planned = self.plan()[0]
+        batch = planned if batch is None else batch
+        self._check_batch(batch)
+        batch = int(batch)
+        if self._solver is not None:
+            self._solver.remove(batch, self.stage)
+        elif self._plan is not None:
+            self._plan = self._plan[1:] if batch == planned else None
+        value = float(self.S[batch, self.stage])
+        self.processed.append((self.stage, batch, value))
+        self._remaining[batch] = False
+        self.stage += 1
+        return {'stage': self.stage - 1, 'batch': batch, 'yield': value, 'planned': planned}
+
+    def apply(self, events: dict) -> dict:
+        """
+        One request's events in order: measurements ("updates"), new batches,
+        then the current stage if "step" (with "batch" if given).
+        Returns {'new_batches': [...], 'decision': step() result if stepped}.
+        """
+        for update in events.get('updates', []):
+            self.update_batch(update['batch'], update['yields'])
+        response = {'new_batches': [self.add_batch(batch['yields'], batch['extension'])
+                                    for batch in events.get('new_batches', [])]}
+        if events.get('step'):
+            response['decision'] = self.step(events.get('batch'))
+        return response
+
+    def sensitivity(self) -> dict:
+        """
+        Tolerance ranges of the current optimal plan (algorithms/sensitivity.py)
+        from the solver's potentials, without re-solving. Rows and columns
+        of the arrays are remaining_batches() and stages t..T-1.
+        """
+        if self.strategy != 'optimal':
+            raise ValueError("sensitivity is available for the 'optimal' strategy only")
+        if self.finished:
+            raise ValueError("campaign is finished")
+        solver = self._solver
+        rows = np.flatnonzero(solver.active_rows)
+        cols = np.flatnonzero(solver.active_cols)
+        local_row = {int(row): k for k, row in enumerate(rows)}
+        permutation = [local_row[int(solver.row4col[j])] for j in cols]
+        # Решатель минимизирует -S: потенциалы задачи максимизации - -u, -v
+        report = sensitivity_from_duals(self.S[np.ix_(rows, np.arange(self.stage, self.horizon))],
+                                        permutation, -solver.u[rows], -solver.v[cols])
+        report['permutation'] = [int(rows[p]) for p in report['permutation']]
+        report['batches'] = [int(row) for row in rows]
+        report['stage'] = self.stage
+        return report
+
+    def schedule(self) -> dict:
+        plan = self.plan() if not self.finished else []
+        realized = sum(value for _, _, value in self.processed)
+        planned = float(sum(self.S[b, self.stage + j] for j, b in enumerate(plan)))
+        return {
+            'strategy': self.strategy,
+            'stage': self.stage,
+            'horizon': self.horizon,
+            'finished': self.finished,
+            'processed': [{'stage': s, 'batch': b, 'yield': y} for s, b, y in self.processed],
+            'plan': [{'stage': self.stage + j, 'batch': b} for j, b in enumerate(plan)],
+            'realized_yield': realized,
+            'planned_yield': planned,
+            'projected_yield': realized + planned,
+        }
+
+    def state(self) -> Tuple[Dict[str, np.ndarray], dict]:
+        """(arrays, meta) for core.checkpoint.Checkpoint.save."""
+        arrays = {'S': self.S, 'remaining': self._remaining,
+                  'processed': np.array(self.processed, dtype=np.float64).reshape(-1, 3)}
+        if self._solver is not None:
+            arrays.update({'solver_' + k: a for k, a in self._solver.state().items()})
+        meta = {'strategy': self.strategy, 'nu': self.nu, 'stage': self.stage, 'plan': self._plan}
+        return arrays, meta
+
+    @classmethod
+    def from_state(cls, arrays: Dict[str, np.ndarray], meta: dict) -> 'RollingScheduler':
+        scheduler = cls.__new__(cls)
+        scheduler.S = np.array(arrays['S'], dtype=np.float64)
+        scheduler.strategy = meta['strategy']
+        scheduler.nu = int(meta['nu'])
+        scheduler.stage = int(meta['stage'])
+        scheduler.processed = [(int(s), int(b), float(y)) for s, b, y in arrays['processed']]
+        scheduler._remaining = np.array(arrays['remaining'], dtype=bool)
+        scheduler._plan = meta.get('plan')
+        scheduler._solver = None
+        if scheduler.strategy in INCREMENTAL_STRATEGIES:
+            # Стоимости решателя - это sign * S: хранить их отдельно значило бы писать S дважды
+            scheduler._solver = IncrementalAssignment.from_state(
+                {k[len('solver_'):]: a for k, a in arrays.items() if k.startswith('solver_')}, scheduler.S)
+        return scheduler
+
+
+def _is_session_id(session_id: str) -> bool:
+    # id становится именем файла - пропускаем только то, что выдаёт uuid4().hex
+    return len(session_id) == 32 and all(c in '0123456789abcdef' for c in session_id)
+
+
+class OnlineSessions:
+    """
+    Schedulers by session id. With a directory, session <id> is the folder
+    <directory>/<id>/: state.npz (the scheduler at version 0) and
+    <version>.json (the events of every later change), so a session
+    survives restarts and is shared between worker processes. In memory at
+    most max_sessions are kept (least recently used evicted first); folders
+    untouched for max_age seconds are removed when a new session starts.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_sessions: int = 100,
+                 max_age: Optional[float] = None):
+        self.directory = directory
+        self.max_sessions = max_sessions
+        self.max_age = max_age
+        self._memory: "OrderedDict[str, Tuple[RollingScheduler, int]]" = OrderedDict()
+        self._session_locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str, name: str = '') -> str:
+        return os.path.join(self.directory, session_id, name)
+
+    def _event_path(self, session_id: str, version: int) -> str:
+        return self._path(session_id, f'{version:08d}.json')
+
+    def create(self, scheduler: RollingScheduler) -> str:
+        session_id = uuid.uuid4().hex
+        if self.directory:
+            self._expire()
+            arrays, meta = scheduler.state()
+            Checkpoint(self._path(session_id, 'state.npz'), interval=0).save(
+                session_id, arrays, dict(meta, version=0))
+        self._remember(session_id, (scheduler, 0))
+        return session_id
+
+    @contextmanager
+    def locked(self, session_id: str):
+        """Hold the session's lock: requests of one session in this process run one at a time."""
+        with self._lock:
+            lock = self._session_locks.setdefault(session_id, threading.RLock())
+        with lock:
+            yield
+
+    def get(self, session_id: str) -> Optional[Tuple[RollingScheduler, int]]:
+        """(scheduler, version) or None for an unknown session."""
+        with self.locked(session_id):
+            with self._lock:
+                entry = self._memory.get(session_id)
+                if entry is not None:
+                    self._memory.move_to_end(session_id)
+            if not self.directory or not _is_session_id(session_id):
+                return entry
+            if not os.path.isdir(self._path(session_id)):
+                # Сессию удалил другой процесс
+                self.discard(session_id)
+                return None
+            if entry is None:
+                state = Checkpoint(self._path(session_id, 'state.npz'), interval=0).load(session_id)
+                if state is None:
+                    return None
+                meta = state.pop('meta')
+                entry = (RollingScheduler.from_state(state, meta), int(meta['version']))
+            # События, сохранённые другими процессами (или ещё не прочитанные этим)
+            scheduler, version = entry
+            while True:
+                record = self._read_event(session_id, version + 1)
+                if record is None:
+                    break
+                scheduler.apply(record)
+                scheduler._plan = record['plan']
+                version += 1
+            entry = (scheduler, version)
+            self._remember(session_id, entry)
+            return entry
+
+    def _read_event(self, session_id: str, version: int) -> Optional[dict]:
+        try:
+            with open(self._event_path(session_id, version)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def commit(self, session_id: str, scheduler: RollingScheduler, version: int, events: dict) -> bool:
+        """
+        Save `events` (already applied to `scheduler`) as `version` of the
+        session. Compare-and-swap: False if that version already exists,
+        i.e. another request changed the session first.
+        """
+        if self.directory:
+            path = self._event_path(session_id, version)
+            tmp = f'{path}.{uuid.uuid4().hex}.tmp'
+            # План эвристик сохраняется: его пересчёт (стратегия random) мог бы дать другой
+            with open(tmp, 'w') as f:
+                json.dump(dict(events, plan=scheduler._plan), f)
+            try:
+                # Ссылка на готовый файл: читатели не видят недописанную версию,
+                # а существующая версия не перезаписывается
+                os.link(tmp, path)
+            except FileExistsError:
+                return False
+            finally:
+                os.remove(tmp)
+        self._remember(session_id, (scheduler, version))
+        return True
+
+    def _remember(self, session_id: str, entry: Tuple[RollingScheduler, int]) -> None:
+        with self._lock:
+            self._memory[session_id] = entry
+            self._memory.move_to_end(session_id)
+            while len(self._memory) > self.max_sessions:
+                self._memory.popitem(last=False)
+
+    def _expire(self) -> None:
+        """Remove session folders not changed for max_age seconds."""
+        if self.max_age is None:
+            return
+        cutoff = time.time() - self.max_age
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not _is_session_id(name):
+                continue
+            try:
+                # Время изменения папки обновляется с каждой новой версией
+                expired = os.path.getmtime(self._path(name)) < cutoff
+            except OSError:
+                continue
+            if expired:
+                self.remove(name)
+
+    def discard(self, session_id: str) -> None:
+        """Forget the in-memory copy; the next get() reloads the saved state."""
+        with self._lock:
+            self._memory.pop(session_id, None)
+
+    def remove(self, session_id: str) -> bool:
+        with self._lock:
+            found = self._memory.pop(session_id, None) is not None
+            self._session_locks.pop(session_id, None)
+        if self.directory and _is_session_id(session_id):
+            path = self._path(session_id)
+            found = found or os.path.isdir(path)
+            shutil.rmtree(path, ignore_errors=True)
+        return found
@@ -49,11 +49,20 @@
     8. Случайная (Random):
        Случайная перестановка (базовая линия для сравнения)
 
+ОЦЕНКА ГОТОВЫХ ПЕРЕСТАНОВОК:
+    evaluate_permutations(S, P) - выход каждой из P перестановок (массив
+    P × m) одной операцией индексирования S[P, j], без цикла Python.
+    Подходит для результата любой стратегии и для выборки случайных
+    перестановок: random_baseline(S, samples) возвращает выходы тысяч
+    случайных перестановок (распределение - core.stats.distribution_summary,
+    через API - POST /random_baseline). Одна optimize_random - лишь одна
+    шумная точка этого распределения.
+
 ИСПОЛЬЗОВАНИЕ:
     from algorithms.optimizer import Optimizer
     import numpy as np
     
-    # S_tilde - матрица состояний (n × n)
+    # S_tilde - матрица состояний (n × n или n × m)
     S_tilde = np.array([[...], [...]])
     
     # Жадная стратегия
@@ -62,6 +71,10 @@
     # Венгерский алгоритм (оптимальное решение)
     permutation, yield_value = Optimizer.optimize_hungarian(S_tilde)
     
+    # Выходы готовых перестановок и случайная базовая линия
+    yields = Optimizer.evaluate_permutations(S_tilde, [perm_a, perm_b])
+    random_yields = Optimizer.random_baseline(S_tilde, samples=10000, rng=np.random.default_rng(0))
+
     # Расчёт итоговой массы
     mass = Optimizer.calculate_final_mass(yield_value, mass_per_batch=1000.0)
 
@@ -70,6 +83,18 @@
         permutation: List[int] - перестановка (последовательность номеров партий, 0-based)
         total_yield: float - суммарный выход сахара S(σ)
 
+ПРЯМОУГОЛЬНЫЕ ЗАДАЧИ:
+    S может быть n × m: n партий, m этапов (m = config.num_stages).
+        - m < n: перерабатываются m партий из n; эвристики останавливаются
+          после m этапов, венгерский алгоритм решает прямоугольную задачу
+          о назначениях напрямую (без дополнения до квадратной)
+        - m > n: эвристики заполняют первые n этапов, оптимальное решение
+          само выбирает n этапов; этап без партии обозначается -1
+    permutation всегда имеет длину m (партия на каждом этапе), по
+    умолчанию ν = [m/2]. Эвристики выбирают партию векторно (argmax/argmin
+    по доступным строкам); при равных значениях берётся партия с меньшим
+    номером.
+
 ВАЖНО:
     - Индексы в permutation начинаются с 0 (0-based)
     - В математической модели используются 1-based индексы
@@ -88,9 +113,26 @@
 """
 
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Callable, List, Tuple, Optional
 import random
 
+# Случайная базовая линия: число перестановок по умолчанию и размер куска
+# (элементов P × m), чтобы тысячи перестановок большой S не занимали гигабайты
+RANDOM_BASELINE_SAMPLES = 10000
+RANDOM_BASELINE_CHUNK = 1 << 21
+
+# scipy.optimize загружается лениво при первом вызове венгерского алгоритма
+# (импорт занимает ~0.4 с); затем функция берётся из кэша модуля
+_linear_sum_assignment: Optional[Callable] = None
+
+def load_linear_sum_assignment() -> Callable:
+    """Import scipy's linear_sum_assignment once; raises ImportError if scipy is missing."""
+    global _linear_sum_assignment
+    if _linear_sum_assignment is None:
+        from scipy.optimize import linear_sum_assignment  # type: ignore
+        _linear_sum_assignment = linear_sum_assignment
+    return _linear_sum_assignment
+
 class Optimizer:
     @staticmethod
     def calculate_final_mass(yield_value: float, mass_per_batch: float, days_per_stage: int = 7) -> float:
@@ -101,32 +143,49 @@ class Optimizer:
         return (yield_value / 100.0) * mass_per_batch * days_per_stage
 
     @staticmethod
-    def optimize_thrifty(S_matrix: np.ndarray) -> Tuple[List[int], float]:
+    def _sequential(S_matrix: np.ndarray, ranks: List[int]) -> Tuple[List[int], float]:
         """
-        Thrifty strategy (бережливая):
-        At each step j (column), pick the available row i with the MINIMUM value S[i, j].
-        Returns permutation and total yield.
+        Stage-by-stage selection shared by the heuristics. ranks[j] picks
+        the batch for stage j among the available ones: 0 - maximum S[i, j],
+        k >= 1 - k-th smallest (1 - minimum). Ties go to the lowest row.
+        Stops when the stages or the batches run out.
         """
-        n = S_matrix.shape[0]
-        available_rows = set(range(n))
+        n, m = S_matrix.shape
+        available = np.ones(n, dtype=bool)
         permutation = []
         total_yield = 0.0
 
-        for j in range(n):
-            best_row = -1
-            min_val = float('inf')
+        for j in range(min(n, m)):
+            column = S_matrix[:, j]
+            k = ranks[j]
+            if k == 0:
+                best_row = int(np.argmax(np.where(available, column, -np.inf)))
+            elif k == 1:
+                best_row = int(np.argmin(np.where(available, column, np.inf)))
+            else:
+                # k-я позиция в списке доступных партий по возрастанию (устойчивая сортировка)
+                rows = np.flatnonzero(available)
+                order = np.argsort(column[rows], kind='stable')
+                best_row = int(rows[order[min(k - 1, len(rows) - 1)]])
+            permutation.append(best_row)
+            available[best_row] = False
+            total_yield += column[best_row]
 
-            for row in available_rows:
-                val = S_matrix[row, j]
-                if val < min_val:
-                    min_val = val
-                    best_row = row
+        return Optimizer._pad(permutation, m), total_yield
 
-            permutation.append(best_row)
-            available_rows.remove(best_row)
-            total_yield += min_val
+    @staticmethod
+    def _pad(permutation: List[int], m: int) -> List[int]:
+        """Stages left without a batch (more stages than batches) are -1."""
+        return permutation + [-1] * (m - len(permutation))
 
-        return permutation, total_yield
+    @staticmethod
+    def optimize_thrifty(S_matrix: np.ndarray) -> Tuple[List[int], float]:
+        """
+        Thrifty strategy (бережливая):
+        At each step j (column), pick the available row i with the MINIMUM value S[i, j].
+        Returns permutation and total yield.
+        """
+        return Optimizer._sequential(S_matrix, [1] * S_matrix.shape[1])
 
     @staticmethod
     def optimize_greedy(S_matrix: np.ndarray) -> Tuple[List[int], float]:
@@ -136,169 +195,99 @@ class Optimizer:
         Returns permutation (list of batch indices) and total yield.
         Indices are 0-based.
         """
-        n = S_matrix.shape[0]
-        available_rows = set(range(n))
-        permutation = []
-        total_yield = 0.0
-        
-        for j in range(n):
-            # Find best row for this column j among available
-            best_row = -1
-            max_val = -float('inf')
-            
-            for row in available_rows:
-                val = S_matrix[row, j]
-                if val > max_val:
-                    max_val = val
-                    best_row = row
-            
-            permutation.append(best_row)
-            available_rows.remove(best_row)
-            total_yield += max_val
-            
-        return permutation, total_yield
+        return Optimizer._sequential(S_matrix, [0] * S_matrix.shape[1])
+
+    @staticmethod
+    def evaluate_permutations(S_matrix: np.ndarray, permutations) -> np.ndarray:
+        """
+        Yields of a (P, m) array of permutations (batch per stage, -1 - idle
+        stage) with one fancy-indexing pass; a single permutation gives (1,).
+        Batches are not checked for repeats.
+        """
+        n, m = S_matrix.shape
+        perms = np.atleast_2d(np.asarray(permutations, dtype=np.int64))
+        if perms.ndim != 2 or perms.shape[1] != m:
+            raise ValueError(f"permutations must have {m} stages")
+        if perms.size and (perms.min() < -1 or perms.max() >= n):
+            raise ValueError(f"batch indices must be in [0, {n - 1}] or -1")
+        values = S_matrix[np.maximum(perms, 0), np.arange(m)]
+        return np.where(perms >= 0, values, 0.0).sum(axis=1)
+
+    @staticmethod
+    def random_permutations(n: int, m: int, count: int,
+                            rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """(count, m) uniformly random batch orders for n batches and m stages (-1 past n)."""
+        rng = np.random.default_rng() if rng is None else rng
+        perms = rng.permuted(np.tile(np.arange(n, dtype=np.int64), (count, 1)), axis=1)[:, :m]
+        if m > n:
+            perms = np.hstack([perms, np.full((count, m - n), -1, dtype=np.int64)])
+        return perms
 
     @staticmethod
-    def optimize_random(S_matrix: np.ndarray) -> Tuple[List[int], float]:
-        n = S_matrix.shape[0]
+    def random_baseline(S_matrix: np.ndarray, samples: int = RANDOM_BASELINE_SAMPLES,
+                        rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """Yields of `samples` random permutations, sorted ascending."""
+        n, m = S_matrix.shape
+        rng = np.random.default_rng() if rng is None else rng
+        chunk = max(1, RANDOM_BASELINE_CHUNK // max(n, m))
+        yields = np.empty(samples)
+        for start in range(0, samples, chunk):
+            count = min(chunk, samples - start)
+            perms = Optimizer.random_permutations(n, m, count, rng)
+            yields[start:start + count] = Optimizer.evaluate_permutations(S_matrix, perms)
+        yields.sort()
+        return yields
+
+    @staticmethod
+    def optimize_random(S_matrix: np.ndarray, rng: Optional[random.Random] = None) -> Tuple[List[int], float]:
+        """One random permutation; `rng` defaults to the global `random` module state."""
+        n, m = S_matrix.shape
         permutation = list(range(n))
-        random.shuffle(permutation)
-        
-        total_yield = 0.0
-        for j in range(n):
-            row = permutation[j]
-            total_yield += S_matrix[row, j]
-            
-        return permutation, total_yield
+        (random if rng is None else rng).shuffle(permutation)
+        permutation = Optimizer._pad(permutation[:m], m)
+        return permutation, float(Optimizer.evaluate_permutations(S_matrix, permutation)[0])
 
     @staticmethod
     def optimize_thrifty_greedy(S_matrix: np.ndarray, nu: Optional[int] = None) -> Tuple[List[int], float]:
         """
         Strategy 3: Thrifty/Greedy (Бережливая/жадная)
-        First (n-nu) stages use thrifty, then from stage nu use greedy.
-        nu = [n/2] by default.
+        First (m-nu) stages use thrifty, then from stage nu use greedy.
+        nu = [m/2] by default (m - number of stages).
         """
-        n = S_matrix.shape[0]
+        m = S_matrix.shape[1]
         if nu is None:
-            nu = n // 2
-        
-        available_rows = set(range(n))
-        permutation = []
-        total_yield = 0.0
-        
-        for j in range(n):
-            if j < n - nu:
-                # Thrifty: pick minimum
-                best_row = -1
-                min_val = float('inf')
-                for row in available_rows:
-                    val = S_matrix[row, j]
-                    if val < min_val:
-                        min_val = val
-                        best_row = row
-                total_yield += min_val
-            else:
-                # Greedy: pick maximum
-                best_row = -1
-                max_val = -float('inf')
-                for row in available_rows:
-                    val = S_matrix[row, j]
-                    if val > max_val:
-                        max_val = val
-                        best_row = row
-                total_yield += max_val
-            
-            permutation.append(best_row)
-            available_rows.remove(best_row)
-        
-        return permutation, total_yield
+            nu = m // 2
+        return Optimizer._sequential(S_matrix, [1 if j < m - nu else 0 for j in range(m)])
 
     @staticmethod
     def optimize_greedy_thrifty(S_matrix: np.ndarray, nu: Optional[int] = None) -> Tuple[List[int], float]:
         """
         Strategy 4: Greedy/Thrifty (Жадная/бережливая)
-        First (n-nu) stages use greedy, then from stage nu use thrifty.
-        nu = [n/2] by default.
+        First (m-nu) stages use greedy, then from stage nu use thrifty.
+        nu = [m/2] by default (m - number of stages).
         """
-        n = S_matrix.shape[0]
+        m = S_matrix.shape[1]
         if nu is None:
-            nu = n // 2
-        
-        available_rows = set(range(n))
-        permutation = []
-        total_yield = 0.0
-        
-        for j in range(n):
-            if j < n - nu:
-                # Greedy: pick maximum
-                best_row = -1
-                max_val = -float('inf')
-                for row in available_rows:
-                    val = S_matrix[row, j]
-                    if val > max_val:
-                        max_val = val
-                        best_row = row
-                total_yield += max_val
-            else:
-                # Thrifty: pick minimum
-                best_row = -1
-                min_val = float('inf')
-                for row in available_rows:
-                    val = S_matrix[row, j]
-                    if val < min_val:
-                        min_val = val
-                        best_row = row
-                total_yield += min_val
-            
-            permutation.append(best_row)
-            available_rows.remove(best_row)
-        
-        return permutation, total_yield
+            nu = m // 2
+        return Optimizer._sequential(S_matrix, [0 if j < m - nu else 1 for j in range(m)])
 
     @staticmethod
     def optimize_tkg(S_matrix: np.ndarray, k: int, nu: Optional[int] = None) -> Tuple[List[int], float]:
         """
         Strategy 5: T(k)G (БkЖ)
-        First (n-nu) stages: pick k-th position from sorted (ascending) by sugar content.
+        First (m-nu) stages: pick k-th position from sorted (ascending) by sugar content.
         From stage nu: use greedy.
-        k must satisfy: 1 <= k <= n - nu + 1
-        nu = [n/2] by default.
+        k must satisfy: 1 <= k <= m - nu + 1
+        nu = [m/2] by default (m - number of stages).
         """
-        n = S_matrix.shape[0]
+        m = S_matrix.shape[1]
         if nu is None:
-            nu = n // 2
-        
-        if k < 1 or k > n - nu + 1:
+            nu = m // 2
+
+        if k < 1 or k > m - nu + 1:
             k = 1  # fallback to thrifty
-        
-        available_rows = set(range(n))
-        permutation = []
-        total_yield = 0.0
-        
-        for j in range(n):
-            if j < n - nu:
-                # Pick k-th from sorted (ascending)
-                row_values = [(row, S_matrix[row, j]) for row in available_rows]
-                row_values.sort(key=lambda x: x[1])  # sort by value ascending
-                
-                k_idx = min(k - 1, len(row_values) - 1)  # k-th position (1-based -> 0-based)
-                best_row = row_values[k_idx][0]
-                total_yield += row_values[k_idx][1]
-            else:
-                # Greedy: pick maximum
-                best_row = -1
-                max_val = -float('inf')
-                for row in available_rows:
-                    val = S_matrix[row, j]
-                    if val > max_val:
-                        max_val = val
-                        best_row = row
-                total_yield += max_val
-            
-            permutation.append(best_row)
-            available_rows.remove(best_row)
-        
-        return permutation, total_yield
+
+        return Optimizer._sequential(S_matrix, [k if j < m - nu else 0 for j in range(m)])
 
     @staticmethod
     def optimize_hungarian(S_matrix: np.ndarray) -> Tuple[List[int], float]:
@@ -308,21 +297,20 @@ class Optimizer:
         This gives the theoretical maximum S*.
         """
         try:
-            # Импортируем венгерский алгоритм из scipy
-            # type: ignore - игнорируем предупреждение линтера о неразрешённом импорте
+            # Венгерский алгоритм из scipy (ленивая загрузка, см. load_linear_sum_assignment)
             # (scipy может быть не установлен, но код обрабатывает это через try-except)
-            from scipy.optimize import linear_sum_assignment  # type: ignore
+            linear_sum_assignment = load_linear_sum_assignment()
         except ImportError:
             # Fallback: use greedy if scipy not available
             return Optimizer.optimize_greedy(S_matrix)
         
-        # Hungarian algorithm solves minimization, so we negate the matrix
+        # Hungarian algorithm solves minimization, so we negate the matrix.
+        # Rectangular n x m is solved directly: min(n, m) pairs
         row_indices, col_indices = linear_sum_assignment(-S_matrix)
         
         # Build permutation (col_indices[i] is the column assigned to row i)
         # But we need: at stage j, which row is processed?
-        n = S_matrix.shape[0]
-        permutation = [0] * n
+        permutation = [-1] * S_matrix.shape[1]
         total_yield = 0.0
         
         for i in range(len(row_indices)):
@@ -336,7 +324,7 @@ class Optimizer:
     @staticmethod
     def optimize_hungarian_min(S_matrix: np.ndarray) -> Tuple[List[int], float]:
         try:
-            from scipy.optimize import linear_sum_assignment  # type: ignore
+            linear_sum_assignment = load_linear_sum_assignment()
         except ImportError:
             # Fallback: use greedy if scipy not available
             return Optimizer.optimize_greedy(S_matrix)
@@ -344,8 +332,7 @@ class Optimizer:
         # Hungarian algorithm solves minimization directly — no negation needed
         row_indices, col_indices = linear_sum_assignment(S_matrix)
         
-        n = S_matrix.shape[0]
-        permutation = [0] * n
+        permutation = [-1] * S_matrix.shape[1]
         total_cost = 0.0
 
         for i in range(len(row_indices)):
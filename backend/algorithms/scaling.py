@@ -0,0 +1,277 @@
+"""
+===================================================================
+ИССЛЕДОВАНИЕ МАСШТАБИРУЕМОСТИ - ВРЕМЯ И КАЧЕСТВО СТРАТЕГИЙ ОТ n
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    В optimizer.py указана сложность O(n²) для эвристик и O(n³) для
+    венгерского алгоритма. Этот модуль проверяет это эмпирически:
+    прогоняет каждую стратегию на геометрической лестнице размеров n
+    с повторными испытаниями и для каждой стратегии:
+        - оценивает показатель степени p в модели t(n) ≈ c · n^p
+          (метод наименьших квадратов в координатах log n, log t)
+        - строит кривую "время - качество": медианное время и средние
+          относительные потери к оптимальному решению при каждом n
+    Результат используется для выбора стратегии под размер завода.
+
+ИСПОЛЬЗОВАНИЕ:
+    Из кода:
+        from algorithms.scaling import run_scaling_study, geometric_ladder
+
+        report = run_scaling_study(config, geometric_ladder(10, 1000, 6), trials=5)
+        report['strategies']['greedy']['fit']['exponent']   # ~2.0
+
+    Через API: POST /scaling_study (см. app.py)
+
+    Из командной строки (из папки backend):
+        python -m algorithms.scaling --n-min 10 --n-max 1000 --steps 6 --trials 5
+        python -m algorithms.scaling --config plant.json --output study.json
+
+    Файл --config содержит те же поля, что и запрос POST /simulate
+    (n в нём игнорируется).
+
+ВАЖНО:
+    - Матрицы для всех стратегий при данном n и испытании общие, поэтому
+      сравнение качества выполняется на одних и тех же данных.
+    - Время - "стеночное" время одного вызова стратегии (perf_counter).
+      Для n ≲ 50 оно порядка микросекунд и показатель степени на малых n
+      занижен за счёт постоянных накладных расходов; используйте
+      --fit-min-n, чтобы подгонять только по большим n.
+    - Если v дозаривания больше [n/2] для малого n, v уменьшается до [n/2];
+      при n < 4 дозаривание отключается.
+===================================================================
+"""
+
+import argparse
+import dataclasses
+import json
+import math
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.models import ExperimentConfig
+from core.generators import MatrixGenerator
+from .optimizer import Optimizer, load_linear_sum_assignment
+
+# Стратегии исследования: имя -> функция от (S, nu, rng); rng (random.Random) нужен
+# только стратегии random - без него она берёт глобальное состояние модуля random
+STUDY_STRATEGIES: Dict[str, Callable] = {
+    'greedy': lambda S, nu, rng=None: Optimizer.optimize_greedy(S),
+    'thrifty': lambda S, nu, rng=None: Optimizer.optimize_thrifty(S),
+    'thrifty_greedy': lambda S, nu, rng=None: Optimizer.optimize_thrifty_greedy(S, nu),
+    'greedy_thrifty': lambda S, nu, rng=None: Optimizer.optimize_greedy_thrifty(S, nu),
+    'tkg': lambda S, nu, rng=None: Optimizer.optimize_tkg(S, 2, nu),
+    'optimal': lambda S, nu, rng=None: Optimizer.optimize_hungarian(S),
+    'notoptimal': lambda S, nu, rng=None: Optimizer.optimize_hungarian_min(S),
+    'random': lambda S, nu, rng=None: Optimizer.optimize_random(S, rng),
+}
+
+# Ограничения для запросов через API
+MAX_STUDY_N = 5000
+MAX_STUDY_TRIALS = 100
+MAX_STUDY_SECONDS = 600
+
+
+def default_config(n: int = 10) -> ExperimentConfig:
+    """Plant configuration used when the study is run without a config."""
+    return ExperimentConfig(
+        n=n, m=1000.0, a_min=12.0, a_max=22.0, beta1=0.85, beta2=0.95,
+        distribution_type='concentrated',
+        k_min=4.8, k_max=7.05, na_min=0.21, na_max=0.82,
+        n_content_min=1.58, n_content_max=2.8,
+    )
+
+
+def geometric_ladder(n_min: int, n_max: int, steps: int) -> List[int]:
+    """`steps` sizes spaced geometrically from n_min to n_max (rounded, unique)."""
+    if n_min < 2 or n_max < n_min:
+        raise ValueError("need 2 <= n_min <= n_max")
+    if steps < 1:
+        raise ValueError("steps must be positive")
+    if steps == 1 or n_min == n_max:
+        return [n_min]
+    ladder = np.geomspace(n_min, n_max, steps)
+    return sorted({int(round(x)) for x in ladder})
+
+
+def config_for_size(config: ExperimentConfig, n: int) -> ExperimentConfig:
+    """Copy of `config` with n replaced and ripening stages clamped to [n/2]."""
+    if config.enable_ripening and n >= 4:
+        v = min(config.v or 2, n // 2)
+        return dataclasses.replace(config, n=n, v=max(v, 2))
+    return dataclasses.replace(config, n=n, enable_ripening=False, v=None)
+
+
+def fit_exponent(sizes: Sequence[float], seconds: Sequence[float]) -> Optional[dict]:
+    """
+    Least-squares fit of log t = log c + p log n.
+    Returns {'exponent': p, 'coefficient': c, 'r_squared': ...} or None if
+    fewer than two usable (positive) points.
+    """
+    points = [(n, t) for n, t in zip(sizes, seconds) if n > 0 and t > 0]
+    if len(points) < 2:
+        return None
+    x = np.log([n for n, _ in points])
+    y = np.log([t for _, t in points])
+    if np.ptp(x) == 0:
+        return None
+    slope, intercept = np.polyfit(x, y, 1)
+    predicted = slope * x + intercept
+    ss_res = float(np.sum((y - predicted) ** 2))
+    ss_tot = float(np.sum((y - y.mean()) ** 2))
+    return {
+        'exponent': float(slope),
+        'coefficient': float(math.exp(intercept)),
+        'r_squared': 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0,
+        'points': len(points),
+    }
+
+
+def run_scaling_study(config: ExperimentConfig, sizes: Sequence[int], trials: int = 3,
+                      strategies: Optional[Sequence[str]] = None, seed: Optional[int] = None,
+                      max_seconds: Optional[float] = None, fit_min_n: int = 0,
+                      log: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Time every strategy on `trials` random matrices for each n in `sizes`.
+
+    Relative loss is measured against 'optimal' on the same matrix (it is
+    always run, even if not requested). If max_seconds is set, the budget
+    is checked after every strategy run: an unfinished trial is dropped, a
+    size is reported with the trials it completed, and the ladder stops.
+    """
+    names = list(strategies) if strategies else list(STUDY_STRATEGIES)
+    unknown = [s for s in names if s not in STUDY_STRATEGIES]
+    if unknown:
+        raise ValueError(f"unknown strategies: {', '.join(unknown)}")
+    run_names = names if 'optimal' in names else names + ['optimal']
+
+    load_linear_sum_assignment()  # импорт scipy не должен попасть в замер при малом n
+    rng = np.random.default_rng(seed)
+    # Свой генератор стратегии random: с тем же seed исследование воспроизводится целиком
+    shuffle_rng = random.Random(seed)
+    started = time.perf_counter()
+    per_size: Dict[str, List[dict]] = {s: [] for s in names}
+    completed: List[int] = []
+
+    def out_of_time() -> bool:
+        return max_seconds is not None and time.perf_counter() - started > max_seconds
+
+    for n in sorted(sizes):
+        size_config = config_for_size(config, n)
+        nu = n // 2
+        timings = {s: [] for s in run_names}
+        yields = {s: [] for s in run_names}
+        losses = {s: [] for s in run_names}
+        stopped = False
+
+        for _ in range(trials):
+            S = MatrixGenerator.generate_experiment(size_config, rng)['matrices']['S']
+            trial = {}
+            for s in run_names:
+                start = time.perf_counter()
+                _, total_yield = STUDY_STRATEGIES[s](S, nu, shuffle_rng)
+                trial[s] = (time.perf_counter() - start, float(total_yield))
+                stopped = out_of_time()
+                if stopped:
+                    break
+            # Незаконченное испытание не учитывается: потери считаются от optimal
+            if len(trial) < len(run_names):
+                break
+            for s, (seconds, total_yield) in trial.items():
+                timings[s].append(seconds)
+                yields[s].append(total_yield)
+            best = yields['optimal'][-1]
+            for s in run_names:
+                if best > 0:
+                    losses[s].append((best - yields[s][-1]) / best * 100)
+            if stopped:
+                break
+
+        if not timings['optimal']:
+            break
+        for s in names:
+            per_size[s].append({
+                'n': n,
+                'trials': len(timings[s]),
+                'median_seconds': statistics.median(timings[s]),
+                'mean_seconds': statistics.fmean(timings[s]),
+                'min_seconds': min(timings[s]),
+                'mean_yield': statistics.fmean(yields[s]),
+                'mean_relative_loss_percent': statistics.fmean(losses[s]) if losses[s] else None,
+            })
+        completed.append(n)
+        if log:
+            log(f"n={n:<6d} " + ' '.join(
+                f"{s}={per_size[s][-1]['median_seconds']:.2e}s" for s in names))
+        if stopped or out_of_time():
+            break
+
+    report = {}
+    for s in names:
+        curve = per_size[s]
+        fit_points = [p for p in curve if p['n'] >= fit_min_n]
+        report[s] = {
+            'fit': fit_exponent([p['n'] for p in fit_points], [p['median_seconds'] for p in fit_points]),
+            'curve': curve,
+        }
+
+    return {
+        'sizes': completed,
+        'skipped_sizes': [n for n in sorted(sizes) if n not in completed],
+        'trials': trials,
+        'elapsed_seconds': time.perf_counter() - started,
+        'strategies': report,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Empirical scaling study of the optimization strategies")
+    parser.add_argument('--config', help="JSON file with /simulate parameters (default: built-in plant config)")
+    parser.add_argument('--n-min', type=int, default=10)
+    parser.add_argument('--n-max', type=int, default=1000)
+    parser.add_argument('--steps', type=int, default=6, help="number of sizes in the geometric ladder")
+    parser.add_argument('--trials', type=int, default=5, help="random matrices per size")
+    parser.add_argument('--strategies', nargs='+', choices=list(STUDY_STRATEGIES))
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--max-seconds', type=float, help="stop climbing the ladder after this budget")
+    parser.add_argument('--fit-min-n', type=int, default=0, help="fit exponents only on sizes >= this")
+    parser.add_argument('--output', help="write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.config:
+        from core.config import build_experiment_config  # те же поля и значения по умолчанию, что у API
+        with open(args.config) as f:
+            data = json.load(f)
+        config = build_experiment_config(dict(data, n=args.n_min))
+    else:
+        config = default_config()
+
+    report = run_scaling_study(
+        config, geometric_ladder(args.n_min, args.n_max, args.steps), args.trials,
+        strategies=args.strategies, seed=args.seed, max_seconds=args.max_seconds,
+        fit_min_n=args.fit_min_n, log=lambda line: print(line, file=sys.stderr),
+    )
+    for name, entry in report['strategies'].items():
+        fit = entry['fit']
+        if fit:
+            print(f"{name:16s} t ~ n^{fit['exponent']:.2f} (R^2 = {fit['r_squared']:.3f})", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
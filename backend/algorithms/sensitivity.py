@@ -0,0 +1,231 @@
+"""
+===================================================================
+ЧУВСТВИТЕЛЬНОСТЬ ОПТИМАЛЬНОГО ПЛАНА - ДВОЙСТВЕННЫЕ ПОТЕНЦИАЛЫ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    optimize_hungarian даёт перестановку и выход, но не отвечает на
+    вопрос технолога: насколько может ошибаться замер сахаристости,
+    чтобы план не изменился? Перебор с повторным решением - O(n³) на
+    каждый вариант. Здесь ответ строится по двойственному решению задачи
+    о назначениях за O(n·m):
+
+        u_i + v_j >= S[i, j],  равенство на назначенных парах
+        r[i, j] = u_i + v_j - S[i, j] >= 0   (приведённые стоимости)
+
+    Пока потенциалы остаются допустимыми после изменения S, текущий план
+    остаётся оптимальным (возможно, наравне с другими). Отсюда:
+
+    Запас строки i - min r[i, k] без назначенной пары (на столько можно
+    уменьшить u_i, увеличив v её этапа), запас столбца - то же для v_j.
+
+    allowed_increase[i, j] - насколько можно увеличить S[i, j]
+        (остальные значения прежние): r[i, j] плюс больший из запасов
+        столбца этапа партии i и строки партии этапа j; inf для
+        назначенной пары.
+    allowed_decrease[i, j] - насколько можно уменьшить назначенное
+        S[i, j]: запас строки i + запас столбца j (уменьшение делится
+        между u_i и v_j); inf для неназначенной пары.
+    batch_tolerance[i] - ошибка ±ε во всех замерах партии i сразу
+        (назначенное значение падает на ε, остальные растут на ε).
+    tolerance - ошибка ±ε во всех замерах всех партий одновременно:
+        ε = min r[i, k] / 2 по неназначенным парам.
+
+    Двойственное решение восстанавливается по готовой оптимальной
+    перестановке (assignment_duals): v - наименьшее решение системы
+    v_k >= v_{σ(i)} + S[i, k] - S[i, σ(i)], итерации Беллмана-Форда по
+    всей матрице сразу (каждая - O(n·m) векторно, обычно десятки
+    итераций). Крайние двойственные решения вырождены (много нулевых r),
+    поэтому берётся середина наименьших v и наименьших u и несколько
+    проходов центрирования. Если потенциалы уже есть (IncrementalAssignment
+    в algorithms/online.py), восстановление не нужно: sensitivity_from_duals.
+
+ИСПОЛЬЗОВАНИЕ:
+    from algorithms.sensitivity import sensitivity_analysis
+
+    report = sensitivity_analysis(S)       # сама решает optimize_hungarian
+    report['tolerance']                    # допустимая ошибка всех замеров
+    report['batch_tolerance'][i]           # допустимая ошибка замеров партии i
+    report['allowed_decrease'][i, j]
+
+    Через API: POST /sensitivity, GET /online/<id>/sensitivity (см. app.py)
+
+ВАЖНО:
+    - Границы достаточные: внутри них план гарантированно оптимален. При
+      вырожденном решении (равные варианты) другие потенциалы могут дать
+      более широкие границы; точная граница для одного значения требует
+      кратчайшего пути, то есть O(n³) на весь отчёт.
+    - Прямоугольные S (n × m) дополняются нулевыми строками или
+      столбцами до квадратной: они соответствуют пустым этапам или
+      непереработанным партиям и сами не измеряются.
+    - Значения в единицах S (выход, %).
+===================================================================
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .optimizer import Optimizer
+
+# Проходы центрирования потенциалов (каждый - O(n²), цикл по этапам)
+CENTERING_SWEEPS = 2
+
+
+def _padded(S: np.ndarray, permutation: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Square zero-padded S and the column of every (padded) row."""
+    n, m = S.shape
+    size = max(n, m)
+    P = np.zeros((size, size))
+    P[:n, :m] = S
+    perm = np.asarray(permutation, dtype=np.int64)
+    if perm.shape != (m,):
+        raise ValueError(f"permutation must have {m} stages")
+    used = perm >= 0
+    if (np.count_nonzero(used) != min(n, m) or perm.max(initial=-1) >= n
+            or len(np.unique(perm[used])) != used.sum()):
+        raise ValueError("permutation must assign min(n, m) distinct batches")
+    col = np.full(size, -1, dtype=np.int64)
+    col[perm[used]] = np.flatnonzero(used)
+    # Пустые этапы и непереработанные партии - пары с нулевыми строками/столбцами
+    idle_rows = np.flatnonzero(col == -1)
+    taken = np.zeros(size, dtype=bool)
+    taken[col[col >= 0]] = True
+    col[idle_rows] = np.flatnonzero(~taken)
+    return P, col
+
+
+def _least_potentials(P: np.ndarray, col: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Dual solution with the least non-negative v; ValueError if `col` is not optimal."""
+    size = P.shape[0]
+    assigned = P[np.arange(size), col]
+    D = P - assigned[:, None]
+    tol = 1e-12 * max(1.0, float(np.abs(P).max(initial=0.0)))
+    v = np.zeros(size)
+    # Беллман-Форд: без положительных циклов (план оптимален) сходится за size проходов
+    for _ in range(size + 1):
+        candidate = (D + v[col][:, None]).max(axis=0)
+        if (candidate - v).max() <= tol:
+            break
+        v = np.maximum(v, candidate)
+    else:
+        raise ValueError("permutation is not optimal")
+    return assigned - v[col], v
+
+
+def _center(P: np.ndarray, col: np.ndarray, u: np.ndarray, v: np.ndarray,
+            sweeps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gauss-Seidel sweeps over the stages: move v_k up and u of its batch down
+    (or back) to the middle of the interval that keeps every r >= 0.
+    """
+    size = len(col)
+    row4col = np.empty_like(col)
+    row4col[col] = np.arange(size)
+    R = u[:, None] + v[None, :] - P
+    R[np.arange(size), col] = np.inf
+    for _ in range(sweeps):
+        for k in range(size):
+            row = row4col[k]
+            with np.errstate(invalid='ignore'):
+                shift = (R[row].min() - R[:, k].min()) / 2
+            if not np.isfinite(shift) or shift == 0:
+                continue
+            R[:, k] += shift
+            R[row] -= shift
+            R[row, k] = np.inf
+            v[k] += shift
+            u[row] -= shift
+    return u, v
+
+
+def _duals(P: np.ndarray, col: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Крайние решения (наименьшие v и наименьшие u) делают нулевыми приведённые
+    # стоимости своего дерева кратчайших путей. Их середина тоже допустима,
+    # а центрирование раздвигает оставшиеся нулевые запасы
+    u_high, v_low = _least_potentials(P, col)
+    row4col = np.empty_like(col)
+    row4col[col] = np.arange(len(col))
+    v_high, u_low = _least_potentials(P.T, row4col)
+    return _center(P, col, (u_low + u_high) / 2, (v_low + v_high) / 2, CENTERING_SWEEPS)
+
+
+def assignment_duals(S: np.ndarray, permutation: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dual potentials (u, v) of the zero-padded square problem for an optimal
+    `permutation` (Optimizer format). Raises ValueError if it is not optimal.
+    """
+    return _duals(*_padded(np.asarray(S, dtype=np.float64), permutation))
+
+
+def _report(P: np.ndarray, col: np.ndarray, u: np.ndarray, v: np.ndarray, n: int, m: int) -> dict:
+    size = P.shape[0]
+    rows = np.arange(size)
+    row4col = np.empty_like(col)
+    row4col[col] = rows
+    R = np.maximum(u[:, None] + v[None, :] - P, 0.0)
+    R[rows, col] = np.inf  # минимумы ниже - без назначенной пары
+    real_col = rows < m
+    assigned_real = (rows < n) & (col < m)
+    # Запасы строки i (сдвиг u_i) и столбца её этапа σ(i) (сдвиг v_σ(i))
+    row_slack = R.min(axis=1)
+    col_slack = R.min(axis=0)[col]
+
+    # Одно значение: увеличение S[i, k] покрывает r[i, k] плюс сдвиг u_i вверх
+    # (v_σ(i) вниз) или v_k вверх (u партии этапа k вниз)
+    allowed_increase = (R + np.maximum(col_slack[:, None], row_slack[row4col][None, :]))[:n, :m]
+    allowed_decrease = np.full((n, m), np.inf)
+    i = np.flatnonzero(assigned_real)
+    # Назначенное значение: уменьшение делится между u_i и v_σ(i)
+    allowed_decrease[i, col[i]] = (row_slack + col_slack)[i]
+
+    # Ошибка ±ε во всех замерах партии i: назначенное падает на ε, остальные
+    # растут на ε. Падение делится: α - на u_i, ε - α - на v_σ(i);
+    # нулевые пары дополнения не измеряются
+    with np.errstate(invalid='ignore'):
+        real_slack = np.where(real_col[None, :], R, np.inf).min(axis=1)
+        pad_slack = np.where(real_col[None, :], np.inf, R).min(axis=1)
+        alpha = np.clip(np.nan_to_num((real_slack - col_slack) / 2, nan=0.0, posinf=np.inf), 0.0, pad_slack)
+        split = np.minimum(real_slack - alpha, col_slack + alpha)
+    # Непереработанная партия (пара с нулевым столбцом): рост u_i за счёт v этого столбца
+    batch_tolerance = np.where(assigned_real, split, real_slack + col_slack)[:n]
+
+    # Все замеры сразу: сдвигаются только u, неназначенные значения растут на ε
+    scaled = np.where(assigned_real[:, None] & real_col[None, :], R / 2, R)
+    scaled[np.ix_(~assigned_real, ~real_col)] = np.inf
+
+    permutation = np.full(m, -1, dtype=np.int64)
+    permutation[col[i]] = i
+    return {
+        'permutation': [int(b) for b in permutation],
+        'yield': float(P[i, col[i]].sum()),
+        'tolerance': float(scaled[:n].min(initial=np.inf)),
+        'batch_tolerance': batch_tolerance,
+        'allowed_increase': allowed_increase,
+        'allowed_decrease': allowed_decrease,
+    }
+
+
+def sensitivity_analysis(S: np.ndarray, permutation: Optional[List[int]] = None) -> dict:
+    """
+    Tolerance ranges of the optimal schedule of S (solved with
+    optimize_hungarian unless an optimal `permutation` is given).
+    """
+    S = np.asarray(S, dtype=np.float64)
+    if S.ndim != 2 or not S.size or not np.all(np.isfinite(S)):
+        raise ValueError("S must be a non-empty finite n x m matrix")
+    if permutation is None:
+        permutation, _ = Optimizer.optimize_hungarian(S)
+    P, col = _padded(S, permutation)
+    return _report(P, col, *_duals(P, col), *S.shape)
+
+
+def sensitivity_from_duals(S: np.ndarray, permutation: Sequence[int],
+                           u: np.ndarray, v: np.ndarray) -> dict:
+    """Same report for a square S from known feasible potentials (maximization form)."""
+    S = np.asarray(S, dtype=np.float64)
+    P, col = _padded(S, permutation)
+    if P.shape != S.shape:
+        raise ValueError("known potentials require a square S")
+    u, v = _center(P, col, np.array(u, dtype=np.float64), np.array(v, dtype=np.float64), CENTERING_SWEEPS)
+    return _report(P, col, u, v, *S.shape)
@@ -14,8 +14,30 @@ FLASK BACKEND API - ГЛАВНЫЙ ФАЙЛ ПРИЛОЖЕНИЯ
     - API endpoints:
         * POST /simulate - генерация матриц состояний и параметров партий
         * POST /multi_simulate - генерация 50 наборов матриц
+        * POST /stage_summary - сводка по этапам для графиков: S и L по этапам,
+          траектории выхода и потерь стратегий (без самих матриц)
         * POST /optimize - оптимизация последовательности переработки
-        * POST /multi_optimize - оптимизация для 50 матриц
+        * POST /multi_optimize - оптимизация для K матриц (обычно 50)
+        * POST /adaptive_optimize - генерация и оптимизация, пока доверительные
+          интервалы потерь не сузятся до заданной точности (engine.py)
+        * POST /compare_configs - сравнение конфигураций на общих случайных числах
+        * POST /sweep - Монте-Карло по сетке конфигураций с кэшем ячеек (sweep.py)
+        * POST /scaling_study - время и качество стратегий от n (algorithms/scaling.py)
+        * POST /multi_plant - распределение партий по нескольким заводам
+          (algorithms/multiplant.py)
+        * POST /random_baseline - распределение выхода случайных перестановок
+          и место стратегий в нём
+        * POST /sensitivity - допустимые ошибки замеров, при которых оптимальный
+          план не меняется (algorithms/sensitivity.py)
+        * GET  /experiments/<id>/tile, /experiments/<id>/overview - окно и обзор
+          матриц сохранённого эксперимента для больших n (core/store.py, core/tiles.py)
+        * POST /online/start, POST /online/<id>/events, GET/DELETE /online/<id>,
+          GET /online/<id>/sensitivity - оперативное планирование со скользящим
+          горизонтом (algorithms/online.py)
+        * GET  /catalog, GET/DELETE /catalog/<id>, GET /catalog/<id>/arrays/<name> -
+          каталог сохранённых расчётов в SQLite (core/catalog.py)
+        * GET  /metrics - счётчики запросов и гистограммы задержек (core/metrics.py)
+        * GET  /health - готовность сервера и прогрев решателей (serving.py)
 
 АРХИТЕКТУРА:
     Frontend (Electron) <--HTTP--> Flask Backend <--использует--> Модули:
@@ -26,7 +48,10 @@ FLASK BACKEND API - ГЛАВНЫЙ ФАЙЛ ПРИЛОЖЕНИЯ
 
 КАК ЗАПУСТИТЬ:
     1. Установите зависимости: pip install -r requirements.txt
-    2. Запустите сервер: 
+    2. Запустите сервер:
+           python app.py                              # dev-сервер (debug, reloader)
+           python app.py --mode production \
+                  --workers 4 --threads 8             # многопроцессный режим (serving.py)
     3. Сервер будет доступен на http://localhost:5000
     4. Frontend автоматически запускает этот сервер при старте
 
@@ -38,6 +63,8 @@ API ENDPOINTS:
         {
             "n": 10,                    # Количество партий
             "m": 1000.0,                # Масса партии
+            "stages": 6,                # (опц.) количество этапов, по умолчанию n;
+                                        # матрицы тогда n × stages
             "a_min": 0.10,              # Минимальная начальная сахаристость
             "a_max": 0.20,              # Максимальная начальная сахаристость
             "beta1": 0.85,              # Минимальный коэффициент деградации (увядание)
@@ -49,7 +76,12 @@ API ENDPOINTS:
             "use_losses": true,         # Учитывать потери сахара
             "growth_base": 1.029,       # База роста для расчёта потерь
             "delta_k": 4,               # Знаменатель для концентрированного распределения
-            "delta_k_ripening": 4      # То же для дозаривания
+            "delta_k_ripening": 4,      # То же для дозаривания
+            "precision": 6,             # (опц.) знаков после запятой в ответе
+            "batch_layout": "rows",     # (опц.) "rows" или "columns" для партий
+            "seed": 42,                 # (опц.) зерно; по умолчанию - новое
+            "store": false,             # (опц.) запомнить эксперимент -> "experiment_id"
+            "include_matrices": true    # (опц.) false - ответ без "matrices"
         }
     
     Выходные данные (JSON):
@@ -60,9 +92,34 @@ API ENDPOINTS:
                 "L": [[...]],  # Матрица потерь (в %)
                 "S": [[...]]   # Итоговая матрица после учёта потерь
             },
-            "batches": [...]   # Список партий с их параметрами
+            "batches": [...],  # Список партий с их параметрами
+                               # (при batch_layout="columns": {"index": [...], ...})
+            "seed": 42,        # использованное зерно
+            "recomputed_stages": ["batches", "B", "C", "L", "S"],
+            "shape": [10, 10],           # n × stages
+            "experiment_id": "3f2a..."   # при "store": true
         }
 
+    При больших n матрицы удобнее не передавать целиком: "store": true,
+    "include_matrices": false и дальше GET /experiments/<id>/tile и
+    /experiments/<id>/overview. В /multi_simulate с "store": true каждый
+    эксперимент получает свой "experiment_id" (с "antithetic" - ошибка 400).
+
+    Генерация идёт через кэш этапов (core/pipeline.py). Если повторить
+    запрос с "seed" из ответа и изменёнными параметрами, пересчитываются
+    только зависящие от них этапы: например, use_losses или growth_base -
+    только L и S, масса m - ничего. Размер кэша: BACKEND_PIPELINE_CACHE_MB
+    (по умолчанию 256).
+
+    Все POST endpoints принимают опции вывода "precision" и "batch_layout";
+    массивы пишутся в JSON напрямую из numpy (core/serialization.py).
+
+    /multi_simulate и /multi_optimize принимают "parallel": true - тогда
+    эксперименты считаются в пуле процессов с общей памятью (engine.py).
+    Размер пула: переменная окружения BACKEND_ENGINE_WORKERS (по умолчанию
+    ядра делятся поровну между воркерами serving.py: cpu_count // workers,
+    не меньше 1). Для /multi_optimize все матрицы должны быть одного размера.
+
     POST /multi_simulate
     ---------------------
     Входные данные (JSON): те же, что и для /simulate
@@ -79,23 +136,67 @@ API ENDPOINTS:
                     "batches": [...]
                 },
                 ...  # 50 экспериментов
-            ]
+            ],
+            "count": 50,
+            "seed": 42,                 # зерно эксперимента i - SeedSequence(seed).spawn(50)[i]
+            "recomputed_stages": {"L": 50, "S": 50}   # сколько раз пересчитан каждый этап
+        }
+
+    POST /stage_summary
+    -------------------
+    Для графиков: K экспериментов генерируются и оптимизируются на сервере
+    (engine.py), а клиенту уходят только агрегаты по этапам (O(m) чисел
+    вместо K · n · m). Эксперименты те же, что у /multi_simulate с тем же
+    "seed" и K = 50.
+    Входные данные (JSON): параметры /simulate и
+        {
+            "K": 50,                    # (опц.) число экспериментов
+            "strategies": ["greedy", "optimal"],   # (опц.) из STUDY_STRATEGIES
+            "parallel": false,          # (опц.) пул процессов движка
+            "catalog": false            # (опц.) записать в каталог -> "catalog_id";
+                                        # массивы: yields (K × s), permutations (K × s × m)
+        }
+    Выходные данные (JSON): каждая сводка по этапам - массивы длины m
+    {"count", "mean", "min", "max", "p5", "p25", "p50", "p75", "p95"}
+    (core/stats.py: stage_summary; null - этап без значений):
+        {
+            "experiments": 50, "stages": 10, "seed": 42,
+            "S": {...},                 # S[i, j] всех партий по этапу j
+            "L": {...},                 # потери L[i, j] по этапу j
+            "strategies": {
+                "greedy": {
+                    "yield": {"count": 50, "mean": ..., "p5": ..., ...},
+                    "S": {...},         # выход назначенной на этап партии
+                    "L": {...},         # её потери
+                    "cumulative_S": [...]   # средний накопленный выход к концу этапа j
+                },
+                ...
+            }
         }
+    Ограничение: K · n · stages <= MAX_STAGE_SUMMARY_CELLS.
 
     POST /optimize
     ---------------
     Входные данные (JSON):
         {
-            "matrix": [[...]],          # Матрица S (итоговая матрица состояний)
-            "mass_per_batch": 1000.0    # Масса партии (для расчёта итоговой массы)
+            "matrix": [[...]],          # Матрица S (итоговая матрица состояний),
+                                        # n партий × m этапов, m может отличаться от n
+            "mass_per_batch": 1000.0,   # Масса партии (для расчёта итоговой массы)
+            "exact": true               # false - без венгерского алгоритма (optimal и
+                                        # notoptimal не считаются), только границы
         }
     
     Выходные данные (JSON):
         {
             "greedy": {
-                "permutation": [2, 5, 1, ...],  # Перестановка (последовательность партий)
+                "permutation": [2, 5, 1, ...],  # Партия на каждом этапе (длина m;
+                                                # -1 - этап без партии при m > n)
                 "yield": 15.5,                  # Выход сахара
-                "final_mass": 108500.0          # Итоговая масса продукта
+                "final_mass": 108500.0,         # Итоговая масса продукта
+                "upper_bound": 17.9,            # Верхняя граница оптимума (algorithms/bounds.py)
+                "guaranteed_gap_percent": 13.4  # (upper_bound - yield) / upper_bound · 100 -
+                                                # не меньше relative_loss_percent;
+                                                # null при upper_bound <= 0
             },
             "thrifty": {...},
             "thrifty_greedy": {...},
@@ -108,8 +209,10 @@ API ENDPOINTS:
     --------------------
     Входные данные (JSON):
         {
-            "matrices": [[[...]], ...],  # Массив из 50 матриц S
-            "mass_per_batch": 1000.0     # Масса партии
+            "matrices": [[[...]], ...],  # Массив из K матриц S (обычно 50)
+            "mass_per_batch": 1000.0,    # Масса партии
+            "include_all_results": false, # true - вернуть результаты по каждой матрице
+            "exact": true                # false - без optimal и notoptimal
         }
     
     Выходные данные (JSON):
@@ -124,8 +227,24 @@ API ENDPOINTS:
                 "greedy_thrifty": {...},
                 "optimal": {...},
                 "notoptimal": {...}
+            },                  # у эвристик также "guaranteed_gap_percent" - средний
+                                # гарантированный разрыв (см. /optimize)
+            "bounds": {         # Границы оптимума без точного решения
+                "upper_bound": {"count", "mean", ...},     # по матрицам
+                "guaranteed_gap_percent": {"greedy": {"count", "mean", "max", ...}, ...}
+            },
+            "statistics": {    # Потоковые агрегаты (core/stats.py)
+                "greedy": {
+                    "yield": {"count", "mean", "variance", "std", "min", "max",
+                              "p5", "p50", "p95"},
+                    "final_mass": {...},
+                    "relative_loss_percent": {...},   # по каждой матрице
+                    "versus_optimal": {"wins", "ties", "losses", "compared",
+                                       "win_rate", "tie_rate"}
+                },
+                ...
             },
-            "all_results": [  # Результаты для каждой матрицы (опционально)
+            "all_results": [  # Результаты для каждой матрицы (если include_all_results)
                 {
                     "greedy": {...},
                     "thrifty": {...},
@@ -135,9 +254,362 @@ API ENDPOINTS:
             ]
         }
 
+    POST /adaptive_optimize
+    -----------------------
+    Вместо фиксированных 50 экспериментов генерирует и оптимизирует их
+    кусками, пока полуширина доверительного интервала относительных потерь
+    каждой стратегии к optimal не станет <= tolerance, либо не будет
+    достигнут max_experiments / max_seconds.
+    Входные данные (JSON): параметры как в /simulate, плюс (все необязательны)
+        {
+            "tolerance": 0.5,           # полуширина ДИ, процентные пункты
+            "confidence": 0.95,         # уровень доверия
+            "chunk_size": 50,           # экспериментов за шаг
+            "min_experiments": 50,      # не останавливаться раньше (по умолчанию chunk_size)
+            "max_experiments": 2000,
+            "max_seconds": 60,          # обязательный бюджет, до MAX_ADAPTIVE_SECONDS
+            "strategies": [...],        # должны включать "optimal"
+            "seed": 42,
+            "parallel": false,          # считать в пуле процессов (engine.py)
+            "catalog": false            # записать расчёт в каталог -> "catalog_id"
+        }
+
+    Выходные данные (JSON): "averages", "statistics", "total_matrices" как в
+    /multi_optimize, плюс
+        "adaptive": {
+            "converged": true,
+            "stop_reason": "converged" | "max_experiments" | "time_budget",
+            "experiments": 150, "tolerance": 0.5, "confidence": 0.95,
+            "elapsed_seconds": 1.2,
+            "relative_loss_ci": {"greedy": {"mean": 9.8, "half_width": 0.41,
+                                            "within_tolerance": true}, ...},
+            "root_seed": 42
+        }
+
+    Контрольные точки: готовые куски сохраняются в папке данных backend
+    (BACKEND_CHECKPOINT_DIR, по умолчанию - папка данных пользователя, см.
+    DATA_DIR) не чаще раз в BACKEND_CHECKPOINT_INTERVAL секунд (по умолчанию
+    30). Тот же запрос после перезапуска backend продолжает с сохранённого
+    места (core/checkpoint.py). Запрос без "seed" продолжается под зерном,
+    сохранённым прерванным расчётом, иначе получает новое; использованное
+    зерно возвращается в "root_seed".
+
+    СНИЖЕНИЕ ДИСПЕРСИИ
+    ------------------
+    /multi_simulate с "antithetic": true генерирует эксперименты парами
+    (2k, 2k+1) с зеркальными равномерными величинами (U и 1 - U);
+    /multi_optimize с "antithetic_pairs": true для таких матриц добавляет
+    в ответ "variance_reduction": по каждой стратегии для "yield" и
+    "relative_loss_percent" - {"pairs", "mean", "pair_correlation",
+    "variance_of_mean_independent", "variance_of_mean_antithetic",
+    "reduction_factor"} (во сколько раз меньше экспериментов нужно для той
+    же точности).
+
+    POST /compare_configs
+    ---------------------
+    Входные данные (JSON):
+        {
+            "configs": {"uniform": {...}, "concentrated": {...}},  # параметры /simulate,
+                                        # одинаковое n
+            "baseline": "uniform",      # по умолчанию - первая в "configs"
+            "K": 50,
+            "strategies": [...],        # по умолчанию как в /multi_optimize
+            "common_random_numbers": true,  # одно зерно на эксперимент для всех конфигураций
+            "antithetic": false,
+            "seed": 42,
+            "parallel": false
+        }
+    Выходные данные (JSON):
+        {
+            "configs": {"uniform": {"averages": ..., "statistics": ...}, ...},
+            "baseline": "uniform",
+            "differences": {           # конфигурация минус базовая, попарно
+                "concentrated": {"greedy": {"yield": {"mean_difference", "half_width",
+                                  "half_width_independent", "correlation",
+                                  "reduction_factor", ...}}, ...}
+            },
+            "total_matrices": 50,
+            "common_random_numbers": true
+        }
+
+    POST /sweep
+    -----------
+    Входные данные (JSON): описание перебора, как в sweep.py
+        {
+            "base": {...},              # параметры /simulate для всех ячеек
+            "grid": {"delta_k": [2, 3, 4], "growth_base": [1.029, 1.03]},
+            "cells": [{"n": 10}, {"n": 20}],   # необязательно
+            "K": 100, "strategies": [...], "seed": 42,
+            "common_random_numbers": true, "antithetic": false,
+            "confidence": 0.95,         # уровень доверия полуширин ДИ
+            "parallel": false
+        }
+    Не более MAX_SWEEP_CELLS ячеек и MAX_SWEEP_EXPERIMENTS экспериментов.
+    Посчитанные ячейки кэшируются в папке BACKEND_SWEEP_CACHE (по умолчанию
+    sweep/ папки данных backend) - повторный запрос с тем же "seed" считает
+    только новые ячейки, в том числе при другом "confidence". Без "seed"
+    ячейки в кэш не пишутся: их отпечаток не повторится.
+    Выходные данные (JSON):
+        {
+            "columns": ["delta_k", "growth_base", "strategy", "experiments",
+                        "yield_mean", ...],
+            "rows": [{"delta_k": 2, "growth_base": 1.029, "strategy": "greedy",
+                      "yield_mean": ..., "relative_loss_mean": ..., ...}, ...],
+            "cells": [{"params": {...}, "fingerprint": "...", "cached": false,
+                       "failed_runs": 0}, ...],
+            "cached_cells": 0, "computed_cells": 6,
+            "experiments_per_cell": 100, "root_seed": 42, "elapsed_seconds": 3.1
+        }
+
+    POST /scaling_study
+    -------------------
+    Входные данные (JSON, все поля необязательны):
+        {
+            "config": {...},            # параметры как в /simulate (n игнорируется);
+                                        # по умолчанию - типовой завод
+            "n_min": 10, "n_max": 500,  # границы геометрической лестницы n
+            "steps": 5,                 # количество размеров
+            "trials": 3,                # случайных матриц на каждый размер
+            "strategies": ["greedy", "optimal", ...],  # по умолчанию все, включая tkg и random
+            "seed": 42,
+            "max_seconds": 60,          # бюджет времени, до MAX_STUDY_SECONDS; проверяется после
+                                        # каждой стратегии, лестница обрывается при превышении
+            "fit_min_n": 0              # подгонять показатель только по n >= fit_min_n
+        }
+
+    Выходные данные (JSON):
+        {
+            "sizes": [10, 22, 47, ...], "skipped_sizes": [...], "trials": 3,
+            "elapsed_seconds": 4.2,
+            "strategies": {
+                "greedy": {
+                    "fit": {"exponent": 1.95, "coefficient": ..., "r_squared": 0.99, "points": 5},
+                    "curve": [{"n": 10, "trials": 3, "median_seconds": ..., "mean_seconds": ...,
+                               "min_seconds": ..., "mean_yield": ...,
+                               "mean_relative_loss_percent": ...}, ...]
+                },
+                ...
+            }
+        }
+
+    POST /multi_plant
+    -----------------
+    Партии из общих буртов распределяются по P заводам; у каждого своя
+    масса партии и своё число этапов.
+    Входные данные (JSON):
+        {
+            "plants": [{"name": "north", "mass": 1000.0, "stages": 20},
+                       {"name": "south", "mass": 600.0, "stages": 15}],
+            "matrix": [[...]],          # S n × max stages; или вместо неё параметры
+                                        # /simulate (n, a_min, ...) и "seed" - тогда S
+                                        # генерируется с stages = max stages
+            "strategies": ["greedy", "decomposed", "optimal"],   # по умолчанию все,
+                                        # optimal - только до MAX_EXACT_SLOTS слотов
+            "nu": 10,                   # (опц.) переключение эвристик, в этапах
+            "block_stages": 8,          # (опц.) этапов в блоке декомпозиции
+            "lookahead": 1              # (опц.) блоков заглядывания вперёд
+        }
+    Выходные данные (JSON):
+        {
+            "slots": 35, "batches": 40, "seed": 42,      # зерно генерации S и стратегии random
+            "results": {
+                "greedy": {"schedule": {"north": [3, 7, ...], "south": [...]},
+                           "yield": ..., "final_mass": ..., "assigned": 35,
+                           "elapsed_seconds": ..., "relative_loss_percent": ...},
+                ...
+            }
+        }
+
+    POST /random_baseline
+    ---------------------
+    Выход тысяч случайных перестановок одной матрицы (Optimizer.
+    random_baseline) - базовая линия вместо одной случайной перестановки.
+    Входные данные (JSON):
+        {
+            "matrix": [[...]],          # S n × m
+            "samples": 10000,           # (опц.) до MAX_BASELINE_SAMPLES и samples × max(n, m)
+                                        #   не больше MAX_BASELINE_CELLS
+            "seed": 42,                 # (опц.) зерно выборки
+            "strategies": ["greedy", "optimal"],   # (опц.) стратегии для сравнения
+            "permutations": [[2, 0, 1, ...], ...]  # (опц.) свои перестановки длины m
+        }
+    Выходные данные (JSON):
+        {
+            "samples": 10000, "seed": 42,
+            "yield": {"count", "mean", "std", "min", "max", "p1", "p5", "p25",
+                      "p50", "p75", "p95", "p99"},
+            "strategies": {"greedy": {"yield": ..., "percentile_rank": 99.9}, ...},
+            "permutations": [{"yield": ..., "percentile_rank": ...}, ...]
+        }
+    percentile_rank - доля случайных перестановок (в %) с меньшим выходом.
+
+    POST /sensitivity
+    -----------------
+    Допустимые ошибки S, при которых оптимальный план остаётся
+    оптимальным, по двойственным потенциалам (без повторных решений).
+    Входные данные (JSON):
+        {
+            "matrix": [[...]],          # S n × m
+            "permutation": [...],       # (опц.) готовый оптимальный план длины m
+            "entries": true             # (опц.) вернуть матрицы по каждому значению
+        }
+    Выходные данные (JSON):
+        {
+            "permutation": [...], "yield": ...,
+            "tolerance": 0.12,          # ошибка ±ε во всех замерах сразу
+            "batch_tolerance": [...],   # ошибка ±ε в замерах одной партии
+            "allowed_increase": [[...]],   # n × m, null - без ограничения
+            "allowed_decrease": [[...]]
+        }
+
+    POST /online/start
+    ------------------
+    Начинает сессию оперативного планирования кампании.
+    Входные данные (JSON):
+        {
+            "matrix": [[...]],          # исходная матрица S n×n (партии × этапы)
+            "strategy": "optimal",      # любая стратегия /scaling_study
+            "nu": 5                     # (опц.) этап переключения n - nu, по умолчанию [n/2]
+        }
+    Выходные данные (JSON): состояние сессии
+        {
+            "session": "9f1c...",       # id для следующих запросов
+            "version": 0,               # растёт с каждым изменением
+            "strategy": "optimal", "stage": 0, "horizon": 10, "finished": false,
+            "processed": [{"stage": 0, "batch": 3, "yield": 15.2}, ...],
+            "plan": [{"stage": 0, "batch": 3}, ...],   # оставшийся горизонт
+            "realized_yield": 0.0, "planned_yield": 152.4, "projected_yield": 152.4
+        }
+
+    POST /online/<id>/events
+    ------------------------
+    События одного этапа: замеры, новые партии и (опц.) выполнение этапа.
+    План после них доводится до оптимума инкрементально, без полного
+    повторного решения.
+        {
+            "updates": [{"batch": 4, "yields": [...]}],   # выходы на этапах stage..horizon-1
+            "new_batches": [{"yields": [...],             # этапы stage..horizon (новый последний)
+                             "extension": [...]}],        # ожидающие партии на новом этапе
+            "step": true,               # выполнить текущий этап
+            "batch": 7                  # (опц.) фактическая партия, если не по плану
+        }
+    Выходные данные (JSON): состояние сессии, а также "new_batches" (номера
+    добавленных партий), "decision" ({"stage", "batch", "yield", "planned"},
+    если "step") и "elapsed_ms" - время доведения плана вместе с его
+    сохранением. 409 - сессию с той же версии уже изменил другой запрос:
+    состояние нужно перечитать (GET) и отправить события заново.
+
+    GET /online/<id> - состояние сессии; DELETE /online/<id> - удалить её.
+    GET /online/<id>/sensitivity - допустимые ошибки замеров для текущего
+    плана (стратегия optimal): как /sensitivity по оставшимся партиям и
+    этапам, по потенциалам решателя сессии; "batches" - номера строк.
+    Каждое изменение сессии пишется в папку online/ папки данных backend
+    (CHECKPOINT_DIR) как запись журнала событий: при --workers > 1 запросы
+    одной сессии попадают в разные процессы, и любой из них дочитывает её
+    оттуда; сессии также переживают перезапуск. В памяти процесса - кэш не
+    более MAX_ONLINE_SESSIONS сессий; сессии, не менявшиеся
+    ONLINE_SESSION_MAX_AGE секунд (7 дней), удаляются с диска.
+
+    GET /experiments/<id>
+    ---------------------
+    Описание сохранённого эксперимента:
+        {"experiment_id": ..., "config": {...}, "seed": 42, "spawn_key": [], "shape": [n, m]}
+    Матрицы не хранятся: они берутся из кэша этапов или пересчитываются
+    по (конфигурация, зерно). Описания пишутся в папку experiments/ папки
+    данных backend (CHECKPOINT_DIR), поэтому id понятен всем воркерам и
+    после перезапуска. Неизвестный id - 404.
+
+    GET /experiments/<id>/tile?matrix=S&row=0&col=0&rows=50&cols=50
+    ------------------------------------------------------------------
+    Окно матрицы B, C, L или S (обрезается у края), не более
+    MAX_TILE_CELLS ячеек:
+        {"matrix": "S", "row": 0, "col": 0, "shape": [n, m], "values": [[...]]}
+
+    GET /experiments/<id>/overview?matrix=S&rows=64&cols=64
+    -------------------------------------------------------
+    Обзор для уменьшенного масштаба: не более rows × cols блоков (до
+    MAX_OVERVIEW_BLOCKS по каждой оси); по блоку - среднее, минимум, максимум:
+        {"matrix": "S", "shape": [n, m], "row_edges": [0, 16, ...],
+         "col_edges": [...], "mean": [[...]], "min": [[...]], "max": [[...]]}
+    Оба запроса принимают "precision" в строке запроса.
+
+    GET /catalog
+    ------------
+    Каталог расчётов (core/catalog.py): расчёты с "catalog": true
+    (/stage_summary, /adaptive_optimize) записываются в SQLite с индексами
+    по полям конфигурации и времени. База: BACKEND_CATALOG_DIR или папка
+    catalog/ папки данных backend (CHECKPOINT_DIR) - общая для всех
+    воркеров и сохраняется между запусками.
+    Параметры строки запроса (все необязательны):
+        kind, n, stages, distribution_type, enable_ripening, use_losses, seed
+        since, until     # unix-время или ISO-дата ("2026-10-01", "2026-10-01T12:00")
+        limit (до MAX_CATALOG_LIST), offset
+    Выходные данные (JSON), новые расчёты первыми:
+        {"runs": [{"id": ..., "kind": "stage_summary", "created_at": 1760000000.0,
+                   "n": 100, "stages": 100, "distribution_type": "uniform",
+                   "enable_ripening": false, "use_losses": true, "seed": 42,
+                   "arrays": {"yields": {"shape": [50, 6], "dtype": "float64"}}}, ...],
+         "count": 1}
+
+    GET /catalog/<id>, DELETE /catalog/<id>
+    ---------------------------------------
+    Запись целиком: поля списка плюс "config" (параметры эксперимента) и
+    "summary" (ответ расчёта). DELETE удаляет запись и файлы массивов.
+
+    GET /catalog/<id>/arrays/<name>
+    -------------------------------
+    Сохранённый массив: {"name": "yields", "shape": [50, 6], "values": [...]};
+    принимает "precision" в строке запроса.
+
+    GET /health
+    -----------
+    Выходные данные (JSON):
+        {
+            "status": "ok",
+            "ready": true,              # решатели прогреты (scipy загружен)
+            "warming": false,           # прогрев ещё идёт
+            "solvers": {"scipy.optimize": true, "greedy": true, ...},
+            "warmup_seconds": 0.45,
+            "uptime_seconds": 3.2,
+            "pid": 1234
+        }
+    main.js опрашивает /health и открывает окно, когда ready == true.
+
+    GET /metrics
+    ------------
+    Выходные данные (JSON, или текст Prometheus при ?format=prometheus):
+        {
+            "uptime_seconds": 12.5,
+            "endpoints": {
+                "simulate": {
+                    "requests": {"200": 3},              # по кодам ответа
+                    "latency_seconds": {"count", "sum", "mean", "buckets"},
+                    "stages": {                          # этапы внутри запроса
+                        "validation": {...}, "batch_sampling": {...},
+                        "generate_B": {...}, "generate_C": {...},
+                        "generate_L": {...}, "generate_S": {...},
+                        "serialization": {...}
+                    },
+                    "request_bytes": {...},
+                    "response_bytes": {...}
+                },
+                "multi_optimize": {"stages": {"optimizer.greedy": {...}, ...}, ...}
+            }
+        }
+
+ПРОФИЛИРОВАНИЕ:
+    Любой из POST endpoints /simulate, /multi_simulate, /optimize,
+    /multi_optimize, /adaptive_optimize, /scaling_study можно вызвать
+    с ?profile=1 (или "profile": true в JSON). Тогда обработчик выполняется
+    под cProfile (core/profiling.py), и к ответу добавляется ключ "profile":
+    таблица горячих функций "hot_functions" и дерево этапов "phases"
+    (config_parsing, generate_single_experiment, generate_B/C (MatrixGenerator),
+    generate_L/S (LossModel), optimizer.<стратегия>, serialization).
+
 ВАЛИДАЦИЯ:
-    Функция validate_config() проверяет все входные параметры согласно
-    требованиям из task.md. При ошибках возвращается список ошибок.
+    Функция validate_config() (core/config.py) проверяет все входные
+    параметры согласно требованиям из task.md. При ошибках возвращается
+    список ошибок. Те же функции использует командная строка (cli.py).
 
 ОБРАБОТКА ОШИБОК:
     - 400 Bad Request - если валидация не прошла
@@ -161,13 +633,42 @@ API ENDPOINTS:
 ===================================================================
 """
 
-from flask import Flask, request, jsonify
+import dataclasses
+import datetime
+import functools
+import os
+import random
+import sys
+import threading
+import time
+
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 import numpy as np
-from core.models import BeetBatch, ExperimentConfig
-from core.generators import MatrixGenerator
 from core.losses import LossModel
-from algorithms.optimizer import Optimizer
+from core.stats import (StrategyAggregator, StreamingSummary, antithetic_report, paired_variance_reduction,
+                        distribution_summary, percentile_rank, stage_summary, scheduled_values,
+                        STAGE_PERCENTILES)
+from core.serialization import dumps
+from core.config import validate_config, validate_seed, build_experiment_config
+from core.metrics import metrics, stage, set_endpoint, reset_endpoint
+from core.checkpoint import Checkpoint, fingerprint
+from core.pipeline import ExperimentPipeline
+from core.store import ExperimentStore
+from core.tiles import window, overview
+from core.catalog import Catalog, CATALOG_FIELDS, DEFAULT_LIST_LIMIT
+from core.models import Plant
+from algorithms.optimizer import Optimizer, RANDOM_BASELINE_SAMPLES
+from algorithms.bounds import yield_bounds, guaranteed_gap_percent
+from algorithms.sensitivity import sensitivity_analysis
+from algorithms.online import RollingScheduler, OnlineSessions
+from algorithms.multiplant import PLANT_STRATEGIES, MAX_EXACT_SLOTS, solve_multi_plant
+from algorithms.scaling import (run_scaling_study, geometric_ladder, default_config,
+                                STUDY_STRATEGIES, MAX_STUDY_N, MAX_STUDY_TRIALS,
+                                MAX_STUDY_SECONDS)
+from serving import warmup
+from engine import ExperimentEngine, MATRIX_NAMES
+from sweep import SweepCache, validate_sweep, run_sweep
 
 # Создаём Flask приложение
 app = Flask(__name__)
@@ -177,286 +678,371 @@ app = Flask(__name__)
 # Без этого браузер заблокирует запросы из-за политики безопасности
 CORS(app)
 
-def validate_config(data):
-    """Validate input parameters according to task.md requirements."""
-    errors = []
-    
-    # Basic validations
-    n = data.get('n')
-    if not n or n <= 0:
-        errors.append("n must be positive integer")
-    
-    m = data.get('m')
-    if not m or m <= 0:
-        errors.append("M (mass per batch) must be positive")
-    
-    a_min = data.get('a_min')
-    a_max = data.get('a_max')
-    if a_min is None or a_max is None or a_min >= a_max:
-        errors.append("a_min must be less than a_max")
-    
-    beta1 = data.get('beta1')
-    beta2 = data.get('beta2')
-    if beta1 is None or beta2 is None:
-        errors.append("beta1 and beta2 must be provided")
-    else:
-        if beta1 >= beta2:
-            errors.append("beta1 must be less than beta2")
-        if beta1 <= 0:
-            errors.append("beta1 must be positive (for wilting, should be in (0,1))")
-        if beta2 >= 1:
-            errors.append("beta2 must be less than 1 (for wilting)")
-    
-    # Ripening validations
-    enable_ripening = data.get('enable_ripening', False)
-    if enable_ripening:
-        v = data.get('v')
-        if v is None:
-            errors.append("v (number of ripening stages) must be provided when ripening is enabled")
-        else:
-            if n:
-                max_v = n // 2  # [n/2]
-                if v < 2 or v > max_v:
-                    errors.append(f"v must satisfy: 2 ≤ v ≤ [n/2] = {max_v}")
-        
-        beta_max = data.get('beta_max')
-        if beta_max is not None and beta_max <= 1:
-            errors.append("beta_max must be greater than 1 (for ripening)")
-
-    # Growth base selection
-    growth_base = data.get('growth_base', 1.029)
-    if growth_base not in [1.029, 1.03]:
-        errors.append("growth_base must be 1.029 or 1.03")
-
-    # Delta denominator validation (concentrated)
-    delta_k = data.get('delta_k', 4)
-    delta_k_ripening = data.get('delta_k_ripening', 4)
-    if delta_k not in [2, 3, 4]:
-        errors.append("delta_k must be one of {2,3,4}")
-    if delta_k_ripening not in [2, 3, 4]:
-        errors.append("delta_k_ripening must be one of {2,3,4}")
-    
-    # Chemical parameters validation (optional, but good for sanity check)
-    # Ranges from Textbook Section 7:
-    # K: [4.8, 7.05], Na: [0.21, 0.82], N: [1.58, 2.8], I0: [0.62, 0.64]
-    # We assume frontend sends valid ranges if provided.
-    if data.get('k_min') and data.get('k_max') and data['k_min'] > data['k_max']:
-        errors.append("k_min must be <= k_max")
+# Метка запросов без маршрута (404, сканеры): путь в метке давал бы новую серию на каждый URL
+UNMATCHED_ENDPOINT = '<unmatched>'
 
-    return errors
+@app.before_request
+def _start_request_timer():
+    # Засекаем время запроса; этапы внутри запроса помечаются именем endpoint
+    g.request_start = time.perf_counter()
+    g.endpoint_token = set_endpoint(request.endpoint or UNMATCHED_ENDPOINT)
 
-def generate_single_experiment(config):
-    """Generate a single experiment with matrices."""
-    # Generate Batches [1..n]
-    batches = []
-    for i in range(config.n):
-        # Initial sugar
-        a_i = np.random.uniform(config.a_min, config.a_max)
-        
-        # Loss params
-        k = np.random.uniform(config.k_min, config.k_max)
-        na = np.random.uniform(config.na_min, config.na_max)
-        n_cont = np.random.uniform(config.n_content_min, config.n_content_max)
-        i0 = np.random.uniform(config.i0_min, config.i0_max)
-        
-        # Concentrated distribution params for wilting (delta)
-        delta = None
-        b_start = None
-        b_end = None
-        if config.distribution_type == 'concentrated':
-            # "delta_i <= |beta2 - beta1| / k"
-            max_delta = abs(config.beta2 - config.beta1) / config.delta_k
-            delta_i = np.random.uniform(0, max_delta)
-            
-            b_start = np.random.uniform(config.beta1, config.beta2 - delta_i)
-            b_end = b_start + delta_i
-            
-            delta = delta_i
-        
-        # Concentrated distribution params for ripening
-        delta_ripening = None
-        b_start_ripening = None
-        b_end_ripening = None
-        if config.distribution_type == 'concentrated' and config.enable_ripening:
-            # Calculate beta_max for ripening range
-            beta_max = config.beta_max
-            if beta_max is None:
-                if config.n > 2:
-                    beta_max = (config.n - 1) / (config.n - 2)
-                else:
-                    beta_max = 1.1
-            
-            # Similar logic for ripening: delta <= |beta_max - 1| / k
-            max_delta_ripening = abs(beta_max - 1.0) / config.delta_k_ripening
-            delta_ripening_i = np.random.uniform(0, max_delta_ripening)
-            
-            # center in (1 + delta, beta_max - delta]
-            center_ripening = np.random.uniform(1.0 + delta_ripening_i, beta_max - delta_ripening_i)
-            b_start_ripening = center_ripening - delta_ripening_i
-            b_end_ripening = center_ripening + delta_ripening_i
-            
-            delta_ripening = delta_ripening_i
-            
-        batches.append(BeetBatch(
-            index=i,
-            initial_sugar=a_i,
-            k=k, na=na, n_content=n_cont, i0=i0,
-            delta=delta, beta_range_start=b_start, beta_range_end=b_end,
-            delta_ripening=delta_ripening,
-            beta_range_start_ripening=b_start_ripening,
-            beta_range_end_ripening=b_end_ripening
-        ))
-        
-    # Generate Matrices
-    B = MatrixGenerator.generate_coefficients(config, batches)
-    C = MatrixGenerator.generate_states(batches, B)
-    if config.use_losses:
-        L = LossModel.calculate_losses(batches, C, config.n, growth_base=config.growth_base)
-        S_tilde = LossModel.calculate_final_yield_matrix(C, L)
-    else:
-        L = np.zeros_like(C)
-        S_tilde = C
-    
-    return {
-        'matrices': {
-            'B': B.tolist(),
-            'C': C.tolist(),
-            'L': L.tolist(),
-            'S': S_tilde.tolist()
-        },
-        'batches': [vars(b) for b in batches]
+@app.after_request
+def _record_request_metrics(response):
+    start = g.pop('request_start', None)
+    token = g.pop('endpoint_token', None)
+    if start is not None:
+        metrics.observe_request(
+            request.endpoint or UNMATCHED_ENDPOINT,
+            response.status_code,
+            time.perf_counter() - start,
+            request.content_length or 0,
+            response.calculate_content_length(),
+        )
+    if token is not None:
+        reset_endpoint(token)
+    return response
+
+def json_response(payload, status=200):
+    """
+    Serialize `payload` (may contain numpy arrays and BeetBatch lists) to a
+    JSON response, timed as the 'serialization' stage. Output options are
+    taken from the request body (or the query string of a GET request):
+    "precision" (decimals) and "batch_layout".
+    """
+    data = request.get_json(silent=True)
+    # GET-запросы (окна матриц) передают опции в строке запроса
+    options = data if isinstance(data, dict) else {
+        'precision': request.args.get('precision', type=int),
+        'batch_layout': request.args.get('batch_layout', 'rows'),
     }
+    try:
+        with stage('serialization'):
+            body = dumps(payload,
+                         precision=options.get('precision'),
+                         batch_layout=options.get('batch_layout', 'rows'))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': 'Invalid output options', 'message': str(e)}), 400
+    return Response(body, status=status, mimetype='application/json')
+
+# Кэш этапов генерации (core/pipeline.py): повторный запрос с тем же "seed"
+# пересчитывает только этапы, входы которых изменились
+PIPELINE = ExperimentPipeline(int(os.environ.get('BACKEND_PIPELINE_CACHE_MB', 256)) * 2**20)
+
+def request_seed(data):
+    """
+    The request's "seed" (checked by validate_seed / validate_config), or a
+    fresh one below 2**53 so that the UI can send it back unchanged
+    (JavaScript numbers are doubles).
+    """
+    if data.get('seed') is not None:
+        return data['seed']
+    return int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> np.uint64(11))
+
+def generate_single_experiment(config, seed=None):
+    """
+    Generate a single experiment with matrices (numpy arrays) and a BatchTable
+    through the memoized pipeline; returns (experiment, recomputed stages).
+    """
+    with stage('generate_single_experiment'):
+        return PIPELINE.run(config, seed)
+
+def profiling_requested():
+    """True if the request opts into profiling (?profile=1 or "profile": true)."""
+    if request.args.get('profile', '').lower() in ('1', 'true', 'yes'):
+        return True
+    data = request.get_json(silent=True)
+    return isinstance(data, dict) and bool(data.get('profile'))
+
+def profiled(handler):
+    """
+    Run the handler under cProfile when profiling_requested() and add a
+    'profile' report (hot functions + phase timing tree) to its JSON result.
+    """
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not profiling_requested():
+            return handler(*args, **kwargs)
+        from core.profiling import profile_call
+        result, report = profile_call(handler, *args, **kwargs)
+        response = app.make_response(result)
+        if response.mimetype != 'application/json' or response.direct_passthrough:
+            return response
+        body = response.get_data().rstrip()
+        if not body.startswith(b'{') or not body.endswith(b'}'):
+            return response
+        # Отчёт дописывается в готовое тело: ответ не разбирается и не кодируется
+        # заново, поэтому precision и batch_layout из json_response сохраняются
+        separator = b'' if body[1:-1].strip() == b'' else b','
+        response.set_data(body[:-1] + separator + b'"profile":' + dumps(report) + b'}')
+        return response
+    return wrapper
+
+# Пул процессов для "parallel": true (engine.py); создаётся при первом запросе
+_engine = None
+_engine_lock = threading.Lock()
+
+def engine_workers() -> int:
+    """Pool size: BACKEND_ENGINE_WORKERS, or this server worker's share of the cores."""
+    workers = int(os.environ.get('BACKEND_ENGINE_WORKERS', 0))
+    if workers > 0:
+        return workers
+    # Каждый воркер serving.py создаёт свой пул: иначе процессов было бы workers × cpu_count
+    server_workers = max(1, int(os.environ.get('BACKEND_SERVER_WORKERS', 1)))
+    return max(1, (os.cpu_count() or 1) // server_workers)
+
+def get_engine():
+    """Shared ExperimentEngine of engine_workers() processes."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            workers = engine_workers()
+            # Сервер многопоточный: fork() из процесса с потоками небезопасен
+            _engine = ExperimentEngine(workers, start_method='spawn')
+        return _engine
+
+# /random_baseline: верхняя граница числа случайных перестановок и стратегии по умолчанию
+MAX_BASELINE_SAMPLES = 1000000
+# Каждая выборка стоит O(max(n, m)) памяти и времени: ограничиваем произведение
+MAX_BASELINE_CELLS = 50000000
+DEFAULT_BASELINE_STRATEGIES = ['greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'optimal']
+
+# Стратегии с венгерским алгоритмом (O(n³)); "exact": false их пропускает
+EXACT_STRATEGIES = ('optimal', 'notoptimal')
+
+# /adaptive_optimize: стратегии по умолчанию (как в /multi_optimize) и верхняя граница K
+DEFAULT_ADAPTIVE_STRATEGIES = ['greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'optimal', 'notoptimal']
+MAX_ADAPTIVE_EXPERIMENTS = 100000
+MAX_ADAPTIVE_SECONDS = 600
+# /stage_summary держит в памяти стопки S и L: K · n · stages значений каждая
+MAX_STAGE_SUMMARY_CELLS = 20000000
+
+def default_data_dir():
+    """
+    Per-user data directory of the backend: the same place as Electron's
+    app.getPath('userData') (main.js passes it explicitly) plus 'backend'.
+    """
+    if os.name == 'nt':
+        base = os.environ.get('APPDATA') or os.path.expanduser('~\\AppData\\Roaming')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(base, 'Beet Optimization Lab', 'backend')
+
+# Папка данных backend: контрольные точки долгих запросов (core/checkpoint.py), а также
+# общие для всех воркеров сессии, сохранённые эксперименты и каталог (ниже).
+# main.js передаёт папку userData приложения; без переменной - та же папка по умолчанию
+CHECKPOINT_DIR = os.environ.get('BACKEND_CHECKPOINT_DIR') or default_data_dir()
+CHECKPOINT_INTERVAL = float(os.environ.get('BACKEND_CHECKPOINT_INTERVAL', 30))
+
+def request_checkpoint(kind, data):
+    """
+    (checkpoint, seed) of a long request. The file is keyed by the request
+    without its output options; an unseeded request reuses the seed saved by
+    an interrupted run of the same request, or gets a fresh one.
+    """
+    key = fingerprint({k: v for k, v in data.items() if k not in ('parallel', 'profile', 'catalog',
+                                                                    'precision', 'batch_layout')})
+    checkpoint = Checkpoint(os.path.join(CHECKPOINT_DIR, f'{kind}-{key[:32]}.npz'), CHECKPOINT_INTERVAL)
+    seed = data.get('seed')
+    if seed is None:
+        meta = checkpoint.read_meta() or {}
+        seed = meta['root_seed'] if meta.get('root_seed') is not None else request_seed(data)
+    return checkpoint, seed
+
+# /sweep: ограничения размера и кэш ячеек (в папке BACKEND_SWEEP_CACHE,
+# по умолчанию - CHECKPOINT_DIR/sweep)
+MAX_SWEEP_CELLS = 1000
+MAX_SWEEP_EXPERIMENTS = 200000
+SWEEP_CACHE = SweepCache(os.environ.get('BACKEND_SWEEP_CACHE') or os.path.join(CHECKPOINT_DIR, 'sweep'))
+
+# Оперативное планирование (algorithms/online.py): сессии и ограничения
+MAX_ONLINE_N = 5000
+MAX_ONLINE_SESSIONS = 100
+ONLINE_SESSION_MAX_AGE = 7 * 24 * 3600
+# Сессии всегда в общей папке: при нескольких воркерах запросы одной сессии попадают в разные процессы
+ONLINE_SESSIONS = OnlineSessions(os.path.join(CHECKPOINT_DIR, 'online'), MAX_ONLINE_SESSIONS,
+                                 ONLINE_SESSION_MAX_AGE)
+
+# Сохранённые эксперименты (core/store.py) и ограничения окон матриц (core/tiles.py)
+# Описания и матрицы - в общей папке: окна запрашиваются у любого воркера, а не только у создавшего id
+EXPERIMENT_STORE = ExperimentStore(PIPELINE, os.path.join(CHECKPOINT_DIR, 'experiments'))
+MAX_TILE_CELLS = 250000
+MAX_OVERVIEW_BLOCKS = 512
+
+# Каталог расчётов (core/catalog.py)
+CATALOG = Catalog(os.environ.get('BACKEND_CATALOG_DIR') or os.path.join(CHECKPOINT_DIR, 'catalog'))
+MAX_CATALOG_LIST = 1000
+
+def parallel_requested(data):
+    return isinstance(data, dict) and bool(data.get('parallel'))
 
 @app.route('/simulate', methods=['POST'])
+@profiled
 def simulate():
     data = request.json
     
     # Validate input
-    validation_errors = validate_config(data)
+    with stage('validation'):
+        validation_errors = validate_config(data)
     if validation_errors:
         return jsonify({'error': 'Validation failed', 'errors': validation_errors}), 400
     
     # Parse Config
-    # Normalize sugar inputs: accept either fraction (0.12) or percent (12)
-    a_min_in = data['a_min']
-    a_max_in = data['a_max']
-    # If values are given as fractions (<= 1), convert to percent
-    if a_min_in is not None and a_min_in <= 1.0:
-        a_min_in = a_min_in * 100.0
-    if a_max_in is not None and a_max_in <= 1.0:
-        a_max_in = a_max_in * 100.0
-
-    config = ExperimentConfig(
-        n=data['n'],
-        m=data['m'],
-        a_min=a_min_in,
-        a_max=a_max_in,
-        beta1=data['beta1'],
-        beta2=data['beta2'],
-        distribution_type=data['distribution_type'],
-        enable_ripening=data.get('enable_ripening', False),
-        v=data.get('v'),
-        beta_max=data.get('beta_max'),
-        use_losses=data.get('use_losses', True),
-        growth_base=data.get('growth_base', 1.029),
-        delta_k=data.get('delta_k', 4),
-        delta_k_ripening=data.get('delta_k_ripening', 4),
-        # Chemical parameters from Textbook Section 7
-        # Passing them to config so generate_single_experiment can use them
-        k_min=data.get('k_min', 4.8),
-        k_max=data.get('k_max', 7.05),
-        na_min=data.get('na_min', 0.21),
-        na_max=data.get('na_max', 0.82),
-        n_content_min=data.get('n_content_min', 1.58),
-        n_content_max=data.get('n_content_max', 2.8),
-        i0_min=data.get('i0_min', 0.62),
-        i0_max=data.get('i0_max', 0.64),
-    )
+    with stage('config_parsing'):
+        # Normalize sugar inputs: accept either fraction (0.12) or percent (12)
+        a_min_in = data['a_min']
+        a_max_in = data['a_max']
+        # If values are given as fractions (<= 1), convert to percent
+        if a_min_in is not None and a_min_in <= 1.0:
+            a_min_in = a_min_in * 100.0
+        if a_max_in is not None and a_max_in <= 1.0:
+            a_max_in = a_max_in * 100.0
+
+        config = build_experiment_config(dict(data, a_min=a_min_in, a_max=a_max_in))
     
     # Generate single experiment
-    experiment = generate_single_experiment(config)
-    
-    return jsonify(experiment)
+    root = np.random.SeedSequence(request_seed(data))
+    experiment, recomputed = generate_single_experiment(config, root)
+    response = dict(experiment, seed=root.entropy, recomputed_stages=recomputed,
+                    shape=[config.n, config.num_stages])
+    if data.get('store'):
+        response['experiment_id'] = EXPERIMENT_STORE.put(config, root, experiment['matrices'])
+    if not data.get('include_matrices', True):
+        del response['matrices']
+    return json_response(response)
 
 @app.route('/multi_simulate', methods=['POST'])
+@profiled
 def multi_simulate():
     """Generate 50 different experiments with the same parameters."""
     data = request.json
     
     # Validate input
-    validation_errors = validate_config(data)
+    with stage('validation'):
+        validation_errors = validate_config(data)
     if validation_errors:
         return jsonify({'error': 'Validation failed', 'errors': validation_errors}), 400
     
     # Parse Config
-    config = ExperimentConfig(
-        n=data['n'],
-        m=data['m'],
-        a_min=data['a_min'],
-        a_max=data['a_max'],
-        beta1=data['beta1'],
-        beta2=data['beta2'],
-        distribution_type=data['distribution_type'],
-        enable_ripening=data.get('enable_ripening', False),
-        v=data.get('v'),
-        beta_max=data.get('beta_max'),
-        use_losses=data.get('use_losses', True),
-        growth_base=data.get('growth_base', 1.029),
-        delta_k=data.get('delta_k', 4),
-        delta_k_ripening=data.get('delta_k_ripening', 4),
-        # Chemical parameters
-        k_min=data.get('k_min', 4.8),
-        k_max=data.get('k_max', 7.05),
-        na_min=data.get('na_min', 0.21),
-        na_max=data.get('na_max', 0.82),
-        n_content_min=data.get('n_content_min', 1.58),
-        n_content_max=data.get('n_content_max', 2.8),
-        i0_min=data.get('i0_min', 0.62),
-        i0_max=data.get('i0_max', 0.64),
-    )
+    with stage('config_parsing'):
+        config = build_experiment_config(data)
     
     # Generate 50 experiments
-    experiments = []
-    for exp_idx in range(50):
-        experiment = generate_single_experiment(config)
-        experiments.append(experiment)
+    root = np.random.SeedSequence(request_seed(data))
+    seeds = root.spawn(50)
+    recomputed = {}
+    antithetic = bool(data.get('antithetic'))
+    if antithetic and data.get('store'):
+        return jsonify({'error': 'Validation failed',
+                        'errors': ["antithetic experiments cannot be stored"]}), 400
+    if parallel_requested(data) or antithetic:
+        engine = get_engine() if parallel_requested(data) else ExperimentEngine(1)
+        with stage('engine.generate'):
+            result = engine.run(config, 50, keep=MATRIX_NAMES, return_batches=True,
+                                antithetic=antithetic, seed=root.entropy)
+        experiments = [
+            {'matrices': {name: result.matrices[name][i] for name in MATRIX_NAMES},
+             'batches': result.batches[i]}
+            for i in range(50)
+        ]
+    else:
+        # Те же зёрна экспериментов, что у движка: SeedSequence(seed).spawn(50)
+        experiments = []
+        for seq in seeds:
+            experiment, stages = generate_single_experiment(config, seq)
+            experiments.append(experiment)
+            for name in stages:
+                recomputed[name] = recomputed.get(name, 0) + 1
+    if data.get('store'):
+        for experiment, seq in zip(experiments, seeds):
+            experiment['experiment_id'] = EXPERIMENT_STORE.put(config, seq, experiment['matrices'])
     
-    return jsonify({
+    return json_response({
         'experiments': experiments,
-        'count': len(experiments)
+        'count': len(experiments),
+        'seed': root.entropy,
+        'recomputed_stages': recomputed,
     })
 
-def to_native(obj):
-    """
-    Рекурсивно конвертирует объекты в JSON-сериализуемые:
-    - np.ndarray -> list
-    - np.generic (np.int64, np.float64, ...) -> Python int/float via .item()
-    - list/tuple/dict -> обрабатывает рекурсивно
-    """
-    if isinstance(obj, np.generic):
-        return obj.item()
-    if isinstance(obj, np.ndarray):
-        return obj.tolist()
-    if isinstance(obj, dict):
-        return {to_native(k): to_native(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [to_native(i) for i in obj]
-    return obj
+@app.route('/stage_summary', methods=['POST'])
+@profiled
+def stage_summary_endpoint():
+    """Per-stage aggregates of S, L and the strategies' schedules over K experiments."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Validation failed', 'errors': ["request body must be a JSON object"]}), 400
+
+    with stage('validation'):
+        errors = validate_config(data)
+        num_experiments = data.get('K', 50)
+        strategies = data.get('strategies', DEFAULT_ADAPTIVE_STRATEGIES)
+        if not isinstance(num_experiments, int) or isinstance(num_experiments, bool) or num_experiments < 1:
+            errors.append("K must be a positive integer")
+        elif not errors and num_experiments * data['n'] * (data.get('stages') or data['n']) > MAX_STAGE_SUMMARY_CELLS:
+            errors.append(f"K * n * stages must be at most {MAX_STAGE_SUMMARY_CELLS}")
+        if not isinstance(strategies, list) or any(s not in STUDY_STRATEGIES for s in strategies):
+            errors.append(f"strategies must be from: {', '.join(STUDY_STRATEGIES)}")
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    with stage('config_parsing'):
+        config = build_experiment_config(data)
+    root = np.random.SeedSequence(request_seed(data))
+    engine = get_engine() if parallel_requested(data) else ExperimentEngine(1)
+    with stage('engine.run'):
+        result = engine.run(config, num_experiments, strategies, seed=root.entropy, keep=('S', 'L'))
+
+    S, L = result.matrices['S'], result.matrices['L']
+    summaries = {}
+    with stage('stage_summary'):
+        for index, name in enumerate(strategies):
+            perms = result.permutations[:, index]
+            ok = result.success[:, index]
+            sugar = scheduled_values(S, perms)
+            summaries[name] = {
+                'yield': distribution_summary(result.yields[ok, index], STAGE_PERCENTILES),
+                'S': stage_summary(sugar),
+                'L': stage_summary(scheduled_values(L, perms)),
+                # Неудачные запуски (все этапы NaN) в накопленный выход не входят
+                'cumulative_S': np.nan_to_num(sugar[ok]).cumsum(axis=1).mean(axis=0) if ok.any()
+                                else np.full(config.num_stages, np.nan),
+            }
+        response = {
+            'experiments': num_experiments,
+            'stages': config.num_stages,
+            'seed': root.entropy,
+            'S': stage_summary(S),
+            'L': stage_summary(L),
+            'strategies': summaries,
+        }
+    if data.get('catalog'):
+        with stage('catalog'):
+            response['catalog_id'] = CATALOG.record(
+                'stage_summary', dataclasses.asdict(config), root.entropy, response,
+                {'yields': result.yields, 'permutations': result.permutations})
+    return json_response(response)
 
 @app.route('/optimize', methods=['POST'])
+@profiled
 def optimize():
     try:
         data = request.json
-        S_tilde = np.array(data['matrix'])
-        mass_per_batch = data.get('mass_per_batch', 1000.0)
+        with stage('config_parsing'):
+            S_tilde = np.array(data['matrix'])
+            mass_per_batch = data.get('mass_per_batch', 1000.0)
+            exact = data.get('exact', True)
 
-        n = S_tilde.shape[0]
-        nu = n // 2
+        # S может быть прямоугольной: n партий × m этапов
+        n = min(S_tilde.shape)
+        nu = S_tilde.shape[1] // 2
 
         results = {}
 
         # 1. Greedy
-        perm_greedy, yield_greedy = Optimizer.optimize_greedy(S_tilde)
+        with stage('optimizer.greedy'):
+            perm_greedy, yield_greedy = Optimizer.optimize_greedy(S_tilde)
         results['greedy'] = {
             'permutation': [int(x) for x in perm_greedy],
             'yield': float(yield_greedy),
@@ -464,7 +1050,8 @@ def optimize():
         }
 
         # 2. Thrifty
-        perm_thrifty, yield_thrifty = Optimizer.optimize_thrifty(S_tilde)
+        with stage('optimizer.thrifty'):
+            perm_thrifty, yield_thrifty = Optimizer.optimize_thrifty(S_tilde)
         results['thrifty'] = {
             'permutation': [int(x) for x in perm_thrifty],
             'yield': float(yield_thrifty),
@@ -472,7 +1059,8 @@ def optimize():
         }
 
         # 3. Thrifty/Greedy
-        perm_tg, yield_tg = Optimizer.optimize_thrifty_greedy(S_tilde, nu)
+        with stage('optimizer.thrifty_greedy'):
+            perm_tg, yield_tg = Optimizer.optimize_thrifty_greedy(S_tilde, nu)
         results['thrifty_greedy'] = {
             'permutation': [int(x) for x in perm_tg],
             'yield': float(yield_tg),
@@ -480,65 +1068,84 @@ def optimize():
         }
 
         # 4. Greedy/Thrifty
-        perm_gt, yield_gt = Optimizer.optimize_greedy_thrifty(S_tilde, nu)
+        with stage('optimizer.greedy_thrifty'):
+            perm_gt, yield_gt = Optimizer.optimize_greedy_thrifty(S_tilde, nu)
         results['greedy_thrifty'] = {
             'permutation': [int(x) for x in perm_gt],
             'yield': float(yield_gt),
             'final_mass': float(Optimizer.calculate_final_mass(yield_gt, mass_per_batch))
         }
 
-        # 5. Hungarian (optimal) - обернём вызов, если может падать
-        try:
-            perm_hungarian, yield_hungarian = Optimizer.optimize_hungarian(S_tilde)
-            results['optimal'] = {
-                'permutation': [int(x) for x in perm_hungarian],
-                'yield': float(yield_hungarian),
-                'final_mass': float(Optimizer.calculate_final_mass(yield_hungarian, mass_per_batch))
-            }
-        except Exception as e:
-            app.logger.warning("Hungarian optimization failed: %s", e)
-            results['optimal'] = {
-                'permutation': list(range(n)),
-                'yield': 0.0,
-                'final_mass': 0.0
-            }
-            yield_hungarian = 0.0
+        # Границы оптимума за O(n·m) - до венгерского алгоритма
+        with stage('optimizer.bounds'):
+            add_heuristic_bounds(S_tilde, results)
 
-        # 6. Hungarian min (notoptimal)
-        try:
-            perm_hungarian_min, yield_hungarian_min = Optimizer.optimize_hungarian_min(S_tilde)
-            results['notoptimal'] = {
-                'permutation': [int(x) for x in perm_hungarian_min],
-                'yield': float(yield_hungarian_min),
-                'final_mass': float(Optimizer.calculate_final_mass(yield_hungarian_min, mass_per_batch))
-            }
+        if exact:
+            # 5. Hungarian (optimal) - обернём вызов, если может падать
+            try:
+                with stage('optimizer.optimal'):
+                    perm_hungarian, yield_hungarian = Optimizer.optimize_hungarian(S_tilde)
+                results['optimal'] = {
+                    'permutation': [int(x) for x in perm_hungarian],
+                    'yield': float(yield_hungarian),
+                    'final_mass': float(Optimizer.calculate_final_mass(yield_hungarian, mass_per_batch))
+                }
+            except Exception as e:
+                app.logger.warning("Hungarian optimization failed: %s", e)
+                results['optimal'] = {
+                    'permutation': list(range(n)),
+                    'yield': 0.0,
+                    'final_mass': 0.0
+                }
+                yield_hungarian = 0.0
+
+            # 6. Hungarian min (notoptimal)
+            try:
+                with stage('optimizer.notoptimal'):
+                    perm_hungarian_min, yield_hungarian_min = Optimizer.optimize_hungarian_min(S_tilde)
+                results['notoptimal'] = {
+                    'permutation': [int(x) for x in perm_hungarian_min],
+                    'yield': float(yield_hungarian_min),
+                    'final_mass': float(Optimizer.calculate_final_mass(yield_hungarian_min, mass_per_batch))
+                }
         
-        except Exception as e:
-            app.logger.warning("Hungarian min optimization failed: %s", e)
-            results['notoptimal'] = {
-                'permutation': list(range(n)),
-                'yield': 0.0,
-                'final_mass': 0.0
-            }
-            yield_hungarian = 0.0
+            except Exception as e:
+                app.logger.warning("Hungarian min optimization failed: %s", e)
+                results['notoptimal'] = {
+                    'permutation': list(range(n)),
+                    'yield': 0.0,
+                    'final_mass': 0.0
+                }
+                yield_hungarian = 0.0
 
         # relative losses vs optimal
         yield_hungarian = locals().get('yield_hungarian', results.get('optimal', {}).get('yield', 0.0))
-        if yield_hungarian and yield_hungarian > 0:
+        if exact and yield_hungarian and yield_hungarian > 0:
             for key in results:
                 if key != 'optimal':
                     relative_loss = ((yield_hungarian - results[key]['yield']) / yield_hungarian) * 100
                     results[key]['relative_loss_percent'] = float(relative_loss)
 
-        # final conversion of any remaining numpy types
-        results_native = to_native(results)
-
-        return jsonify(results_native)
+        return json_response(results)
 
     except Exception as e:
         app.logger.exception("Optimization failed")
         return jsonify({'error': 'Optimization failed', 'message': str(e)}), 500
 
+def add_heuristic_bounds(S_tilde, results):
+    """
+    Add 'upper_bound' and 'guaranteed_gap_percent' to every heuristic in
+    `results` (all strategies except optimal/notoptimal); returns the bounds.
+    """
+    heuristics = {name: r['yield'] for name, r in results.items()
+                  if name not in EXACT_STRATEGIES and r.get('success', True)}
+    bounds = yield_bounds(S_tilde, heuristics)
+    for name in heuristics:
+        results[name]['upper_bound'] = bounds['upper_bound']
+        results[name]['guaranteed_gap_percent'] = guaranteed_gap_percent(
+            bounds['upper_bound'], results[name]['yield'])
+    return bounds
+
 def run_algorithm(algo_name, func, args, mass_per_batch):
     """
     Helper to run a single optimization algorithm safely.
@@ -546,10 +1153,11 @@ def run_algorithm(algo_name, func, args, mass_per_batch):
     """
     try:
         # Unpack args if it's a tuple/list, otherwise pass as single arg
-        if isinstance(args, (list, tuple)):
-            perm, yield_val = func(*args)
-        else:
-            perm, yield_val = func(args)
+        with stage(f'optimizer.{algo_name}'):
+            if isinstance(args, (list, tuple)):
+                perm, yield_val = func(*args)
+            else:
+                perm, yield_val = func(args)
             
         final_mass = Optimizer.calculate_final_mass(yield_val, mass_per_batch)
         return float(yield_val), float(final_mass), True
@@ -570,85 +1178,811 @@ def get_optimizer_map(S_tilde, nu):
         'notoptimal': (Optimizer.optimize_hungarian_min, S_tilde)
     }
 
+def optimize_sequentially(matrices, algorithm_names, mass_per_batch):
+    """Yield {algorithm: {'yield', 'final_mass', 'success'}} per matrix, in this process."""
+    for matrix_data in matrices:
+        with stage('config_parsing'):
+            S_tilde = np.array(matrix_data)
+        nu = S_tilde.shape[1] // 2
+
+        # Define algorithms and their arguments for this matrix
+        algo_map = get_optimizer_map(S_tilde, nu)
+        matrix_results = {}
+
+        for algo_name in algorithm_names:
+            func, args = algo_map[algo_name]
+            y_val, m_val, success = run_algorithm(algo_name, func, args, mass_per_batch)
+            matrix_results[algo_name] = {
+                'yield': y_val,
+                'final_mass': m_val,
+                'success': success
+            }
+        yield matrix_results
+
+def optimize_in_engine(S_stack, algorithm_names, mass_per_batch):
+    """Same records as optimize_sequentially, computed by the process pool (engine.py)."""
+    with stage('engine.optimize'):
+        result = get_engine().optimize(S_stack, algorithm_names)
+    for row in result.yields:
+        yield {
+            algo: {
+                'yield': 0.0 if np.isnan(y) else float(y),
+                'final_mass': 0.0 if np.isnan(y) else float(Optimizer.calculate_final_mass(y, mass_per_batch)),
+                'success': not np.isnan(y),
+            }
+            for algo, y in zip(algorithm_names, row)
+        }
+
+def summarize_aggregator(aggregator, algorithm_names):
+    """'averages' (with relative losses vs optimal) and 'statistics' for a StrategyAggregator."""
+    statistics = aggregator.to_dict()
+
+    # Calculate averages
+    averages = {}
+    for algo in algorithm_names:
+        yield_stats = statistics[algo]['yield']
+        averages[algo] = {
+            'yield': float(yield_stats['mean']),
+            'final_mass': float(statistics[algo]['final_mass']['mean']),
+            'success_count': yield_stats['count']
+        }
+
+    # Calculate relative losses vs optimal
+    if 'optimal' in averages and averages['optimal']['yield'] > 0:
+        for algo in algorithm_names:
+            if algo != 'optimal' and algo in averages:
+                relative_loss = ((averages['optimal']['yield'] - averages[algo]['yield']) /
+                                averages['optimal']['yield']) * 100
+                averages[algo]['relative_loss_percent'] = float(relative_loss)
+
+    return {
+        'averages': averages,
+        'statistics': statistics,  # mean/variance/p5/p50/p95 and win counts per strategy
+    }
+
 @app.route('/multi_optimize', methods=['POST'])
+@profiled
 def multi_optimize():
-    """Apply optimization algorithms to 50 matrices and return average results."""
+    """
+    Apply optimization algorithms to K matrices and return average results.
+    Statistics are aggregated in constant memory as results arrive;
+    per-matrix results are returned only if include_all_results is true.
+    """
     try:
         data = request.json
-        matrices = data['matrices']  # Array of 50 matrices
+        matrices = data['matrices']  # Array of K matrices
         mass_per_batch = data.get('mass_per_batch', 1000.0)
+        include_all_results = data.get('include_all_results', False)
         
-        if len(matrices) != 50:
-            return jsonify({'error': 'Exactly 50 matrices are required'}), 400
+        if not matrices:
+            return jsonify({'error': 'At least one matrix is required'}), 400
         
-        # Initialize accumulators for each algorithm
         algorithm_names = ['greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'optimal', 'notoptimal']
-        accumulators = {algo: {'yield_sum': 0.0, 'mass_sum': 0.0, 'count': 0} for algo in algorithm_names}
+        if not data.get('exact', True):
+            algorithm_names = [algo for algo in algorithm_names if algo not in EXACT_STRATEGIES]
+        aggregator = StrategyAggregator(algorithm_names, reference='optimal')
+        upper_bounds = StreamingSummary()
+        gaps = {algo: StreamingSummary() for algo in algorithm_names if algo not in EXACT_STRATEGIES}
         
-        all_results = []  # Store results for each matrix
+        all_results = [] if include_all_results else None  # Store results for each matrix
         
+        if parallel_requested(data):
+            with stage('config_parsing'):
+                try:
+                    S_stack = np.array(matrices, dtype=np.float64)
+                except ValueError:
+                    S_stack = None
+            if S_stack is None or S_stack.ndim != 3:
+                return jsonify({'error': 'parallel mode requires K matrices of the same size'}), 400
+            matrix_results_stream = optimize_in_engine(S_stack, algorithm_names, mass_per_batch)
+        else:
+            matrix_results_stream = optimize_sequentially(matrices, algorithm_names, mass_per_batch)
+
+        antithetic_pairs = bool(data.get('antithetic_pairs'))
+        per_matrix = {algo: [] for algo in algorithm_names} if antithetic_pairs else None
+
         # Process each matrix
-        for matrix_idx, matrix_data in enumerate(matrices):
-            S_tilde = np.array(matrix_data)
-            n = S_tilde.shape[0]
-            nu = n // 2
-            
-            # Define algorithms and their arguments for this matrix
-            algo_map = get_optimizer_map(S_tilde, nu)
-            matrix_results = {}
-            
-            for algo_name in algorithm_names:
-                func, args = algo_map[algo_name]
-                y_val, m_val, success = run_algorithm(algo_name, func, args, mass_per_batch)
-                
-                if success:
-                    accumulators[algo_name]['yield_sum'] += y_val
-                    accumulators[algo_name]['mass_sum'] += m_val
-                    accumulators[algo_name]['count'] += 1
-                
-                matrix_results[algo_name] = {
-                    'yield': y_val,
-                    'final_mass': m_val
-                }
-            
-            all_results.append(matrix_results)
-        
-        # Calculate averages
-        averages = {}
-        for algo in algorithm_names:
-            if accumulators[algo]['count'] > 0:
-                avg_yield = accumulators[algo]['yield_sum'] / accumulators[algo]['count']
-                avg_mass = accumulators[algo]['mass_sum'] / accumulators[algo]['count']
-                
-                averages[algo] = {
-                    'yield': float(avg_yield),
-                    'final_mass': float(avg_mass),
-                    'success_count': accumulators[algo]['count']
-                }
-            else:
-                averages[algo] = {
-                    'yield': 0.0,
-                    'final_mass': 0.0,
-                    'success_count': 0
-                }
-        
-        # Calculate relative losses vs optimal
-        if 'optimal' in averages and averages['optimal']['yield'] > 0:
-            for algo in algorithm_names:
-                if algo != 'optimal' and algo in averages:
-                    relative_loss = ((averages['optimal']['yield'] - averages[algo]['yield']) / 
-                                    averages['optimal']['yield']) * 100
-                    averages[algo]['relative_loss_percent'] = float(relative_loss)
+        for matrix_data, matrix_results in zip(matrices, matrix_results_stream):
+            aggregator.add(matrix_results)
+            with stage('optimizer.bounds'):
+                bounds = add_heuristic_bounds(np.asarray(matrix_data, dtype=np.float64), matrix_results)
+            upper_bounds.push(bounds['upper_bound'])
+            for algo, summary in gaps.items():
+                gap = matrix_results[algo].get('guaranteed_gap_percent')
+                if gap is not None:
+                    summary.push(gap)
+            if per_matrix is not None:
+                for algo, r in matrix_results.items():
+                    per_matrix[algo].append(r['yield'] if r['success'] else np.nan)
+            if all_results is not None:
+                all_results.append({
+                    algo: {'yield': r['yield'], 'final_mass': r['final_mass']}
+                    for algo, r in matrix_results.items()
+                })
         
-        return jsonify({
-            'averages': averages,
-            'all_results': all_results,  # Optional: detailed results for each matrix
-            'total_matrices': len(matrices)
-        })
+        response = dict(summarize_aggregator(aggregator, algorithm_names),
+                        total_matrices=len(matrices))
+        for algo, summary in gaps.items():
+            if summary.stats.count:
+                response['averages'][algo]['guaranteed_gap_percent'] = summary.stats.mean
+        response['bounds'] = {
+            'upper_bound': upper_bounds.to_dict(),
+            'guaranteed_gap_percent': {algo: summary.to_dict() for algo, summary in gaps.items()},
+        }
+        if per_matrix is not None:
+            response['variance_reduction'] = antithetic_report(per_matrix)
+        if all_results is not None:
+            response['all_results'] = all_results  # Optional: detailed results for each matrix
+        return json_response(response)
         
     except Exception as e:
         app.logger.exception("Multi-optimization failed")
         return jsonify({'error': 'Multi-optimization failed', 'message': str(e)}), 500
 
+@app.route('/adaptive_optimize', methods=['POST'])
+@profiled
+def adaptive_optimize():
+    """
+    Generate and optimize experiments in chunks until the CI of every
+    strategy's relative loss vs optimal is within `tolerance` (engine.py).
+    """
+    data = request.json
+
+    with stage('validation'):
+        errors = validate_config(data)
+        tolerance = data.get('tolerance', 0.5)
+        confidence = data.get('confidence', 0.95)
+        chunk_size = data.get('chunk_size', 50)
+        min_experiments = data.get('min_experiments')
+        max_experiments = data.get('max_experiments', 2000)
+        max_seconds = data.get('max_seconds', 60)
+        strategies = data.get('strategies', DEFAULT_ADAPTIVE_STRATEGIES)
+        # bool - подкласс int: True не должен проходить как 1
+        def number(x):
+            return isinstance(x, (int, float)) and not isinstance(x, bool) and np.isfinite(x)
+
+        def integer(x):
+            return isinstance(x, int) and not isinstance(x, bool)
+
+        if not number(tolerance) or tolerance <= 0:
+            errors.append("tolerance must be a positive number (percentage points)")
+        if not number(confidence) or not 0 < confidence < 1:
+            errors.append("confidence must be in (0, 1)")
+        if not integer(chunk_size) or chunk_size < 1:
+            errors.append("chunk_size must be a positive integer")
+        if not integer(max_experiments) or not 1 <= max_experiments <= MAX_ADAPTIVE_EXPERIMENTS:
+            errors.append(f"max_experiments must be in [1, {MAX_ADAPTIVE_EXPERIMENTS}]")
+        if min_experiments is not None and (not integer(min_experiments) or min_experiments < 1):
+            errors.append("min_experiments must be a positive integer")
+        elif min_experiments is not None and integer(max_experiments) and min_experiments > max_experiments:
+            errors.append("min_experiments must not exceed max_experiments")
+        # Через API бюджет времени обязателен, как и в /scaling_study
+        if not number(max_seconds) or not 0 < max_seconds <= MAX_ADAPTIVE_SECONDS:
+            errors.append(f"max_seconds must be in (0, {MAX_ADAPTIVE_SECONDS}]")
+        if (not isinstance(strategies, list) or 'optimal' not in strategies
+                or any(s not in STUDY_STRATEGIES for s in strategies)):
+            errors.append(f"strategies must include 'optimal' and be from: {', '.join(STUDY_STRATEGIES)}")
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    with stage('config_parsing'):
+        config = build_experiment_config(data)
+
+    checkpoint, seed = request_checkpoint('adaptive', data)
+    engine = get_engine() if parallel_requested(data) else ExperimentEngine(1)
+    with stage('engine.adaptive'):
+        aggregator, report = engine.run_adaptive(
+            config, strategies, tolerance, confidence=confidence, chunk_size=chunk_size,
+            min_experiments=min_experiments, max_experiments=max_experiments,
+            max_seconds=max_seconds, seed=seed,
+            mass_per_batch=data.get('mass_per_batch', config.m),
+            checkpoint=checkpoint,
+        )
+
+    response = dict(summarize_aggregator(aggregator, strategies),
+                    total_matrices=report['experiments'], adaptive=report)
+    if data.get('catalog'):
+        with stage('catalog'):
+            response['catalog_id'] = CATALOG.record('adaptive_optimize', dataclasses.asdict(config),
+                                                    report['root_seed'], response)
+    return json_response(response)
+
+@app.route('/compare_configs', methods=['POST'])
+@profiled
+def compare_configs():
+    """
+    Compare configurations (e.g. uniform vs concentrated) on common random
+    numbers and report paired differences with the variance reduction.
+    """
+    data = request.json
+
+    with stage('validation'):
+        errors = []
+        configs_data = data.get('configs')
+        num_experiments = data.get('K', 50)
+        strategies = data.get('strategies', DEFAULT_ADAPTIVE_STRATEGIES)
+        if not isinstance(configs_data, dict) or len(configs_data) < 2:
+            errors.append("configs must map at least two names to /simulate parameters")
+        else:
+            for name, config_data in configs_data.items():
+                if not isinstance(config_data, dict):
+                    errors.append(f"{name}: config must be an object")
+                    continue
+                errors.extend(f"{name}: {e}" for e in validate_config(config_data))
+            if not errors and len({(c['n'], c.get('stages') or c['n']) for c in configs_data.values()}) > 1:
+                errors.append("all configs must have the same n and stages")
+            if data.get('baseline') is not None and data['baseline'] not in configs_data:
+                errors.append("baseline must be one of configs")
+        if not isinstance(num_experiments, int) or not 2 <= num_experiments <= MAX_ADAPTIVE_EXPERIMENTS:
+            errors.append(f"K must be in [2, {MAX_ADAPTIVE_EXPERIMENTS}]")
+        if not isinstance(strategies, list) or not strategies or any(s not in STUDY_STRATEGIES for s in strategies):
+            errors.append(f"strategies must be from: {', '.join(STUDY_STRATEGIES)}")
+        errors.extend(validate_seed(data))
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    with stage('config_parsing'):
+        configs = {name: build_experiment_config(config_data) for name, config_data in configs_data.items()}
+
+    engine = get_engine() if parallel_requested(data) else ExperimentEngine(1)
+    with stage('engine.compare'):
+        results = engine.compare_configs(
+            configs, num_experiments, strategies, seed=data.get('seed'),
+            common_random_numbers=data.get('common_random_numbers', True),
+            antithetic=bool(data.get('antithetic')),
+        )
+
+    summaries = {}
+    for name, result in results.items():
+        aggregator = result.add_to(StrategyAggregator(strategies, reference='optimal'),
+                                   data.get('mass_per_batch', configs[name].m))
+        summaries[name] = summarize_aggregator(aggregator, strategies)
+
+    # Разности к базовой конфигурации, попарно по экспериментам
+    baseline = data.get('baseline') or next(iter(results))
+    others = [name for name in results if name != baseline]
+    differences = {
+        name: {
+            algo: {'yield': paired_variance_reduction(results[baseline].yields[:, j], results[name].yields[:, j])}
+            for j, algo in enumerate(strategies)
+        }
+        for name in others
+    }
+    return json_response({
+        'configs': summaries,
+        'baseline': baseline,
+        'differences': differences,
+        'total_matrices': num_experiments,
+        'common_random_numbers': data.get('common_random_numbers', True),
+    })
+
+@app.route('/sweep', methods=['POST'])
+@profiled
+def sweep():
+    """Monte Carlo over a grid of configurations; completed cells are cached (sweep.py)."""
+    data = request.json
+
+    with stage('validation'):
+        errors = (validate_sweep(data, MAX_SWEEP_CELLS, MAX_SWEEP_EXPERIMENTS) if isinstance(data, dict)
+                  else ["request body must be a JSON object"])
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    engine = get_engine() if parallel_requested(data) else ExperimentEngine(1)
+    with stage('engine.sweep'):
+        report = run_sweep(data, engine=engine, cache=SWEEP_CACHE)
+    return json_response(report)
+
+@app.route('/scaling_study', methods=['POST'])
+@profiled
+def scaling_study():
+    """Run every strategy over a geometric ladder of n and fit runtime exponents."""
+    data = request.get_json(silent=True) or {}
+
+    with stage('validation'):
+        errors = []
+        n_min = data.get('n_min', 10)
+        n_max = data.get('n_max', 500)
+        steps = data.get('steps', 5)
+        trials = data.get('trials', 3)
+        strategies = data.get('strategies')
+        max_seconds = data.get('max_seconds', 60)
+        fit_min_n = data.get('fit_min_n', 0)
+        if not all(isinstance(x, int) for x in (n_min, n_max, steps, trials)):
+            errors.append("n_min, n_max, steps and trials must be integers")
+        else:
+            if not 2 <= n_min <= n_max <= MAX_STUDY_N:
+                errors.append(f"need 2 <= n_min <= n_max <= {MAX_STUDY_N}")
+            if not 1 <= steps <= 50:
+                errors.append("steps must be in [1, 50]")
+            if not 1 <= trials <= MAX_STUDY_TRIALS:
+                errors.append(f"trials must be in [1, {MAX_STUDY_TRIALS}]")
+        if strategies is not None and (not isinstance(strategies, list)
+                                       or any(s not in STUDY_STRATEGIES for s in strategies)):
+            errors.append(f"strategies must be a list of: {', '.join(STUDY_STRATEGIES)}")
+        # Через API бюджет обязателен: без него запрос мог бы занять воркер надолго
+        if (isinstance(max_seconds, bool) or not isinstance(max_seconds, (int, float))
+                or not 0 < max_seconds <= MAX_STUDY_SECONDS):
+            errors.append(f"max_seconds must be in (0, {MAX_STUDY_SECONDS}]")
+        if isinstance(fit_min_n, bool) or not isinstance(fit_min_n, int) or fit_min_n < 0:
+            errors.append("fit_min_n must be a non-negative integer")
+        config_data = data.get('config')
+        if config_data is not None:
+            if not isinstance(config_data, dict):
+                errors.append("config must be an object")
+            else:
+                errors.extend(validate_config(dict(config_data, n=n_max if isinstance(n_max, int) else 0)))
+        errors.extend(validate_seed(data))
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    with stage('config_parsing'):
+        if config_data is not None:
+            config = build_experiment_config(dict(config_data, n=n_min))
+        else:
+            config = default_config(n_min)
+
+    report = run_scaling_study(
+        config, geometric_ladder(n_min, n_max, steps), trials,
+        strategies=strategies, seed=data.get('seed'), max_seconds=max_seconds,
+        fit_min_n=fit_min_n,
+    )
+    return json_response(report)
+
+@app.route('/multi_plant', methods=['POST'])
+@profiled
+def multi_plant():
+    """Distribute batches over several plants' (plant, stage) slots with every strategy."""
+    data = request.get_json(silent=True)
+
+    with stage('validation'):
+        errors = []
+        plants = []
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Validation failed', 'errors': ["request body must be a JSON object"]}), 400
+        plants_data = data.get('plants')
+        if not isinstance(plants_data, list) or not plants_data:
+            errors.append("plants must be a non-empty list")
+        else:
+            for k, item in enumerate(plants_data):
+                mass = item.get('mass') if isinstance(item, dict) else None
+                stages = item.get('stages') if isinstance(item, dict) else None
+                if (isinstance(mass, bool) or not isinstance(mass, (int, float)) or not np.isfinite(mass)
+                        or mass <= 0 or isinstance(stages, bool) or not isinstance(stages, int) or stages < 1):
+                    errors.append(f"plants[{k}] must have a positive mass and a positive integer number of stages")
+                else:
+                    plants.append(Plant(str(item.get('name', k)), float(mass), stages))
+        horizon = max((plant.stages for plant in plants), default=0)
+        slots = sum(plant.stages for plant in plants)
+        S = None
+        if 'matrix' in data:
+            try:
+                S = np.array(data['matrix'], dtype=float)
+            except (TypeError, ValueError):
+                S = None
+            if S is None or S.ndim != 2 or not S.size:
+                errors.append("matrix must be a non-empty n x m list of numbers")
+            elif not np.all(np.isfinite(S)):
+                errors.append("matrix must contain only finite numbers")
+            elif S.shape[1] < horizon:
+                errors.append(f"matrix must have at least {horizon} stage columns")
+        # Параметры стратегий проверяются здесь, а не ошибками типов внутри solve_multi_plant
+        for name, minimum in (('nu', 0), ('block_stages', 1), ('lookahead', 0)):
+            value = data.get(name)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+                errors.append(f"{name} must be an integer >= {minimum}")
+        if isinstance(data.get('nu'), int) and plants and data['nu'] > horizon:
+            errors.append(f"nu must be at most the number of stages ({horizon})")
+        strategies = data.get('strategies')
+        if strategies is None:
+            strategies = [s for s in PLANT_STRATEGIES if s != 'optimal' or slots <= MAX_EXACT_SLOTS]
+        if not isinstance(strategies, list) or not strategies or any(s not in PLANT_STRATEGIES for s in strategies):
+            errors.append(f"strategies must be from: {', '.join(PLANT_STRATEGIES)}")
+        elif 'optimal' in strategies and slots > MAX_EXACT_SLOTS:
+            errors.append(f"optimal is limited to {MAX_EXACT_SLOTS} slots; use 'decomposed'")
+        if 'matrix' not in data and not errors:
+            errors.extend(validate_config(dict(data, stages=horizon)))
+        elif 'matrix' in data:
+            errors.extend(validate_seed(data))
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    # Зерно нужно и с готовой матрицей: от него зависит стратегия random
+    seed = request_seed(data)
+    if S is None:
+        with stage('config_parsing'):
+            config = build_experiment_config(dict(data, stages=horizon))
+        experiment, _ = generate_single_experiment(config, np.random.SeedSequence(seed))
+        S = experiment['matrices']['S']
+
+    results = {}
+    shuffle_rng = random.Random(seed)
+    try:
+        for name in strategies:
+            with stage(f'multiplant.{name}'):
+                results[name] = solve_multi_plant(S, plants, name, nu=data.get('nu'),
+                                                  block_stages=data.get('block_stages'),
+                                                  lookahead=data.get('lookahead', 1), rng=shuffle_rng)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+
+    best = results.get('optimal', {}).get('final_mass')
+    if best:
+        for name, result in results.items():
+            if name != 'optimal':
+                result['relative_loss_percent'] = (best - result['final_mass']) / best * 100
+    return json_response(dict(seed=seed, slots=slots, batches=int(S.shape[0]), results=results))
+
+def online_event_errors(scheduler, data):
+    """Check all events up front so that a bad request leaves the session unchanged."""
+    def numbers(values, length):
+        return (isinstance(values, list) and len(values) == length
+                and all(isinstance(x, (int, float)) and np.isfinite(x) for x in values))
+
+    def waiting_batch(batch):
+        # True == 1 и 1.0 == 1: без проверки типа такие значения прошли бы проверку по множеству
+        return isinstance(batch, int) and not isinstance(batch, bool) and batch in waiting
+
+    errors = []
+    waiting = set(scheduler.remaining_batches())
+    remaining = scheduler.horizon - scheduler.stage
+    updates = data.get('updates', [])
+    new_batches = data.get('new_batches', [])
+    if not isinstance(updates, list) or not isinstance(new_batches, list):
+        return ["updates and new_batches must be lists"]
+    for k, update in enumerate(updates):
+        if not isinstance(update, dict) or not waiting_batch(update.get('batch')):
+            errors.append(f"updates[{k}]: batch must be one of the waiting batches")
+        elif not numbers(update.get('yields'), remaining):
+            errors.append(f"updates[{k}]: yields must be {remaining} numbers")
+    for k, batch in enumerate(new_batches):
+        if not isinstance(batch, dict) or not numbers(batch.get('yields'), remaining + k + 1) \
+                or not numbers(batch.get('extension'), remaining + k):
+            errors.append(f"new_batches[{k}]: need {remaining + k + 1} yields and {remaining + k} extension values")
+    if data.get('step'):
+        if remaining + len(new_batches) == 0:
+            errors.append("campaign is finished")
+        elif data.get('batch') is not None and not waiting_batch(data['batch']):
+            errors.append("batch must be one of the waiting batches")
+    return errors
+
+def online_state(session_id, scheduler, version):
+    return dict(scheduler.schedule(), session=session_id, version=version)
+
+@app.route('/random_baseline', methods=['POST'])
+@profiled
+def random_baseline():
+    """Yield distribution of random permutations and where strategies fall in it."""
+    data = request.get_json(silent=True)
+
+    with stage('validation'):
+        errors = []
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Validation failed', 'errors': ["request body must be a JSON object"]}), 400
+        try:
+            S = np.array(data.get('matrix'), dtype=float)
+        except (TypeError, ValueError):
+            S = None
+        if S is None or S.ndim != 2 or not S.size:
+            errors.append("matrix must be a non-empty n x m list of numbers")
+            S = None
+        elif not np.all(np.isfinite(S)):
+            errors.append("matrix must contain only finite numbers")
+        samples = data.get('samples', RANDOM_BASELINE_SAMPLES)
+        if isinstance(samples, bool) or not isinstance(samples, int) or not 1 <= samples <= MAX_BASELINE_SAMPLES:
+            errors.append(f"samples must be in [1, {MAX_BASELINE_SAMPLES}]")
+        elif S is not None and samples * max(S.shape) > MAX_BASELINE_CELLS:
+            errors.append(f"samples * max(n, m) must be at most {MAX_BASELINE_CELLS}")
+        strategies = data.get('strategies', DEFAULT_BASELINE_STRATEGIES)
+        if not isinstance(strategies, list) or any(s not in STUDY_STRATEGIES for s in strategies):
+            errors.append(f"strategies must be from: {', '.join(STUDY_STRATEGIES)}")
+        permutations = data.get('permutations', [])
+        if not isinstance(permutations, list):
+            errors.append("permutations must be a list")
+        errors.extend(validate_seed(data))
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    root = np.random.SeedSequence(request_seed(data))
+    with stage('optimizer.random_baseline'):
+        yields = Optimizer.random_baseline(S, samples, np.random.default_rng(root))
+    try:
+        with stage('optimizer.evaluate_permutations'):
+            own = Optimizer.evaluate_permutations(S, permutations) if permutations else []
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'Validation failed', 'errors': [f"permutations: {e}"]}), 400
+
+    compared = {}
+    shuffle_rng = random.Random(root.entropy)
+    for name in strategies:
+        with stage(f'optimizer.{name}'):
+            _, value = STUDY_STRATEGIES[name](S, S.shape[1] // 2, shuffle_rng)
+        compared[name] = {'yield': float(value), 'percentile_rank': percentile_rank(yields, value)}
+    return json_response({
+        'samples': samples,
+        'seed': root.entropy,
+        'yield': distribution_summary(yields),
+        'strategies': compared,
+        'permutations': [{'yield': float(value), 'percentile_rank': percentile_rank(yields, value)}
+                         for value in own],
+    })
+
+@app.route('/sensitivity', methods=['POST'])
+@profiled
+def sensitivity():
+    """Tolerance ranges of the optimal schedule from the assignment duals."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Validation failed', 'errors': ["request body must be a JSON object"]}), 400
+    try:
+        with stage('config_parsing'):
+            S = np.array(data.get('matrix'), dtype=float)
+        with stage('sensitivity'):
+            report = sensitivity_analysis(S, data.get('permutation'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+    if not data.get('entries', True):
+        del report['allowed_increase'], report['allowed_decrease']
+    return json_response(report)
+
+def stored_matrix(experiment_id):
+    """((name, matrix), None) of the stored experiment for ?matrix=, or (None, error response)."""
+    name = request.args.get('matrix', 'S')
+    if name not in MATRIX_NAMES:
+        return None, (jsonify({'error': 'Validation failed',
+                               'errors': [f"matrix must be one of: {', '.join(MATRIX_NAMES)}"]}), 400)
+    # Матрицы читаются с mmap из файлов хранилища: окно не требует пересчёта эксперимента
+    with stage('store'):
+        M = EXPERIMENT_STORE.matrix(experiment_id, name)
+    if M is None:
+        return None, (jsonify({'error': 'Unknown experiment'}), 404)
+    return (name, M), None
+
+@app.route('/experiments/<experiment_id>', methods=['GET'])
+def experiment_info(experiment_id):
+    """Description of a stored experiment."""
+    entry = EXPERIMENT_STORE.describe(experiment_id)
+    if entry is None:
+        return jsonify({'error': 'Unknown experiment'}), 404
+    return json_response(dict(entry, experiment_id=experiment_id))
+
+@app.route('/experiments/<experiment_id>/tile', methods=['GET'])
+@profiled
+def experiment_tile(experiment_id):
+    """A row/column window of one matrix of a stored experiment."""
+    row = request.args.get('row', 0, type=int)
+    col = request.args.get('col', 0, type=int)
+    rows = request.args.get('rows', 50, type=int)
+    cols = request.args.get('cols', 50, type=int)
+    if rows * cols > MAX_TILE_CELLS:
+        return jsonify({'error': 'Validation failed',
+                        'errors': [f"rows * cols must be at most {MAX_TILE_CELLS}"]}), 400
+    found, error = stored_matrix(experiment_id)
+    if error:
+        return error
+    name, M = found
+    try:
+        values = window(M, row, col, rows, cols)
+    except ValueError as e:
+        return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+    return json_response({'matrix': name, 'row': row, 'col': col, 'shape': list(M.shape), 'values': values})
+
+@app.route('/experiments/<experiment_id>/overview', methods=['GET'])
+@profiled
+def experiment_overview(experiment_id):
+    """Block mean/min/max of one matrix of a stored experiment."""
+    rows = request.args.get('rows', 64, type=int)
+    cols = request.args.get('cols', 64, type=int)
+    if not (1 <= rows <= MAX_OVERVIEW_BLOCKS and 1 <= cols <= MAX_OVERVIEW_BLOCKS):
+        return jsonify({'error': 'Validation failed',
+                        'errors': [f"rows and cols must be in [1, {MAX_OVERVIEW_BLOCKS}]"]}), 400
+    found, error = stored_matrix(experiment_id)
+    if error:
+        return error
+    name, M = found
+    with stage('overview'):
+        summary = overview(M, rows, cols)
+    return json_response(dict(summary, matrix=name, shape=list(M.shape)))
+
+@app.route('/online/start', methods=['POST'])
+def online_start():
+    """Start an online scheduling session for a campaign's S matrix."""
+    data = request.get_json(silent=True)
+
+    with stage('validation'):
+        errors = []
+        if not isinstance(data, dict):
+            errors.append("request body must be a JSON object")
+        else:
+            matrix = data.get('matrix')
+            nu = data.get('nu')
+            if (not isinstance(matrix, list) or not matrix or len(matrix) > MAX_ONLINE_N
+                    or any(not isinstance(row, list) or len(row) != len(matrix) for row in matrix)):
+                errors.append(f"matrix must be a square list of lists with n <= {MAX_ONLINE_N}")
+            if nu is not None and not isinstance(nu, int):
+                errors.append("nu must be an integer")
+    if errors:
+        return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+    try:
+        with stage('online.solve'):
+            scheduler = RollingScheduler(np.array(matrix, dtype=float),
+                                         data.get('strategy', 'optimal'), nu)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+    session_id = ONLINE_SESSIONS.create(scheduler)
+    return json_response(online_state(session_id, scheduler, 0))
+
+@app.route('/online/<session_id>', methods=['GET', 'DELETE'])
+def online_session(session_id):
+    """State of an online scheduling session, or remove it."""
+    if request.method == 'DELETE':
+        if not ONLINE_SESSIONS.remove(session_id):
+            return jsonify({'error': 'Unknown session'}), 404
+        return jsonify({'session': session_id, 'removed': True})
+    with ONLINE_SESSIONS.locked(session_id):
+        entry = ONLINE_SESSIONS.get(session_id)
+        if entry is None:
+            return jsonify({'error': 'Unknown session'}), 404
+        return json_response(online_state(session_id, *entry))
+
+@app.route('/online/<session_id>/sensitivity', methods=['GET'])
+def online_sensitivity(session_id):
+    """Tolerance ranges of the session's current optimal plan."""
+    with ONLINE_SESSIONS.locked(session_id):
+        entry = ONLINE_SESSIONS.get(session_id)
+        if entry is None:
+            return jsonify({'error': 'Unknown session'}), 404
+        scheduler, version = entry
+        try:
+            with stage('sensitivity'):
+                report = scheduler.sensitivity()
+        except ValueError as e:
+            return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+        return json_response(dict(report, session=session_id, version=version))
+
+@app.route('/online/<session_id>/events', methods=['POST'])
+def online_events(session_id):
+    """Apply measurements and new batches, optionally process the current stage."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Validation failed', 'errors': ["request body must be a JSON object"]}), 400
+    # Потоки этого процесса меняют сессию по очереди; другие процессы - через версию (commit)
+    with ONLINE_SESSIONS.locked(session_id):
+        entry = ONLINE_SESSIONS.get(session_id)
+        if entry is None:
+            return jsonify({'error': 'Unknown session'}), 404
+        scheduler, version = entry
+
+        with stage('validation'):
+            errors = online_event_errors(scheduler, data)
+        if errors:
+            return jsonify({'error': 'Validation failed', 'errors': errors}), 400
+
+        start = time.perf_counter()
+        try:
+            with stage('online.update'):
+                response = scheduler.apply(data)
+        except (TypeError, ValueError) as e:
+            # Часть событий могла примениться к кэшу в памяти: следующий запрос перечитает сохранённое состояние
+            ONLINE_SESSIONS.discard(session_id)
+            return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+        # В журнал - фактическая партия этапа: повтор событий не зависит от пересчёта плана
+        events = {'updates': data.get('updates', []), 'new_batches': data.get('new_batches', []),
+                  'step': 'decision' in response,
+                  'batch': response['decision']['batch'] if 'decision' in response else None}
+        try:
+            with stage('online.save'):
+                saved = ONLINE_SESSIONS.commit(session_id, scheduler, version + 1, events)
+        except FileNotFoundError:
+            ONLINE_SESSIONS.discard(session_id)
+            return jsonify({'error': 'Unknown session'}), 404
+        if not saved:
+            ONLINE_SESSIONS.discard(session_id)
+            return jsonify({'error': 'Conflict', 'message': (
+                f"session was changed by another request after version {version}; "
+                "reload it and resend the events")}), 409
+        response['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return json_response(dict(online_state(session_id, scheduler, version + 1), **response))
+
+def parse_time(value):
+    """Unix time from a number or an ISO date/datetime string (local time if naive)."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+@app.route('/catalog', methods=['GET'])
+def catalog_list():
+    """Recorded runs filtered by config fields and date, newest first."""
+    args = request.args
+    try:
+        filters = {}
+        for name in CATALOG_FIELDS:
+            value = args.get(name)
+            if value is None:
+                continue
+            if name in ('n', 'stages', 'seed'):
+                value = int(value)
+            elif name in ('enable_ripening', 'use_losses'):
+                value = value.lower() in ('1', 'true', 'yes')
+            filters[name] = value
+        since = parse_time(args['since']) if 'since' in args else None
+        until = parse_time(args['until']) if 'until' in args else None
+        limit = int(args.get('limit', DEFAULT_LIST_LIMIT))
+        offset = int(args.get('offset', 0))
+        if not 1 <= limit <= MAX_CATALOG_LIST or offset < 0:
+            raise ValueError(f"limit must be in [1, {MAX_CATALOG_LIST}] and offset non-negative")
+    except ValueError as e:
+        return jsonify({'error': 'Validation failed', 'errors': [str(e)]}), 400
+    with stage('catalog'):
+        runs = CATALOG.list(since, until, limit, offset, **filters)
+    return json_response({'runs': runs, 'count': len(runs)})
+
+@app.route('/catalog/<run_id>', methods=['GET', 'DELETE'])
+def catalog_entry(run_id):
+    """One recorded run with its config and summary; DELETE removes it."""
+    with stage('catalog'):
+        if request.method == 'DELETE':
+            if not CATALOG.delete(run_id):
+                return jsonify({'error': 'Unknown run'}), 404
+            return jsonify({'deleted': run_id})
+        entry = CATALOG.get(run_id)
+    if entry is None:
+        return jsonify({'error': 'Unknown run'}), 404
+    return json_response(entry)
+
+@app.route('/catalog/<run_id>/arrays/<name>', methods=['GET'])
+def catalog_array(run_id, name):
+    """An array stored with a recorded run."""
+    with stage('catalog'):
+        values = CATALOG.load_array(run_id, name)
+    if values is None:
+        return jsonify({'error': 'Unknown run or array'}), 404
+    return json_response({'name': name, 'shape': list(values.shape), 'values': np.asarray(values)})
+
+@app.route('/health', methods=['GET'])
+def health():
+    """Readiness probe for the Electron launcher: 'ready' turns true once solvers are warm."""
+    return jsonify(warmup.to_dict())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Request counts and latency/size histograms (JSON or ?format=prometheus)."""
+    if request.args.get('format') == 'prometheus':
+        return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+    return jsonify(metrics.to_dict())
+
+def parse_args(argv=None):
+    """Command-line options shared by `python app.py` and the bundled backend.exe."""
+    import argparse
+    from serving import default_workers
+
+    parser = argparse.ArgumentParser(description="Beet processing optimization backend")
+    parser.add_argument('--mode', choices=['dev', 'production'], default='dev',
+                        help="dev: Flask debug server; production: pre-forked multi-worker server")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="worker processes in production mode (default: CPU count)")
+    parser.add_argument('--threads', type=int, default=4,
+                        help="handler threads per worker in production mode")
+    parser.add_argument('--no-prewarm', dest='prewarm', action='store_false',
+                        help="dev mode: do not load scipy and warm up the solvers in the background")
+    return parser.parse_args(argv)
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    import multiprocessing
+    multiprocessing.freeze_support()  # пул engine.py в собранном backend.exe
+    args = parse_args()
+    if args.mode == 'production':
+        from serving import run_production
+        run_production(app, host=args.host, port=args.port,
+                       workers=args.workers, threads=args.threads)
+    else:
+        # С перезагрузчиком сервер работает в дочернем процессе (WERKZEUG_RUN_MAIN);
+        # прогреваем только его. Поток работает параллельно и не задерживает открытие сокета.
+        if args.prewarm and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            from serving import start_prewarm_thread
+            start_prewarm_thread()
+        app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
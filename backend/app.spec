@@ -9,7 +9,7 @@ a = Analysis(
     pathex=[os.path.join(os.getcwd(), 'backend')],
     binaries=[],
     datas=[],
-    hiddenimports=['flask', 'flask_cors', 'numpy', 'core.models', 'core.generators', 'core.losses', 'algorithms.optimizer'],
+    hiddenimports=['flask', 'flask_cors', 'numpy', 'scipy.optimize', 'serving', 'engine', 'sweep', 'core.models', 'core.generators', 'core.losses', 'algorithms.optimizer'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,303 @@
+"""
+===================================================================
+НАБОР БЕНЧМАРКОВ - ЗАМЕРЫ ГЕНЕРАТОРОВ, ПОТЕРЬ, ОПТИМИЗАТОРОВ И API
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Замеряет время работы:
+        - MatrixGenerator.generate_coefficients, generate_states
+        - LossModel.calculate_losses
+        - каждой стратегии Optimizer
+        - Flask endpoints (через app.test_client(), без сети)
+    на сетке размеров n ∈ {10, 100, 1000, 5000} и числа матриц
+    K ∈ {1, 50, 500}, записывает результаты в JSON и сравнивает их с
+    сохранённым базовым прогоном (baseline).
+
+ЗАПУСК (из папки backend):
+    python -m benchmarks.suite                         # полная сетка
+    python -m benchmarks.suite --sizes 10 100 --ks 1 50 --output out.json
+    python -m benchmarks.suite --save-baseline         # сохранить baseline
+    python -m benchmarks.suite --threshold 0.25        # упасть, если медиана
+                                                       # хуже baseline > 25%
+
+    Код возврата 1 означает регрессию относительно baseline: медиана
+    медленнее более чем на --threshold (доля) и более чем на --min-delta
+    секунд (порог шума таймера для микросекундных функций). Код 2 - нет
+    файла baseline (и не задан --save-baseline): baseline зависит от
+    машины, поэтому в репозитории его нет, и его сначала нужно снять.
+
+ФОРМАТ РЕЗУЛЬТАТОВ (JSON):
+    {
+        "meta": {"python": "...", "numpy": "...", "platform": "...", "timestamp": ...},
+        "results": [
+            {"name": "optimizer.greedy", "n": 100, "K": 1, "repeats": 5,
+             "best_seconds": 0.0012, "median_seconds": 0.0013},
+            ...
+        ],
+        "skipped": [{"name": "endpoint.multi_optimize", "n": 5000, "K": 50,
+                     "reason": "..."}]
+    }
+
+ОГРАНИЧЕНИЯ:
+    Ячейки, где n² · K превышает --max-elements (по умолчанию 1e7 для
+    endpoints), пропускаются: тело запроса с K матрицами n × n в JSON
+    не помещается в память.
+===================================================================
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.models import ExperimentConfig
+from core.generators import MatrixGenerator
+from core.losses import LossModel
+from algorithms.scaling import STUDY_STRATEGIES
+
+DEFAULT_SIZES = (10, 100, 1000, 5000)
+DEFAULT_KS = (1, 50, 500)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def benchmark_config(n: int) -> ExperimentConfig:
+    """Typical plant configuration used by all benchmarks."""
+    return ExperimentConfig(
+        n=n, m=1000.0, a_min=12.0, a_max=22.0, beta1=0.85, beta2=0.95,
+        distribution_type='concentrated', enable_ripening=n >= 4, v=2 if n >= 4 else None,
+        k_min=4.8, k_max=7.05, na_min=0.21, na_max=0.82,
+        n_content_min=1.58, n_content_max=2.8,
+    )
+
+
+def request_payload(n: int) -> dict:
+    return {
+        'n': n, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+        'distribution_type': 'concentrated', 'precision': 6,
+    }
+
+
+def time_call(fn: Callable[[], object], min_time: float = 0.2, max_repeats: int = 5,
+              min_sample: float = 0.001) -> Tuple[int, List[float]]:
+    """
+    Per-call timings of fn. One untimed warm-up call absorbs lazy imports
+    (scipy) and caches; fast functions are looped so that each sample lasts
+    at least min_sample seconds. Sampling stops after max_repeats samples or
+    once min_time seconds have been spent.
+    """
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    loops = 1 if first >= min_sample else max(1, int(min_sample / max(first, 1e-7)))
+
+    timings = []
+    spent = 0.0
+    while len(timings) < max_repeats and (not timings or spent < min_time):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed / loops)
+        spent += elapsed
+    return len(timings), timings
+
+
+def experiment_data(n: int):
+    """Batches, B and C for the benchmark configuration (fixed seed)."""
+    config = benchmark_config(n)
+    rng = np.random.default_rng(n)
+    batches = MatrixGenerator.generate_batches(config, rng)
+    B = MatrixGenerator.generate_coefficients(config, batches, rng)
+    C = MatrixGenerator.generate_states(batches, B)
+    return config, batches, B, C
+
+
+def _generator_setup(name: str, n: int):
+    def setup():
+        config, batches, B, C = experiment_data(n)
+        if name == 'generators.generate_coefficients':
+            return lambda: MatrixGenerator.generate_coefficients(config, batches)
+        if name == 'generators.generate_states':
+            return lambda: MatrixGenerator.generate_states(batches, B)
+        return lambda: LossModel.calculate_losses(batches, C, n)
+    return setup
+
+
+def _optimizer_setup(strategy: Callable, n: int):
+    def setup():
+        S = MatrixGenerator.generate_experiment(benchmark_config(n), np.random.default_rng(n))['matrices']['S']
+        return lambda: strategy(S, n // 2)
+    return setup
+
+
+def build_cases(sizes: Sequence[int], ks: Sequence[int], max_elements: float,
+                include_endpoints: bool = True):
+    """
+    Yield (name, n, K, setup) tuples; setup() prepares the data and returns
+    the callable to time, or raises SkipCase.
+    """
+    for n in sizes:
+        for name in ('generators.generate_coefficients', 'generators.generate_states',
+                     'losses.calculate_losses'):
+            yield (name, n, 1, _generator_setup(name, n))
+
+        for name, strategy in STUDY_STRATEGIES.items():
+            yield (f'optimizer.{name}', n, 1, _optimizer_setup(strategy, n))
+
+        if not include_endpoints:
+            continue
+
+        for name, K in (('endpoint.simulate', 1), ('endpoint.optimize', 1), ('endpoint.multi_simulate', 50)):
+            yield (name, n, K, _endpoint_setup(name, n, K, max_elements))
+        for K in ks:
+            yield ('endpoint.multi_optimize', n, K, _endpoint_setup('endpoint.multi_optimize', n, K, max_elements))
+
+
+class SkipCase(Exception):
+    """Raised by a case setup that cannot run within the configured limits."""
+
+
+def _endpoint_setup(name: str, n: int, K: int, max_elements: float):
+    def setup():
+        if n * n * K > max_elements:
+            raise SkipCase(f"n^2*K = {n * n * K:.3g} exceeds max_elements = {max_elements:.3g}")
+        from app import app
+
+        client = app.test_client()
+        payload = request_payload(n)
+        if name == 'endpoint.simulate':
+            path, body = '/simulate', payload
+        elif name == 'endpoint.multi_simulate':
+            path, body = '/multi_simulate', payload
+        else:
+            rng = np.random.default_rng(n)
+            config = benchmark_config(n)
+            matrices = [MatrixGenerator.generate_experiment(config, rng)['matrices']['S'].tolist()
+                        for _ in range(K)]
+            if name == 'endpoint.optimize':
+                path, body = '/optimize', {'matrix': matrices[0]}
+            else:
+                path, body = '/multi_optimize', {'matrices': matrices, 'include_all_results': False}
+        encoded = json.dumps(body)
+
+        def call():
+            response = client.post(path, data=encoded, content_type='application/json')
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+            return response.get_data()
+        return call
+    return setup
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES, ks: Sequence[int] = DEFAULT_KS,
+        max_elements: float = 1e7, min_time: float = 0.2, max_repeats: int = 5,
+        include_endpoints: bool = True, only: Optional[Sequence[str]] = None,
+        log=None) -> dict:
+    """Run all benchmark cases and return the results document."""
+    results, skipped = [], []
+    for name, n, K, setup in build_cases(sizes, ks, max_elements, include_endpoints):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        try:
+            fn = setup()
+        except SkipCase as e:
+            skipped.append({'name': name, 'n': n, 'K': K, 'reason': str(e)})
+            continue
+        repeats, timings = time_call(fn, min_time, max_repeats)
+        entry = {
+            'name': name, 'n': n, 'K': K, 'repeats': repeats,
+            'best_seconds': min(timings), 'median_seconds': statistics.median(timings),
+        }
+        results.append(entry)
+        if log:
+            log(f"{name:38s} n={n:<5d} K={K:<4d} median={entry['median_seconds']:.6f}s")
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta: float = 0.0) -> List[dict]:
+    """
+    Cases whose median time exceeds the baseline median by more than
+    `threshold` (relative, 0.25 = 25%) and by more than `min_delta` seconds.
+    Cases missing from either side are ignored.
+    """
+    reference = {(r['name'], r['n'], r['K']): r for r in baseline.get('results', [])}
+    regressions = []
+    for r in current.get('results', []):
+        base = reference.get((r['name'], r['n'], r['K']))
+        if base is None or base['median_seconds'] <= 0:
+            continue
+        ratio = r['median_seconds'] / base['median_seconds']
+        if ratio > 1.0 + threshold and r['median_seconds'] - base['median_seconds'] > min_delta:
+            regressions.append({
+                'name': r['name'], 'n': r['n'], 'K': r['K'],
+                'baseline_seconds': base['median_seconds'],
+                'current_seconds': r['median_seconds'],
+                'ratio': ratio,
+            })
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backend performance benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="values of n")
+    parser.add_argument('--ks', type=int, nargs='+', default=list(DEFAULT_KS), help="values of K for /multi_optimize")
+    parser.add_argument('--only', nargs='+', help="run only cases whose name starts with one of these prefixes")
+    parser.add_argument('--no-endpoints', dest='endpoints', action='store_false', help="skip Flask endpoint cases")
+    parser.add_argument('--max-elements', type=float, default=1e7,
+                        help="skip endpoint cells with n^2*K above this")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds spent per case")
+    parser.add_argument('--max-repeats', type=int, default=5)
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the results JSON")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline results JSON")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed relative slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument('--min-delta', type=float, default=1e-4,
+                        help="ignore slowdowns smaller than this many seconds (timer noise)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Без baseline сравнивать не с чем: проверка регрессий не должна молча проходить
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one", file=sys.stderr)
+        return 2
+
+    document = run(args.sizes, args.ks, args.max_elements, args.min_time, args.max_repeats,
+                   args.endpoints, args.only, log=lambda line: print(line, file=sys.stderr))
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(document, baseline, args.threshold, args.min_delta)
+    for r in regressions:
+        print(f"REGRESSION {r['name']} n={r['n']} K={r['K']}: "
+              f"{r['baseline_seconds']:.6f}s -> {r['current_seconds']:.6f}s (x{r['ratio']:.2f})",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+===================================================================
+КОМАНДНАЯ СТРОКА - ПАКЕТНЫЙ ЗАПУСК МОНТЕ-КАРЛО БЕЗ СЕРВЕРА
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Запускает генерацию матриц и все стратегии оптимизации для K
+    экспериментов напрямую, без Flask, HTTP и JSON-сериализации в цикле.
+    Эксперименты распределяются по процессам (по умолчанию - по всем ядрам)
+    движком с общей памятью (engine.py).
+    Предназначен для долгих (ночных) расчётов на серверах без браузера.
+
+ИСПОЛЬЗОВАНИЕ (из папки backend):
+    python cli.py --config plant.json -K 10000 --output results/
+    python cli.py --config plant.json -K 500 --workers 8 --seed 42 \\
+                  --strategies greedy thrifty tkg optimal --save-matrices
+
+    plant.json - параметры в формате запроса POST /simulate
+    (проверяются той же функцией validate_config, core/config.py).
+
+ВЫХОДНЫЕ ФАЙЛЫ (в папке --output):
+    results.npz   - сжатый архив numpy:
+                      strategies    (s,)       имена стратегий
+                      yields        (K, s)     выход сахара S(σ)
+                      final_masses  (K, s)     итоговая масса
+                      permutations  (K, s, m)  партия на каждом из m этапов (0-based, -1 - нет)
+                      root_seed     ()         корневое зерно (строкой: оно может
+                                               не помещаться в int64)
+                      S             (K, n, m)  матрицы S (только с --save-matrices)
+    results.csv   - одна строка на (эксперимент, стратегия):
+                    experiment,strategy,yield,final_mass,relative_loss_percent
+    summary.json  - потоковые агрегаты StrategyAggregator (как "statistics"
+                    в /multi_optimize) и параметры запуска
+
+АДАПТИВНЫЙ РЕЖИМ (--tolerance):
+    Эксперименты запускаются шагами по --adaptive-chunk, пока полуширина
+    доверительного интервала относительных потерь каждой стратегии к
+    optimal не станет <= --tolerance (процентные пункты), либо не будет
+    достигнут -K (максимум) или --max-seconds. Достигнутая точность
+    пишется в summary.json ("adaptive").
+
+АНТИТЕТИЧЕСКИЕ ПАРЫ (--antithetic):
+    Эксперименты (2k, 2k+1) генерируются из одних случайных чисел U и 1-U
+    (core/generators.py, AntitheticRNG). В summary.json добавляется
+    "variance_reduction" - во сколько раз пары уменьшают дисперсию
+    среднего выхода и потерь по сравнению с независимыми экспериментами.
+    С --tolerance не сочетается.
+
+КОНТРОЛЬНЫЕ ТОЧКИ (--checkpoint-interval, по умолчанию 60 с):
+    Готовые эксперименты сохраняются в <output>/checkpoint.npz
+    (core/checkpoint.py). Если прогон прерван, повторите ту же команду:
+    посчитанные эксперименты будут пропущены, а результат совпадёт с
+    непрерывным прогоном. Без --seed зерно берётся из контрольной точки.
+    После успешного завершения файл удаляется.
+
+ВОСПРОИЗВОДИМОСТЬ:
+    Зерно эксперимента i выводится из --seed через
+    numpy.random.SeedSequence(seed).spawn(K)[i], поэтому результат
+    эксперимента не зависит от числа процессов и порядка их выполнения.
+    Стратегия random перемешивает с тем же зерном.
+===================================================================
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from core.checkpoint import Checkpoint
+from core.config import validate_config, build_experiment_config
+from core.stats import StrategyAggregator, antithetic_report
+from algorithms.optimizer import Optimizer
+from algorithms.scaling import STUDY_STRATEGIES
+from engine import ExperimentEngine
+
+# Стратегии по умолчанию - те же, что в /multi_optimize
+DEFAULT_STRATEGIES = ('greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'optimal', 'notoptimal')
+
+
+def run_batch(config, num_experiments: int, strategies: Sequence[str] = DEFAULT_STRATEGIES,
+              workers: Optional[int] = None, seed: Optional[int] = None,
+              save_matrices: bool = False, chunk_size: Optional[int] = None,
+              antithetic: bool = False, checkpoint: Optional[Checkpoint] = None, log=None) -> dict:
+    """
+    Run num_experiments experiments in the shared-memory engine (engine.py);
+    workers=1 runs in-process. Results are ordered by experiment index.
+    """
+    with ExperimentEngine(workers, chunk_size=chunk_size) as engine:
+        result = engine.run(config, num_experiments, strategies, seed=seed,
+                            keep=('S',) if save_matrices else (), antithetic=antithetic,
+                            checkpoint=checkpoint, log=log)
+    return {
+        'strategies': result.strategies,
+        'yields': result.yields,
+        'permutations': result.permutations,
+        'S': result.matrices.get('S'),
+        'root_seed': result.root_seed,
+        'elapsed_seconds': result.elapsed_seconds,
+    }
+
+
+def run_adaptive_batch(config, max_experiments: int, tolerance: float,
+                       strategies: Sequence[str] = DEFAULT_STRATEGIES,
+                       workers: Optional[int] = None, seed: Optional[int] = None,
+                       save_matrices: bool = False, chunk_size: Optional[int] = None,
+                       adaptive_chunk: int = 200, confidence: float = 0.95,
+                       max_seconds: Optional[float] = None, checkpoint: Optional[Checkpoint] = None,
+                       log=None) -> dict:
+    """
+    Like run_batch, but stops once every relative-loss CI half-width is
+    within `tolerance` (engine.run_adaptive); max_experiments is the cap.
+    """
+    chunks = []
+    with ExperimentEngine(workers, chunk_size=chunk_size) as engine:
+        _, report = engine.run_adaptive(config, strategies, tolerance, confidence=confidence,
+                                        chunk_size=adaptive_chunk, max_experiments=max_experiments,
+                                        max_seconds=max_seconds, seed=seed,
+                                        keep=('S',) if save_matrices else (),
+                                        on_chunk=chunks.append, checkpoint=checkpoint, log=log)
+    return {
+        'strategies': list(strategies),
+        'yields': np.concatenate([c.yields for c in chunks]),
+        'permutations': np.concatenate([c.permutations for c in chunks]),
+        'S': np.concatenate([c.matrices['S'] for c in chunks]) if save_matrices else None,
+        'root_seed': report['root_seed'],
+        'elapsed_seconds': report['elapsed_seconds'],
+        'adaptive': report,
+    }
+
+
+def summarize(result: dict, mass_per_batch: float) -> dict:
+    """StrategyAggregator statistics over all experiments (as in /multi_optimize)."""
+    strategies = result['strategies']
+    aggregator = StrategyAggregator(strategies, reference='optimal')
+    for row in result['yields']:
+        aggregator.add({
+            name: {'yield': float(y), 'final_mass': Optimizer.calculate_final_mass(float(y), mass_per_batch),
+                   'success': not np.isnan(y)}
+            for name, y in zip(strategies, row)
+        })
+    return aggregator.to_dict()
+
+
+def write_outputs(result: dict, output_dir: str, mass_per_batch: float,
+                  formats: Sequence[str] = ('npz', 'csv')) -> List[str]:
+    """Write results.npz / results.csv into output_dir; returns the written paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    strategies = result['strategies']
+    yields = result['yields']
+    final_masses = Optimizer.calculate_final_mass(yields, mass_per_batch)  # поэлементно для массива
+    written = []
+
+    if 'npz' in formats:
+        path = os.path.join(output_dir, 'results.npz')
+        arrays = {
+            'strategies': np.array(strategies),
+            'yields': yields,
+            'final_masses': final_masses,
+            'permutations': result['permutations'],
+            'root_seed': np.array(str(result['root_seed'])),
+        }
+        if result.get('S') is not None:
+            arrays['S'] = result['S']
+        np.savez_compressed(path, **arrays)
+        written.append(path)
+
+    if 'csv' in formats:
+        path = os.path.join(output_dir, 'results.csv')
+        reference = yields[:, strategies.index('optimal')] if 'optimal' in strategies else None
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['experiment', 'strategy', 'yield', 'final_mass', 'relative_loss_percent'])
+            for i in range(len(yields)):
+                best = reference[i] if reference is not None else 0.0
+                for j, name in enumerate(strategies):
+                    loss = (best - yields[i, j]) / best * 100 if best > 0 else ''
+                    writer.writerow([i, name, repr(float(yields[i, j])), repr(float(final_masses[i, j])),
+                                     repr(float(loss)) if loss != '' else ''])
+        written.append(path)
+
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Headless batch runner: generation + optimization for K experiments")
+    parser.add_argument('--config', required=True, help="JSON file with /simulate parameters")
+    parser.add_argument('-K', '--experiments', type=int, default=50, help="number of experiments")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processes (default: all cores)")
+    parser.add_argument('--seed', type=int, help="root seed (default: fresh entropy)")
+    parser.add_argument('--strategies', nargs='+', choices=list(STUDY_STRATEGIES), default=list(DEFAULT_STRATEGIES))
+    parser.add_argument('--output', default='results', help="output directory")
+    parser.add_argument('--formats', nargs='+', choices=['npz', 'csv'], default=['npz', 'csv'])
+    parser.add_argument('--save-matrices', action='store_true', help="store all S matrices in results.npz")
+    parser.add_argument('--chunk-size', type=int, help="experiments per worker task")
+    parser.add_argument('--tolerance', type=float,
+                        help="adaptive mode: stop when every relative-loss CI half-width (pp) is within this; "
+                             "-K becomes the maximum")
+    parser.add_argument('--confidence', type=float, default=0.95, help="adaptive mode: CI level")
+    parser.add_argument('--adaptive-chunk', type=int, default=200, help="adaptive mode: experiments per step")
+    parser.add_argument('--max-seconds', type=float, help="adaptive mode: time budget")
+    parser.add_argument('--checkpoint-interval', type=float, default=60,
+                        help="seconds between checkpoints in <output>/checkpoint.npz (0 disables)")
+    parser.add_argument('--antithetic', action='store_true',
+                        help="generate experiments (2k, 2k+1) as antithetic pairs and report the variance reduction")
+    args = parser.parse_args(argv)
+    # Адаптивный режим генерирует независимые эксперименты: пары молча потерялись бы
+    if args.tolerance is not None and args.antithetic:
+        parser.error("--antithetic cannot be combined with --tolerance")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with open(args.config) as f:
+        data = json.load(f)
+    errors = validate_config(data)
+    if args.experiments < 1:
+        errors.append("K must be positive")
+    if errors:
+        for e in errors:
+            print(f"error: {e}", file=sys.stderr)
+        return 2
+    config = build_experiment_config(data)
+
+    checkpoint = None
+    seed = args.seed
+    if args.checkpoint_interval > 0:
+        checkpoint = Checkpoint(os.path.join(args.output, 'checkpoint.npz'), args.checkpoint_interval)
+        meta = checkpoint.read_meta()
+        if seed is None and meta is not None:
+            seed = meta.get('root_seed')  # продолжение прерванного прогона без --seed
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    log = lambda line: print(line, file=sys.stderr)
+    if args.tolerance is not None:
+        if 'optimal' not in args.strategies:
+            print("error: adaptive mode needs the 'optimal' strategy", file=sys.stderr)
+            return 2
+        result = run_adaptive_batch(config, args.experiments, args.tolerance, args.strategies,
+                                    args.workers, seed, args.save_matrices, args.chunk_size,
+                                    args.adaptive_chunk, args.confidence, args.max_seconds,
+                                    checkpoint, log=log)
+    else:
+        result = run_batch(config, args.experiments, args.strategies, args.workers, seed,
+                           args.save_matrices, args.chunk_size, args.antithetic, checkpoint, log=log)
+    paths = write_outputs(result, args.output, config.m, args.formats)
+
+    summary = {
+        'config': data,
+        'experiments': len(result['yields']),
+        'seed': seed,
+        'workers': args.workers,
+        'elapsed_seconds': result['elapsed_seconds'],
+        'statistics': summarize(result, config.m),
+    }
+    if 'adaptive' in result:
+        summary['adaptive'] = result['adaptive']
+    if args.antithetic:
+        summary['variance_reduction'] = antithetic_report(
+            {name: result['yields'][:, j] for j, name in enumerate(result['strategies'])})
+    summary_path = os.path.join(args.output, 'summary.json')
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    paths.append(summary_path)
+
+    for path in paths:
+        log(f"wrote {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
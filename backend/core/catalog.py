@@ -0,0 +1,200 @@
+"""
+===================================================================
+КАТАЛОГ РАСЧЁТОВ - SQLITE-ИНДЕКС КОНФИГУРАЦИЙ, ЗЕРЕН И ИТОГОВ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Результаты расчётов нигде не сохранялись: чтобы сравнить новый
+    прогон с прошлым, прошлый приходилось запускать заново. Catalog
+    записывает каждый отмеченный расчёт - вид (endpoint), конфигурацию,
+    зерно, итоговую сводку и ссылки на файлы массивов - в базу SQLite с
+    индексами по основным полям конфигурации и по времени. Найти прошлый
+    расчёт - запрос к индексу, а не повторный прогон.
+
+СХЕМА:
+    Таблица runs: id, kind, created_at (unix-время), n, stages,
+    distribution_type, enable_ripening, use_losses, seed - отдельные
+    индексируемые столбцы (CATALOG_FIELDS); config, summary и arrays -
+    JSON. Массивы (выходы, перестановки) лежат отдельными файлами .npy в
+    <directory>/arrays/<id>/ и читаются с mmap: строка каталога хранит
+    только имена и формы.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.catalog import Catalog
+
+    catalog = Catalog('catalog')          # папка базы и массивов
+    run_id = catalog.record('stage_summary', config, seed=42, summary={...},
+                            arrays={'yields': yields})
+    catalog.list(n=100, distribution_type='uniform', since=time.time() - 86400)
+    catalog.get(run_id)                   # {'config': ..., 'summary': ..., 'arrays': {...}}
+    catalog.load_array(run_id, 'yields')
+
+    Через API: "catalog": true в /stage_summary и /adaptive_optimize,
+    GET /catalog, GET/DELETE /catalog/<id>, GET /catalog/<id>/arrays/<name>
+    (см. app.py)
+
+ВАЖНО:
+    - База: <directory>/catalog.sqlite в режиме WAL; у каждой операции
+      своё соединение, поэтому каталог общий для потоков и воркеров
+      serving.py. Каталог всегда на диске: в памяти процесса он не
+      переживал бы перезапуск и не был бы виден другим воркерам.
+    - Сводка записывается через core/serialization.py: NaN и inf
+      хранятся как null, как и в ответах API.
+    - Массивы пишутся до строки каталога: строка всегда ссылается на
+      готовые файлы.
+===================================================================
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .serialization import dumps
+
+# Индексируемые поля конфигурации (столбцы таблицы runs)
+CATALOG_FIELDS = ('kind', 'n', 'stages', 'distribution_type', 'enable_ripening', 'use_losses', 'seed')
+
+DEFAULT_LIST_LIMIT = 100
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    n INTEGER,
+    stages INTEGER,
+    distribution_type TEXT,
+    enable_ripening INTEGER,
+    use_losses INTEGER,
+    seed TEXT,
+    config TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    arrays TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_shape ON runs (n, stages, created_at);
+CREATE INDEX IF NOT EXISTS runs_kind ON runs (kind, created_at);
+CREATE INDEX IF NOT EXISTS runs_distribution ON runs (distribution_type, created_at);
+'''
+
+
+def _row(row: sqlite3.Row, full: bool) -> dict:
+    entry = {name: row[name] for name in ('id', 'created_at') + CATALOG_FIELDS}
+    for name in ('enable_ripening', 'use_losses'):
+        if entry[name] is not None:
+            entry[name] = bool(entry[name])
+    # Зерно хранится строкой: entropy SeedSequence может не помещаться в INTEGER
+    if entry['seed'] is not None:
+        entry['seed'] = int(entry['seed'])
+    entry['arrays'] = json.loads(row['arrays'])
+    if full:
+        entry['config'] = json.loads(row['config'])
+        entry['summary'] = json.loads(row['summary'])
+    return entry
+
+
+class Catalog:
+    """Recorded runs in an indexed SQLite table; arrays as .npy files beside it."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(os.path.join(self.directory, 'catalog.sqlite'), timeout=30)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _array_dir(self, run_id: str) -> str:
+        return os.path.join(self.directory, 'arrays', run_id)
+
+    def record(self, kind: str, config: dict, seed: Optional[int] = None, summary: Optional[dict] = None,
+               arrays: Optional[Dict[str, np.ndarray]] = None) -> str:
+        """Store one run; `config` is the request's experiment parameters. Returns the run id."""
+        run_id = uuid.uuid4().hex
+        arrays = {name: np.asarray(value) for name, value in (arrays or {}).items()}
+        if arrays:
+            os.makedirs(self._array_dir(run_id), exist_ok=True)
+            for name, value in arrays.items():
+                np.save(os.path.join(self._array_dir(run_id), f'{name}.npy'), value)
+        shapes = {name: {'shape': list(value.shape), 'dtype': str(value.dtype)} for name, value in arrays.items()}
+        stages = config.get('stages') or config.get('n')
+        with self._connect() as db:
+            db.execute(
+                'INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (run_id, kind, time.time(), config.get('n'), stages, config.get('distribution_type'),
+                 None if config.get('enable_ripening') is None else int(bool(config['enable_ripening'])),
+                 None if config.get('use_losses') is None else int(bool(config['use_losses'])),
+                 None if seed is None else str(seed),
+                 dumps(config).decode(), dumps(summary or {}).decode(), json.dumps(shapes)),
+            )
+        return run_id
+
+    def list(self, since: Optional[float] = None, until: Optional[float] = None,
+             limit: int = DEFAULT_LIST_LIMIT, offset: int = 0, **fields) -> List[dict]:
+        """
+        Runs matching the CATALOG_FIELDS filters, recorded in [since, until)
+        (unix time), newest first; without config and summary.
+        """
+        unknown = set(fields) - set(CATALOG_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown catalog fields: {', '.join(sorted(unknown))}")
+        clauses, params = [], []
+        for name, value in fields.items():
+            if value is None:
+                continue
+            if name in ('enable_ripening', 'use_losses'):
+                value = int(bool(value))
+            elif name == 'seed':
+                value = str(value)
+            clauses.append(f'{name} = ?')
+            params.append(value)
+        if since is not None:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('created_at < ?')
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._connect() as db:
+            rows = db.execute(
+                f'SELECT id, created_at, {", ".join(CATALOG_FIELDS)}, arrays FROM runs {where} '
+                'ORDER BY created_at DESC, rowid DESC LIMIT ? OFFSET ?', params + [limit, offset]).fetchall()
+        return [_row(row, full=False) for row in rows]
+
+    def get(self, run_id: str) -> Optional[dict]:
+        """Full entry (with config and summary), or None for an unknown id."""
+        with self._connect() as db:
+            row = db.execute('SELECT * FROM runs WHERE id = ?', (run_id,)).fetchone()
+        return None if row is None else _row(row, full=True)
+
+    def load_array(self, run_id: str, name: str) -> Optional[np.ndarray]:
+        """A stored array (memory-mapped from its file), or None if the run has no such array."""
+        entry = self.get(run_id)
+        if entry is None or name not in entry['arrays']:
+            return None
+        return np.load(os.path.join(self._array_dir(run_id), f'{name}.npy'), mmap_mode='r')
+
+    def delete(self, run_id: str) -> bool:
+        """Remove a run and its array files; False for an unknown id."""
+        with self._connect() as db:
+            deleted = db.execute('DELETE FROM runs WHERE id = ?', (run_id,)).rowcount
+        # Папка удаляется только для найденной записи: id из URL не должен указывать куда угодно
+        if deleted:
+            shutil.rmtree(self._array_dir(run_id), ignore_errors=True)
+        return bool(deleted)
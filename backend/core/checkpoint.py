@@ -0,0 +1,103 @@
+"""
+===================================================================
+КОНТРОЛЬНЫЕ ТОЧКИ - СОХРАНЕНИЕ И ПРОДОЛЖЕНИЕ ДОЛГИХ РАСЧЁТОВ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Многочасовой прогон Монте-Карло теряется целиком, если процесс
+    backend завершился (сон ноутбука, снятие процесса PyInstaller).
+    Checkpoint периодически сохраняет на диск уже посчитанные
+    эксперименты (выходы, перестановки, при необходимости матрицы),
+    а при повторном запуске того же расчёта отдаёт их обратно.
+    Зерно эксперимента i зависит только от корневого зерна и i
+    (engine.py), поэтому продолженный расчёт даёт тот же результат,
+    что и непрерывный.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.checkpoint import Checkpoint, fingerprint
+
+    checkpoint = Checkpoint('run.ckpt.npz', interval=60)
+    key = fingerprint({'config': ..., 'K': 1000, 'seed': ...})
+    state = checkpoint.load(key)          # None - начать сначала
+    ...
+    if checkpoint.due():
+        checkpoint.save(key, {'yields': yields, 'done': done}, meta={...})
+    checkpoint.remove()                    # расчёт завершён
+
+    Движок: ExperimentEngine.run(..., checkpoint=...) и
+    run_adaptive(..., checkpoint=...).
+
+ФОРМАТ ФАЙЛА:
+    Архив numpy (.npz): сохранённые массивы и массив '__meta__' - строка
+    JSON с отпечатком расчёта ("fingerprint") и полями meta.
+
+ВАЖНО:
+    - Запись атомарна (временный файл + os.replace): процесс, убитый во
+      время записи, оставляет предыдущую контрольную точку целой.
+    - Контрольная точка с другим отпечатком (изменились параметры или
+      зерно) не используется и будет перезаписана.
+===================================================================
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def fingerprint(payload: dict) -> str:
+    """Stable SHA-256 of a JSON-serializable description of a run."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Checkpoint:
+    """Arrays of a partially completed run, persisted at most every `interval` seconds."""
+
+    def __init__(self, path: str, interval: float = 60.0):
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_save >= self.interval
+
+    def read_meta(self) -> Optional[dict]:
+        """Meta of the stored checkpoint regardless of its fingerprint (None if absent or unreadable)."""
+        try:
+            with np.load(self.path) as archive:
+                return json.loads(str(archive['__meta__']))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def load(self, key: str) -> Optional[Dict[str, object]]:
+        """Stored arrays plus 'meta', or None if absent, unreadable or from another run."""
+        try:
+            with np.load(self.path) as archive:
+                meta = json.loads(str(archive['__meta__']))
+                if meta.get('fingerprint') != key:
+                    return None
+                state = {name: archive[name] for name in archive.files if name != '__meta__'}
+        except (OSError, ValueError, KeyError):
+            return None
+        state['meta'] = meta
+        return state
+
+    def save(self, key: str, arrays: Dict[str, np.ndarray], meta: Optional[dict] = None) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:  # объект файла: np.savez не добавит ".npz" к имени
+            np.savez(f, __meta__=np.array(json.dumps(dict(meta or {}, fingerprint=key))), **arrays)
+        os.replace(tmp, self.path)
+        self._last_save = time.monotonic()
+
+    def remove(self) -> None:
+        for path in (self.path, self.path + '.tmp'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
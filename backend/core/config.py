@@ -0,0 +1,146 @@
+"""
+===================================================================
+КОНФИГУРАЦИЯ ЭКСПЕРИМЕНТА - ВАЛИДАЦИЯ И СБОРКА ИЗ СЛОВАРЯ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Проверка параметров эксперимента и сборка ExperimentConfig из словаря
+    в формате запроса POST /simulate. Вынесено из app.py, чтобы те же
+    правила и значения по умолчанию использовались без Flask: в
+    командной строке (cli.py, algorithms/scaling.py) и в API.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.config import validate_config, build_experiment_config
+
+    errors = validate_config(data)     # список сообщений, [] если всё верно
+    if not errors:
+        config = build_experiment_config(data)
+===================================================================
+"""
+
+from .models import ExperimentConfig
+from .serialization import MAX_PRECISION, BATCH_LAYOUTS
+
+
+def validate_config(data):
+    """Validate input parameters according to task.md requirements."""
+    errors = []
+    
+    # Basic validations
+    n = data.get('n')
+    if not n or n <= 0:
+        errors.append("n must be positive integer")
+    
+    m = data.get('m')
+    if not m or m <= 0:
+        errors.append("M (mass per batch) must be positive")
+
+    # Number of stages (optional): n batches over `stages` stages
+    stages = data.get('stages')
+    if stages is not None and (not isinstance(stages, int) or isinstance(stages, bool) or stages <= 0):
+        errors.append("stages must be a positive integer")
+        stages = None
+    num_stages = stages if stages is not None else n
+    
+    a_min = data.get('a_min')
+    a_max = data.get('a_max')
+    if a_min is None or a_max is None or a_min >= a_max:
+        errors.append("a_min must be less than a_max")
+    
+    beta1 = data.get('beta1')
+    beta2 = data.get('beta2')
+    if beta1 is None or beta2 is None:
+        errors.append("beta1 and beta2 must be provided")
+    else:
+        if beta1 >= beta2:
+            errors.append("beta1 must be less than beta2")
+        if beta1 <= 0:
+            errors.append("beta1 must be positive (for wilting, should be in (0,1))")
+        if beta2 >= 1:
+            errors.append("beta2 must be less than 1 (for wilting)")
+    
+    # Ripening validations
+    enable_ripening = data.get('enable_ripening', False)
+    if enable_ripening:
+        v = data.get('v')
+        if v is None:
+            errors.append("v (number of ripening stages) must be provided when ripening is enabled")
+        else:
+            if num_stages:
+                max_v = num_stages // 2  # [n/2], для прямоугольной задачи - [stages/2]
+                if v < 2 or v > max_v:
+                    errors.append(f"v must satisfy: 2 ≤ v ≤ [{'stages' if stages else 'n'}/2] = {max_v}")
+        
+        beta_max = data.get('beta_max')
+        if beta_max is not None and beta_max <= 1:
+            errors.append("beta_max must be greater than 1 (for ripening)")
+
+    # Growth base selection
+    growth_base = data.get('growth_base', 1.029)
+    if growth_base not in [1.029, 1.03]:
+        errors.append("growth_base must be 1.029 or 1.03")
+
+    # Delta denominator validation (concentrated)
+    delta_k = data.get('delta_k', 4)
+    delta_k_ripening = data.get('delta_k_ripening', 4)
+    if delta_k not in [2, 3, 4]:
+        errors.append("delta_k must be one of {2,3,4}")
+    if delta_k_ripening not in [2, 3, 4]:
+        errors.append("delta_k_ripening must be one of {2,3,4}")
+    
+    # Chemical parameters validation (optional, but good for sanity check)
+    # Ranges from Textbook Section 7:
+    # K: [4.8, 7.05], Na: [0.21, 0.82], N: [1.58, 2.8], I0: [0.62, 0.64]
+    # We assume frontend sends valid ranges if provided.
+    if data.get('k_min') and data.get('k_max') and data['k_min'] > data['k_max']:
+        errors.append("k_min must be <= k_max")
+
+    # Output options (core/serialization.py)
+    precision = data.get('precision')
+    if precision is not None and (isinstance(precision, bool) or not isinstance(precision, int)
+                                  or not 0 <= precision <= MAX_PRECISION):
+        errors.append(f"precision must be an integer in [0, {MAX_PRECISION}]")
+    if data.get('batch_layout', 'rows') not in BATCH_LAYOUTS:
+        errors.append(f"batch_layout must be one of {', '.join(BATCH_LAYOUTS)}")
+
+    errors.extend(validate_seed(data))
+    return errors
+
+
+def validate_seed(data):
+    """Errors of the optional "seed" (a root for SeedSequence: a non-negative integer)."""
+    seed = data.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        return ["seed must be a non-negative integer"]
+    return []
+
+
+def build_experiment_config(data):
+    """Build ExperimentConfig from a validated request payload."""
+    return ExperimentConfig(
+        n=data['n'],
+        m=data['m'],
+        stages=data.get('stages'),
+        a_min=data['a_min'],
+        a_max=data['a_max'],
+        beta1=data['beta1'],
+        beta2=data['beta2'],
+        distribution_type=data['distribution_type'],
+        enable_ripening=data.get('enable_ripening', False),
+        v=data.get('v'),
+        beta_max=data.get('beta_max'),
+        use_losses=data.get('use_losses', True),
+        growth_base=data.get('growth_base', 1.029),
+        delta_k=data.get('delta_k', 4),
+        delta_k_ripening=data.get('delta_k_ripening', 4),
+        # Chemical parameters from Textbook Section 7
+        # Passing them to config so generate_single_experiment can use them
+        k_min=data.get('k_min', 4.8),
+        k_max=data.get('k_max', 7.05),
+        na_min=data.get('na_min', 0.21),
+        na_max=data.get('na_max', 0.82),
+        n_content_min=data.get('n_content_min', 1.58),
+        n_content_max=data.get('n_content_max', 2.8),
+        i0_min=data.get('i0_min', 0.62),
+        i0_max=data.get('i0_max', 0.64),
+    )
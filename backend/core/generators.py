@@ -9,17 +9,20 @@
     модели из task.md.
 
 МАТРИЦЫ:
+    Размер всех матриц - n × m: n партий (строки), m = config.num_stages
+    этапов (столбцы); по умолчанию m = n.
+
     B (коэффициенты деградации):
-        - Размер: n × n
+        - Размер: n × m
         - B[i, j] - коэффициент перехода от этапа j-1 к этапу j для партии i
         - B[i, 0] не используется (можно считать равным 1.0)
         - Для j = 1..v-1: B[i, j] ∈ (1, beta_max] (дозаривание)
-        - Для j = v..n-1: B[i, j] ∈ [beta1, beta2] ⊂ (0,1) (увядание)
+        - Для j = v..m-1: B[i, j] ∈ [beta1, beta2] ⊂ (0,1) (увядание)
     
     C (содержание сахара):
-        - Размер: n × n
+        - Размер: n × m
         - C[i, 0] = a_i (начальная сахаристость)
-        - C[i, j] = C[i, j-1] × B[i, j] для j = 1..n-1
+        - C[i, j] = C[i, j-1] × B[i, j] для j = 1..m-1
 
 АЛГОРИТМ:
     1. Генерация матрицы B:
@@ -35,17 +38,45 @@
 ИСПОЛЬЗОВАНИЕ:
     from core.generators import MatrixGenerator
     
+    # Генерация партий (BatchTable - по массиву на каждое поле)
+    batches = MatrixGenerator.generate_batches(config)
+    
     # Генерация коэффициентов
     B = MatrixGenerator.generate_coefficients(config, batches)
     
     # Генерация состояний
     C = MatrixGenerator.generate_states(batches, B)
+    
+    # Весь эксперимент целиком (партии, B, C, L, S)
+    experiment = MatrixGenerator.generate_experiment(config)
+
+ПРОИЗВОДИТЕЛЬНОСТЬ:
+    Все методы векторизованы по партиям (numpy), партии передаются как
+    BatchTable. Списки BeetBatch тоже принимаются и преобразуются.
+    Параметр rng (np.random.Generator / RandomState) задаёт поток случайных
+    чисел; по умолчанию используется глобальный np.random. Для одинакового
+    состояния np.random generate_coefficients и generate_states дают те же
+    значения, что и поэлементные циклы (порядок выборки - по строкам).
+
+СНИЖЕНИЕ ДИСПЕРСИИ:
+    Все случайные величины генератора - равномерные rng.uniform(low, high).
+        - Антитетические пары: generate_experiment(..., antithetic=True)
+          заменяет каждую равномерную величину U на 1 - U (AntitheticRNG).
+          Эксперимент с тем же состоянием rng без флага - его пара.
+        - Общие случайные числа (CRN): при отдельном потоке для B
+          (coefficient_rng) конфигурации, отличающиеся типом распределения
+          или дозариванием, получают одни и те же партии и те же U для B.
+          Дополнительные параметры concentrated/дозаривания выбираются
+          после общих, поэтому не сдвигают поток.
+    experiment_streams(seq) - два независимых потока (партии и B) из одного
+    SeedSequence; так их выбирают engine.py и core/pipeline.py.
+    См. engine.py (antithetic, compare_configs) и core/stats.py.
 
 РАСШИРЕНИЕ:
     Чтобы изменить логику генерации:
         1. Модифицируйте метод generate_coefficients() для изменения B
         2. Модифицируйте метод generate_states() для изменения C
-        3. Убедитесь, что размеры матриц остаются n × n
+        3. Убедитесь, что размеры матриц остаются n × m
 
 АВТОР: [Ваше имя]
 ДАТА СОЗДАНИЯ: [Дата]
@@ -53,108 +84,221 @@
 """
 
 import numpy as np
-from typing import List, Tuple
-from .models import BeetBatch, ExperimentConfig
+from typing import List, Tuple, Union
+from .models import BeetBatch, BatchTable, ExperimentConfig, as_batch_table
+from .losses import LossModel
+from .metrics import stage
+
+Batches = Union[BatchTable, List[BeetBatch]]
+
+class AntitheticRNG:
+    """
+    Wraps a random generator so that uniform(low, high) returns the mirror
+    image of the wrapped draw: U -> 1 - U, i.e. high - (high - low) * U.
+    An experiment generated from a generator state and one generated
+    through this wrapper from the same state form an antithetic pair.
+    """
+
+    def __init__(self, rng=None):
+        self._rng = np.random if rng is None else rng
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        low = np.asarray(low, dtype=float)
+        high = np.asarray(high, dtype=float)
+        shape = np.broadcast_shapes(low.shape, high.shape) if size is None else size
+        u = self._rng.random(shape)
+        result = high - (high - low) * u
+        return result if np.ndim(result) else float(result)
+
+
+def experiment_streams(seq: np.random.SeedSequence) -> Tuple[np.random.Generator, np.random.Generator]:
+    """
+    Batch-parameter and B-coefficient generators of one experiment. Separate
+    streams keep the draws aligned across configurations (common random
+    numbers, see MatrixGenerator.generate_experiment).
+    """
+    return tuple(
+        np.random.default_rng(np.random.SeedSequence(seq.entropy, spawn_key=seq.spawn_key + (k,)))
+        for k in range(2)
+    )
+
 
 class MatrixGenerator:
     @staticmethod
-    def generate_coefficients(config: ExperimentConfig, batches: List[BeetBatch]) -> np.ndarray:
+    def ripening_beta_max(config: ExperimentConfig) -> float:
+        """beta_max for ripening; auto-calculated as (m-1)/(m-2) for m stages if not provided (task.md)."""
+        if config.beta_max is not None:
+            return config.beta_max
+        m = config.num_stages
+        if m > 2:
+            return (m - 1) / (m - 2)
+        return 1.1  # fallback for small n
+
+    @staticmethod
+    def generate_batches(config: ExperimentConfig, rng=None) -> BatchTable:
         """
-        Generates the matrix B of degradation coefficients b_{ij}.
-        Size: n x (n-1) because j goes from 2 to n (columns 1 to n-1 in 0-indexed matrix).
-        Actually, let's make it n x n and keep column 0 empty or 1.0 for convenience.
-        Task says b_{i,j-1} = c_{ij} / c_{i,j-1} for j=2..n.
-        So we have n columns corresponding to transitions.
-        Let's store b_{ij} where j is the stage index (0-indexed).
-        Stage 0 is initial state.
-        Coef for stage 0->1 is at index 0?
-        Task: b_{i,j-1} for j=2..n. So indices 1..n-1?
-        Let's produce an n x n matrix where B[i, j] is the coefficient for transition to stage j.
-        B[i, 0] is irrelevant (or 1.0).
-        B[i, j] is coef to get from stage j-1 to j.
+        Samples the parameters of n batches [1..n] as a BatchTable.
+        Concentrated distributions also get per-batch coefficient ranges
+        (delta, beta_range_start/end and their ripening counterparts).
         """
+        rng = np.random if rng is None else rng
         n = config.n
-        B = np.zeros((n, n))
+
+        # Initial sugar
+        a = rng.uniform(config.a_min, config.a_max, size=n)
+
+        # Loss params
+        k = rng.uniform(config.k_min, config.k_max, size=n)
+        na = rng.uniform(config.na_min, config.na_max, size=n)
+        n_cont = rng.uniform(config.n_content_min, config.n_content_max, size=n)
+        i0 = rng.uniform(config.i0_min, config.i0_max, size=n)
+
+        columns = dict(initial_sugar=a, k=k, na=na, n_content=n_cont, i0=i0)
+
+        # Concentrated distribution params for wilting (delta)
+        if config.distribution_type == 'concentrated':
+            # "delta_i <= |beta2 - beta1| / k"
+            max_delta = abs(config.beta2 - config.beta1) / config.delta_k
+            delta = rng.uniform(0, max_delta, size=n)
+            b_start = rng.uniform(config.beta1, config.beta2 - delta)
+            columns.update(delta=delta, beta_range_start=b_start, beta_range_end=b_start + delta)
+
+        # Concentrated distribution params for ripening
+        if config.distribution_type == 'concentrated' and config.enable_ripening:
+            beta_max = MatrixGenerator.ripening_beta_max(config)
+            # Similar logic for ripening: delta <= |beta_max - 1| / k
+            max_delta_ripening = abs(beta_max - 1.0) / config.delta_k_ripening
+            delta_ripening = rng.uniform(0, max_delta_ripening, size=n)
+            # center in (1 + delta, beta_max - delta]
+            center = rng.uniform(1.0 + delta_ripening, beta_max - delta_ripening)
+            columns.update(
+                delta_ripening=delta_ripening,
+                beta_range_start_ripening=center - delta_ripening,
+                beta_range_end_ripening=center + delta_ripening,
+            )
+
+        return BatchTable(**columns)
+
+    @staticmethod
+    def generate_coefficients(config: ExperimentConfig, batches: Batches, rng=None) -> np.ndarray:
+        """
+        Generates the matrix B of degradation coefficients b_{ij}.
+        B is n x m (m = config.num_stages); column j (0-based, j = 0..m-2) holds the coefficient
+        applied on the transition from stage j to stage j+1 (see generate_states),
+        the last column is unused (0.0).
+        Columns 1..v-1 are ripening (b in (1, beta_max]) when ripening is enabled,
+        all other columns are wilting (b in [beta1, beta2]).
+        For the concentrated distribution each batch uses its own range
+        (falls back to the global range if the batch range is not set).
+        """
+        rng = np.random if rng is None else rng
+        table = as_batch_table(batches)
+        n, m = config.n, config.num_stages
+        B = np.zeros((n, m))
+        if m < 2:
+            return B
         
         # Determine ripening stages
         v = config.v if config.enable_ripening and config.v else 0
+        beta_max = MatrixGenerator.ripening_beta_max(config) if config.enable_ripening else None
         
-        # Auto-calculate beta_max if not provided (recommended formula from task.md)
-        beta_max = config.beta_max
-        if config.enable_ripening and beta_max is None:
-            if n > 2:
-                beta_max = (n - 1) / (n - 2)
-            else:
-                beta_max = 1.1  # fallback for small n
-        
-        for i in range(n):
-            batch = batches[i]
-            
-            # For each stage j from 1 to n-1 (0-based column index)
-            # In task.md: j = 1..v-1 for ripening (1-based), j = v..n-1 for wilting (1-based)
-            # In our 0-based code: j = 1..v-1 for ripening, j = v..n-1 for wilting
-            # (j=0 is initial state, j=1..n-1 are transitions)
-            
-            for j in range(0, n-1):
-                is_ripening = False
-                if config.enable_ripening and v > 0:
-                    # Ripening stages: j = 1..v-1 (0-based, matching task.md 1-based j=1..v-1)
-                    # Wilting stages: j = v..n-1 (0-based, matching task.md 1-based j=v..n-1)
-                    if 1 <= j <= v - 1:
-                        is_ripening = True
-                
-                # Determine range for this coefficient
-                if is_ripening:
-                    # Ripening: b_{ij} \in (1, beta_max]
-                    low, high = 1.0 + 1e-6, beta_max
-                else:
-                    # Wilting: b_{ij} \in [beta1, beta2] \subset (0,1)
-                    low, high = config.beta1, config.beta2
-                
-                # Generate value
-                if config.distribution_type == "concentrated":
-                    if is_ripening:
-                        # Use batch specific range for ripening
-                        b_low = batch.beta_range_start_ripening if batch.beta_range_start_ripening else low
-                        b_high = batch.beta_range_end_ripening if batch.beta_range_end_ripening else high
-                        val = np.random.uniform(b_low, b_high)
-                    else:
-                        # Use batch specific range for wilting
-                        b_low = batch.beta_range_start if batch.beta_range_start else low
-                        b_high = batch.beta_range_end if batch.beta_range_end else high
-                        val = np.random.uniform(b_low, b_high)
-                else:
-                    # Uniform distribution
-                    val = np.random.uniform(low, high)
-                    
-                B[i, j] = val
-                
+        # Ripening stages: j = 1..v-1 (0-based, matching task.md 1-based j=1..v-1)
+        # Wilting stages: j = v..m-1 (0-based, matching task.md 1-based j=v..m-1)
+        j = np.arange(m - 1)
+        is_ripening = (j >= 1) & (j <= v - 1) if v > 0 else np.zeros(m - 1, dtype=bool)
+
+        if config.distribution_type == "concentrated":
+            def batch_range(values, default):
+                # Batch specific range; missing (NaN) or zero values use the global bound
+                values = values[:, None]
+                return np.where(np.isnan(values) | (values == 0), default, values)
+
+            low = np.where(
+                is_ripening,
+                batch_range(table.beta_range_start_ripening, 1.0 + 1e-6),
+                batch_range(table.beta_range_start, config.beta1),
+            )
+            high = np.where(
+                is_ripening,
+                batch_range(table.beta_range_end_ripening, beta_max if beta_max is not None else np.nan),
+                batch_range(table.beta_range_end, config.beta2),
+            )
+        else:
+            # Uniform distribution: one range per column
+            low = np.broadcast_to(np.where(is_ripening, 1.0 + 1e-6, config.beta1), (n, m - 1))
+            high = np.broadcast_to(np.where(is_ripening, beta_max if beta_max is not None else np.nan,
+                                            config.beta2), (n, m - 1))
+
+        # Row-major sampling: same order of draws as a loop over i, then j
+        B[:, :m - 1] = rng.uniform(low, high)
         return B
 
     @staticmethod
-    def generate_states(batches: List[BeetBatch], B: np.ndarray) -> np.ndarray:
+    def generate_states(batches: Batches, B: np.ndarray) -> np.ndarray:
         """
-        Generates Matrix C (sugar content).
+        Generates Matrix C (sugar content), n x m like B.
         c_{ij}
         Col 0: c_{i1} = a_i
-        Col j: c_{ij} = c_{i, j-1} * B[i, j]
+        Col j: c_{ij} = c_{i, j-1} * B[i, j-1]
         """
-        n = len(batches)
-        C = np.zeros((n, n))
+        table = as_batch_table(batches)
+        n, m = len(table), B.shape[1]
+        C = np.empty((n, m))
+        if m == 0:
+            return C
         
         # Initial state (j=0)
-        for i in range(n):
-            C[i, 0] = batches[i].initial_sugar
-            
-        # Subsequent states
-        for j in range(1, n):
-            for i in range(n):
-                C[i, j] = C[i, j-1] * B[i, j-1]
+        C[:, 0] = table.initial_sugar
+        
+        # Subsequent states: running product along the stages
+        if m > 1:
+            C[:, 1:] = B[:, :m - 1]
+            np.cumprod(C, axis=1, out=C)
                 
         return C
+
+    @staticmethod
+    def generate_experiment(config: ExperimentConfig, rng=None, coefficient_rng=None,
+                            antithetic: bool = False) -> dict:
+        """
+        Generates one experiment: batches, B, C, L and S (numpy arrays).
+        Each stage is timed with core.metrics.stage.
+
+        coefficient_rng: separate stream for B (default: rng). With separate
+        streams, configurations that differ only in distribution_type or
+        ripening reuse the same batch draws and the same uniforms for B
+        (common random numbers).
+        antithetic: mirror every uniform draw (AntitheticRNG).
+        """
+        coefficient_rng = rng if coefficient_rng is None else coefficient_rng
+        if antithetic:
+            rng, coefficient_rng = AntitheticRNG(rng), AntitheticRNG(coefficient_rng)
+        with stage('batch_sampling'):
+            batches = MatrixGenerator.generate_batches(config, rng)
+        with stage('generate_B'):
+            B = MatrixGenerator.generate_coefficients(config, batches, coefficient_rng)
+        with stage('generate_C'):
+            C = MatrixGenerator.generate_states(batches, B)
+        if config.use_losses:
+            with stage('generate_L'):
+                L = LossModel.calculate_losses(batches, C, config.num_stages, growth_base=config.growth_base)
+            with stage('generate_S'):
+                S_tilde = LossModel.calculate_final_yield_matrix(C, L)
+        else:
+            L = np.zeros_like(C)
+            S_tilde = C
+        return {
+            'matrices': {
+                'B': B,
+                'C': C,
+                'L': L,
+                'S': S_tilde
+            },
+            'batches': batches
+        }
     
     @staticmethod
-    def generate_multiple_experiments(config: ExperimentConfig, num_experiments: int = 50):
+    def generate_multiple_experiments(config: ExperimentConfig, num_experiments: int = 50, rng=None):
         """
         Generate multiple experiments with the same configuration.
         
@@ -165,87 +309,4 @@ class MatrixGenerator:
         Returns:
             List of experiment results, each containing matrices and batches
         """
-        experiments = []
-        
-        for exp_idx in range(num_experiments):
-            # Generate Batches [1..n]
-            batches = []
-            for i in range(config.n):
-                # Initial sugar
-                a_i = np.random.uniform(config.a_min, config.a_max)
-                
-                # Loss params
-                k = np.random.uniform(config.k_min, config.k_max)
-                na = np.random.uniform(config.na_min, config.na_max)
-                n_cont = np.random.uniform(config.n_content_min, config.n_content_max)
-                i0 = np.random.uniform(config.i0_min, config.i0_max)
-                
-                # Concentrated distribution params for wilting (delta)
-                delta = None
-                b_start = None
-                b_end = None
-                if config.distribution_type == 'concentrated':
-                    # "delta_i <= |beta2 - beta1| / k"
-                    max_delta = abs(config.beta2 - config.beta1) / config.delta_k
-                    delta_i = np.random.uniform(0, max_delta)
-                    
-                    b_start = np.random.uniform(config.beta1, config.beta2 - delta_i)
-                    b_end = b_start + delta_i
-                    
-                    delta = delta_i
-                
-                # Concentrated distribution params for ripening
-                delta_ripening = None
-                b_start_ripening = None
-                b_end_ripening = None
-                if config.distribution_type == 'concentrated' and config.enable_ripening:
-                    # Calculate beta_max for ripening range
-                    beta_max = config.beta_max
-                    if beta_max is None:
-                        if config.n > 2:
-                            beta_max = (config.n - 1) / (config.n - 2)
-                        else:
-                            beta_max = 1.1
-                    
-                    # Similar logic for ripening: delta <= |beta_max - 1| / k
-                    max_delta_ripening = abs(beta_max - 1.0) / config.delta_k_ripening
-                    delta_ripening_i = np.random.uniform(0, max_delta_ripening)
-                    
-                    # center in (1 + delta, beta_max - delta]
-                    center_ripening = np.random.uniform(1.0 + delta_ripening_i, beta_max - delta_ripening_i)
-                    b_start_ripening = center_ripening - delta_ripening_i
-                    b_end_ripening = center_ripening + delta_ripening_i
-                    
-                    delta_ripening = delta_ripening_i
-                    
-                batches.append(BeetBatch(
-                    index=i,
-                    initial_sugar=a_i,
-                    k=k, na=na, n_content=n_cont, i0=i0,
-                    delta=delta, beta_range_start=b_start, beta_range_end=b_end,
-                    delta_ripening=delta_ripening,
-                    beta_range_start_ripening=b_start_ripening,
-                    beta_range_end_ripening=b_end_ripening
-                ))
-            
-            # Generate Matrices
-            B = MatrixGenerator.generate_coefficients(config, batches)
-            C = MatrixGenerator.generate_states(batches, B)
-            if config.use_losses:
-                L = LossModel.calculate_losses(batches, C, config.n, growth_base=config.growth_base)
-                S_tilde = LossModel.calculate_final_yield_matrix(C, L)
-            else:
-                L = np.zeros_like(C)
-                S_tilde = C
-            
-            experiments.append({
-                'matrices': {
-                    'B': B.tolist(),
-                    'C': C.tolist(),
-                    'L': L.tolist(),
-                    'S': S_tilde.tolist()
-                },
-                'batches': [vars(b) for b in batches]
-            })
-        
-        return experiments
\ No newline at end of file
+        return [MatrixGenerator.generate_experiment(config, rng) for _ in range(num_experiments)]
@@ -45,7 +45,7 @@
     S_tilde = LossModel.calculate_final_yield_matrix(C, L)
 
 ПАРАМЕТРЫ:
-    batches: List[BeetBatch] - список партий свёклы
+    batches: BatchTable или List[BeetBatch] - партии свёклы
     num_stages: int - количество этапов переработки (обычно n)
     growth_base: float - база роста (1.029 или 1.03)
 
@@ -58,13 +58,18 @@
 """
 
 import numpy as np
-from typing import List
-from .models import BeetBatch
+from typing import List, Union
+from .models import BeetBatch, BatchTable, as_batch_table
 
 class LossModel:
+    # Реалистичные пределы потерь
+    MIN_LOSS = 1.5    # Минимальные технологические потери
+    MAX_LOSS = 4.5    # Максимальные потери в нормальном производстве
+    MAX_PERCENT_OF_SUGAR = 0.5  # Максимум от содержания сахара
+
     @staticmethod
     def calculate_losses(
-        batches: List[BeetBatch],
+        batches: Union[BatchTable, List[BeetBatch]],
         C: np.ndarray,
         num_stages: int,
         growth_base: float = 1.029,
@@ -75,75 +80,49 @@ class LossModel:
         l_{ij} = 1.1 + 0.1541(K + Na) + 0.2159 N + 0.9989 I_{ij} + 0.1967
         I_{ij} = I_{i0} * (growth_base)^(7j - 7)
         where j is 1-based stage index.
+        Vectorized over batches; the clamping below runs stage by stage
+        because it depends on the previous stage's loss.
         """
-        n = len(batches)
+        table = as_batch_table(batches)
+        n = len(table)
         L = np.zeros((n, num_stages))
-        # Реалистичные пределы потерь
-        MIN_LOSS = 1.5    # Минимальные технологические потери
-        MAX_LOSS = 4.5    # Максимальные потери в нормальном производстве
-        MAX_PERCENT_OF_SUGAR = 0.5  # Максимум от содержания сахара
-        
-        for i in range(n):
-            batch = batches[i]
-            K = batch.k
-            Na = batch.na
-            N = batch.n_content
-            I0 = batch.i0
-
-            if growth_base == 1.029:
-                I0 *= C[i, 0] / 100.0
-            else:
-                I0 = 0.1
-            
-            max_loss_so_far = 0.0
-
-            for j in range(num_stages): # j is 0-indexed here (0..n-1)
-                # Formula uses 1-based index (1..n)
-                stage_idx = j + 1
-
-
-                # I_{ij} calculation
-                # Power is 7j - 7 = 7(j-1). Since stage_idx is j, -> 7(stage_idx) - 7 = 7(stage_idx - 1)
-                # If stage_idx=1, power=0. Correct.
-                I_ij = I0 * (growth_base ** (7*stage_idx - 7))
-
-                
-                # Loss calculation
-                l_val = 1.1 + 0.1541 * (K + Na) + 0.2159 * N + 0.9989 * I_ij + 0.1967
-
-
-                
-                # ГАРАНТИРУЕМ, что потери не уменьшаются
-                # (физически невозможно уменьшение потерь со временем хранения)
-                
-                
-                current_sugar = C[i, j]
-                
-                # 1. Не менее минимальных технологических потерь
-                l_val = max(l_val, MIN_LOSS)
-                
-                # 2. Не более максимального процента от сахара
-                # Но с учётом того, что потери не должны уменьшаться
-                max_by_percent = current_sugar * MAX_PERCENT_OF_SUGAR
-                
-                # 3. Не более абсолютного максимума
-                # Применяем ограничения, но сохраняем неубывание
-                if l_val > max_by_percent:
-                    # Если ограничение по проценту строже, берем его
-                    # но не опускаемся ниже ранее достигнутых потерь
-                    l_val = min(max_by_percent, MAX_LOSS)
-                    l_val = max(l_val, max_loss_so_far)
-                else:
-                    l_val = min(l_val, MAX_LOSS)
-                
-                # Обновляем максимальные потери для этой партии
-                max_loss_so_far = l_val
-                
-                
-                
-                L[i, j] = l_val
-
-                
+        if n == 0 or num_stages == 0:
+            return L
+
+        if growth_base == 1.029:
+            I0 = table.i0 * (C[:, 0] / 100.0)
+        else:
+            I0 = np.full(n, 0.1)
+
+        # Formula uses 1-based index (1..n): power is 7j - 7 = 7(j-1)
+        powers = np.array([growth_base ** (7 * stage_idx - 7) for stage_idx in range(1, num_stages + 1)])
+        I = I0[:, None] * powers[None, :]
+
+        # Loss calculation (same order of additions as the scalar formula)
+        base = 1.1 + 0.1541 * (table.k + table.na) + 0.2159 * table.n_content
+        raw = base[:, None] + 0.9989 * I + 0.1967
+
+        # 1. Не менее минимальных технологических потерь
+        raw = np.maximum(raw, LossModel.MIN_LOSS)
+
+        # ГАРАНТИРУЕМ, что потери не уменьшаются
+        # (физически невозможно уменьшение потерь со временем хранения)
+        max_loss_so_far = np.zeros(n)
+        for j in range(num_stages):
+            l_val = raw[:, j]
+            # 2. Не более максимального процента от сахара
+            max_by_percent = C[:, j] * LossModel.MAX_PERCENT_OF_SUGAR
+            # 3. Не более абсолютного максимума
+            # Если ограничение по проценту строже, берем его,
+            # но не опускаемся ниже ранее достигнутых потерь
+            l_val = np.where(
+                l_val > max_by_percent,
+                np.maximum(np.minimum(max_by_percent, LossModel.MAX_LOSS), max_loss_so_far),
+                np.minimum(l_val, LossModel.MAX_LOSS),
+            )
+            L[:, j] = l_val
+            max_loss_so_far = l_val
+
         return L
 
     @staticmethod
@@ -0,0 +1,272 @@
+"""
+===================================================================
+МЕТРИКИ - СЧЁТЧИКИ ЗАПРОСОВ И ГИСТОГРАММЫ ЗАДЕРЖЕК
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Этот модуль собирает лёгкие метрики производительности backend:
+        - количество запросов по каждому endpoint (и по кодам ответа)
+        - гистограммы времени обработки запроса по endpoint
+        - гистограммы времени отдельных этапов внутри запроса:
+          валидация, генерация партий, матрицы B/C/L/S, каждая стратегия
+          Optimizer, сериализация JSON
+        - гистограммы размеров запроса и ответа (в байтах)
+
+    Данные отдаются через GET /metrics (app.py) в JSON или в текстовом
+    формате Prometheus (?format=prometheus).
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.metrics import metrics, stage, endpoint_scope
+
+    with endpoint_scope('simulate'):
+        with stage('generate_B'):
+            B = MatrixGenerator.generate_coefficients(config, batches)
+
+    metrics.to_dict()
+
+ВАЖНО:
+    - Метрики хранятся в памяти процесса. В многопроцессном режиме
+      (serving.py) каждый воркер ведёт свои метрики.
+    - Таймер stage() стоит порядка микросекунды, поэтому его можно
+      ставить вокруг любых этапов, но не внутри циклов по элементам.
+    - Внутри блока trace() этапы дополнительно складываются в дерево
+      (Span), которое используется режимом профилирования (core/profiling.py).
+===================================================================
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Границы корзин гистограмм
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # секунды
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                4194304, 16777216, 67108864, 268435456)  # байты
+
+# Имя текущего endpoint (метка для этапов, выполняемых внутри запроса)
+_current_endpoint: contextvars.ContextVar[str] = contextvars.ContextVar('endpoint', default='-')
+
+
+class Span:
+    """One node of a per-request phase timing tree (see trace())."""
+    __slots__ = ('name', 'seconds', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.seconds = 0.0
+        self.children: List['Span'] = []
+
+    def to_dict(self) -> dict:
+        """Tree as dicts; repeated sibling phases are merged with a call count."""
+        return _merge_spans([self])[0]
+
+
+def _merge_spans(spans: List[Span]) -> List[dict]:
+    merged: Dict[str, dict] = {}
+    grouped: Dict[str, List[Span]] = {}
+    for span in spans:
+        node = merged.get(span.name)
+        if node is None:
+            node = merged[span.name] = {'name': span.name, 'seconds': 0.0, 'calls': 0}
+            grouped[span.name] = []
+        node['seconds'] += span.seconds
+        node['calls'] += 1
+        grouped[span.name].extend(span.children)
+    for name, node in merged.items():
+        if grouped[name]:
+            node['children'] = _merge_spans(grouped[name])
+    return list(merged.values())
+
+
+# Текущий узел дерева этапов (None, если трассировка не включена)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('span', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with count and sum (Prometheus style)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя корзина: +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        idx = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                idx = i
+                break
+        self.counts[idx] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, c in zip(list(self.buckets) + ['+Inf'], self.counts):
+            cumulative += c
+            buckets[str(bound)] = cumulative
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'buckets': buckets,
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store of request counters and labelled histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self.requests: Dict[Tuple[str, int], int] = {}
+            self.request_latency: Dict[str, Histogram] = {}
+            self.stage_latency: Dict[Tuple[str, str], Histogram] = {}
+            self.request_size: Dict[str, Histogram] = {}
+            self.response_size: Dict[str, Histogram] = {}
+
+    @staticmethod
+    def _observe(table: dict, key, buckets, value: float) -> None:
+        hist = table.get(key)
+        if hist is None:
+            hist = table[key] = Histogram(buckets)
+        hist.observe(value)
+
+    def observe_request(self, endpoint: str, status: int, seconds: float,
+                        request_bytes: int, response_bytes: Optional[int]) -> None:
+        with self._lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self._observe(self.request_latency, endpoint, LATENCY_BUCKETS, seconds)
+            self._observe(self.request_size, endpoint, SIZE_BUCKETS, request_bytes)
+            if response_bytes is not None:
+                self._observe(self.response_size, endpoint, SIZE_BUCKETS, response_bytes)
+
+    def observe_stage(self, stage_name: str, seconds: float, endpoint: Optional[str] = None) -> None:
+        endpoint = endpoint or _current_endpoint.get()
+        with self._lock:
+            self._observe(self.stage_latency, (endpoint, stage_name), LATENCY_BUCKETS, seconds)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            endpoints: Dict[str, dict] = {}
+
+            def entry(name):
+                return endpoints.setdefault(name, {
+                    'requests': {}, 'latency_seconds': None, 'stages': {},
+                    'request_bytes': None, 'response_bytes': None,
+                })
+
+            for (endpoint, status), n in sorted(self.requests.items()):
+                entry(endpoint)['requests'][str(status)] = n
+            for endpoint, hist in self.request_latency.items():
+                entry(endpoint)['latency_seconds'] = hist.to_dict()
+            for endpoint, hist in self.request_size.items():
+                entry(endpoint)['request_bytes'] = hist.to_dict()
+            for endpoint, hist in self.response_size.items():
+                entry(endpoint)['response_bytes'] = hist.to_dict()
+            for (endpoint, stage_name), hist in sorted(self.stage_latency.items()):
+                entry(endpoint)['stages'][stage_name] = hist.to_dict()
+
+            return {
+                'uptime_seconds': time.time() - self.started_at,
+                'endpoints': endpoints,
+            }
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            lines.append('# TYPE backend_requests_total counter')
+            for (endpoint, status), n in sorted(self.requests.items()):
+                lines.append(f'backend_requests_total{{endpoint="{endpoint}",status="{status}"}} {n}')
+            _render_histograms(lines, 'backend_request_latency_seconds',
+                               {(('endpoint', e),): h for e, h in self.request_latency.items()})
+            _render_histograms(lines, 'backend_stage_latency_seconds',
+                               {(('endpoint', e), ('stage', s)): h
+                                for (e, s), h in self.stage_latency.items()})
+            _render_histograms(lines, 'backend_request_bytes',
+                               {(('endpoint', e),): h for e, h in self.request_size.items()})
+            _render_histograms(lines, 'backend_response_bytes',
+                               {(('endpoint', e),): h for e, h in self.response_size.items()})
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histograms(lines: List[str], name: str, series: dict) -> None:
+    lines.append(f'# TYPE {name} histogram')
+    for labels, hist in sorted(series.items()):
+        label_str = ','.join(f'{k}="{v}"' for k, v in labels)
+        cumulative = 0
+        for bound, c in zip(list(hist.buckets) + ['+Inf'], hist.counts):
+            cumulative += c
+            lines.append(f'{name}_bucket{{{label_str},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{label_str}}} {hist.sum}')
+        lines.append(f'{name}_count{{{label_str}}} {hist.count}')
+
+
+# Глобальный реестр метрик процесса
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def endpoint_scope(endpoint: str):
+    """Label stages recorded inside the block with `endpoint`."""
+    token = _current_endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _current_endpoint.reset(token)
+
+
+def set_endpoint(endpoint: str) -> contextvars.Token:
+    """Set the endpoint label for the current request (reset with reset_endpoint)."""
+    return _current_endpoint.set(endpoint)
+
+
+def reset_endpoint(token: contextvars.Token) -> None:
+    _current_endpoint.reset(token)
+
+
+@contextmanager
+def trace(name: str = 'request'):
+    """
+    Collect a phase timing tree: every stage() entered inside the block
+    becomes a child span of the returned root.
+    """
+    root = Span(name)
+    token = _current_span.set(root)
+    start = time.perf_counter()
+    try:
+        yield root
+    finally:
+        root.seconds = time.perf_counter() - start
+        _current_span.reset(token)
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block and record it as stage `name`."""
+    parent = _current_span.get()
+    span = token = None
+    if parent is not None:
+        span = Span(name)
+        parent.children.append(span)
+        token = _current_span.set(span)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe_stage(name, elapsed)
+        if span is not None:
+            span.seconds = elapsed
+            _current_span.reset(token)
@@ -10,7 +10,14 @@
 
 СТРУКТУРА:
     - BeetBatch: представляет одну партию свёклы со всеми её параметрами
+      (dataclass со __slots__, без __dict__)
+    - BatchTable: таблица из n партий в виде "структуры массивов" -
+      по одному numpy массиву на каждое поле BeetBatch. Именно её
+      генерирует и потребляет MatrixGenerator / LossModel; table[i]
+      возвращает BeetBatch для поштучного доступа
     - ExperimentConfig: конфигурация эксперимента (параметры генерации)
+    - Plant: завод (масса партии за этап и число этапов) для задачи
+      с несколькими заводами
 
 ИСПОЛЬЗОВАНИЕ:
     Эти классы используются во всех модулях проекта для передачи данных:
@@ -21,8 +28,9 @@
 РАСШИРЕНИЕ:
     Чтобы добавить новый параметр:
         1. Добавьте поле в соответствующий dataclass
-        2. Обновите генерацию в app.py (функция simulate)
-        3. Обновите валидацию в app.py (функция validate_config)
+           (поля BeetBatch автоматически становятся столбцами BatchTable)
+        2. Обновите генерацию в core/generators.py (MatrixGenerator.generate_batches)
+        3. Обновите валидацию в core/config.py (функция validate_config)
 
 ПРИМЕР ИСПОЛЬЗОВАНИЯ:
     # Создание партии
@@ -51,10 +59,12 @@
 ===================================================================
 """
 
-from dataclasses import dataclass, field
-from typing import List, Optional
+from dataclasses import dataclass, field, fields
+from typing import Dict, Iterator, List, Optional, Sequence
 
-@dataclass
+import numpy as np
+
+@dataclass(slots=True)
 class BeetBatch:
     """
     Класс, представляющий одну партию сахарной свёклы.
@@ -106,6 +116,76 @@ class BeetBatch:
     beta_range_start_ripening: Optional[float] = None
     beta_range_end_ripening: Optional[float] = None
 
+# Имена полей партии (порядок совпадает с BeetBatch)
+BATCH_FIELDS = tuple(f.name for f in fields(BeetBatch))
+# Опциональные поля (None в BeetBatch, NaN в BatchTable)
+OPTIONAL_BATCH_FIELDS = (
+    'delta', 'beta_range_start', 'beta_range_end',
+    'delta_ripening', 'beta_range_start_ripening', 'beta_range_end_ripening',
+)
+
+class BatchTable:
+    """
+    Struct-of-arrays table of n beet batches.
+
+    Every BeetBatch field is an attribute holding a numpy array of length n:
+    `index` is int64, all other fields are float64. Optional fields that are
+    None in BeetBatch are stored as NaN.
+
+    table[i] and iteration give BeetBatch objects for per-object access.
+    """
+    __slots__ = BATCH_FIELDS
+
+    def __init__(self, **columns: Sequence):
+        n = len(columns['initial_sugar'])
+        for name in BATCH_FIELDS:
+            values = columns.get(name)
+            if name == 'index':
+                arr = np.arange(n) if values is None else np.asarray(values, dtype=np.int64)
+            elif values is None:
+                arr = np.full(n, np.nan)
+            else:
+                arr = np.asarray(
+                    [np.nan if v is None else v for v in values] if isinstance(values, list) else values,
+                    dtype=np.float64,
+                )
+            if arr.shape != (n,):
+                raise ValueError(f"column '{name}' must have length {n}")
+            setattr(self, name, arr)
+
+    @classmethod
+    def from_batches(cls, batches: Sequence[BeetBatch]) -> 'BatchTable':
+        return cls(**{name: [getattr(b, name) for b in batches] for name in BATCH_FIELDS})
+
+    def __len__(self) -> int:
+        return len(self.initial_sugar)
+
+    def __getitem__(self, i: int) -> BeetBatch:
+        values = {}
+        for name in BATCH_FIELDS:
+            v = getattr(self, name)[i].item()
+            if name in OPTIONAL_BATCH_FIELDS and v != v:  # NaN -> None
+                v = None
+            values[name] = v
+        return BeetBatch(**values)
+
+    def __iter__(self) -> Iterator[BeetBatch]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_batches(self) -> List[BeetBatch]:
+        return list(self)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Field name -> column array (shared, not copied)."""
+        return {name: getattr(self, name) for name in BATCH_FIELDS}
+
+def as_batch_table(batches) -> BatchTable:
+    """Accept a BatchTable or a sequence of BeetBatch and return a BatchTable."""
+    if isinstance(batches, BatchTable):
+        return batches
+    return BatchTable.from_batches(batches)
+
 @dataclass
 class ExperimentConfig:
     """
@@ -117,6 +197,10 @@ class ExperimentConfig:
     ОСНОВНЫЕ ПАРАМЕТРЫ:
         n: int - количество партий свёклы
         m: float - масса одной партии (в единицах массы)
+        stages: int - количество этапов переработки (по умолчанию n).
+            При stages < n перерабатывается только часть партий,
+            при stages > n часть этапов остаётся без партии.
+            Матрицы B, C, L, S имеют размер n × stages.
     
     ПАРАМЕТРЫ НАЧАЛЬНОЙ САХАРИСТОСТИ:
         a_min: float - минимальная начальная сахаристость
@@ -133,9 +217,9 @@ class ExperimentConfig:
     
     ПАРАМЕТРЫ ДОЗАРИВАНИЯ (опционально):
         enable_ripening: bool - включить ли процесс дозаривания
-        v: int - количество этапов дозаривания (2 ≤ v ≤ [n/2])
+        v: int - количество этапов дозаривания (2 ≤ v ≤ [stages/2])
         beta_max: float - максимальный коэффициент для дозаривания (> 1)
-            Если не указан, вычисляется автоматически: (n-1)/(n-2)
+            Если не указан, вычисляется автоматически: (stages-1)/(stages-2)
     
     ПАРАМЕТРЫ ПОТЕРЬ:
         use_losses: bool - учитывать ли потери сахара при переработке
@@ -167,6 +251,9 @@ class ExperimentConfig:
     beta2: float  # Максимальный коэффициент деградации (увядание)
     distribution_type: str  # Тип распределения: "uniform" или "concentrated"
     
+    # Количество этапов (None - по одному этапу на партию, квадратная задача)
+    stages: Optional[int] = None
+
     # Параметры дозаривания (опционально)
     enable_ripening: bool = False  # Включить дозаривание
     v: Optional[int] = None  # Количество этапов дозаривания
@@ -189,3 +276,25 @@ class ExperimentConfig:
     n_content_max: float = 2.0  # Максимальное содержание азота
     i0_min: float = 0.62  # Минимальный начальный индекс
     i0_max: float = 0.64  # Максимальный начальный индекс
+
+    @property
+    def num_stages(self) -> int:
+        """Number of processing stages: `stages`, or n for the square problem."""
+        return self.n if self.stages is None else self.stages
+
+@dataclass
+class Plant:
+    """
+    Завод в задаче с несколькими заводами (algorithms/multiplant.py).
+
+    Все заводы берут партии из общих буртов и работают синхронными
+    этапами: этап j завода p - та же неделя, что и этап j любого другого
+    завода, поэтому выход партии i на нём - S[i, j].
+
+        name: str - название завода (ключ в результатах)
+        mass: float - масса партии, перерабатываемой заводом за этап (M_p)
+        stages: int - количество этапов переработки завода (m_p)
+    """
+    name: str
+    mass: float
+    stages: int
@@ -0,0 +1,176 @@
+"""
+===================================================================
+КОНВЕЙЕР ГЕНЕРАЦИИ - ЭТАПЫ ПАРТИИ → B → C → L → S С КЭШЕМ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    MatrixGenerator.generate_experiment каждый раз считает партии, B, C,
+    L и S заново, даже если между двумя запусками из интерфейса изменился
+    только use_losses или growth_base. Здесь генерация разбита на этапы,
+    и результат каждого этапа кэшируется по ключу из тех входов, от
+    которых этап действительно зависит:
+
+        этап      зависит от
+        --------  ----------------------------------------------------
+        batches   зерно (поток партий), n, a_min/a_max, диапазоны k, na,
+                  N, I0, distribution_type; для concentrated - beta1,
+                  beta2, delta_k; для concentrated с дозариванием -
+                  beta_max (фактический) и delta_k_ripening
+        B         batches, зерно (поток B), число этапов, distribution_type,
+                  beta1, beta2, v и beta_max (если дозаривание включено)
+        C         batches, B
+        L         batches, C, growth_base (только при use_losses)
+        S         C, L, use_losses
+
+    Масса партии m не влияет ни на один этап: при её изменении всё
+    берётся из кэша. Переключение потерь пересчитывает только L и S.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.pipeline import ExperimentPipeline
+
+    pipeline = ExperimentPipeline(max_bytes=256 * 2**20)
+    experiment, recomputed = pipeline.run(config, seed=42)
+    # experiment - как у MatrixGenerator.generate_experiment
+    # recomputed - пересчитанные этапы, например ['L', 'S']
+
+    seed - int или np.random.SeedSequence (например, SeedSequence(42).spawn(50)[i]
+    для i-го из 50 экспериментов). Партии и B берутся из двух потоков
+    experiment_streams(seed), поэтому результат совпадает с
+    generate_experiment(config, *experiment_streams(seed)) и с
+    экспериментом движка (engine.py) с тем же зерном.
+
+ВАЖНО:
+    - Кэш ограничен по памяти (max_bytes): вытесняются давно не
+      использованные результаты этапов (LRU).
+    - Массивы из кэша общие для всех запросов и помечены только для
+      чтения; копируйте их перед изменением.
+    - Потокобезопасен: вычисления идут вне блокировки, одновременный
+      пересчёт одного этапа в двух потоках лишь дублирует работу.
+===================================================================
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .generators import MatrixGenerator, experiment_streams
+from .losses import LossModel
+from .metrics import stage
+from .models import BatchTable, ExperimentConfig
+
+STAGES = ('batches', 'B', 'C', 'L', 'S')
+
+
+def stage_keys(config: ExperimentConfig, seed_id: tuple) -> dict:
+    """Cache key of every stage: the stage's own inputs plus its upstream keys."""
+    c = config
+    concentrated = c.distribution_type == 'concentrated'
+    beta_max = MatrixGenerator.ripening_beta_max(c) if c.enable_ripening else None
+
+    batches = (seed_id, c.n, c.a_min, c.a_max, c.k_min, c.k_max, c.na_min, c.na_max,
+               c.n_content_min, c.n_content_max, c.i0_min, c.i0_max, c.distribution_type)
+    if concentrated:
+        batches += (c.beta1, c.beta2, c.delta_k)
+        if c.enable_ripening:
+            batches += (beta_max, c.delta_k_ripening)
+    v = c.v if c.enable_ripening and c.v else 0
+    B = (batches, c.num_stages, c.distribution_type, c.beta1, c.beta2, v, beta_max if v else None)
+    C = (batches, B)
+    L = (C, c.growth_base) if c.use_losses else None
+    S = (C, L)
+    return {'batches': batches, 'B': B, 'C': C, 'L': L, 'S': S}
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, BatchTable):
+        return sum(column.nbytes for column in value.columns().values())
+    return value.nbytes
+
+
+def _freeze(value):
+    arrays = value.columns().values() if isinstance(value, BatchTable) else (value,)
+    for array in arrays:
+        array.flags.writeable = False
+    return value
+
+
+class ExperimentPipeline:
+    """Memoized batches -> B -> C -> L -> S generation with an LRU byte budget."""
+
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, Tuple[object, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = {name: 0 for name in STAGES}
+        self.misses = {name: 0 for name in STAGES}
+
+    def _get(self, name: str, key):
+        with self._lock:
+            entry = self._entries.get((name, key))
+            if entry is None:
+                self.misses[name] += 1
+                return None
+            self._entries.move_to_end((name, key))
+            self.hits[name] += 1
+            return entry[0]
+
+    def _put(self, name: str, key, value) -> None:
+        size = _nbytes(value)
+        with self._lock:
+            if (name, key) in self._entries or size > self.max_bytes:
+                return
+            self._entries[(name, key)] = (_freeze(value), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes,
+                    'hits': dict(self.hits), 'misses': dict(self.misses)}
+
+    def run(self, config: ExperimentConfig, seed=None) -> Tuple[dict, List[str]]:
+        """
+        Experiment for (config, seed) in the generate_experiment format,
+        and the list of stages that had to be recomputed.
+        """
+        seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        keys = stage_keys(config, (seq.entropy, seq.spawn_key))
+        recomputed: List[str] = []
+        streams: Optional[tuple] = None
+
+        def cached(name, metric, compute):
+            value = self._get(name, keys[name])
+            if value is None:
+                with stage(metric):
+                    value = compute()
+                self._put(name, keys[name], value)
+                recomputed.append(name)
+            return value
+
+        def stream(k):
+            nonlocal streams
+            if streams is None:
+                streams = experiment_streams(seq)
+            return streams[k]
+
+        batches = cached('batches', 'batch_sampling', lambda: MatrixGenerator.generate_batches(config, stream(0)))
+        B = cached('B', 'generate_B', lambda: MatrixGenerator.generate_coefficients(config, batches, stream(1)))
+        C = cached('C', 'generate_C', lambda: MatrixGenerator.generate_states(batches, B))
+        if config.use_losses:
+            L = cached('L', 'generate_L', lambda: LossModel.calculate_losses(
+                batches, C, config.num_stages, growth_base=config.growth_base))
+            S = cached('S', 'generate_S', lambda: LossModel.calculate_final_yield_matrix(C, L))
+        else:
+            L = _freeze(np.zeros_like(C))
+            S = C
+        return {'matrices': {'B': B, 'C': C, 'L': L, 'S': S}, 'batches': batches}, recomputed
@@ -0,0 +1,81 @@
+"""
+===================================================================
+ПРОФИЛИРОВАНИЕ ЗАПРОСОВ - ГОРЯЧИЕ ФУНКЦИИ И ДЕРЕВО ЭТАПОВ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Этот модуль выполняет функцию (обычно обработчик Flask) под cProfile
+    и одновременно собирает дерево этапов через core.metrics.trace().
+    Используется, когда в запросе передан флаг profile (см. app.py), чтобы
+    снимать профиль прямо на рабочем экземпляре backend.
+
+ФОРМАТ ОТЧЁТА:
+    {
+        "total_seconds": 0.42,
+        "phases": {                      # дерево этапов (stage() в app.py)
+            "name": "request", "seconds": 0.42, "calls": 1,
+            "children": [
+                {"name": "validation", "seconds": ..., "calls": 1},
+                {"name": "generate_single_experiment", ..., "children": [...]},
+                ...
+            ]
+        },
+        "hot_functions": [               # top-N по собственному времени
+            {"function": "optimizer.py:132(optimize_greedy)",
+             "calls": 6, "total_seconds": ..., "cumulative_seconds": ...},
+            ...
+        ]
+    }
+
+ВАЖНО:
+    cProfile допускает только один активный профилировщик на процесс,
+    поэтому профилируемые запросы выполняются по очереди (блокировка).
+===================================================================
+"""
+
+import cProfile
+import os
+import pstats
+import threading
+from typing import Any, Callable, List, Tuple
+
+from .metrics import trace
+
+_profile_lock = threading.Lock()
+
+
+def hot_functions(profiler: cProfile.Profile, limit: int = 20) -> List[dict]:
+    """Compact table of the `limit` functions with the largest own time."""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({func})',
+            'calls': nc,
+            'total_seconds': tt,
+            'cumulative_seconds': ct,
+        })
+    rows.sort(key=lambda r: r['total_seconds'], reverse=True)
+    return rows[:limit]
+
+
+def profile_call(func: Callable, *args, limit: int = 20, **kwargs) -> Tuple[Any, dict]:
+    """
+    Call func(*args, **kwargs) under cProfile and a phase trace.
+    Returns (result, report).
+    """
+    with _profile_lock:
+        profiler = cProfile.Profile()
+        with trace('request') as root:
+            profiler.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.disable()
+
+    report = {
+        'total_seconds': root.seconds,
+        'phases': root.to_dict(),
+        'hot_functions': hot_functions(profiler, limit),
+    }
+    return result, report
@@ -0,0 +1,229 @@
+"""
+===================================================================
+СЕРИАЛИЗАЦИЯ - ЗАПИСЬ NUMPY МАССИВОВ ПРЯМО В JSON
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Ответы backend содержат матрицы B, C, L, S размера n × n для каждого
+    эксперимента. Путь .tolist() -> to_native() -> jsonify() создаёт
+    по объекту Python float на каждый элемент и обходит их рекурсивно.
+    Этот модуль пишет массивы numpy в текст JSON векторно, без
+    промежуточных списков Python.
+
+АЛГОРИТМ (encode_array с точностью p):
+    1. Значения умножаются на 10^p и округляются до int64
+    2. Цифры всех элементов вычисляются одновременно (divmod на 10)
+       в байтовую матрицу фиксированной ширины
+    3. Лишние нули (ведущие и хвостовые) заменяются байтом 0,
+       добавляются '-', '.', ',', '[' и ']'
+    4. Матрица байтов склеивается через tobytes(), байты 0 удаляются
+
+    Без точности (precision=None) числа пишутся с полной точностью
+    (repr), массив при этом кодируется напрямую через json.dumps.
+    Нечисловые значения (NaN, ±inf) пишутся как null.
+
+ПАРТИИ:
+    BatchTable (и списки BeetBatch) можно кодировать построчно (batch_layout="rows",
+    как раньше: список объектов) или по столбцам (batch_layout="columns"):
+        {"index": [...], "initial_sugar": [...], "k": [...], ...}
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.serialization import dumps
+
+    body = dumps({'matrices': {'S': S}}, precision=6)  # bytes
+===================================================================
+"""
+
+import dataclasses
+import json
+from typing import Any, List, Optional
+
+import numpy as np
+
+from .models import BeetBatch, BatchTable
+
+# Максимальная поддерживаемая точность (знаков после запятой)
+MAX_PRECISION = 15
+BATCH_LAYOUTS = ('rows', 'columns')
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _plain(obj: Any) -> bytes:
+    """Compact JSON for plain Python values."""
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _encode_fixed(a: np.ndarray, precision: int) -> Optional[bytes]:
+    """Fixed-point encoding of a finite float array with ndim >= 1; None if out of int64 range."""
+    scale = 10.0 ** precision
+    with np.errstate(over='ignore', invalid='ignore'):
+        scaled_f = np.rint(a * scale)
+    if scaled_f.size and np.abs(scaled_f).max() >= 9.0e18:
+        return None
+    scaled = scaled_f.astype(np.int64)
+
+    neg = scaled < 0
+    mag = np.abs(scaled)
+    max_mag = int(mag.max()) if mag.size else 0
+    n_digits = max(len(str(max_mag)), precision + 1)
+    int_digits = n_digits - precision
+
+    # Все цифры всех элементов: digits[..., k] - k-я цифра слева
+    digits = np.empty(a.shape + (n_digits,), dtype=np.uint8)
+    rest = mag
+    for k in range(n_digits - 1, -1, -1):
+        rest, d = np.divmod(rest, 10)
+        digits[..., k] = d
+
+    # Ширина ячейки: знак, целая часть, '.', дробная часть, разделитель
+    width = 1 + int_digits + (1 + precision if precision else 0) + 1
+    cells = np.zeros(a.shape + (width,), dtype=np.uint8)
+    cells[..., 0] = np.where(neg, ord('-'), 0)
+
+    int_chars = digits[..., :int_digits] + ord('0')
+    leading = np.cumsum(digits[..., :int_digits] != 0, axis=-1) == 0
+    leading[..., -1] = False  # хотя бы одна цифра перед точкой
+    int_chars[leading] = 0
+    cells[..., 1:1 + int_digits] = int_chars
+
+    if precision:
+        cells[..., 1 + int_digits] = ord('.')
+        frac = digits[..., int_digits:]
+        frac_chars = frac + ord('0')
+        trailing = np.cumsum((frac != 0)[..., ::-1], axis=-1)[..., ::-1] == 0
+        trailing[..., 0] = False  # хотя бы одна цифра после точки
+        frac_chars[trailing] = 0
+        cells[..., 2 + int_digits:2 + int_digits + precision] = frac_chars
+
+    return _join_cells(cells)
+
+
+def _join_cells(cells: np.ndarray) -> bytes:
+    """Join a (..., width) uint8 cell array into nested JSON lists."""
+    shape = cells.shape[:-1]
+    cells[..., -1] = ord(',')
+    # Последний элемент каждой строки закрывает её скобкой
+    cells[..., -1, -1] = ord(']')
+    rows = cells.reshape(-1, shape[-1] * cells.shape[-1])
+    out = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+    out[:, 0] = ord('[')
+    out[:, 1:] = rows
+    out = out.reshape(shape[:-1] + (-1,))
+    # Строки одного уровня разделяются запятыми и оборачиваются скобками
+    for _ in range(len(shape) - 1):
+        width = out.shape[-1]
+        framed = np.zeros(out.shape[:-1] + (width + 1,), dtype=np.uint8)
+        framed[..., :width] = out
+        framed[..., width] = ord(',')
+        framed[..., -1, -1] = ord(']')
+        flat = framed.reshape(framed.shape[:-2] + (-1,))
+        out = np.zeros(flat.shape[:-1] + (flat.shape[-1] + 1,), dtype=np.uint8)
+        out[..., 0] = ord('[')
+        out[..., 1:] = flat
+    return out.tobytes().replace(b'\x00', b'')
+
+
+def encode_array(a: np.ndarray, precision: Optional[int] = None) -> bytes:
+    """JSON text for a numpy array, optionally rounded to `precision` decimals."""
+    a = np.asarray(a)
+    if a.ndim == 0:
+        return _encode_scalar(a.item(), precision)
+    if a.size == 0 or a.dtype.kind != 'f':
+        # Целые (перестановки) и прочие типы невелики - обычный путь
+        return _plain(a.tolist())
+
+    finite = np.isfinite(a)
+    if not finite.all():
+        values = np.where(finite, a if precision is None else np.round(a, precision), 0.0).tolist()
+        return _plain(_null_nonfinite(values, finite.tolist()))
+    if precision is None:
+        return _plain(a.tolist())
+    encoded = _encode_fixed(a, precision)
+    if encoded is None:
+        return _plain(np.round(a, precision).tolist())
+    return encoded
+
+
+def _null_nonfinite(values, finite):
+    if isinstance(values, list):
+        return [_null_nonfinite(v, f) for v, f in zip(values, finite)]
+    return values if finite else None
+
+
+def _encode_scalar(x, precision: Optional[int]) -> bytes:
+    if isinstance(x, float):
+        if x != x or x in (float('inf'), float('-inf')):
+            return b'null'
+        if precision is not None:
+            x = round(x, precision)
+    return _plain(x)
+
+
+def _write_batch_table(table: BatchTable, out: List[bytes], precision: Optional[int],
+                       batch_layout: str) -> None:
+    if batch_layout == 'columns':
+        # Столбцы таблицы пишутся напрямую; NaN (нет значения) -> null
+        _write(table.columns(), out, precision, batch_layout)
+    else:
+        _write([dataclasses.asdict(b) for b in table], out, precision, batch_layout)
+
+
+def _write_items(items, out: List[bytes], precision: Optional[int], batch_layout: str) -> None:
+    out.append(b'[')
+    for i, item in enumerate(items):
+        if i:
+            out.append(b',')
+        _write(item, out, precision, batch_layout)
+    out.append(b']')
+
+
+def _write(obj: Any, out: List[bytes], precision: Optional[int], batch_layout: str) -> None:
+    if isinstance(obj, np.ndarray):
+        out.append(encode_array(obj, precision))
+    elif isinstance(obj, np.generic):
+        out.append(_encode_scalar(obj.item(), precision))
+    elif isinstance(obj, float):
+        out.append(_encode_scalar(obj, precision))
+    elif isinstance(obj, dict):
+        out.append(b'{')
+        first = True
+        for key, value in obj.items():
+            if not first:
+                out.append(b',')
+            first = False
+            out.append(_plain(str(key)))
+            out.append(b':')
+            _write(value, out, precision, batch_layout)
+        out.append(b'}')
+    elif isinstance(obj, BatchTable):
+        _write_batch_table(obj, out, precision, batch_layout)
+    elif isinstance(obj, (list, tuple)):
+        if obj and all(isinstance(b, BeetBatch) for b in obj):
+            _write_batch_table(BatchTable.from_batches(obj), out, precision, batch_layout)
+        elif precision is None and all(type(x) in _PLAIN_TYPES for x in obj):
+            try:
+                # allow_nan=False: NaN и inf идут поэлементным путём и становятся null
+                out.append(json.dumps(obj, separators=(',', ':'), allow_nan=False).encode())
+            except ValueError:
+                _write_items(obj, out, precision, batch_layout)
+        else:
+            _write_items(obj, out, precision, batch_layout)
+    elif isinstance(obj, BeetBatch):
+        _write(dataclasses.asdict(obj), out, precision, batch_layout)
+    else:
+        out.append(_plain(obj))
+
+
+def dumps(obj: Any, precision: Optional[int] = None, batch_layout: str = 'rows') -> bytes:
+    """
+    Serialize `obj` (dicts/lists of numpy arrays, numpy scalars, BeetBatch
+    objects and plain JSON values) to UTF-8 JSON bytes.
+    """
+    if precision is not None and not 0 <= precision <= MAX_PRECISION:
+        raise ValueError(f"precision must be in [0, {MAX_PRECISION}]")
+    if batch_layout not in BATCH_LAYOUTS:
+        raise ValueError(f"batch_layout must be one of {BATCH_LAYOUTS}")
+    out: List[bytes] = []
+    _write(obj, out, precision, batch_layout)
+    return b''.join(out)
@@ -0,0 +1,458 @@
+"""
+===================================================================
+ПОТОКОВАЯ СТАТИСТИКА - АГРЕГАТЫ ЗА ПОСТОЯННУЮ ПАМЯТЬ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Этот модуль содержит классы для накопления статистики по результатам
+    оптимизации "на лету", по мере поступления результатов, без хранения
+    всех значений. Используется в /multi_optimize, чтобы при K в тысячи
+    матриц не держать в памяти и не пересылать результат по каждой матрице.
+
+КЛАССЫ:
+    RunningStats:
+        Среднее, дисперсия (алгоритм Уэлфорда), минимум и максимум,
+        полуширина доверительного интервала для среднего.
+        Память: O(1).
+
+    P2Quantile:
+        Оценка квантиля алгоритмом P² (Jain & Chlamtac, 1985).
+        Хранит 5 маркеров, память: O(1).
+
+    StreamingSummary:
+        RunningStats + квантили p5, p50, p95.
+
+    StrategyAggregator:
+        Сводка по всем стратегиям: выход, итоговая масса, относительные
+        потери к оптимальному решению и подсчёт побед/ничьих/поражений
+        в сравнении с 'optimal' по каждой матрице.
+
+ОЦЕНКИ СНИЖЕНИЯ ДИСПЕРСИИ (по готовым массивам значений):
+    antithetic_variance_reduction(values):
+        values[2k], values[2k+1] - антитетическая пара. Сравнивает дисперсию
+        среднего по парам с дисперсией среднего по тому же числу
+        независимых экспериментов.
+    paired_variance_reduction(a, b):
+        a[i], b[i] - две конфигурации на общих случайных числах. Сравнивает
+        дисперсию разности средних (парной) с независимой выборкой.
+    antithetic_report(yields):
+        То же для выхода и относительных потерь каждой стратегии.
+    reduction_factor > 1 - во столько раз меньше экспериментов нужно для
+    той же точности.
+
+РАСПРЕДЕЛЕНИЯ (по готовым массивам значений):
+    distribution_summary(values):
+        count, mean, std, min, max и точные перцентили p1 ... p99
+        (например, выход тысяч случайных перестановок).
+    percentile_rank(values, x):
+        Доля значений (в %) строго меньше x плюс половина равных.
+
+ПО ЭТАПАМ (стопки K матриц n × m):
+    stage_summary(values):
+        count, mean, min, max и перцентили p5 ... p95 по каждому этапу
+        (последняя ось) сразу по всем экспериментам и партиям; NaN
+        пропускаются. Для графиков: килобайты вместо K · n · m значений.
+    scheduled_values(M, permutations):
+        Значения M вдоль расписаний: M[k, perm[j], j], NaN для этапа без
+        партии - траектория выхода или потерь стратегии по этапам.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.stats import StrategyAggregator
+
+    aggregator = StrategyAggregator(['greedy', 'thrifty', 'optimal'])
+    for matrix_results in results_stream:
+        # matrix_results = {'greedy': {'yield': ..., 'final_mass': ...}, ...}
+        aggregator.add(matrix_results)
+    report = aggregator.to_dict()
+===================================================================
+"""
+
+import math
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class RunningStats:
+    """Running count, mean, variance (Welford), min and max."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self) -> float:
+        """Unbiased sample variance (0.0 for fewer than two values)."""
+        if self.count < 2:
+            return 0.0
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def half_width(self, confidence: float = 0.95) -> float:
+        """
+        Half-width of the normal-approximation confidence interval for the
+        mean (z * s / sqrt(count)); inf for fewer than two values.
+        """
+        if self.count < 2:
+            return math.inf
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return z * self.std / math.sqrt(self.count)
+
+    def to_dict(self) -> dict:
+        if self.count == 0:
+            return {'count': 0, 'mean': 0.0, 'variance': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0}
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'variance': self.variance,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max,
+        }
+
+
+class P2Quantile:
+    """
+    Streaming estimate of the p-quantile with the P² algorithm.
+    Keeps five markers; exact while fewer than five values were seen.
+    """
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self.count = 0
+        self._q: List[float] = []          # высоты маркеров
+        self._n = [0, 1, 2, 3, 4]          # позиции маркеров
+        self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]  # желаемые позиции
+        self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def push(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+        q = self._q
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        n = self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x < q[1]:
+            k = 0
+        elif x < q[2]:
+            k = 1
+        elif x < q[3]:
+            k = 2
+        elif x <= q[4]:
+            k = 3
+        else:
+            q[4] = x
+            k = 3
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        # Корректировка трёх внутренних маркеров
+        for i in range(1, 4):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self._q, self._n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        if self.count == 0:
+            return 0.0
+        if self.count <= 5:
+            # Точный квантиль с линейной интерполяцией (как numpy.percentile)
+            pos = self.p * (self.count - 1)
+            lo = int(math.floor(pos))
+            hi = min(lo + 1, self.count - 1)
+            return self._q[lo] + (pos - lo) * (self._q[hi] - self._q[lo])
+        return self._q[2]
+
+
+class StreamingSummary:
+    """RunningStats plus P² estimates of p5, p50 and p95."""
+
+    QUANTILES = (0.05, 0.5, 0.95)
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.quantiles = [P2Quantile(p) for p in self.QUANTILES]
+
+    def push(self, x: float) -> None:
+        self.stats.push(x)
+        for q in self.quantiles:
+            q.push(x)
+
+    def to_dict(self) -> dict:
+        result = self.stats.to_dict()
+        for q in self.quantiles:
+            result[f'p{int(round(q.p * 100))}'] = q.value
+        return result
+
+
+class StrategyAggregator:
+    """
+    Constant-memory summary of per-matrix optimization results.
+
+    For every strategy tracks yield and final mass, the relative loss in %
+    against the reference strategy ('optimal') and how often the strategy
+    beats, ties or loses to the reference on the same matrix.
+    """
+
+    def __init__(self, strategies: Iterable[str], reference: str = 'optimal',
+                 tie_tolerance: float = 1e-9):
+        self.strategies = list(strategies)
+        self.reference = reference
+        self.tie_tolerance = tie_tolerance
+        self.matrices = 0
+        self.yields = {s: StreamingSummary() for s in self.strategies}
+        self.masses = {s: StreamingSummary() for s in self.strategies}
+        self.relative_losses = {s: StreamingSummary() for s in self.strategies if s != reference}
+        self.versus_reference = {
+            s: {'wins': 0, 'ties': 0, 'losses': 0} for s in self.strategies if s != reference
+        }
+
+    def add(self, matrix_results: Dict[str, dict]) -> None:
+        """
+        Add results for one matrix: {strategy: {'yield', 'final_mass', 'success'?}}.
+        Failed strategies (success == False) are skipped.
+        """
+        self.matrices += 1
+        ok = {s: r for s, r in matrix_results.items() if r.get('success', True)}
+        for s, r in ok.items():
+            if s not in self.yields:
+                continue
+            self.yields[s].push(r['yield'])
+            self.masses[s].push(r['final_mass'])
+
+        ref = ok.get(self.reference)
+        if ref is None:
+            return
+        ref_yield = ref['yield']
+        for s in self.relative_losses:
+            if s not in ok:
+                continue
+            y = ok[s]['yield']
+            if ref_yield > 0:
+                self.relative_losses[s].push((ref_yield - y) / ref_yield * 100)
+            diff = y - ref_yield
+            if diff > self.tie_tolerance:
+                self.versus_reference[s]['wins'] += 1
+            elif diff < -self.tie_tolerance:
+                self.versus_reference[s]['losses'] += 1
+            else:
+                self.versus_reference[s]['ties'] += 1
+
+    def mean_yield(self, strategy: str) -> Optional[float]:
+        stats = self.yields[strategy].stats
+        return stats.mean if stats.count else None
+
+    def to_dict(self) -> dict:
+        report = {}
+        for s in self.strategies:
+            entry = {
+                'yield': self.yields[s].to_dict(),
+                'final_mass': self.masses[s].to_dict(),
+            }
+            if s in self.relative_losses:
+                entry['relative_loss_percent'] = self.relative_losses[s].to_dict()
+                counts = self.versus_reference[s]
+                compared = counts['wins'] + counts['ties'] + counts['losses']
+                entry[f'versus_{self.reference}'] = dict(
+                    counts,
+                    compared=compared,
+                    win_rate=counts['wins'] / compared if compared else 0.0,
+                    tie_rate=counts['ties'] / compared if compared else 0.0,
+                )
+            report[s] = entry
+        return report
+
+
+def _reduction(variance_independent: float, variance_reduced: float) -> float:
+    if variance_reduced > 0:
+        return variance_independent / variance_reduced
+    return math.inf if variance_independent > 0 else 1.0
+
+
+def antithetic_variance_reduction(values) -> Optional[dict]:
+    """
+    Variance of the mean over antithetic pairs (values[2k], values[2k+1])
+    against independent sampling with the same number of experiments.
+    None if there are fewer than two complete pairs or NaN values.
+    """
+    x = np.asarray(values, dtype=float)
+    pairs = len(x) // 2
+    x = x[:2 * pairs]
+    if pairs < 2 or np.isnan(x).any():
+        return None
+    first, second = x[0::2], x[1::2]
+    variance_independent = float(x.var(ddof=1)) / len(x)
+    variance_antithetic = float(((first + second) / 2).var(ddof=1)) / pairs
+    std_first, std_second = first.std(), second.std()
+    return {
+        'pairs': pairs,
+        'mean': float(x.mean()),
+        'pair_correlation': float(np.corrcoef(first, second)[0, 1]) if std_first > 0 and std_second > 0 else 0.0,
+        'variance_of_mean_independent': variance_independent,
+        'variance_of_mean_antithetic': variance_antithetic,
+        'reduction_factor': _reduction(variance_independent, variance_antithetic),
+    }
+
+
+def paired_variance_reduction(a, b, confidence: float = 0.95) -> Optional[dict]:
+    """
+    Difference of means mean(b) - mean(a) for paired samples (common random
+    numbers) with its CI half-width, and the variance reduction against
+    two independent samples of the same size. None for fewer than two pairs.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    ok = ~(np.isnan(a) | np.isnan(b))
+    a, b = a[ok], b[ok]
+    count = len(a)
+    if count < 2:
+        return None
+    variance_independent = (float(a.var(ddof=1)) + float(b.var(ddof=1))) / count
+    variance_paired = float((b - a).var(ddof=1)) / count
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return {
+        'pairs': count,
+        'mean_difference': float(b.mean() - a.mean()),
+        'half_width': z * math.sqrt(variance_paired),
+        'half_width_independent': z * math.sqrt(variance_independent),
+        'correlation': float(np.corrcoef(a, b)[0, 1]) if a.std() > 0 and b.std() > 0 else 0.0,
+        'variance_of_difference_independent': variance_independent,
+        'variance_of_difference_paired': variance_paired,
+        'reduction_factor': _reduction(variance_independent, variance_paired),
+    }
+
+
+def antithetic_report(yields: Dict[str, Iterable[float]], reference: str = 'optimal') -> dict:
+    """
+    antithetic_variance_reduction of every strategy's per-experiment yield
+    and of its relative loss in % vs `reference` (NaN marks a failed run).
+    """
+    arrays = {name: np.asarray(list(values), dtype=float) for name, values in yields.items()}
+    best = arrays.get(reference)
+    report = {}
+    for name, values in arrays.items():
+        entry = {'yield': antithetic_variance_reduction(values)}
+        if best is not None and name != reference:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                losses = np.where(best > 0, (best - values) / best * 100, np.nan)
+            entry['relative_loss_percent'] = antithetic_variance_reduction(losses)
+        report[name] = entry
+    return report
+
+
+DEFAULT_PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def distribution_summary(values, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> dict:
+    """count, mean, std (ddof=1), min, max and exact percentiles p<q> of `values`."""
+    x = np.asarray(values, dtype=float)
+    if x.size == 0:
+        return {'count': 0}
+    percentiles = list(percentiles)
+    summary = {
+        'count': int(x.size),
+        'mean': float(x.mean()),
+        'std': float(x.std(ddof=1)) if x.size > 1 else 0.0,
+        'min': float(x.min()),
+        'max': float(x.max()),
+    }
+    for q, value in zip(percentiles, np.percentile(x, percentiles)):
+        summary[f'p{q:g}'] = float(value)
+    return summary
+
+
+def percentile_rank(values, x: float) -> float:
+    """Share of `values` below x in %, counting ties as half (values sorted ascending)."""
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return math.nan
+    below = np.searchsorted(values, x, side='left')
+    not_above = np.searchsorted(values, x, side='right')
+    return float((below + not_above) / 2 / values.size * 100)
+
+
+STAGE_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def stage_summary(values, percentiles: Iterable[float] = STAGE_PERCENTILES) -> dict:
+    """
+    Per-stage count, mean, min, max and percentiles p<q> of `values` (..., m)
+    over all leading axes; NaN entries are skipped (a stage without any gives NaN).
+    """
+    x = np.asarray(values, dtype=float)
+    x = x.reshape(-1, x.shape[-1])
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=0)
+    empty = count == 0
+    with np.errstate(invalid='ignore'):
+        summary = {
+            'count': count,
+            'mean': np.where(valid, x, 0.0).sum(axis=0) / count,
+            'min': np.where(empty, np.nan, np.where(valid, x, np.inf).min(axis=0, initial=np.inf)),
+            'max': np.where(empty, np.nan, np.where(valid, x, -np.inf).max(axis=0, initial=-np.inf)),
+        }
+    percentiles = list(percentiles)
+    if valid.all():
+        levels = np.percentile(x, percentiles, axis=0)
+    else:
+        # Пустые этапы заполняются нулём и затем помечаются NaN (без предупреждений nanpercentile)
+        levels = np.nanpercentile(np.where(empty, 0.0, x), percentiles, axis=0)
+        levels[:, empty] = np.nan
+    for q, level in zip(percentiles, levels):
+        summary[f'p{q:g}'] = level
+    return summary
+
+
+def scheduled_values(M, permutations) -> np.ndarray:
+    """
+    M[k, perm[j], j] for stacked matrices M (K, n, m) and permutations
+    (K, ..., m) in Optimizer format; NaN where a stage has no batch (-1).
+    """
+    M = np.asarray(M, dtype=float)
+    perms = np.asarray(permutations, dtype=np.int64)
+    k = np.arange(M.shape[0]).reshape((-1,) + (1,) * (perms.ndim - 1))
+    values = M[k, np.maximum(perms, 0), np.arange(M.shape[2])]
+    return np.where(perms >= 0, values, np.nan)
@@ -0,0 +1,144 @@
+"""
+===================================================================
+ХРАНИЛИЩЕ ЭКСПЕРИМЕНТОВ - МАТРИЦЫ ПО ИДЕНТИФИКАТОРУ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    При n в тысячи ответ /simulate с четырьмя матрицами n × n занимает
+    сотни мегабайт, а интерфейс всё равно показывает только видимое окно.
+    ExperimentStore запоминает эксперимент как (конфигурация, зерно) и
+    выдаёт идентификатор; с папкой матрицы B, C, L, S также пишутся в
+    файлы .npy и читаются с mmap, так что окно матрицы стоит столько,
+    сколько в нём чисел. Клиент затем запрашивает окна и обзор матриц
+    (core/tiles.py), а не всю матрицу.
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.store import ExperimentStore
+
+    store = ExperimentStore(pipeline, directory='experiments')
+    experiment_id = store.put(config, np.random.SeedSequence(42), experiment['matrices'])
+    store.matrix(experiment_id, 'S')    # np.memmap; None - неизвестный id
+    experiment, recomputed = store.get(experiment_id)   # пересчёт конвейером
+    store.describe(experiment_id)   # {'config': {...}, 'seed': 42, 'spawn_key': [], 'shape': [n, m]}
+
+    Через API: "store": true в /simulate и /multi_simulate,
+    GET /experiments/<id>, /experiments/<id>/tile, /experiments/<id>/overview
+    (см. app.py)
+
+ВАЖНО:
+    - Идентификатор - отпечаток (конфигурация, зерно): тот же
+      эксперимент всегда получает тот же id.
+    - В памяти хранится только описание (сотни байт) - не более
+      max_entries описаний (LRU). С папкой описание пишется в
+      <directory>/<id>.json, а матрицы - в <directory>/<id>/<имя>.npy
+      (до описания: описание всегда ссылается на готовые файлы); id
+      понятен всем процессам (воркеры serving.py) и после перезапуска,
+      и ни один из них не пересчитывает матрицы для окна. Без папки (и
+      для описаний без файлов матриц) матрицы берутся из кэша этапов
+      (core/pipeline.py) или детерминированно пересчитываются.
+    - Антитетические эксперименты движка не воспроизводятся конвейером
+      и не сохраняются.
+===================================================================
+"""
+
+import dataclasses
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .checkpoint import fingerprint
+from .models import ExperimentConfig
+
+
+def _is_experiment_id(experiment_id: str) -> bool:
+    return len(experiment_id) == 32 and all(c in '0123456789abcdef' for c in experiment_id)
+
+
+class ExperimentStore:
+    """Experiment descriptions (config, seed) by id; matrices come from the pipeline."""
+
+    def __init__(self, pipeline, directory: Optional[str] = None, max_entries: int = 1000):
+        self.pipeline = pipeline
+        self.directory = directory
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, experiment_id: str) -> str:
+        return os.path.join(self.directory, f'{experiment_id}.json')
+
+    def _matrix_path(self, experiment_id: str, name: str) -> str:
+        return os.path.join(self.directory, experiment_id, f'{name}.npy')
+
+    def put(self, config: ExperimentConfig, seed: np.random.SeedSequence,
+            matrices: Optional[Dict[str, np.ndarray]] = None) -> str:
+        """Remember an experiment; with a directory, `matrices` are saved for memory-mapped windows."""
+        entry = {
+            'config': dataclasses.asdict(config),
+            'seed': seed.entropy,
+            'spawn_key': list(seed.spawn_key),
+            'shape': [config.n, config.num_stages],
+        }
+        experiment_id = fingerprint(entry)[:32]
+        if self.directory and not os.path.exists(self._path(experiment_id)):
+            os.makedirs(self.directory, exist_ok=True)
+            if matrices:
+                os.makedirs(os.path.join(self.directory, experiment_id), exist_ok=True)
+                for name, value in matrices.items():
+                    path = self._matrix_path(experiment_id, name)
+                    tmp = f'{path}.{os.getpid()}.tmp'
+                    with open(tmp, 'wb') as f:  # объект файла: np.save не добавит ".npy" к имени
+                        np.save(f, np.asarray(value))
+                    os.replace(tmp, path)
+            tmp = f'{self._path(experiment_id)}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self._path(experiment_id))
+        self._remember(experiment_id, entry)
+        return experiment_id
+
+    def describe(self, experiment_id: str) -> Optional[dict]:
+        """Stored description, or None for an unknown id."""
+        with self._lock:
+            entry = self._memory.get(experiment_id)
+            if entry is not None:
+                self._memory.move_to_end(experiment_id)
+                return entry
+        if not self.directory or not _is_experiment_id(experiment_id):
+            return None
+        try:
+            with open(self._path(experiment_id)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._remember(experiment_id, entry)
+        return entry
+
+    def matrix(self, experiment_id: str, name: str) -> Optional[np.ndarray]:
+        """One matrix, memory-mapped from its file if saved; None for an unknown id."""
+        if self.directory and _is_experiment_id(experiment_id):
+            try:
+                return np.load(self._matrix_path(experiment_id, name), mmap_mode='r')
+            except FileNotFoundError:
+                pass
+        stored = self.get(experiment_id)
+        return None if stored is None else stored[0]['matrices'][name]
+
+    def get(self, experiment_id: str) -> Optional[Tuple[dict, List[str]]]:
+        """(experiment, recomputed stages) as from the pipeline, or None for an unknown id."""
+        entry = self.describe(experiment_id)
+        if entry is None:
+            return None
+        seed = np.random.SeedSequence(entry['seed'], spawn_key=tuple(entry['spawn_key']))
+        return self.pipeline.run(ExperimentConfig(**entry['config']), seed)
+
+    def _remember(self, experiment_id: str, entry: dict) -> None:
+        with self._lock:
+            self._memory[experiment_id] = entry
+            self._memory.move_to_end(experiment_id)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
@@ -0,0 +1,69 @@
+"""
+===================================================================
+ОКНА И ОБЗОР МАТРИЦ - ОТОБРАЖЕНИЕ БОЛЬШИХ n
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Таблица n × n при n в тысячи не передаётся и не рисуется целиком.
+    Интерфейс запрашивает:
+        - окно: строки [row, row + rows), столбцы [col, col + cols) -
+          только видимые ячейки при просмотре вблизи;
+        - обзор: матрица делится на не более чем rows × cols блоков
+          почти равного размера, для каждого блока - среднее, минимум и
+          максимум (тепловая карта при просмотре издалека).
+    Объём ответа пропорционален видимому, а не n².
+
+ИСПОЛЬЗОВАНИЕ:
+    from core.tiles import window, overview
+
+    tile = window(S, row=100, col=0, rows=50, cols=40)
+    summary = overview(S, rows=64, cols=64)
+    summary['mean'], summary['min'], summary['max']     # блоки
+    summary['row_edges'], summary['col_edges']          # границы блоков
+
+    Через API: GET /experiments/<id>/tile и /experiments/<id>/overview
+
+ВАЖНО:
+    - Окно у края матрицы обрезается; row/col за пределами матрицы -
+      ошибка.
+    - Если блоков запрошено не меньше, чем строк (столбцов), блок -
+      одна строка (столбец), и обзор совпадает с самой матрицей.
+===================================================================
+"""
+
+import numpy as np
+
+
+def block_edges(length: int, blocks: int) -> np.ndarray:
+    """Boundaries of at most `blocks` nearly equal blocks covering [0, length)."""
+    blocks = max(1, min(blocks, length))
+    return np.linspace(0, length, blocks + 1).round().astype(np.int64)
+
+
+def window(M: np.ndarray, row: int, col: int, rows: int, cols: int) -> np.ndarray:
+    """M[row:row + rows, col:col + cols], clipped at the matrix edge."""
+    n, m = M.shape
+    if not (0 <= row < n and 0 <= col < m) or rows < 1 or cols < 1:
+        raise ValueError(f"window must start inside the {n} x {m} matrix and be non-empty")
+    return M[row:row + rows, col:col + cols]
+
+
+def overview(M: np.ndarray, rows: int, cols: int) -> dict:
+    """Block mean, min and max of M on an (at most) rows x cols grid."""
+    if rows < 1 or cols < 1:
+        raise ValueError("rows and cols must be positive")
+    row_edges = block_edges(M.shape[0], rows)
+    col_edges = block_edges(M.shape[1], cols)
+    starts_r, starts_c = row_edges[:-1], col_edges[:-1]
+
+    def reduce(ufunc):
+        return ufunc.reduceat(ufunc.reduceat(M, starts_r, axis=0), starts_c, axis=1)
+
+    sizes = np.outer(np.diff(row_edges), np.diff(col_edges))
+    return {
+        'row_edges': row_edges,
+        'col_edges': col_edges,
+        'mean': reduce(np.add) / sizes,
+        'min': reduce(np.minimum),
+        'max': reduce(np.maximum),
+    }
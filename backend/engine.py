@@ -0,0 +1,551 @@
+"""
+===================================================================
+ПАРАЛЛЕЛЬНЫЙ ДВИЖОК ЭКСПЕРИМЕНТОВ - ПУЛ ПРОЦЕССОВ И ОБЩАЯ ПАМЯТЬ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Генерация K экспериментов (MatrixGenerator) и их оптимизация
+    (Optimizer) - это независимые задачи. Движок делит K экспериментов
+    на куски и выполняет их в пуле процессов:
+        1. Родитель выделяет тензоры в multiprocessing.shared_memory:
+           S (K, n, m), перестановки (K, s, m) и, по запросу, B, C, L
+           (n партий, m = config.num_stages этапов; по умолчанию m = n)
+        2. Каждый воркер генерирует свои эксперименты со своим зерном
+           (SeedSequence.spawn), пишет матрицы прямо в общую память
+           и сразу же оптимизирует их
+        3. Обратно в родителя возвращаются только маленькие записи:
+           выход каждой стратегии по каждому эксперименту (и, по запросу,
+           столбцы партий - O(n) чисел)
+    Матрицы n × m не сериализуются (pickle) между процессами.
+
+РЕЖИМЫ:
+    engine.run(config, K, strategies)   - генерация + оптимизация
+    engine.run(config, K, strategies=()) - только генерация
+                                          (для /multi_simulate)
+    engine.optimize(S_stack, strategies) - только оптимизация готовых
+                                          матриц (для /multi_optimize)
+    engine.run_cells([(config, seed_seq), ...], K, strategies)
+                                        - много конфигураций сразу: куски
+                                          всех ячеек идут в пул вместе
+                                          (для sweep.py)
+    engine.run_adaptive(config, strategies, tolerance)
+                                        - генерация + оптимизация кусками,
+                                          пока доверительные интервалы
+                                          относительных потерь не сузятся
+                                          до tolerance (для /adaptive_optimize)
+
+СНИЖЕНИЕ ДИСПЕРСИИ:
+    - run(..., antithetic=True): эксперименты 2k и 2k+1 - антитетическая
+      пара (одно зерно, у второго U -> 1 - U)
+    - compare_configs(configs, K, ...): общие случайные числа - эксперимент i
+      каждой конфигурации получает одно и то же зерно, а партии и B
+      выбираются из отдельных потоков (experiment_streams)
+    Оценки выигрыша: core/stats.py (antithetic_variance_reduction,
+    paired_variance_reduction).
+
+ИСПОЛЬЗОВАНИЕ:
+    from engine import ExperimentEngine
+
+    engine = ExperimentEngine(workers=32)
+    result = engine.run(config, 10000, ['greedy', 'optimal'], seed=42)
+    result.yields          # (K, s), NaN - стратегия завершилась ошибкой
+    engine.close()
+
+ВАЖНО:
+    - Результат не зависит от числа воркеров и размера кусков: зерно
+      эксперимента i - SeedSequence(seed).spawn(K)[i]. Стратегия random
+      перемешивает с зерном того же эксперимента.
+    - Пул создаётся один раз и переиспользуется между вызовами. В
+      многопоточном сервере (app.py) используется контекст 'spawn':
+      fork() из процесса с потоками небезопасен.
+    - Сегменты общей памяти освобождаются родителем (unlink) в finally,
+      в том числе при ошибке в воркере.
+    - run(..., checkpoint=Checkpoint(path)) и run_adaptive(..., checkpoint=...)
+      периодически сохраняют готовые эксперименты (core/checkpoint.py);
+      повторный запуск с тем же зерном продолжает с сохранённого места
+      и даёт тот же результат.
+===================================================================
+"""
+
+import dataclasses
+import multiprocessing
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.checkpoint import Checkpoint, fingerprint
+from core.generators import MatrixGenerator, experiment_streams
+from core.models import BatchTable
+from core.stats import StrategyAggregator
+from algorithms.optimizer import Optimizer
+from algorithms.scaling import STUDY_STRATEGIES
+
+MATRIX_NAMES = ('B', 'C', 'L', 'S')
+
+
+@dataclass
+class EngineResult:
+    """Arrays gathered from the workers, ordered by experiment index."""
+    strategies: List[str]
+    yields: np.ndarray                       # (K, s), NaN при ошибке стратегии
+    permutations: np.ndarray                 # (K, s, m), -1 при ошибке или этапе без партии
+    matrices: Dict[str, np.ndarray] = field(default_factory=dict)   # 'S' -> (K, n, m), ...
+    batches: Optional[List[BatchTable]] = None
+    root_seed: Optional[int] = None
+    elapsed_seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def success(self) -> np.ndarray:
+        return ~np.isnan(self.yields)
+
+    def add_to(self, aggregator: StrategyAggregator, mass_per_batch: float) -> StrategyAggregator:
+        """Feed every experiment's yields into a StrategyAggregator (failed runs are skipped)."""
+        for row in self.yields:
+            aggregator.add({
+                name: {'yield': float(y), 'final_mass': Optimizer.calculate_final_mass(float(y), mass_per_batch),
+                       'success': not np.isnan(y)}
+                for name, y in zip(self.strategies, row)
+            })
+        return aggregator
+
+
+class _SharedArrays:
+    """Named numpy arrays backed by shared memory blocks owned by the parent."""
+
+    def __init__(self, specs: Dict[str, Tuple[tuple, str]]):
+        self.blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self.arrays: Dict[str, np.ndarray] = {}
+        try:
+            for name, (shape, dtype) in specs.items():
+                size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+                block = shared_memory.SharedMemory(create=True, size=size)
+                self.blocks[name] = block
+                self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        except BaseException:
+            self.release()
+            raise
+        self.spec = {name: (self.blocks[name].name, shape, dtype) for name, (shape, dtype) in specs.items()}
+
+    def release(self) -> None:
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            block.unlink()
+        self.blocks.clear()
+
+
+def _attach(spec: Dict[str, tuple]):
+    """
+    Open the parent's shared blocks in a worker. Pool workers share the
+    parent's resource_tracker, so attaching does not transfer ownership:
+    the segments are still unlinked by the parent only.
+    """
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        block = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return blocks, arrays
+
+
+def _run_shard(task) -> List[tuple]:
+    """Worker: generate and/or optimize experiments [start, stop)."""
+    spec, start, stop, config, strategies, seeds, return_batches, antithetic = task
+    blocks, arrays = _attach(spec)
+    try:
+        return _process_shard(arrays, start, stop, config, strategies, seeds, return_batches, antithetic)
+    finally:
+        # Все представления numpy должны исчезнуть до close()
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+def _run_cell_shard(task):
+    """Worker: experiments [start, stop) of one sweep cell, without shared memory."""
+    cell, start, stop, config, strategies, seeds, antithetic = task
+    arrays = {'permutations': np.full((stop - start, len(strategies), config.num_stages), -1, dtype=np.int32)}
+    records = _process_shard(arrays, start, stop, config, strategies, seeds, False, antithetic, base=start)
+    return cell, start, records, arrays['permutations']
+
+
+def _process_shard(arrays, start, stop, config, strategies, seeds, return_batches,
+                   antithetic, base: int = 0) -> List[tuple]:
+    """Experiment i is written to row i - base of the arrays."""
+    records = []
+    for offset, i in enumerate(range(start, stop)):
+        seq = seeds[offset]
+        # Свой генератор для стратегии random: глобальное состояние random не трогаем
+        shuffle_rng = random.Random(int(seq.generate_state(1)[0]))
+        batch_columns = None
+        if config is not None:
+            batch_rng, coefficient_rng = experiment_streams(seq)
+            # Нечётный эксперимент пары - антитетический двойник чётного
+            experiment = MatrixGenerator.generate_experiment(
+                config, batch_rng, coefficient_rng, antithetic=antithetic and i % 2 == 1)
+            for name in MATRIX_NAMES:
+                if name in arrays:
+                    arrays[name][i - base] = experiment['matrices'][name]
+            S = experiment['matrices']['S']
+            if return_batches:
+                batch_columns = experiment['batches'].columns()
+        else:
+            S = arrays['S'][i - base]
+
+        nu = S.shape[1] // 2
+        yields = []
+        for j, name in enumerate(strategies):
+            try:
+                perm, total_yield = STUDY_STRATEGIES[name](S, nu, shuffle_rng)
+            except Exception:
+                yields.append(None)
+                continue
+            arrays['permutations'][i - base, j] = perm
+            yields.append(float(total_yield))
+        records.append((i, yields, batch_columns))
+    return records
+
+
+class ExperimentEngine:
+    """Process pool that runs experiment shards against shared-memory tensors."""
+
+    def __init__(self, workers: Optional[int] = None, start_method: Optional[str] = None,
+                 chunk_size: Optional[int] = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.start_method = start_method
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._pool = context.Pool(self.workers)
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _shards(self, count: int, total: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Split `count` experiments; `total` is the whole workload when several runs share the pool."""
+        size = self.chunk_size or max(1, min(100, count, (total or count) // (self.workers * 4) or 1))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    def _pending_shards(self, done: np.ndarray) -> List[Tuple[int, int]]:
+        """Shards covering the experiments not yet marked done."""
+        pending = np.flatnonzero(~done)
+        if not len(pending):
+            return []
+        # Непрерывные отрезки [a, b) ещё не выполненных экспериментов
+        breaks = np.flatnonzero(np.diff(pending) > 1)
+        starts = np.concatenate(([pending[0]], pending[breaks + 1]))
+        stops = np.concatenate((pending[breaks] + 1, [pending[-1] + 1]))
+        return [(int(a) + lo, int(a) + hi)
+                for a, b in zip(starts, stops) for lo, hi in self._shards(int(b - a), len(done))]
+
+    def _execute(self, count: int, shape: Tuple[int, int], config, strategies: Sequence[str],
+                 root: np.random.SeedSequence, keep: Sequence[str], return_batches: bool,
+                 S_input: Optional[np.ndarray] = None, antithetic: bool = False,
+                 checkpoint: Optional[Checkpoint] = None, log=None) -> EngineResult:
+        strategies = list(strategies)
+        unknown = [s for s in strategies if s not in STUDY_STRATEGIES]
+        if unknown:
+            raise ValueError(f"unknown strategies: {', '.join(unknown)}")
+        state = key = None
+        if checkpoint is not None:
+            if config is None or return_batches:
+                raise ValueError("checkpoints need a generated run without return_batches")
+            key = fingerprint({'run': 'execute', 'config': dataclasses.asdict(config), 'K': count,
+                               'strategies': strategies, 'keep': sorted(keep), 'antithetic': antithetic,
+                               'seed': [root.entropy, root.spawn_key, root.n_children_spawned]})
+            state = checkpoint.load(key)
+
+        if antithetic:
+            # Эксперименты 2k и 2k+1 используют одно зерно
+            pair_seeds = root.spawn((count + 1) // 2)
+            seeds = [pair_seeds[i // 2] for i in range(count)]
+        else:
+            seeds = root.spawn(count)  # spawn() продолжает нумерацию: куски подряд = один прогон
+        specs = {name: ((count,) + tuple(shape), 'float64') for name in MATRIX_NAMES if name in keep or name == 'S'}
+        specs['permutations'] = ((count, len(strategies), shape[1]), 'int32')
+        started = time.perf_counter()
+
+        shared = _SharedArrays(specs)
+        try:
+            shared.arrays['permutations'].fill(-1)
+            if S_input is not None:
+                shared.arrays['S'][:] = S_input
+
+            yields = np.full((count, len(strategies)), np.nan)
+            done = np.zeros(count, dtype=bool)
+            if state is not None:
+                done, yields = state['done'].copy(), state['yields'].copy()
+                for name in ('permutations',) + tuple(keep):
+                    shared.arrays[name][:] = state[name]
+                if log:
+                    log(f"resuming from checkpoint: {int(done.sum())}/{count} experiments done")
+
+            tasks = [(shared.spec, start, stop, config, strategies, seeds[start:stop],
+                      return_batches, antithetic)
+                     for start, stop in self._pending_shards(done)]
+            batches: Optional[List[BatchTable]] = [None] * count if return_batches else None
+
+            if self.workers == 1 or len(tasks) == 1:
+                results = map(_run_shard, tasks)
+            else:
+                results = self._get_pool().imap_unordered(_run_shard, tasks)
+            for records in results:
+                for i, shard_yields, batch_columns in records:
+                    yields[i] = [np.nan if y is None else y for y in shard_yields]
+                    done[i] = True
+                    if batches is not None:
+                        batches[i] = BatchTable(**batch_columns)
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save(key, dict({name: shared.arrays[name] for name in ('permutations',) + tuple(keep)},
+                                              done=done, yields=yields),
+                                    meta={'root_seed': root.entropy})
+                if log:
+                    log(f"{int(done.sum())}/{count} experiments, {time.perf_counter() - started:.1f}s")
+
+            matrices = {name: shared.arrays[name].copy() for name in MATRIX_NAMES
+                        if name in shared.arrays and name in keep}
+            permutations = shared.arrays['permutations'].copy()
+        finally:
+            shared.release()
+        if checkpoint is not None:
+            checkpoint.remove()
+
+        return EngineResult(
+            strategies=strategies, yields=yields, permutations=permutations,
+            matrices=matrices, batches=batches, root_seed=root.entropy,
+            elapsed_seconds=time.perf_counter() - started, workers=self.workers,
+        )
+
+    def run(self, config, num_experiments: int, strategies: Sequence[str] = (),
+            seed: Optional[int] = None, keep: Sequence[str] = (),
+            return_batches: bool = False, antithetic: bool = False,
+            checkpoint: Optional[Checkpoint] = None, log=None) -> EngineResult:
+        """
+        Generate num_experiments experiments and run `strategies` on each S.
+        `keep` lists the matrices ('B', 'C', 'L', 'S') to return.
+        antithetic: experiments (2k, 2k+1) are antithetic pairs.
+        checkpoint: completed experiments are saved there every
+        checkpoint.interval seconds and skipped when the same run (config,
+        K, strategies, seed) is started again; removed on completion.
+        """
+        return self._execute(num_experiments, (config.n, config.num_stages), config, strategies,
+                             np.random.SeedSequence(seed), keep, return_batches,
+                             antithetic=antithetic, checkpoint=checkpoint, log=log)
+
+    def compare_configs(self, configs: Dict[str, object], num_experiments: int,
+                        strategies: Sequence[str], seed: Optional[int] = None,
+                        common_random_numbers: bool = True, antithetic: bool = False,
+                        return_batches: bool = False, log=None) -> Dict[str, EngineResult]:
+        """
+        Run every configuration on num_experiments experiments. With
+        common_random_numbers, experiment i of every configuration uses the
+        same seed, so differences between configurations are paired;
+        otherwise each configuration gets an independent seed stream.
+        """
+        sizes = {(config.n, config.num_stages) for config in configs.values()}
+        if len(sizes) > 1:
+            raise ValueError("compared configurations must have the same n and stages")
+        root = np.random.SeedSequence(seed)
+        roots = ([np.random.SeedSequence(root.entropy) for _ in configs] if common_random_numbers
+                 else root.spawn(len(configs)))
+        return {
+            name: self._execute(num_experiments, (config.n, config.num_stages), config, strategies, config_root, (),
+                                return_batches, antithetic=antithetic, log=log)
+            for (name, config), config_root in zip(configs.items(), roots)
+        }
+
+    def run_cells(self, cells: Sequence[Tuple[object, np.random.SeedSequence]], num_experiments: int,
+                  strategies: Sequence[str], antithetic: bool = False,
+                  on_cell=None, log=None) -> List[EngineResult]:
+        """
+        Run num_experiments experiments for every (config, root seed) cell.
+        Shards of all cells go to the pool at once, so many small cells keep
+        every worker busy. on_cell(index, result) is called as each cell
+        completes (in completion order). Matrices are not returned.
+        """
+        strategies = list(strategies)
+        unknown = [s for s in strategies if s not in STUDY_STRATEGIES]
+        if unknown:
+            raise ValueError(f"unknown strategies: {', '.join(unknown)}")
+
+        started = time.perf_counter()
+        total = num_experiments * len(cells)
+        tasks = []
+        for index, (config, root) in enumerate(cells):
+            if antithetic:
+                pair_seeds = root.spawn((num_experiments + 1) // 2)
+                seeds = [pair_seeds[i // 2] for i in range(num_experiments)]
+            else:
+                seeds = root.spawn(num_experiments)
+            tasks.extend((index, start, stop, config, strategies, seeds[start:stop], antithetic)
+                         for start, stop in self._shards(num_experiments, total))
+
+        yields = [np.full((num_experiments, len(strategies)), np.nan) for _ in cells]
+        permutations = [np.full((num_experiments, len(strategies), config.num_stages), -1, dtype=np.int32)
+                        for config, _ in cells]
+        remaining = [num_experiments] * len(cells)
+        results: List[Optional[EngineResult]] = [None] * len(cells)
+
+        if self.workers == 1 or len(tasks) == 1:
+            shards = map(_run_cell_shard, tasks)
+        else:
+            shards = self._get_pool().imap_unordered(_run_cell_shard, tasks)
+        for index, start, records, shard_permutations in shards:
+            for i, shard_yields, _ in records:
+                yields[index][i] = [np.nan if y is None else y for y in shard_yields]
+            permutations[index][start:start + len(records)] = shard_permutations
+            remaining[index] -= len(records)
+            if remaining[index]:
+                continue
+            results[index] = EngineResult(
+                strategies=strategies, yields=yields[index], permutations=permutations[index],
+                root_seed=cells[index][1].entropy,
+                elapsed_seconds=time.perf_counter() - started, workers=self.workers,
+            )
+            if on_cell:
+                on_cell(index, results[index])
+            if log:
+                done = sum(r is not None for r in results)
+                log(f"{done}/{len(cells)} cells, {time.perf_counter() - started:.1f}s")
+        return results
+
+    def optimize(self, S_stack: np.ndarray, strategies: Sequence[str],
+                 seed: Optional[int] = None, log=None) -> EngineResult:
+        """Run `strategies` on each of the given (K, n, m) S matrices."""
+        S_stack = np.asarray(S_stack, dtype=np.float64)
+        if S_stack.ndim != 3:
+            raise ValueError("expected a (K, n, m) stack of matrices")
+        return self._execute(S_stack.shape[0], S_stack.shape[1:], None, strategies,
+                             np.random.SeedSequence(seed), (), False, S_input=S_stack, log=log)
+
+    def run_adaptive(self, config, strategies: Sequence[str], tolerance: float,
+                     confidence: float = 0.95, chunk_size: int = 50,
+                     min_experiments: Optional[int] = None, max_experiments: int = 5000,
+                     max_seconds: Optional[float] = None, seed: Optional[int] = None,
+                     mass_per_batch: Optional[float] = None, keep: Sequence[str] = (),
+                     on_chunk=None, checkpoint: Optional[Checkpoint] = None,
+                     log=None) -> Tuple[StrategyAggregator, dict]:
+        """
+        Run experiments in chunks until the confidence interval half-width of
+        every strategy's relative loss vs 'optimal' (percentage points) is at
+        most `tolerance`, or max_experiments / max_seconds is reached.
+
+        Returns (aggregator, report); on_chunk(result) receives each chunk's
+        EngineResult (with the matrices listed in `keep`). The first K experiments are the same as run(config, K, seed=seed).
+
+        checkpoint: completed chunks are saved there (at most every
+        checkpoint.interval seconds). A restarted run with the same config,
+        strategies, chunk_size, keep and seed replays them - one on_chunk
+        call with all saved experiments - and continues; the stopping
+        parameters may differ. The file is removed when the run stops.
+        """
+        strategies = list(strategies)
+        if 'optimal' not in strategies:
+            raise ValueError("adaptive mode needs the 'optimal' strategy as the reference")
+        if tolerance <= 0 or chunk_size < 1 or max_experiments < 1:
+            raise ValueError("tolerance, chunk_size and max_experiments must be positive")
+        mass = config.m if mass_per_batch is None else mass_per_batch
+        min_experiments = min(max_experiments, min_experiments or max(chunk_size, 20))
+
+        root = np.random.SeedSequence(seed)
+        aggregator = StrategyAggregator(strategies, reference='optimal')
+        started = time.perf_counter()
+        total = 0
+        previous_seconds = 0.0
+        half_widths: Dict[str, float] = {}
+        saved: Dict[str, List[np.ndarray]] = {name: [] for name in ('yields', 'permutations') + tuple(keep)}
+
+        def record(result: EngineResult) -> None:
+            result.add_to(aggregator, mass)
+            if on_chunk:
+                on_chunk(result)
+            if checkpoint is not None:
+                saved['yields'].append(result.yields)
+                saved['permutations'].append(result.permutations)
+                for name in keep:
+                    saved[name].append(result.matrices[name])
+
+        def stop_reason_now() -> Optional[str]:
+            nonlocal half_widths
+            elapsed = previous_seconds + time.perf_counter() - started
+            half_widths = {name: summary.stats.half_width(confidence)
+                           for name, summary in aggregator.relative_losses.items()}
+            worst = max(half_widths.values(), default=0.0)
+            if log:
+                log(f"{total} experiments, {elapsed:.1f}s, widest CI half-width {worst:.4f} pp")
+            if total >= min_experiments and worst <= tolerance:
+                return 'converged'
+            if total >= max_experiments:
+                return 'max_experiments'
+            if max_seconds is not None and elapsed >= max_seconds:
+                return 'time_budget'
+            return None
+
+        stop_reason = None
+        if checkpoint is not None:
+            key = fingerprint({'run': 'adaptive', 'config': dataclasses.asdict(config), 'strategies': strategies,
+                               'chunk_size': chunk_size, 'keep': sorted(keep), 'seed': root.entropy})
+            state = checkpoint.load(key)
+            if state is not None:
+                total = len(state['yields'])
+                previous_seconds = state['meta'].get('elapsed_seconds', 0.0)
+                root.spawn(total)  # те же зёрна, что у непрерывного прогона
+                record(EngineResult(strategies=strategies, yields=state['yields'],
+                                    permutations=state['permutations'],
+                                    matrices={name: state[name] for name in keep},
+                                    root_seed=root.entropy, workers=self.workers))
+                if log:
+                    log(f"resuming from checkpoint: {total} experiments done")
+                stop_reason = stop_reason_now()
+
+        while stop_reason is None:
+            count = min(chunk_size, max_experiments - total)
+            record(self._execute(count, (config.n, config.num_stages), config, strategies, root, keep, False))
+            total += count
+            stop_reason = stop_reason_now()
+            if stop_reason is None and checkpoint is not None and checkpoint.due():
+                for name, parts in saved.items():
+                    saved[name] = [np.concatenate(parts)]
+                checkpoint.save(key, {name: parts[0] for name, parts in saved.items()},
+                                meta={'root_seed': root.entropy,
+                                      'elapsed_seconds': previous_seconds + time.perf_counter() - started})
+        if checkpoint is not None:
+            checkpoint.remove()
+
+        report = {
+            'converged': stop_reason == 'converged',
+            'stop_reason': stop_reason,
+            'experiments': total,
+            'tolerance': tolerance,
+            'confidence': confidence,
+            'elapsed_seconds': previous_seconds + time.perf_counter() - started,
+            'relative_loss_ci': {
+                name: {
+                    'mean': aggregator.relative_losses[name].stats.mean,
+                    'half_width': hw,
+                    'within_tolerance': hw <= tolerance,
+                }
+                for name, hw in half_widths.items()
+            },
+            'root_seed': root.entropy,
+        }
+        return aggregator, report
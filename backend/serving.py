@@ -0,0 +1,279 @@
+"""
+===================================================================
+ПРОДАКШН-СЕРВЕР - МНОГОПРОЦЕССНЫЙ ЗАПУСК BACKEND
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Этот модуль запускает Flask приложение в "боевом" режиме вместо
+    встроенного dev-сервера (app.run(debug=True)), который обрабатывает
+    запросы в одном процессе с перезагрузчиком и отладчиком.
+
+СХЕМА РАБОТЫ (pre-fork):
+    1. Родительский процесс один раз импортирует numpy, scipy и все модули
+       core/algorithms (preload_modules), чтобы дочерние процессы получили
+       их уже загруженными через fork (copy-on-write).
+    2. Родитель открывает слушающий сокет на host:port.
+    3. Создаются `workers` дочерних процессов; каждый принимает соединения
+       с общего сокета и обслуживает их пулом из `threads` потоков.
+    4. Родитель следит за дочерними процессами и перезапускает упавшие;
+       по SIGINT/SIGTERM завершает всех.
+
+    На Windows нет fork(), поэтому там запускается один процесс с пулом
+    потоков (workers игнорируется).
+
+ПРОГРЕВ (warmup):
+    scipy.optimize загружается лениво (algorithms/optimizer.py), чтобы не
+    задерживать старт. prewarm() загружает его и один раз прогоняет все
+    стратегии Optimizer на маленькой матрице. Состояние прогрева
+    (warmup.to_dict()) отдаётся через GET /health:
+        - в dev-режиме прогрев идёт в фоновом потоке после запуска сервера
+        - в production-режиме - в родительском процессе до fork(),
+          воркеры стартуют уже прогретыми
+
+ИСПОЛЬЗОВАНИЕ:
+    python app.py --mode production --workers 4 --threads 8
+
+    или из кода:
+        from serving import run_production
+        run_production(app, host='0.0.0.0', port=5000, workers=4, threads=8)
+===================================================================
+"""
+
+import importlib
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from werkzeug.serving import BaseWSGIServer
+
+_started_at = time.time()
+
+# Модули, которые импортируются один раз до fork()
+PRELOAD_MODULES = [
+    'numpy',
+    'scipy.optimize',
+    'core.models',
+    'core.generators',
+    'core.losses',
+    'algorithms.optimizer',
+]
+
+
+def default_workers() -> int:
+    """Default number of worker processes: one per CPU core."""
+    return os.cpu_count() or 1
+
+
+def preload_modules() -> List[str]:
+    """Import heavy numeric modules in the parent so workers inherit them."""
+    loaded = []
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+        loaded.append(name)
+    return loaded
+
+
+class WarmupState:
+    """Readiness of the numeric solvers, reported by GET /health."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.solvers: Dict[str, bool] = {}
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'status': 'ok',
+                'ready': self.ready,
+                'warming': self.started_at is not None and not self.ready,
+                'solvers': dict(self.solvers),
+                'warmup_seconds': (self.finished_at - self.started_at) if self.ready else None,
+                'error': self.error,
+                'uptime_seconds': time.time() - _started_at,
+                'pid': os.getpid(),
+            }
+
+
+warmup = WarmupState()
+
+
+def prewarm() -> WarmupState:
+    """Load scipy.optimize and run every Optimizer strategy once on a small matrix."""
+    with warmup._lock:
+        if warmup.started_at is not None:
+            return warmup
+        warmup.started_at = time.time()
+    solvers = {}
+    error = None
+    try:
+        import numpy as np
+        from algorithms.optimizer import Optimizer, load_linear_sum_assignment
+
+        try:
+            load_linear_sum_assignment()
+            solvers['scipy.optimize'] = True
+        except ImportError:
+            solvers['scipy.optimize'] = False
+
+        S = np.random.default_rng(0).uniform(10.0, 20.0, size=(8, 8))
+        for name, func, args in (
+            ('greedy', Optimizer.optimize_greedy, (S,)),
+            ('thrifty', Optimizer.optimize_thrifty, (S,)),
+            ('thrifty_greedy', Optimizer.optimize_thrifty_greedy, (S, 4)),
+            ('greedy_thrifty', Optimizer.optimize_greedy_thrifty, (S, 4)),
+            ('optimal', Optimizer.optimize_hungarian, (S,)),
+            ('notoptimal', Optimizer.optimize_hungarian_min, (S,)),
+        ):
+            func(*args)
+            solvers[name] = True
+    except Exception as e:  # прогрев не должен ронять сервер
+        error = str(e)
+    with warmup._lock:
+        warmup.solvers = solvers
+        warmup.error = error
+        warmup.finished_at = time.time()
+    return warmup
+
+
+def start_prewarm_thread() -> threading.Thread:
+    """Run prewarm() in a daemon thread so the server can accept requests meanwhile."""
+    thread = threading.Thread(target=prewarm, name='prewarm', daemon=True)
+    thread.start()
+    return thread
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server that handles connections on a bounded thread pool.
+    Unlike werkzeug's ThreadedWSGIServer it never spawns more than
+    `threads` handler threads per process.
+    """
+    multithread = True
+
+    def __init__(self, host, port, app, threads: int = 4, fd=None):
+        super().__init__(host, port, app, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, threads))
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def shutdown_pool(self):
+        self._pool.shutdown(wait=False)
+
+
+def _bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve_worker(app, host, port, threads, fd, on_bound=None):
+    server = PooledWSGIServer(host, port, app, threads=threads, fd=fd)
+    if on_bound is not None:
+        on_bound()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.shutdown_pool()
+
+
+def run_production(app, host: str = '0.0.0.0', port: int = 5000,
+                   workers: int = None, threads: int = 4) -> None:
+    """
+    Run `app` with `workers` pre-forked processes of `threads` threads each.
+    Numeric modules are imported before forking.
+    """
+    workers = workers or default_workers()
+
+    if not hasattr(os, 'fork') or workers <= 1:
+        if workers > 1:
+            print("fork() is not available, running a single worker process", file=sys.stderr)
+        # Прогрев идёт в фоне, как только сервер открыл сокет
+        _serve_worker(app, host, port, threads, fd=None, on_bound=start_prewarm_thread)
+        return
+
+    # Воркеры делят ядра: пул engine.py в каждом воркере меньше (app.get_engine)
+    os.environ['BACKEND_SERVER_WORKERS'] = str(workers)
+    # Сокет открывается до прогрева: ранние соединения ждут в очереди (backlog)
+    sock = _bind_socket(host, port)
+    preload_modules()
+    prewarm()
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Дочерний процесс: стандартная обработка сигналов и обслуживание сокета
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 0
+            try:
+                _serve_worker(app, host, port, threads, fd=sock.fileno())
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on http://{host}:{port} with {workers} workers x {threads} threads",
+          file=sys.stderr)
+
+    try:
+        while children:
+            try:
+                pid, _status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            children.discard(pid)
+            if not stopping:
+                # Упавший воркер заменяется новым (с паузой, чтобы не зациклиться
+                # на воркере, который падает сразу после старта)
+                time.sleep(1.0)
+                spawn()
+    finally:
+        sock.close()
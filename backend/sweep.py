@@ -0,0 +1,403 @@
+"""
+===================================================================
+ПЕРЕБОР ПАРАМЕТРОВ - МОНТЕ-КАРЛО ПО СЕТКЕ КОНФИГУРАЦИЙ
+===================================================================
+
+НАЗНАЧЕНИЕ:
+    Исследования чувствительности требуют прогнать /multi_simulate +
+    /multi_optimize для каждой комбинации параметров (n, beta1/beta2,
+    distribution_type, enable_ripening, v, delta_k, growth_base, ...).
+    Этот модуль:
+        1. Строит ячейки - словари параметров в формате POST /simulate -
+           из базовой конфигурации, сетки (декартово произведение) и/или
+           явного списка ячеек
+        2. Отдаёт эксперименты всех ещё не посчитанных ячеек движку
+           (engine.py, ExperimentEngine.run_cells) - одним пулом процессов
+        3. Кэширует посчитанные ячейки по отпечатку (config_fingerprint):
+           повторный или расширенный перебор считает только новые ячейки
+        4. Возвращает "длинную" таблицу: одна строка на (ячейка, стратегия)
+
+ИСПОЛЬЗОВАНИЕ:
+    Из кода:
+        from sweep import run_sweep, SweepCache
+
+        report = run_sweep({'base': plant, 'grid': {'delta_k': [2, 3, 4]}, 'K': 200},
+                           cache=SweepCache('sweep_cache'))
+        report['rows']     # [{'delta_k': 2, 'strategy': 'greedy', 'yield_mean': ...}, ...]
+
+    Через API: POST /sweep (см. app.py)
+
+    Из командной строки (из папки backend):
+        python sweep.py --spec sweep.json --output sweep_results/ --workers 8
+
+ФОРМАТ ОПИСАНИЯ ПЕРЕБОРА (spec):
+    {
+        "base": {...},                  # параметры /simulate, общие для всех ячеек
+        "grid": {"distribution_type": ["uniform", "concentrated"],
+                 "delta_k": [2, 3, 4]},   # декартово произведение
+        "cells": [{"n": 10}, {"n": 20, "v": 3}],  # и/или явный список изменений
+        "K": 100,                       # экспериментов на ячейку
+        "strategies": [...],            # по умолчанию как в /multi_optimize
+        "seed": 42,                     # неотрицательное целое
+        "common_random_numbers": true,  # одно зерно для всех ячеек
+        "antithetic": false,
+        "confidence": 0.95              # уровень доверия полуширин ДИ, в (0, 1)
+    }
+    Если заданы и "cells", и "grid", сетка применяется к каждой ячейке.
+
+СТРОКА ТАБЛИЦЫ:
+    изменяемые параметры ячейки, strategy, experiments, yield_mean,
+    yield_std, yield_ci_half_width, yield_p5, yield_p50, yield_p95,
+    final_mass_mean, relative_loss_mean, relative_loss_ci_half_width,
+    win_rate, tie_rate (последние четыре - к 'optimal', если он есть)
+
+ВАЖНО:
+    - Отпечаток ячейки учитывает всю ExperimentConfig (после значений по
+      умолчанию), K, стратегии, корневое зерно и режимы выборки. Без
+      "seed" зерно новое при каждом запуске: такие ячейки не могли бы
+      попасть в кэш повторно и поэтому в него не пишутся.
+      Уровень доверия в отпечаток не входит: полуширина ДИ пропорциональна
+      z, поэтому ячейка из кэша пересчитывается к запрошенному
+      "confidence" без повторного прогона.
+    - С common_random_numbers все ячейки берут одно корневое зерно:
+      разности между ячейками парные (см. engine.compare_configs). Иначе
+      зерно ячейки выводится из её отпечатка и не зависит от порядка ячеек.
+    - Каждая ячейка кэшируется сразу по завершении: прерванный перебор
+      продолжается с того же места при повторном запуске с тем же "seed"
+      (командная строка без "seed" хранит выбранное зерно в папке кэша).
+      Кэш ячеек - контрольная точка перебора; отдельная ячейка
+      пересчитывается целиком.
+===================================================================
+"""
+
+import argparse
+import csv
+import dataclasses
+import itertools
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from statistics import NormalDist
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.checkpoint import fingerprint
+from core.config import validate_config, build_experiment_config
+from core.models import ExperimentConfig
+from core.stats import StrategyAggregator
+from algorithms.scaling import STUDY_STRATEGIES
+from engine import ExperimentEngine
+
+# Стратегии по умолчанию - те же, что в /multi_optimize
+DEFAULT_SWEEP_STRATEGIES = ('greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'optimal', 'notoptimal')
+
+CONFIG_FIELDS = tuple(f.name for f in dataclasses.fields(ExperimentConfig))
+
+ROW_METRICS = ('experiments', 'yield_mean', 'yield_std', 'yield_ci_half_width',
+               'yield_p5', 'yield_p50', 'yield_p95', 'final_mass_mean',
+               'relative_loss_mean', 'relative_loss_ci_half_width', 'win_rate', 'tie_rate')
+
+
+def expand_cells(base: dict, grid: Optional[Dict[str, Sequence]] = None,
+                 cells: Optional[Sequence[dict]] = None) -> List[dict]:
+    """Parameter dicts of all cells: base, updated by each cell, times the grid product."""
+    grid = grid or {}
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return [dict(base, **override, **combo) for override in (cells or [{}]) for combo in combos]
+
+
+def swept_columns(grid: Optional[dict] = None, cells: Optional[Sequence[dict]] = None) -> List[str]:
+    """Parameters that vary between cells, in order of first appearance."""
+    columns = []
+    for override in cells or []:
+        columns.extend(k for k in override if k not in columns)
+    columns.extend(k for k in grid or {} if k not in columns)
+    return columns
+
+
+def validate_sweep(spec: dict, max_cells: Optional[int] = None,
+                   max_experiments: Optional[int] = None) -> List[str]:
+    """Validate a sweep description; returns a list of error messages."""
+    errors = []
+    base = spec.get('base', {})
+    grid = spec.get('grid') or {}
+    cells = spec.get('cells')
+    num_experiments = spec.get('K', 50)
+    strategies = spec.get('strategies', list(DEFAULT_SWEEP_STRATEGIES))
+
+    if not isinstance(base, dict):
+        errors.append("base must be an object")
+    if not isinstance(grid, dict) or any(not isinstance(v, list) or not v for v in grid.values()):
+        errors.append("grid must map parameter names to non-empty lists")
+    if cells is not None and (not isinstance(cells, list) or not cells
+                              or any(not isinstance(c, dict) for c in cells)):
+        errors.append("cells must be a non-empty list of objects")
+    if not isinstance(num_experiments, int) or num_experiments < 1:
+        errors.append("K must be a positive integer")
+    confidence = spec.get('confidence', 0.95)
+    if not isinstance(confidence, (int, float)) or isinstance(confidence, bool) or not 0 < confidence < 1:
+        errors.append("confidence must be a number in (0, 1)")
+    seed = spec.get('seed')
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        errors.append("seed must be a non-negative integer")
+    if not isinstance(strategies, list) or not strategies or any(s not in STUDY_STRATEGIES for s in strategies):
+        errors.append(f"strategies must be from: {', '.join(STUDY_STRATEGIES)}")
+    if errors:
+        return errors
+
+    unknown = [k for k in swept_columns(grid, cells) if k not in CONFIG_FIELDS]
+    if unknown:
+        return [f"unknown parameters: {', '.join(unknown)}"]
+
+    expanded = expand_cells(base, grid, cells)
+    if max_cells is not None and len(expanded) > max_cells:
+        errors.append(f"sweep has {len(expanded)} cells, at most {max_cells} allowed")
+    if max_experiments is not None and len(expanded) * num_experiments > max_experiments:
+        errors.append(f"cells * K must not exceed {max_experiments}")
+    if errors:
+        return errors
+
+    columns = swept_columns(grid, cells)
+    for params in expanded:
+        label = ', '.join(f"{k}={params.get(k)}" for k in columns) or 'base'
+        errors.extend(f"cell ({label}): {e}" for e in validate_config(params))
+    return errors
+
+
+def config_fingerprint(config: ExperimentConfig, num_experiments: int, strategies: Sequence[str],
+                       root_entropy: int, common_random_numbers: bool, antithetic: bool) -> str:
+    """Stable hash of everything that determines a cell's result."""
+    return fingerprint({
+        'config': dataclasses.asdict(config),
+        'K': num_experiments,
+        'strategies': list(strategies),
+        'seed': str(root_entropy),
+        'common_random_numbers': bool(common_random_numbers),
+        'antithetic': bool(antithetic),
+    })
+
+
+class SweepCache:
+    """
+    Completed cells by fingerprint. With a directory, each cell is a JSON
+    file there (survives restarts); otherwise an in-memory dict that keeps
+    at most max_entries cells (oldest evicted first).
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str) -> Optional[dict]:
+        if not self.directory:
+            return self._memory.get(key)
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, entry: dict) -> None:
+        if not self.directory:
+            self._memory[key] = entry
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            return
+        # Запись через временный файл: прерванный процесс не оставит битую ячейку
+        tmp = self._path(key) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(key))
+
+
+def cell_rows(aggregator: StrategyAggregator, confidence: float = 0.95) -> List[dict]:
+    """Per-strategy metrics of one cell (the swept parameters are added by run_sweep)."""
+    statistics = aggregator.to_dict()
+    rows = []
+    for name in aggregator.strategies:
+        entry = statistics[name]
+        row = {
+            'strategy': name,
+            'experiments': entry['yield']['count'],
+            'yield_mean': entry['yield']['mean'],
+            'yield_std': entry['yield']['std'],
+            'yield_ci_half_width': aggregator.yields[name].stats.half_width(confidence),
+            'yield_p5': entry['yield'].get('p5'),
+            'yield_p50': entry['yield'].get('p50'),
+            'yield_p95': entry['yield'].get('p95'),
+            'final_mass_mean': entry['final_mass']['mean'],
+            'relative_loss_mean': None,
+            'relative_loss_ci_half_width': None,
+            'win_rate': None,
+            'tie_rate': None,
+        }
+        if 'relative_loss_percent' in entry:
+            versus = entry[f'versus_{aggregator.reference}']
+            row.update(
+                relative_loss_mean=entry['relative_loss_percent']['mean'],
+                relative_loss_ci_half_width=aggregator.relative_losses[name].stats.half_width(confidence),
+                win_rate=versus['win_rate'],
+                tie_rate=versus['tie_rate'],
+            )
+        rows.append(row)
+    return rows
+
+
+def rescale_rows(rows: List[dict], from_confidence: float, to_confidence: float) -> List[dict]:
+    """Rows with the CI half-widths converted to another confidence level (they scale with z)."""
+    if from_confidence == to_confidence:
+        return rows
+    ratio = NormalDist().inv_cdf(0.5 + to_confidence / 2) / NormalDist().inv_cdf(0.5 + from_confidence / 2)
+    scaled = []
+    for row in rows:
+        row = dict(row)
+        for name in ('yield_ci_half_width', 'relative_loss_ci_half_width'):
+            if row[name] is not None:
+                row[name] *= ratio
+        scaled.append(row)
+    return scaled
+
+
+def run_sweep(spec: dict, engine: Optional[ExperimentEngine] = None, cache: Optional[SweepCache] = None,
+              workers: Optional[int] = None, log=None) -> dict:
+    """
+    Run every cell of a (validated) sweep description; cells found in the
+    cache are not recomputed. Uses `engine` if given, otherwise a private
+    ExperimentEngine(workers) that is closed afterwards.
+    """
+    grid, cells = spec.get('grid') or {}, spec.get('cells')
+    num_experiments = spec.get('K', 50)
+    strategies = list(spec.get('strategies', DEFAULT_SWEEP_STRATEGIES))
+    common_random_numbers = spec.get('common_random_numbers', True)
+    antithetic = bool(spec.get('antithetic'))
+    confidence = spec.get('confidence', 0.95)
+    cache = cache if cache is not None else SweepCache()
+
+    columns = swept_columns(grid, cells)
+    params_list = expand_cells(spec.get('base', {}), grid, cells)
+    configs = [build_experiment_config(params) for params in params_list]
+    root = np.random.SeedSequence(spec.get('seed'))
+    # Без "seed" отпечатки ячеек больше не повторятся: запись в кэш лишь заняла бы диск
+    cacheable = spec.get('seed') is not None
+    keys = [config_fingerprint(config, num_experiments, strategies, root.entropy,
+                               common_random_numbers, antithetic) for config in configs]
+    started = time.perf_counter()
+
+    # Ячейки старого формата (без уровня доверия) считаются заново
+    entries: List[Optional[dict]] = [cache.get(key) for key in keys]
+    entries = [entry if entry is not None and 'confidence' in entry else None for entry in entries]
+    pending = [i for i, entry in enumerate(entries) if entry is None]
+    cached = len(configs) - len(pending)
+    if log:
+        log(f"{len(configs)} cells: {cached} cached, {len(pending)} to run")
+
+    def seed_for(i):
+        if common_random_numbers:
+            return np.random.SeedSequence(root.entropy)
+        # Зерно из отпечатка ячейки: не зависит от её места в переборе
+        return np.random.SeedSequence(root.entropy, spawn_key=(int(keys[i][:8], 16),))
+
+    def store(index, result):
+        i = pending[index]
+        aggregator = result.add_to(StrategyAggregator(strategies, reference='optimal'), configs[i].m)
+        entries[i] = {'rows': cell_rows(aggregator, confidence), 'confidence': confidence,
+                      'failed_runs': int((~result.success).sum())}
+        if cacheable:
+            cache.put(keys[i], entries[i])
+
+    if pending:
+        own_engine = engine is None
+        engine = engine or ExperimentEngine(workers)
+        try:
+            engine.run_cells([(configs[i], seed_for(i)) for i in pending], num_experiments, strategies,
+                             antithetic=antithetic, on_cell=store, log=log)
+        finally:
+            if own_engine:
+                engine.close()
+
+    rows = []
+    cell_reports = []
+    for i, params in enumerate(params_list):
+        swept = {k: params.get(k) for k in columns}
+        rows.extend(dict(swept, **row)
+                    for row in rescale_rows(entries[i]['rows'], entries[i]['confidence'], confidence))
+        cell_reports.append({'params': swept, 'fingerprint': keys[i], 'cached': i not in pending,
+                             'failed_runs': entries[i]['failed_runs']})
+
+    return {
+        'columns': columns + ['strategy'] + list(ROW_METRICS),
+        'rows': rows,
+        'cells': cell_reports,
+        'cached_cells': cached,
+        'computed_cells': len(pending),
+        'experiments_per_cell': num_experiments,
+        'root_seed': root.entropy,
+        'elapsed_seconds': time.perf_counter() - started,
+    }
+
+
+def write_csv(report: dict, path: str) -> None:
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=report['columns'])
+        writer.writeheader()
+        for row in report['rows']:
+            writer.writerow({k: '' if v is None else v for k, v in row.items()})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo parameter sweep over ExperimentConfig fields")
+    parser.add_argument('--spec', required=True, help="JSON sweep description (see module docstring)")
+    parser.add_argument('--output', default='sweep_results', help="output directory")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processes (default: all cores)")
+    parser.add_argument('--cache-dir', help="cell cache directory (default: <output>/cache)")
+    parser.add_argument('--no-cache', action='store_true', help="recompute every cell")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with open(args.spec) as f:
+        spec = json.load(f)
+    errors = validate_sweep(spec)
+    if errors:
+        for e in errors:
+            print(f"error: {e}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    cache = None if args.no_cache else SweepCache(args.cache_dir or os.path.join(args.output, 'cache'))
+    if spec.get('seed') is None:
+        # Зерно сохраняется рядом с кэшем: повторный запуск продолжит прерванный перебор
+        seed_path = os.path.join(cache.directory, 'root_seed.json') if cache else None
+        if seed_path and os.path.exists(seed_path):
+            with open(seed_path) as f:
+                spec['seed'] = json.load(f)
+        else:
+            spec['seed'] = np.random.SeedSequence().entropy
+            if seed_path:
+                with open(seed_path, 'w') as f:
+                    json.dump(spec['seed'], f)
+    log = lambda line: print(line, file=sys.stderr)
+    report = run_sweep(spec, cache=cache, workers=args.workers, log=log)
+
+    csv_path = os.path.join(args.output, 'sweep.csv')
+    json_path = os.path.join(args.output, 'sweep.json')
+    write_csv(report, csv_path)
+    with open(json_path, 'w') as f:
+        json.dump(dict(report, spec=spec), f, indent=2)
+    for path in (csv_path, json_path):
+        log(f"wrote {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
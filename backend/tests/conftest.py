@@ -0,0 +1,13 @@
+import os
+import tempfile
+
+# Папка данных backend (app.CHECKPOINT_DIR) для тестов - временная, а не папка пользователя
+os.environ.setdefault('BACKEND_CHECKPOINT_DIR', tempfile.mkdtemp(prefix='backend-tests-'))
+
+from algorithms.optimizer import load_linear_sum_assignment
+
+
+def best_yield(S, maximize=True):
+    """Exact optimum of the assignment problem on S (reference for tests)."""
+    rows, cols = load_linear_sum_assignment()(S, maximize=maximize)
+    return S[rows, cols].sum()
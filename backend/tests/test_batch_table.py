@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from core.models import BeetBatch, BatchTable, ExperimentConfig
+from core.generators import MatrixGenerator
+from core.losses import LossModel
+
+
+def make_config(**overrides):
+    params = dict(n=12, m=1000.0, a_min=12.0, a_max=22.0, beta1=0.85, beta2=0.95,
+                  distribution_type='concentrated', enable_ripening=True, v=3)
+    params.update(overrides)
+    return ExperimentConfig(**params)
+
+
+def test_beet_batch_has_slots():
+    batch = BeetBatch(0, 10.0, 5.0, 0.5, 2.0, 0.63)
+    assert not hasattr(batch, '__dict__')
+
+
+def test_batch_table_round_trip():
+    batches = [BeetBatch(0, 10.0, 5.0, 0.5, 2.0, 0.63), BeetBatch(1, 11.0, 5.5, 0.4, 2.1, 0.62, delta=0.01)]
+    table = BatchTable.from_batches(batches)
+    assert len(table) == 2
+    assert np.isnan(table.delta[0]) and table.delta[1] == 0.01
+    assert table.to_batches() == batches
+    with pytest.raises(ValueError):
+        BatchTable(initial_sugar=[1.0, 2.0], k=[1.0])
+
+
+def test_generate_batches_respects_ranges():
+    config = make_config()
+    table = MatrixGenerator.generate_batches(config, np.random.default_rng(0))
+    assert len(table) == 12
+    assert np.all((table.initial_sugar >= 12.0) & (table.initial_sugar <= 22.0))
+    assert np.all(table.beta_range_start >= 0.85) and np.all(table.beta_range_end <= 0.95)
+    assert np.allclose(table.beta_range_end - table.beta_range_start, table.delta)
+    assert np.all(table.beta_range_start_ripening > 1.0)
+
+
+def test_losses_accept_table_or_list():
+    config = make_config()
+    table = MatrixGenerator.generate_batches(config, np.random.default_rng(1))
+    B = MatrixGenerator.generate_coefficients(config, table, np.random.default_rng(2))
+    C = MatrixGenerator.generate_states(table, B)
+    L_table = LossModel.calculate_losses(table, C, config.n)
+    L_list = LossModel.calculate_losses(table.to_batches(), C, config.n)
+    assert np.array_equal(L_table, L_list)
+    # Losses never decrease along the stages and stay within the absolute bounds
+    assert np.all(np.diff(L_table, axis=1) >= -1e-12)
+    assert np.all(L_table <= LossModel.MAX_LOSS)
+
+
+def test_generate_experiment_is_reproducible_with_seeded_rng():
+    config = make_config(distribution_type='uniform')
+    first = MatrixGenerator.generate_experiment(config, np.random.default_rng(7))
+    second = MatrixGenerator.generate_experiment(config, np.random.default_rng(7))
+    assert first['matrices']['S'].shape == (12, 12)
+    assert np.array_equal(first['matrices']['S'], second['matrices']['S'])
+    assert isinstance(first['batches'], BatchTable)
@@ -0,0 +1,51 @@
+import json
+
+from benchmarks.suite import compare, main, run, time_call
+
+
+def test_tiny_grid_covers_all_case_families():
+    document = run(sizes=[6], ks=[2], min_time=0.0, max_repeats=1)
+    names = {r['name'] for r in document['results']}
+    assert 'generators.generate_coefficients' in names
+    assert 'losses.calculate_losses' in names
+    assert {'optimizer.tkg', 'optimizer.random', 'optimizer.optimal'} <= names
+    assert {'endpoint.simulate', 'endpoint.optimize', 'endpoint.multi_simulate'} <= names
+    assert any(r['name'] == 'endpoint.multi_optimize' and r['K'] == 2 for r in document['results'])
+    assert all(r['median_seconds'] >= 0 for r in document['results'])
+
+
+def test_endpoint_cells_over_budget_are_skipped():
+    document = run(sizes=[10], ks=[500], max_elements=1000, min_time=0.0, max_repeats=1,
+                   only=['endpoint.multi_optimize'])
+    assert document['results'] == []
+    assert document['skipped'][0]['K'] == 500
+
+
+def test_time_call_loops_fast_functions():
+    repeats, timings = time_call(lambda: None, min_time=0.0, max_repeats=3)
+    assert repeats == 1 and len(timings) == 1
+
+
+def _doc(seconds):
+    return {'results': [{'name': 'optimizer.greedy', 'n': 10, 'K': 1, 'median_seconds': seconds}]}
+
+
+def test_compare_flags_only_slowdowns_above_threshold():
+    assert compare(_doc(1.2), _doc(1.0), threshold=0.25) == []
+    regressions = compare(_doc(1.5), _doc(1.0), threshold=0.25)
+    assert len(regressions) == 1 and regressions[0]['ratio'] == 1.5
+    assert compare(_doc(1.5e-6), _doc(1.0e-6), threshold=0.25, min_delta=1e-4) == []
+
+
+def test_main_exits_nonzero_on_regression(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    output = tmp_path / 'out.json'
+    args = ['--sizes', '6', '--only', 'optimizer.greedy', '--min-time', '0',
+            '--max-repeats', '1', '--output', str(output), '--baseline', str(baseline)]
+    assert main(args) == 2 and not output.exists()
+    assert main(args + ['--save-baseline']) == 0
+    saved = json.loads(baseline.read_text())
+    for r in saved['results']:
+        r['median_seconds'] = 1e-9
+    baseline.write_text(json.dumps(saved))
+    assert main(args + ['--min-delta', '0']) == 1
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from app import app
+from algorithms.bounds import column_bound, dual_bound, guaranteed_gap_percent, row_bound, yield_bounds
+from algorithms.optimizer import Optimizer
+from conftest import best_yield
+
+
+@pytest.mark.parametrize('shape', [(6, 6), (30, 30), (9, 4), (4, 9)])
+def test_bounds_enclose_the_optimum(shape):
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        S = rng.normal(10, 5, shape)
+        optimum = best_yield(S)
+        heuristics = {'greedy': Optimizer.optimize_greedy(S)[1], 'thrifty': Optimizer.optimize_thrifty(S)[1]}
+        bounds = yield_bounds(S, heuristics)
+        for name in ('column_bound', 'row_bound', 'dual_bound'):
+            assert bounds[name] >= optimum - 1e-9
+        assert bounds['upper_bound'] <= min(bounds['column_bound'], bounds['row_bound'])
+        assert bounds['lower_bound'] == max(heuristics.values()) <= optimum + 1e-9
+        assert heuristics[bounds['lower_bound_strategy']] == bounds['lower_bound']
+
+
+def test_relaxation_passes_tighten_the_dual_bound():
+    S = np.cumprod(np.random.default_rng(1).uniform(0.85, 0.97, (60, 60)), axis=1) * 20
+    greedy = Optimizer.optimize_greedy(S)[1]
+    start = dual_bound(S)
+    refined = dual_bound(S, 20, greedy)
+    assert best_yield(S) - 1e-9 <= refined < start <= min(column_bound(S), row_bound(S))
+    # гарантированный разрыв не меньше настоящего
+    true_loss = (best_yield(S) - greedy) / best_yield(S) * 100
+    assert guaranteed_gap_percent(refined, greedy) >= true_loss
+
+
+def test_stacked_matrices_match_single_ones():
+    stack = np.random.default_rng(2).random((3, 7, 5))
+    lower = np.array([Optimizer.optimize_greedy(S)[1] for S in stack])
+    assert np.allclose(column_bound(stack), [column_bound(S) for S in stack])
+    assert np.allclose(dual_bound(stack, 10, lower), [dual_bound(S, 10, b) for S, b in zip(stack, lower)])
+
+
+def test_endpoints_report_gap_without_exact_solve():
+    client = app.test_client()
+    S = (np.random.default_rng(3).random((8, 8)) * 20).tolist()
+    exact = client.post('/optimize', json={'matrix': S}).get_json()
+    assert exact['greedy']['guaranteed_gap_percent'] >= exact['greedy']['relative_loss_percent'] - 1e-9
+    assert exact['greedy']['upper_bound'] >= exact['optimal']['yield'] - 1e-9
+
+    fast = client.post('/optimize', json={'matrix': S, 'exact': False}).get_json()
+    assert set(fast) == {'greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty'}
+    assert fast['greedy']['guaranteed_gap_percent'] == pytest.approx(exact['greedy']['guaranteed_gap_percent'])
+
+    multi = client.post('/multi_optimize', json={'matrices': [S, S], 'exact': False}).get_json()
+    assert 'optimal' not in multi['averages']
+    assert multi['bounds']['upper_bound']['count'] == 2
+    assert multi['averages']['thrifty']['guaranteed_gap_percent'] == pytest.approx(
+        exact['thrifty']['guaranteed_gap_percent'])
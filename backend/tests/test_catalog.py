@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import pytest
+
+import app as backend
+from core.catalog import Catalog
+
+PLANT = {
+    'n': 6, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'uniform', 'seed': 4,
+}
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return Catalog(str(tmp_path))
+
+
+def test_record_list_and_fetch(catalog):
+    first = catalog.record('stage_summary', dict(PLANT, stages=None), seed=2 ** 90,
+                           summary={'mean': np.array([1.5, np.nan])}, arrays={'yields': np.arange(6.0).reshape(3, 2)})
+    second = catalog.record('adaptive_optimize', dict(PLANT, n=20, stages=5, distribution_type='concentrated'), seed=4)
+
+    assert [run['id'] for run in catalog.list()] == [second, first]
+    assert [run['id'] for run in catalog.list(n=6, stages=6)] == [first]
+    assert [run['id'] for run in catalog.list(distribution_type='concentrated', kind='adaptive_optimize')] == [second]
+    assert catalog.list(seed=2 ** 90)[0]['seed'] == 2 ** 90
+    assert catalog.list(since=time.time() + 60) == [] and len(catalog.list(until=time.time() + 60)) == 2
+    assert len(catalog.list(limit=1, offset=1)) == 1
+    with pytest.raises(ValueError):
+        catalog.list(a_min=12.0)
+
+    entry = catalog.get(first)
+    assert entry['summary'] == {'mean': [1.5, None]} and entry['config']['a_max'] == 22.0
+    assert entry['arrays'] == {'yields': {'shape': [3, 2], 'dtype': 'float64'}}
+    assert np.array_equal(catalog.load_array(first, 'yields'), np.arange(6.0).reshape(3, 2))
+    assert catalog.load_array(second, 'yields') is None
+
+    assert catalog.delete(first) and not catalog.delete(first)
+    assert catalog.get(first) is None and catalog.load_array(first, 'yields') is None
+    # Неизвестный id не удаляет ничего за пределами своей записи
+    assert not catalog.delete('..')
+    assert catalog.get(second) is not None
+
+
+def test_catalog_survives_a_new_instance(tmp_path):
+    run_id = Catalog(str(tmp_path)).record('stage_summary', PLANT, seed=1, arrays={'p': np.eye(3, dtype=np.int64)})
+    reopened = Catalog(str(tmp_path))
+    assert reopened.get(run_id)['seed'] == 1
+    assert reopened.load_array(run_id, 'p').dtype == np.int64
+
+
+def test_catalog_endpoints(monkeypatch, tmp_path):
+    monkeypatch.setattr(backend, 'CATALOG', Catalog(str(tmp_path)))
+    client = backend.app.test_client()
+    response = client.post('/stage_summary', json=dict(PLANT, K=5, strategies=['greedy'], catalog=True)).get_json()
+    run_id = response['catalog_id']
+
+    runs = client.get('/catalog?n=6&distribution_type=uniform&since=2000-01-01').get_json()['runs']
+    assert [run['id'] for run in runs] == [run_id]
+    assert client.get('/catalog?n=7').get_json()['count'] == 0
+    entry = client.get(f'/catalog/{run_id}').get_json()
+    assert entry['summary']['S']['mean'] == response['S']['mean'] and entry['seed'] == 4
+    yields = client.get(f'/catalog/{run_id}/arrays/yields').get_json()
+    assert yields['shape'] == [5, 1]
+    assert np.mean(yields['values']) == pytest.approx(response['strategies']['greedy']['yield']['mean'])
+
+    assert client.get('/catalog?limit=0').status_code == 400
+    assert client.get('/catalog?since=yesterday').status_code == 400
+    assert client.get(f'/catalog/{run_id}/arrays/missing').status_code == 404
+    assert client.delete(f'/catalog/{run_id}').status_code == 200
+    assert client.get(f'/catalog/{run_id}').status_code == 404
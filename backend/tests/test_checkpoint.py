@@ -0,0 +1,96 @@
+import numpy as np
+
+from core.checkpoint import Checkpoint
+from core.config import build_experiment_config
+from engine import ExperimentEngine
+
+PLANT = {
+    'n': 8, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated',
+}
+STRATEGIES = ['greedy', 'optimal']
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(lines):
+    """log callback that kills the run after `lines` progress messages."""
+    seen = []
+
+    def log(line):
+        seen.append(line)
+        if len(seen) >= lines:
+            raise Interrupted
+    return log
+
+
+def test_checkpoint_round_trip_and_fingerprint(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / 'run.npz'), interval=0)
+    checkpoint.save('a', {'yields': np.arange(3.0)}, meta={'root_seed': 7})
+    assert checkpoint.read_meta()['root_seed'] == 7
+    assert checkpoint.load('b') is None
+    state = checkpoint.load('a')
+    assert np.array_equal(state['yields'], np.arange(3.0)) and state['meta']['fingerprint'] == 'a'
+    checkpoint.remove()
+    assert checkpoint.load('a') is None and not (tmp_path / 'run.npz').exists()
+
+
+def test_interrupted_run_resumes_with_identical_results(tmp_path):
+    config = build_experiment_config(PLANT)
+    path = str(tmp_path / 'run.npz')
+    engine = ExperimentEngine(1, chunk_size=3)
+    reference = engine.run(config, 12, STRATEGIES, seed=9, keep=('S',))
+
+    try:
+        engine.run(config, 12, STRATEGIES, seed=9, keep=('S',),
+                   checkpoint=Checkpoint(path, interval=0), log=interrupt_after(2))
+    except Interrupted:
+        pass
+    with np.load(path) as saved:
+        assert saved['done'].sum() == 6
+
+    progress = []
+    resumed = engine.run(config, 12, STRATEGIES, seed=9, keep=('S',),
+                         checkpoint=Checkpoint(path, interval=0), log=progress.append)
+    assert progress[0] == 'resuming from checkpoint: 6/12 experiments done'
+    assert np.array_equal(resumed.yields, reference.yields)
+    assert np.array_equal(resumed.permutations, reference.permutations)
+    assert np.array_equal(resumed.matrices['S'], reference.matrices['S'])
+    assert not (tmp_path / 'run.npz').exists()
+
+
+def test_adaptive_run_resumes_from_checkpoint(tmp_path):
+    config = build_experiment_config(PLANT)
+    path = str(tmp_path / 'adaptive.npz')
+    engine = ExperimentEngine(1)
+    kwargs = dict(chunk_size=10, min_experiments=40, max_experiments=40, seed=3)
+    reference, report = engine.run_adaptive(config, STRATEGIES, 1e-9, **kwargs)
+
+    try:
+        engine.run_adaptive(config, STRATEGIES, 1e-9, checkpoint=Checkpoint(path, interval=0),
+                            log=interrupt_after(3), **kwargs)
+    except Interrupted:
+        pass
+    chunks = []
+    resumed, resumed_report = engine.run_adaptive(config, STRATEGIES, 1e-9, on_chunk=chunks.append,
+                                                  checkpoint=Checkpoint(path, interval=0), **kwargs)
+    assert [len(c.yields) for c in chunks] == [20, 10, 10]
+    assert resumed_report['experiments'] == report['experiments'] == 40
+    assert resumed.to_dict() == reference.to_dict()
+
+
+def test_unseeded_request_resumes_under_the_saved_seed(monkeypatch, tmp_path):
+    import app as backend
+    monkeypatch.setattr(backend, 'CHECKPOINT_DIR', str(tmp_path))
+    data = dict(PLANT, tolerance=0.5, precision=3)
+    checkpoint, seed = backend.request_checkpoint('adaptive', data)
+    assert backend.request_checkpoint('adaptive', dict(data, precision=6))[0].path == checkpoint.path
+
+    # Прерванный расчёт оставил контрольную точку с корневым зерном
+    checkpoint.save('run', {'yields': np.zeros(3)}, meta={'root_seed': seed})
+    assert backend.request_checkpoint('adaptive', data)[1] == seed
+    assert backend.request_checkpoint('adaptive', dict(data, seed=5))[1] == 5
+    checkpoint.remove()
+    assert backend.request_checkpoint('adaptive', data)[1] != seed
@@ -0,0 +1,48 @@
+import json
+
+import numpy as np
+import pytest
+
+from cli import main, parse_args, run_batch
+from core.config import build_experiment_config
+
+PLANT = {
+    'n': 8, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated', 'enable_ripening': True, 'v': 2,
+}
+
+
+def test_results_do_not_depend_on_chunking():
+    config = build_experiment_config(PLANT)
+    a = run_batch(config, 12, ['greedy', 'random', 'optimal'], workers=1, seed=3, chunk_size=12)
+    b = run_batch(config, 12, ['greedy', 'random', 'optimal'], workers=1, seed=3, chunk_size=5)
+    assert np.array_equal(a['yields'], b['yields'])
+    assert np.array_equal(a['permutations'], b['permutations'])
+    assert (a['yields'][:, 2] >= a['yields'][:, 0] - 1e-9).all()
+
+
+def test_main_writes_npz_csv_and_summary(tmp_path):
+    config_path = tmp_path / 'plant.json'
+    config_path.write_text(json.dumps(PLANT))
+    out = tmp_path / 'out'
+    assert main(['--config', str(config_path), '-K', '6', '--workers', '2', '--seed', '1',
+                 '--output', str(out), '--save-matrices']) == 0
+
+    data = np.load(out / 'results.npz')
+    assert data['yields'].shape == (6, 6)
+    assert data['S'].shape == (6, 8, 8)
+    assert len((out / 'results.csv').read_text().splitlines()) == 1 + 6 * 6
+    summary = json.loads((out / 'summary.json').read_text())
+    assert summary['statistics']['greedy']['yield']['count'] == 6
+
+
+def test_main_rejects_invalid_config(tmp_path):
+    config_path = tmp_path / 'plant.json'
+    config_path.write_text(json.dumps(dict(PLANT, beta1=0.99)))
+    assert main(['--config', str(config_path), '-K', '2', '--output', str(tmp_path / 'out')]) == 2
+
+
+def test_antithetic_is_rejected_in_adaptive_mode():
+    with pytest.raises(SystemExit):
+        parse_args(['--config', 'plant.json', '--tolerance', '0.5', '--antithetic'])
+    assert parse_args(['--config', 'plant.json', '--antithetic']).antithetic
@@ -0,0 +1,117 @@
+import random
+
+import numpy as np
+
+import app as backend
+from app import app
+from core.config import build_experiment_config
+from engine import ExperimentEngine
+
+PLANT = {
+    'n': 12, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated',
+}
+STRATEGIES = ['greedy', 'random', 'optimal']
+
+
+def test_results_match_across_worker_counts():
+    config = build_experiment_config(PLANT)
+    with ExperimentEngine(1) as engine:
+        serial = engine.run(config, 10, STRATEGIES, seed=4, keep=('S', 'C'), return_batches=True)
+    with ExperimentEngine(2, start_method='fork', chunk_size=3) as engine:
+        pooled = engine.run(config, 10, STRATEGIES, seed=4, keep=('S', 'C'), return_batches=True)
+        again = engine.optimize(pooled.matrices['S'], STRATEGIES, seed=4)
+
+    assert np.array_equal(serial.yields, pooled.yields)
+    assert np.array_equal(serial.permutations, pooled.permutations)
+    assert np.array_equal(serial.matrices['C'], pooled.matrices['C'])
+    assert np.array_equal(pooled.yields, again.yields)
+    assert len(pooled.batches) == 10 and len(pooled.batches[0]) == 12
+    assert pooled.success.all()
+
+
+def test_random_strategy_leaves_global_state_alone():
+    random.seed(123)
+    expected = random.random()
+    random.seed(123)
+    with ExperimentEngine(1) as engine:
+        first = engine.run(build_experiment_config(PLANT), 4, ['random'], seed=9)
+    assert random.random() == expected
+    with ExperimentEngine(1) as engine:
+        assert np.array_equal(engine.run(build_experiment_config(PLANT), 4, ['random'], seed=9).yields, first.yields)
+
+
+def test_engine_pool_shares_cores_between_server_workers(monkeypatch):
+    monkeypatch.setattr(backend.os, 'cpu_count', lambda: 8)
+    monkeypatch.delenv('BACKEND_ENGINE_WORKERS', raising=False)
+    monkeypatch.setenv('BACKEND_SERVER_WORKERS', '4')
+    assert backend.engine_workers() == 2
+    monkeypatch.setenv('BACKEND_SERVER_WORKERS', '16')
+    assert backend.engine_workers() == 1
+    monkeypatch.setenv('BACKEND_ENGINE_WORKERS', '3')
+    assert backend.engine_workers() == 3
+
+
+def test_optimized_permutations_reproduce_yields():
+    S = np.random.default_rng(0).random((3, 6, 6))
+    result = ExperimentEngine(1).optimize(S, ['greedy', 'optimal'])
+    for k in range(3):
+        for j in range(2):
+            perm = result.permutations[k, j]
+            assert np.isclose(S[k][perm, np.arange(6)].sum(), result.yields[k, j])
+
+
+def test_multi_optimize_parallel_matches_sequential(monkeypatch):
+    monkeypatch.setenv('BACKEND_ENGINE_WORKERS', '1')
+    client = app.test_client()
+    matrices = np.random.default_rng(1).random((4, 5, 5)).tolist()
+    sequential = client.post('/multi_optimize', json={'matrices': matrices, 'include_all_results': True}).get_json()
+    parallel = client.post('/multi_optimize', json={'matrices': matrices, 'parallel': True, 'include_all_results': True}).get_json()
+    assert parallel['averages'] == sequential['averages']
+    assert parallel['all_results'] == sequential['all_results']
+
+    ragged = client.post('/multi_optimize', json={'matrices': [[[1.0]], [[1.0, 2.0], [3.0, 4.0]]],
+                                                  'parallel': True})
+    assert ragged.status_code == 400
+
+
+def test_adaptive_run_stops_when_intervals_converge():
+    config = build_experiment_config(PLANT)
+    chunks = []
+    aggregator, report = ExperimentEngine(1).run_adaptive(
+        config, ['greedy', 'optimal'], tolerance=1.0, chunk_size=20, max_experiments=2000,
+        seed=2, on_chunk=chunks.append)
+    assert report['stop_reason'] == 'converged' and report['converged']
+    assert report['relative_loss_ci']['greedy']['half_width'] <= 1.0
+    assert report['experiments'] == aggregator.matrices == 20 * len(chunks)
+
+    # Куски подряд дают те же эксперименты, что и один прогон
+    full = ExperimentEngine(1).run(config, report['experiments'], ['greedy', 'optimal'], seed=2)
+    assert np.array_equal(np.concatenate([c.yields for c in chunks]), full.yields)
+
+
+def test_adaptive_run_reports_budget_stop():
+    config = build_experiment_config(PLANT)
+    _, report = ExperimentEngine(1).run_adaptive(
+        config, ['random', 'optimal'], tolerance=1e-6, chunk_size=10, max_experiments=30, seed=0)
+    assert report['stop_reason'] == 'max_experiments'
+    assert report['experiments'] == 30
+    assert not report['relative_loss_ci']['random']['within_tolerance']
+
+
+def test_adaptive_optimize_endpoint():
+    client = app.test_client()
+    response = client.post('/adaptive_optimize', json=dict(
+        PLANT, tolerance=2.0, chunk_size=10, max_experiments=200, seed=1,
+        strategies=['greedy', 'thrifty', 'optimal']))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['total_matrices'] == body['adaptive']['experiments']
+    assert body['statistics']['greedy']['yield']['count'] == body['total_matrices']
+    assert 'relative_loss_percent' in body['averages']['greedy']
+
+    bad = client.post('/adaptive_optimize', json=dict(PLANT, strategies=['greedy'], tolerance=-1))
+    assert bad.status_code == 400
+    for options in ({'max_seconds': None}, {'max_seconds': 10 ** 6}, {'tolerance': True}, {'confidence': True},
+                    {'chunk_size': True}, {'max_experiments': True}, {'min_experiments': 300, 'max_experiments': 200}):
+        assert client.post('/adaptive_optimize', json=dict(PLANT, **options)).status_code == 400
@@ -0,0 +1,89 @@
+from app import app
+from core.metrics import Histogram, MetricsRegistry, metrics
+
+CONFIG = {
+    'n': 6, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0,
+    'beta1': 0.85, 'beta2': 0.95, 'distribution_type': 'uniform',
+}
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram((1.0, 2.0))
+    for v in (0.5, 1.5, 1.7, 5.0):
+        hist.observe(v)
+    report = hist.to_dict()
+    assert report['count'] == 4
+    assert report['buckets'] == {'1.0': 1, '2.0': 3, '+Inf': 4}
+
+
+def test_registry_labels_stages_by_endpoint():
+    registry = MetricsRegistry()
+    registry.observe_stage('generate_B', 0.01, endpoint='simulate')
+    registry.observe_request('simulate', 200, 0.02, 100, 5000)
+    report = registry.to_dict()['endpoints']['simulate']
+    assert report['requests'] == {'200': 1}
+    assert report['stages']['generate_B']['count'] == 1
+    assert 'backend_stage_latency_seconds_bucket' in registry.to_prometheus()
+
+
+def test_metrics_endpoint_reports_pipeline_stages():
+    metrics.reset()
+    client = app.test_client()
+    assert client.post('/simulate', json=CONFIG).status_code == 200
+    matrix = [[1.0, 2.0], [3.0, 1.0]]
+    assert client.post('/optimize', json={'matrix': matrix}).status_code == 200
+
+    data = client.get('/metrics').get_json()
+    simulate = data['endpoints']['simulate']
+    assert simulate['requests'] == {'200': 1}
+    for name in ('validation', 'batch_sampling', 'generate_B', 'generate_C',
+                 'generate_L', 'generate_S', 'serialization'):
+        assert simulate['stages'][name]['count'] == 1
+    assert simulate['response_bytes']['count'] == 1
+    assert 'optimizer.optimal' in data['endpoints']['optimize']['stages']
+
+    text = client.get('/metrics?format=prometheus').get_data(as_text=True)
+    assert 'backend_requests_total{endpoint="simulate",status="200"} 1' in text
+
+
+def test_unmatched_urls_share_one_series():
+    metrics.reset()
+    client = app.test_client()
+    for path in ('/wp-login.php', '/.env', '/no/such/route'):
+        assert client.get(path).status_code == 404
+    endpoints = client.get('/metrics').get_json()['endpoints']
+    assert endpoints['<unmatched>']['requests'] == {'404': 3}
+    assert not any(name.startswith('/') for name in endpoints)
+
+
+def test_profile_flag_adds_phase_tree_and_hot_functions():
+    client = app.test_client()
+    response = client.post('/simulate?profile=1', json=CONFIG)
+    data = response.get_json()
+    assert response.status_code == 200
+    assert 'matrices' in data
+    profile = data['profile']
+    phases = {child['name']: child for child in profile['phases']['children']}
+    assert {'validation', 'config_parsing', 'generate_single_experiment', 'serialization'} <= set(phases)
+    generation = {child['name'] for child in phases['generate_single_experiment']['children']}
+    assert {'generate_B', 'generate_C', 'generate_L', 'generate_S'} <= generation
+    assert profile['hot_functions'] and 'calls' in profile['hot_functions'][0]
+
+
+def test_profile_flag_in_json_body_for_optimize():
+    client = app.test_client()
+    data = client.post('/optimize', json={'matrix': [[1.0, 2.0], [3.0, 1.0]], 'profile': True}).get_json()
+    names = {child['name'] for child in data['profile']['phases']['children']}
+    assert 'optimizer.optimal' in names
+    assert 'profile' not in client.post('/optimize', json={'matrix': [[1.0]]}).get_json()
+
+
+def test_profile_keeps_output_options():
+    client = app.test_client()
+    body = dict(CONFIG, seed=3, precision=1, batch_layout='columns')
+    plain = client.post('/simulate', json=body).get_json()
+    profiled = client.post('/simulate?profile=1', json=body).get_json()
+    assert 'hot_functions' in profiled.pop('profile')
+    # Второй запрос берёт этапы из кэша конвейера
+    assert profiled.pop('recomputed_stages') == [] and plain.pop('recomputed_stages')
+    assert profiled == plain
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app import app
+from core.models import Plant
+from algorithms.multiplant import slot_layout, solve_multi_plant
+from algorithms.optimizer import Optimizer, load_linear_sum_assignment
+
+PLANTS = [Plant('north', 1000.0, 6), Plant('south', 600.0, 4), Plant('east', 800.0, 6)]
+
+
+def brute_force_mass(S, plants):
+    slot_plant, slot_stage = slot_layout(plants)
+    masses = np.array([p.mass for p in plants])
+    W = S[:, slot_stage] * masses[slot_plant]
+    rows, cols = load_linear_sum_assignment()(W, maximize=True)
+    return Optimizer.calculate_final_mass(W[rows, cols].sum(), 1.0)
+
+
+def test_slots_are_in_time_order_heavier_plants_first():
+    slot_plant, slot_stage = slot_layout(PLANTS)
+    assert list(slot_stage[:3]) == [0, 0, 0]
+    assert list(slot_plant[:3]) == [0, 2, 1]
+    assert len(slot_stage) == 16 and list(slot_plant[-2:]) == [0, 2]
+
+
+@pytest.mark.parametrize('n', [10, 16, 30])
+def test_optimal_and_heuristics_fill_slots_consistently(n):
+    S = np.random.default_rng(n).random((n, 6)) * 20
+    optimal = solve_multi_plant(S, PLANTS, 'optimal')
+    assert optimal['final_mass'] == pytest.approx(brute_force_mass(S, PLANTS))
+    assert optimal['assigned'] == min(n, 16)
+    for name in ('greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty', 'tkg', 'random', 'decomposed'):
+        result = solve_multi_plant(S, PLANTS, name)
+        batches = [b for schedule in result['schedule'].values() for b in schedule if b >= 0]
+        assert len(batches) == len(set(batches)) == min(n, 16)
+        assert result['final_mass'] <= optimal['final_mass'] + 1e-9
+
+
+def test_single_plant_matches_optimizer():
+    S = np.random.default_rng(1).random((9, 9)) * 20
+    plant = [Plant('only', 1000.0, 9)]
+    for name, strategy in (('greedy', Optimizer.optimize_greedy), ('optimal', Optimizer.optimize_hungarian)):
+        result = solve_multi_plant(S, plant, name)
+        perm, total = strategy(S)
+        assert result['schedule']['only'] == [int(b) for b in perm]
+        assert result['yield'] == pytest.approx(total)
+        assert result['final_mass'] == pytest.approx(Optimizer.calculate_final_mass(total, 1000.0))
+
+
+def test_decomposition_is_exact_with_full_window_and_close_otherwise():
+    rng = np.random.default_rng(2)
+    # выход убывает по этапам, как при увядании
+    S = np.cumprod(rng.uniform(0.85, 0.97, (400, 40)), axis=1) * rng.uniform(12, 22, (400, 1))
+    plants = [Plant(str(p), 600.0 + 100 * p, 40 - 5 * p) for p in range(5)]
+    optimal = solve_multi_plant(S, plants, 'optimal')['final_mass']
+    full = solve_multi_plant(S, plants, 'decomposed', block_stages=40)['final_mass']
+    assert full == pytest.approx(optimal)
+    blocks = solve_multi_plant(S, plants, 'decomposed', block_stages=4, lookahead=2)['final_mass']
+    greedy = solve_multi_plant(S, plants, 'greedy')['final_mass']
+    assert greedy < blocks <= optimal + 1e-9
+    assert (optimal - blocks) / optimal < 0.005
+
+
+def test_multi_plant_endpoint():
+    client = app.test_client()
+    plants = [{'name': 'north', 'mass': 1000.0, 'stages': 6}, {'name': 'south', 'mass': 600.0, 'stages': 4}]
+    response = client.post('/multi_plant', json={
+        'plants': plants, 'n': 12, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0,
+        'beta1': 0.85, 'beta2': 0.95, 'distribution_type': 'uniform', 'seed': 3,
+    }).get_json()
+    assert response['slots'] == 10 and response['batches'] == 12 and response['seed'] == 3
+    assert set(response['results']) == {'greedy', 'thrifty', 'thrifty_greedy', 'greedy_thrifty',
+                                        'tkg', 'random', 'optimal', 'decomposed'}
+    assert len(response['results']['optimal']['schedule']['south']) == 4
+    assert response['results']['greedy']['relative_loss_percent'] >= 0
+
+    bad = client.post('/multi_plant', json={'plants': plants, 'matrix': [[1.0] * 3] * 12})
+    assert bad.status_code == 400
+    matrix = [[1.0] * 6] * 12
+    for body in ({'matrix': 'abc'}, {'matrix': [[1.0, float('inf')] * 3] * 12},
+                 {'matrix': matrix, 'plants': [{'mass': True, 'stages': 6}]},
+                 {'matrix': matrix, 'plants': [{'mass': 1000.0, 'stages': True}]},
+                 {'matrix': matrix, 'nu': 1.5}, {'matrix': matrix, 'nu': 7},
+                 {'matrix': matrix, 'block_stages': 0}, {'matrix': matrix, 'lookahead': False}):
+        assert client.post('/multi_plant', json=dict({'plants': plants}, **body)).status_code == 400
@@ -0,0 +1,213 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import app as backend
+from algorithms.online import IncrementalAssignment, OnlineSessions, RollingScheduler
+from algorithms.optimizer import Optimizer
+from algorithms.scaling import STUDY_STRATEGIES
+from conftest import best_yield
+
+
+def remaining_matrix(scheduler):
+    return scheduler.S[np.ix_(scheduler.remaining_batches(), range(scheduler.stage, scheduler.horizon))]
+
+
+@pytest.mark.parametrize('maximize', [True, False])
+def test_initial_solution_is_optimal(maximize):
+    rng = np.random.default_rng(0)
+    for n in (1, 2, 7, 40):
+        W = rng.integers(0, 4, (n, n)).astype(float)  # много равных значений
+        solver = IncrementalAssignment(W, maximize=maximize)
+        total = sum(W[row, col] for col, row in solver.assignment().items())
+        assert total == pytest.approx(best_yield(W, maximize))
+
+
+def test_plan_stays_optimal_under_campaign_events():
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        scheduler = RollingScheduler(rng.random((8, 8)) * 20, 'optimal')
+        while not scheduler.finished:
+            waiting = scheduler.remaining_batches()
+            remaining = scheduler.horizon - scheduler.stage
+            event = rng.integers(4)
+            if event == 0:
+                scheduler.update_batch(int(rng.choice(waiting)), rng.random(remaining) * 20)
+            elif event == 1 and scheduler.horizon < 12:
+                scheduler.add_batch(rng.random(remaining + 1) * 20, rng.random(len(waiting)) * 20)
+            elif event == 2:
+                scheduler.step(int(rng.choice(waiting)))  # завод отошёл от плана
+            else:
+                scheduler.step()
+            if not scheduler.finished:
+                schedule = scheduler.schedule()
+                assert schedule['planned_yield'] == pytest.approx(best_yield(remaining_matrix(scheduler)))
+                assert sorted(p['batch'] for p in schedule['plan']) == scheduler.remaining_batches()
+
+
+def test_following_the_plan_reproduces_offline_strategy():
+    S = np.random.default_rng(2).random((9, 9)) * 20
+    for name in ('optimal', 'greedy', 'thrifty_greedy', 'tkg'):
+        scheduler = RollingScheduler(S, name)
+        while not scheduler.finished:
+            scheduler.step()
+        schedule = scheduler.schedule()
+        _, expected = STUDY_STRATEGIES[name](S, 9 // 2)
+        assert schedule['realized_yield'] == pytest.approx(expected)
+        assert schedule['projected_yield'] == pytest.approx(expected)
+
+
+def test_heuristic_plan_uses_absolute_switch_stage():
+    S = np.random.default_rng(3).random((10, 10)) * 20
+    scheduler = RollingScheduler(S, 'thrifty_greedy', nu=4)
+    scheduler.step()
+    scheduler.step()
+    scheduler.update_batch(scheduler.remaining_batches()[0], np.full(8, 1.0))
+    sub = remaining_matrix(scheduler)
+    perm, _ = Optimizer.optimize_thrifty_greedy(sub, 4)  # переключение на этапе 6 = 2 + (8 - 4)
+    assert scheduler.plan() == [scheduler.remaining_batches()[p] for p in perm]
+
+
+def test_incremental_step_is_faster_than_full_solve():
+    rng = np.random.default_rng(4)
+    scheduler = RollingScheduler(rng.random((400, 400)) * 20, 'optimal')
+    solver = scheduler._solver
+    before = solver.augmentations
+    for _ in range(20):
+        scheduler.update_batch(int(rng.choice(scheduler.remaining_batches())),
+                               rng.random(scheduler.horizon - scheduler.stage) * 20)
+        scheduler.step()
+    # один кратчайший путь на замер и ни одного на этап по плану
+    assert solver.augmentations - before == 20
+    assert scheduler.schedule()['planned_yield'] == pytest.approx(best_yield(remaining_matrix(scheduler)))
+
+
+def test_scheduler_rejects_non_integer_batches():
+    scheduler = RollingScheduler(np.eye(3), 'optimal')
+    for batch in (True, 1.0):
+        with pytest.raises(ValueError):
+            scheduler.update_batch(batch, np.zeros(3))
+        with pytest.raises(ValueError):
+            scheduler.step(batch)
+    assert scheduler.step(np.int64(1))['batch'] == 1
+
+
+def test_state_round_trip_through_session_files(tmp_path):
+    S = np.random.default_rng(5).random((6, 6)) * 20
+    sessions = OnlineSessions(str(tmp_path))
+    scheduler = RollingScheduler(S, 'optimal')
+    session_id = sessions.create(scheduler)
+    with np.load(tmp_path / session_id / 'state.npz') as archive:
+        assert 'solver_cost' not in archive.files  # стоимости восстанавливаются из S
+    decision = scheduler.apply({'step': True})['decision']
+    assert sessions.commit(session_id, scheduler, 1, {'step': True, 'batch': decision['batch']})
+
+    other_process = OnlineSessions(str(tmp_path))
+    restored, version = other_process.get(session_id)
+    assert version == 1
+    assert restored.schedule() == scheduler.schedule()
+    restored.update_batch(restored.remaining_batches()[0], np.zeros(5))
+    assert restored.schedule()['planned_yield'] == pytest.approx(best_yield(remaining_matrix(restored)))
+    assert other_process.remove(session_id)
+    assert sessions.get(session_id) is None
+    assert sessions.get('../etc') is None
+
+
+def test_heuristic_sessions_replay_the_saved_plan(tmp_path):
+    sessions = OnlineSessions(str(tmp_path))
+    scheduler = RollingScheduler(np.random.default_rng(8).random((7, 7)) * 20, 'random')
+    session_id = sessions.create(scheduler)
+    for version in (1, 2):
+        decision = scheduler.apply({'step': True})['decision']
+        sessions.commit(session_id, scheduler, version, {'step': True, 'batch': decision['batch']})
+    restored, version = OnlineSessions(str(tmp_path)).get(session_id)
+    assert version == 2 and restored.schedule() == scheduler.schedule()
+
+
+def test_concurrent_changes_of_one_version_conflict(tmp_path):
+    sessions = OnlineSessions(str(tmp_path))
+    session_id = sessions.create(RollingScheduler(np.eye(4), 'optimal'))
+    first, _ = OnlineSessions(str(tmp_path)).get(session_id)
+    second, _ = OnlineSessions(str(tmp_path)).get(session_id)
+    first.step(0)
+    second.step(1)
+    assert sessions.commit(session_id, first, 1, {'step': True, 'batch': 0})
+    assert not sessions.commit(session_id, second, 1, {'step': True, 'batch': 1})
+    assert OnlineSessions(str(tmp_path)).get(session_id)[0].processed[0][1] == 0
+
+
+def test_idle_sessions_expire_from_disk(tmp_path):
+    sessions = OnlineSessions(str(tmp_path), max_age=3600)
+    old = sessions.create(RollingScheduler(np.eye(3), 'optimal'))
+    stale = time.time() - 7200
+    os.utime(tmp_path / old, (stale, stale))
+    fresh = sessions.create(RollingScheduler(np.eye(3), 'optimal'))
+    assert not (tmp_path / old).exists() and (tmp_path / fresh).exists()
+    assert OnlineSessions(str(tmp_path)).get(old) is None
+
+
+def test_online_api_session():
+    client = backend.app.test_client()
+    S = np.random.default_rng(6).random((5, 5)) * 20
+    started = client.post('/online/start', json={'matrix': S.tolist()}).get_json()
+    session = started['session']
+    assert started['projected_yield'] == pytest.approx(best_yield(S))
+
+    response = client.post(f'/online/{session}/events', json={
+        'updates': [{'batch': 0, 'yields': [30.0] * 5}],
+        'new_batches': [{'yields': [1.0] * 6, 'extension': [2.0] * 5}],
+        'step': True,
+    }).get_json()
+    assert response['version'] == 1
+    assert response['new_batches'] == [5]
+    assert response['decision']['stage'] == 0
+    assert response['horizon'] == 6 and response['stage'] == 1
+
+    bad = client.post(f'/online/{session}/events', json={
+        'updates': [{'batch': 1, 'yields': [1.0] * 5}], 'step': True, 'batch': 99})
+    assert bad.status_code == 400
+    assert client.get(f'/online/{session}').get_json()['version'] == 1
+    for batch in (True, 1.0, '1'):
+        bad = client.post(f'/online/{session}/events', json={'updates': [{'batch': batch, 'yields': [1.0] * 5}]})
+        assert bad.status_code == 400
+        assert client.post(f'/online/{session}/events', json={'step': True, 'batch': batch}).status_code == 400
+    assert client.get(f'/online/{session}').get_json()['version'] == 1
+
+    assert client.delete(f'/online/{session}').status_code == 200
+    assert client.get(f'/online/{session}').status_code == 404
+    assert client.post('/online/start', json={'matrix': [[1, 2]]}).status_code == 400
+
+
+def test_api_sessions_are_visible_to_other_workers():
+    # Другой воркер production-режима - свой экземпляр OnlineSessions на той же папке
+    assert backend.ONLINE_SESSIONS.directory
+    other_worker = OnlineSessions(backend.ONLINE_SESSIONS.directory)
+    client = backend.app.test_client()
+    S = np.random.default_rng(7).random((4, 4)) * 20
+    session = client.post('/online/start', json={'matrix': S.tolist()}).get_json()['session']
+
+    scheduler, version = other_worker.get(session)
+    assert version == 0 and scheduler.schedule()['planned_yield'] == pytest.approx(best_yield(S))
+    decision = scheduler.apply({'step': True})['decision']
+    assert other_worker.commit(session, scheduler, version + 1, {'step': True, 'batch': decision['batch']})
+    state = client.get(f'/online/{session}').get_json()
+    assert state['version'] == 1 and state['processed'][0]['batch'] == decision['batch']
+
+    assert client.delete(f'/online/{session}').status_code == 200
+    assert other_worker.get(session) is None
+
+
+def test_concurrent_events_in_one_worker_are_serialized():
+    client = backend.app.test_client()
+    S = np.random.default_rng(9).random((8, 8)) * 20
+    session = client.post('/online/start', json={'matrix': S.tolist()}).get_json()['session']
+    post = lambda _: backend.app.test_client().post(f'/online/{session}/events', json={'step': True}).status_code
+    with ThreadPoolExecutor(4) as pool:
+        assert list(pool.map(post, range(4))) == [200] * 4
+    state = client.get(f'/online/{session}').get_json()
+    assert state['version'] == 4 and state['stage'] == 4
+    assert state['projected_yield'] == pytest.approx(best_yield(S))
+    client.delete(f'/online/{session}')
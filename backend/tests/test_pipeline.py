@@ -0,0 +1,77 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from app import app
+from core.config import build_experiment_config
+from core.generators import MatrixGenerator, experiment_streams
+from core.pipeline import ExperimentPipeline
+
+PLANT = {
+    'n': 12, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated', 'enable_ripening': True, 'v': 3,
+}
+
+
+def test_pipeline_matches_generate_experiment():
+    config = build_experiment_config(PLANT)
+    seq = np.random.SeedSequence(4).spawn(3)[2]
+    experiment, recomputed = ExperimentPipeline().run(config, seq)
+    expected = MatrixGenerator.generate_experiment(config, *experiment_streams(seq))
+    assert recomputed == ['batches', 'B', 'C', 'L', 'S']
+    for name in ('B', 'C', 'L', 'S'):
+        assert np.array_equal(experiment['matrices'][name], expected['matrices'][name])
+    assert np.array_equal(experiment['batches'].initial_sugar, expected['batches'].initial_sugar)
+
+
+@pytest.mark.parametrize('change, stages', [
+    ({'m': 500.0}, []),
+    ({'growth_base': 1.03}, ['L', 'S']),
+    ({'use_losses': False}, []),
+    ({'beta_max': 1.2}, ['batches', 'B', 'C', 'L', 'S']),
+    ({'distribution_type': 'uniform'}, ['batches', 'B', 'C', 'L', 'S']),
+])
+def test_only_invalidated_stages_are_recomputed(change, stages):
+    pipeline = ExperimentPipeline()
+    config = build_experiment_config(PLANT)
+    pipeline.run(config, 1)
+    changed = dataclasses.replace(config, **change)
+    experiment, recomputed = pipeline.run(changed, 1)
+    assert recomputed == stages
+    fresh, _ = ExperimentPipeline().run(changed, 1)
+    assert np.array_equal(experiment['matrices']['S'], fresh['matrices']['S'])
+
+
+def test_uniform_batches_ignore_ripening_range():
+    pipeline = ExperimentPipeline()
+    config = build_experiment_config(dict(PLANT, distribution_type='uniform'))
+    pipeline.run(config, 1)
+    _, recomputed = pipeline.run(dataclasses.replace(config, beta_max=1.2), 1)
+    assert recomputed == ['B', 'C', 'L', 'S']
+
+
+def test_cache_respects_byte_budget_and_freezes_arrays():
+    pipeline = ExperimentPipeline(max_bytes=3 * 12 * 12 * 8)
+    config = build_experiment_config(PLANT)
+    experiment, _ = pipeline.run(config, 1)
+    assert pipeline.stats()['bytes'] <= pipeline.max_bytes
+    with pytest.raises(ValueError):
+        experiment['matrices']['S'][0, 0] = 0.0
+    _, recomputed = pipeline.run(config, 1)
+    assert 'batches' in recomputed  # вытеснены более поздними этапами
+
+
+def test_simulate_reuses_stages_with_returned_seed():
+    client = app.test_client()
+    first = client.post('/simulate', json=PLANT).get_json()
+    assert first['recomputed_stages'] == ['batches', 'B', 'C', 'L', 'S']
+    assert first['seed'] < 2**53
+    second = client.post('/simulate', json=dict(PLANT, seed=first['seed'], use_losses=False)).get_json()
+    assert second['recomputed_stages'] == []
+    assert second['matrices']['S'] == first['matrices']['C']
+
+    many = client.post('/multi_simulate', json=dict(PLANT, seed=5)).get_json()
+    again = client.post('/multi_simulate', json=dict(PLANT, seed=5, growth_base=1.03)).get_json()
+    assert again['recomputed_stages'] == {'L': 50, 'S': 50}
+    assert again['experiments'][7]['matrices']['C'] == many['experiments'][7]['matrices']['C']
@@ -0,0 +1,62 @@
+import random
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from app import app
+from algorithms.optimizer import Optimizer
+from core.stats import distribution_summary, percentile_rank
+
+
+@pytest.mark.parametrize('shape', [(6, 6), (7, 4), (4, 7)])
+def test_bulk_evaluation_matches_loop(shape):
+    S = np.random.default_rng(0).random(shape)
+    perms = Optimizer.random_permutations(*shape, 50, np.random.default_rng(1))
+    n, m = shape
+    for perm, value in zip(perms, Optimizer.evaluate_permutations(S, perms)):
+        used = [b for b in perm if b >= 0]
+        assert len(used) == len(set(used)) == min(n, m)
+        assert value == pytest.approx(sum(S[b, j] for j, b in enumerate(perm) if b >= 0))
+    greedy, total = Optimizer.optimize_greedy(S)
+    assert Optimizer.evaluate_permutations(S, greedy) == pytest.approx([total])
+    with pytest.raises(ValueError):
+        Optimizer.evaluate_permutations(S, [[n] * m])
+
+
+def test_random_baseline_is_uniform_over_permutations():
+    S = np.random.default_rng(2).random((4, 4))
+    exact = sorted(sum(S[b, j] for j, b in enumerate(p)) for p in permutations(range(4)))
+    sampled = Optimizer.random_baseline(S, 24000, np.random.default_rng(3))
+    assert np.all(np.diff(sampled) >= 0)
+    assert sampled.mean() == pytest.approx(np.mean(exact), rel=0.01)
+    assert set(np.round(sampled, 12)) == set(np.round(exact, 12))
+    # optimize_random - одна точка того же распределения
+    random.seed(0)
+    assert round(Optimizer.optimize_random(S)[1], 12) in set(np.round(exact, 12))
+
+
+def test_distribution_summary_and_rank():
+    summary = distribution_summary(np.arange(101.0))
+    assert summary['count'] == 101 and summary['p5'] == 5.0 and summary['p99'] == 99.0
+    assert percentile_rank([1.0, 2.0, 2.0, 3.0], 2.0) == 50.0
+    assert percentile_rank([1.0, 2.0], 5.0) == 100.0
+
+
+def test_random_baseline_endpoint():
+    client = app.test_client()
+    S = (np.random.default_rng(4).random((10, 10)) * 20).tolist()
+    body = {'matrix': S, 'samples': 2000, 'seed': 5, 'permutations': [list(range(10))]}
+    report = client.post('/random_baseline', json=body).get_json()
+    assert report['yield']['count'] == 2000 and report['seed'] == 5
+    assert report['strategies']['optimal']['percentile_rank'] == 100.0
+    assert report['yield']['max'] <= report['strategies']['optimal']['yield'] + 1e-9
+    assert report['permutations'][0]['yield'] == pytest.approx(sum(S[j][j] for j in range(10)))
+    assert client.post('/random_baseline', json=body).get_json()['yield'] == report['yield']
+
+    bad = client.post('/random_baseline', json=dict(body, permutations=[[0, 1]]))
+    assert bad.status_code == 400
+    nan = client.post('/random_baseline', json=dict(body, matrix=[[1.0, float('nan')], [0.0, 1.0]]))
+    assert nan.status_code == 400
+    huge = client.post('/random_baseline', json={'matrix': np.ones((100, 1000)).tolist(), 'samples': 1000000})
+    assert huge.status_code == 400 and 'max(n, m)' in huge.get_json()['errors'][0]
@@ -0,0 +1,99 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from app import app
+from core.config import build_experiment_config, validate_config
+from core.generators import MatrixGenerator, experiment_streams
+from algorithms.optimizer import Optimizer, load_linear_sum_assignment
+from algorithms.scaling import STUDY_STRATEGIES
+from engine import ExperimentEngine
+
+PLANT = {
+    'n': 12, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated', 'enable_ripening': True, 'v': 3,
+}
+
+
+@pytest.mark.parametrize('stages', [5, 12, 20])
+def test_generated_matrices_are_n_by_stages(stages):
+    config = build_experiment_config(dict(PLANT, stages=stages))
+    experiment = MatrixGenerator.generate_experiment(config, *experiment_streams(np.random.SeedSequence(1)))
+    for name in ('B', 'C', 'L', 'S'):
+        assert experiment['matrices'][name].shape == (12, stages)
+    assert len(experiment['batches']) == 12
+
+
+def test_explicit_square_stages_match_default():
+    config = build_experiment_config(PLANT)
+    seq = np.random.SeedSequence(3)
+    default = MatrixGenerator.generate_experiment(config, *experiment_streams(seq))['matrices']
+    explicit = MatrixGenerator.generate_experiment(
+        dataclasses.replace(config, stages=12), *experiment_streams(seq))['matrices']
+    for name in ('B', 'C', 'L', 'S'):
+        assert np.array_equal(explicit[name], default[name])
+
+
+@pytest.mark.parametrize('shape', [(9, 4), (4, 9)])
+def test_strategies_on_rectangular_matrices(shape):
+    S = np.random.default_rng(2).random(shape)
+    n, m = shape
+    rows, cols = load_linear_sum_assignment()(S, maximize=True)
+    best = S[rows, cols].sum()
+    for name, strategy in STUDY_STRATEGIES.items():
+        perm, total = strategy(S, m // 2)
+        assert len(perm) == m
+        used = [b for b in perm if b >= 0]
+        assert len(used) == min(n, m) == len(set(used))
+        assert total == pytest.approx(sum(S[b, j] for j, b in enumerate(perm) if b >= 0))
+        if name == 'optimal':
+            assert total == pytest.approx(best)
+        elif name != 'notoptimal':
+            assert total <= best + 1e-12
+    # эвристики занимают первые n этапов
+    assert Optimizer.optimize_greedy(S)[0][min(n, m):] == [-1] * (m - min(n, m))
+
+
+def test_greedy_ties_go_to_lowest_batch():
+    S = np.array([[1.0, 2.0], [3.0, 2.0], [3.0, 5.0]])
+    assert Optimizer.optimize_greedy(S) == ([1, 2], 8.0)
+    assert Optimizer.optimize_thrifty(S) == ([0, 1], 3.0)
+
+
+def test_engine_and_api_with_stages():
+    config = build_experiment_config(dict(PLANT, stages=6))
+    result = ExperimentEngine(1).run(config, 4, ['greedy', 'optimal'], seed=7, keep=('S',))
+    assert result.matrices['S'].shape == (4, 12, 6)
+    assert result.permutations.shape == (4, 2, 6)
+    assert np.all(result.yields[:, 1] >= result.yields[:, 0] - 1e-12)
+
+    client = app.test_client()
+    simulated = client.post('/simulate', json=dict(PLANT, stages=6, seed=7)).get_json()
+    assert np.array(simulated['matrices']['S']).shape == (12, 6)
+    optimized = client.post('/optimize', json={'matrix': simulated['matrices']['S']}).get_json()
+    assert len(optimized['optimal']['permutation']) == 6
+
+
+def test_ripening_stages_are_bounded_by_stages():
+    assert validate_config(dict(PLANT, stages=5)) == ["v must satisfy: 2 ≤ v ≤ [stages/2] = 2"]
+    assert validate_config(dict(PLANT, stages=0)) == ["stages must be a positive integer"]
+
+
+@pytest.mark.parametrize('seed', ['x', -1, True, 1.5])
+def test_invalid_seed_is_a_validation_error(seed):
+    client = app.test_client()
+    matrix = np.random.default_rng(0).random((4, 4)).tolist()
+    requests = [
+        ('/simulate', dict(PLANT, seed=seed)),
+        ('/multi_simulate', dict(PLANT, seed=seed)),
+        ('/stage_summary', dict(PLANT, K=2, seed=seed)),
+        ('/adaptive_optimize', dict(PLANT, max_experiments=10, seed=seed)),
+        ('/compare_configs', {'configs': {'a': PLANT, 'b': dict(PLANT, delta_k=2)}, 'K': 2, 'seed': seed}),
+        ('/random_baseline', {'matrix': matrix, 'samples': 10, 'seed': seed}),
+        ('/scaling_study', {'n_min': 4, 'n_max': 4, 'trials': 1, 'seed': seed}),
+    ]
+    for url, body in requests:
+        response = client.post(url, json=body)
+        assert response.status_code == 400, url
+        assert response.get_json()['errors'] == ["seed must be a non-negative integer"]
@@ -0,0 +1,82 @@
+import numpy as np
+
+from app import app
+from algorithms.scaling import (config_for_size, default_config, fit_exponent,
+                                geometric_ladder, run_scaling_study)
+
+
+def test_geometric_ladder_is_sorted_and_spans_range():
+    ladder = geometric_ladder(10, 1000, 5)
+    assert ladder[0] == 10 and ladder[-1] == 1000
+    assert ladder == sorted(set(ladder))
+    assert geometric_ladder(8, 8, 4) == [8]
+
+
+def test_fit_exponent_recovers_power_law():
+    sizes = np.array([10, 20, 40, 80, 160])
+    fit = fit_exponent(sizes, 3e-6 * sizes ** 2.0)
+    assert abs(fit['exponent'] - 2.0) < 1e-9
+    assert abs(fit['coefficient'] - 3e-6) < 1e-12
+    assert fit['r_squared'] > 0.999
+    assert fit_exponent([10], [1.0]) is None
+
+
+def test_ripening_stages_are_clamped_for_small_sizes():
+    config = default_config(100)
+    config.enable_ripening, config.v = True, 10
+    assert config_for_size(config, 8).v == 4
+    assert config_for_size(config, 3).enable_ripening is False
+
+
+def test_study_reports_curves_and_losses_against_optimal():
+    report = run_scaling_study(default_config(), [6, 12], trials=2,
+                               strategies=['greedy', 'random'], seed=0)
+    assert report['sizes'] == [6, 12]
+    assert set(report['strategies']) == {'greedy', 'random'}
+    curve = report['strategies']['greedy']['curve']
+    assert [p['n'] for p in curve] == [6, 12]
+    assert all(p['mean_relative_loss_percent'] >= -1e-9 for p in curve)
+    assert report['strategies']['greedy']['fit'] is not None
+
+
+def test_random_strategy_is_reproducible_with_a_seed():
+    study = lambda: run_scaling_study(default_config(), [8], trials=3, strategies=['random'], seed=4)
+    assert study()['strategies']['random']['curve'][0]['mean_yield'] == \
+        study()['strategies']['random']['curve'][0]['mean_yield']
+
+    client = app.test_client()
+    S = np.random.default_rng(0).random((9, 9)).tolist()
+    plants = [{'name': 'a', 'mass': 1.0, 'stages': 5}, {'name': 'b', 'mass': 2.0, 'stages': 4}]
+    plant = lambda: client.post('/multi_plant', json={'plants': plants, 'matrix': S, 'strategies': ['random'],
+                                                      'seed': 2}).get_json()['results']['random']['schedule']
+    baseline = lambda: client.post('/random_baseline', json={'matrix': S, 'samples': 10, 'seed': 2,
+                                                             'strategies': ['random']}).get_json()['strategies']
+    first_plant, first_baseline = plant(), baseline()
+    for _ in range(3):
+        assert plant() == first_plant and baseline() == first_baseline
+
+
+def test_budget_is_checked_within_a_size():
+    report = run_scaling_study(default_config(), [6, 12], trials=50, strategies=['greedy'], seed=0,
+                               max_seconds=1e-9)
+    # Бюджет кончается на первой же стратегии: незаконченное испытание не засчитывается
+    assert report['sizes'] == [] and report['skipped_sizes'] == [6, 12]
+    assert report['strategies']['greedy']['curve'] == []
+
+
+def test_scaling_study_endpoint():
+    client = app.test_client()
+    response = client.post('/scaling_study', json={
+        'n_min': 4, 'n_max': 16, 'steps': 3, 'trials': 1, 'seed': 1,
+        'strategies': ['greedy', 'tkg', 'optimal'],
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['sizes'] == [4, 8, 16]
+    assert body['strategies']['optimal']['curve'][0]['mean_relative_loss_percent'] == 0.0
+
+    bad = client.post('/scaling_study', json={'n_min': 50, 'n_max': 10, 'strategies': ['nope']})
+    assert bad.status_code == 400
+    assert len(bad.get_json()['errors']) == 2
+    for bad_body in ({'max_seconds': None}, {'max_seconds': 10 ** 6}, {'max_seconds': True}, {'fit_min_n': 'big'}):
+        assert client.post('/scaling_study', json=bad_body).status_code == 400
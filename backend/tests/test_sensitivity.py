@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import app as backend
+from algorithms.online import RollingScheduler
+from algorithms.optimizer import Optimizer
+from algorithms.sensitivity import assignment_duals, sensitivity_analysis
+from conftest import best_yield
+
+
+def still_optimal(S, permutation):
+    return Optimizer.evaluate_permutations(S, permutation)[0] >= best_yield(S) - 1e-9
+
+
+@pytest.mark.parametrize('shape', [(6, 6), (7, 4), (4, 7)])
+def test_plan_stays_optimal_inside_the_ranges(shape):
+    rng = np.random.default_rng(0)
+    n, m = shape
+    for trial in range(100):
+        # целые значения дают вырожденные задачи с равными вариантами
+        S = rng.integers(0, 5, shape).astype(float) if trial % 3 == 0 else rng.random(shape) * 20
+        report = sensitivity_analysis(S)
+        perm = report['permutation']
+        assert report['yield'] == pytest.approx(best_yield(S))
+        i, j = rng.integers(n), rng.integers(m)
+        for key, sign in (('allowed_increase', 1), ('allowed_decrease', -1)):
+            T = S.copy()
+            T[i, j] += sign * min(report[key][i, j], 100.0) * 0.999
+            assert still_optimal(T, perm)
+        # худший случай ошибки замеров партии i: назначенное ниже, остальные выше
+        eps = min(report['batch_tolerance'][i], 100.0) * 0.999
+        T = S.copy()
+        T[i] += eps
+        T[i, [k for k, b in enumerate(perm) if b == i]] -= 2 * eps
+        assert still_optimal(T, perm)
+        eps = min(report['tolerance'], 100.0) * 0.999
+        assert still_optimal(S + rng.choice([-eps, eps], shape), perm)
+
+
+def test_ranges_are_tight_for_a_clear_winner():
+    S = np.array([[10.0, 1.0], [1.0, 10.0]])
+    report = sensitivity_analysis(S)
+    assert report['permutation'] == [0, 1]
+    # план меняется, когда S[0, 1] + S[1, 0] > 20
+    assert report['allowed_increase'][0, 1] == pytest.approx(18.0)
+    assert report['allowed_decrease'][0, 0] == pytest.approx(18.0)
+    assert report['tolerance'] == pytest.approx(4.5)
+    assert np.isinf(report['allowed_increase'][0, 0]) and np.isinf(report['allowed_decrease'][0, 1])
+
+
+def test_non_optimal_plan_is_rejected():
+    with pytest.raises(ValueError):
+        assignment_duals(np.eye(3), [1, 0, 2])
+
+
+def test_online_session_reuses_solver_potentials():
+    S = np.random.default_rng(1).random((8, 8)) * 20
+    scheduler = RollingScheduler(S, 'optimal')
+    scheduler.step()
+    scheduler.update_batch(scheduler.remaining_batches()[0], np.full(7, 5.0))
+    report = scheduler.sensitivity()
+    assert report['permutation'] == scheduler.plan()
+    sub = scheduler.S[np.ix_(report['batches'], range(scheduler.stage, scheduler.horizon))]
+    local = [report['batches'].index(b) for b in report['permutation']]
+    eps = report['tolerance'] * 0.999
+    assert still_optimal(sub + np.random.default_rng(2).choice([-eps, eps], sub.shape), local)
+    with pytest.raises(ValueError):
+        RollingScheduler(S, 'greedy').sensitivity()
+
+
+def test_sensitivity_endpoints():
+    client = backend.app.test_client()
+    S = (np.random.default_rng(3).random((6, 6)) * 20).tolist()
+    report = client.post('/sensitivity', json={'matrix': S}).get_json()
+    assert len(report['batch_tolerance']) == 6 and len(report['allowed_increase']) == 6
+    assert report['allowed_decrease'][report['permutation'][0]][1] is None
+    brief = client.post('/sensitivity', json={'matrix': S, 'entries': False}).get_json()
+    assert 'allowed_increase' not in brief and brief['tolerance'] == report['tolerance']
+    assert client.post('/sensitivity', json={'matrix': S, 'permutation': [0, 0, 1, 2, 3, 4]}).status_code == 400
+
+    session = client.post('/online/start', json={'matrix': S}).get_json()['session']
+    online = client.get(f'/online/{session}/sensitivity').get_json()
+    assert online['version'] == 0 and online['permutation'] == report['permutation']
+    client.delete(f'/online/{session}')
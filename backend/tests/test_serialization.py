@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+from app import app
+from core.models import BeetBatch
+from core.serialization import dumps, encode_array
+
+
+def test_encode_array_matches_rounded_values():
+    a = np.random.default_rng(0).uniform(-50, 50, size=(7, 5))
+    decoded = json.loads(encode_array(a, 4))
+    assert np.allclose(decoded, np.round(a, 4), atol=1e-12)
+    assert json.loads(encode_array(a)) == a.tolist()
+
+
+def test_encode_array_edge_values():
+    a = np.array([[0.0, -0.00004, 1.5], [123456.789, -2.25, 1e-7]])
+    assert encode_array(a, 2) == b'[[0.0,0.0,1.5],[123456.79,-2.25,0.0]]'
+    assert encode_array(a, 0) == b'[[0,0,2],[123457,-2,0]]'
+    assert json.loads(encode_array(np.array([1.0, np.nan, np.inf]), 2)) == [1.0, None, None]
+    assert json.loads(encode_array(np.arange(24.0).reshape(2, 3, 4), 1)) == np.arange(24.0).reshape(2, 3, 4).tolist()
+    assert encode_array(np.zeros((0, 3)), 3) == b'[]'
+
+
+def test_plain_lists_write_non_finite_values_as_null():
+    assert dumps({'a': [1.0, float('nan')], 'b': [float('-inf'), 2]}) == b'{"a":[1.0,null],"b":[null,2]}'
+    assert dumps([1, 'x', None]) == b'[1,"x",null]'
+
+
+def test_dumps_batches_rows_and_columns():
+    batches = [BeetBatch(0, 10.123456, 5.0, 0.5, 2.0, 0.63), BeetBatch(1, 11.0, 5.0, 0.5, 2.0, 0.63, delta=0.1)]
+    rows = json.loads(dumps({'batches': batches}, precision=3))
+    assert rows['batches'][0]['initial_sugar'] == 10.123
+    columns = json.loads(dumps({'batches': batches}, batch_layout='columns'))['batches']
+    assert columns['index'] == [0, 1]
+    assert columns['delta'] == [None, 0.1]
+    with pytest.raises(ValueError):
+        dumps({}, batch_layout='diagonal')
+
+
+def test_simulate_respects_precision_option():
+    config = {'n': 5, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+              'distribution_type': 'uniform', 'precision': 2, 'batch_layout': 'columns'}
+    client = app.test_client()
+    data = client.post('/simulate', json=config).get_json()
+    S = np.array(data['matrices']['S'])
+    assert S.shape == (5, 5)
+    assert np.allclose(S, np.round(S, 2))
+    assert len(data['batches']['initial_sugar']) == 5
+    assert client.post('/simulate', json=dict(config, precision=99)).status_code == 400
+    assert client.post('/simulate', json=dict(config, precision=True)).status_code == 400
@@ -0,0 +1,36 @@
+import sys
+
+from app import parse_args
+from serving import preload_modules, PRELOAD_MODULES
+
+
+def test_parse_args_defaults_to_dev_server():
+    args = parse_args([])
+    assert args.mode == 'dev'
+    assert args.port == 5000
+    assert args.workers >= 1
+
+
+def test_parse_args_production_mode():
+    args = parse_args(['--mode', 'production', '--workers', '3', '--threads', '8'])
+    assert args.mode == 'production'
+    assert args.workers == 3
+    assert args.threads == 8
+
+
+def test_preload_imports_numeric_modules():
+    loaded = preload_modules()
+    assert loaded == PRELOAD_MODULES
+    assert 'scipy.optimize' in sys.modules
+
+
+def test_health_reports_warm_solvers():
+    from app import app
+    from serving import prewarm
+
+    prewarm()
+    data = app.test_client().get('/health').get_json()
+    assert data['status'] == 'ok'
+    assert data['ready'] is True
+    assert data['solvers']['scipy.optimize'] is True
+    assert data['solvers']['optimal'] is True
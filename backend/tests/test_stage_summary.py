@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app import app
+from algorithms.optimizer import Optimizer
+from core.stats import scheduled_values, stage_summary
+
+PLANT = {
+    'n': 8, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'uniform', 'seed': 11,
+}
+
+
+def test_stage_summary_matches_numpy_and_skips_nan():
+    x = np.random.default_rng(0).random((6, 5, 4))
+    summary = stage_summary(x)
+    flat = x.reshape(-1, 4)
+    assert np.allclose(summary['mean'], flat.mean(axis=0))
+    assert np.allclose(summary['p25'], np.percentile(flat, 25, axis=0))
+    assert list(summary['count']) == [30] * 4
+
+    x[0, :, 1] = np.nan
+    x[:, :, 3] = np.nan
+    summary = stage_summary(x)
+    assert list(summary['count']) == [30, 25, 30, 0]
+    assert summary['max'][1] == pytest.approx(x[1:, :, 1].max())
+    assert summary['p50'][1] == pytest.approx(np.median(x[1:, :, 1]))
+    assert np.isnan(summary['mean'][3]) and np.isnan(summary['p95'][3]) and np.isnan(summary['min'][3])
+
+
+def test_scheduled_values_follow_permutations():
+    M = np.random.default_rng(1).random((3, 4, 5))
+    perms = np.array([[[0, 1, 2, 3, -1], [3, 2, 1, 0, -1]]] * 3)
+    values = scheduled_values(M, perms)
+    assert values.shape == (3, 2, 5)
+    assert values[2, 1, 0] == M[2, 3, 0] and np.isnan(values[1, 0, 4])
+    for k in range(3):
+        assert np.nansum(values[k, 0]) == pytest.approx(Optimizer.evaluate_permutations(M[k], perms[k, :1])[0])
+
+
+def test_stage_summary_endpoint_matches_multi_simulate():
+    client = app.test_client()
+    response = client.post('/stage_summary', json=dict(PLANT, strategies=['greedy', 'optimal'])).get_json()
+    assert response['experiments'] == 50 and response['stages'] == 8 and response['seed'] == 11
+
+    experiments = client.post('/multi_simulate', json=PLANT).get_json()['experiments']
+    S = np.array([e['matrices']['S'] for e in experiments])
+    L = np.array([e['matrices']['L'] for e in experiments])
+    assert np.allclose(response['S']['mean'], S.mean(axis=(0, 1)))
+    assert np.allclose(response['L']['p95'], np.percentile(L.reshape(-1, 8), 95, axis=0))
+
+    optimal = response['strategies']['optimal']
+    best = [Optimizer.optimize_hungarian(s)[1] for s in S]
+    assert optimal['yield']['mean'] == pytest.approx(np.mean(best))
+    assert optimal['cumulative_S'][-1] == pytest.approx(np.mean(best))
+    assert np.sum(optimal['S']['mean']) == pytest.approx(np.mean(best))
+    assert response['strategies']['greedy']['yield']['mean'] <= optimal['yield']['mean'] + 1e-9
+
+    assert client.post('/stage_summary', json=dict(PLANT, K=0)).status_code == 400
+    assert client.post('/stage_summary', json=dict(PLANT, strategies=['nope'])).status_code == 400
+    assert client.post('/stage_summary', json=dict(PLANT, n=10000, K=1000)).status_code == 400
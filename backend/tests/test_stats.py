@@ -0,0 +1,71 @@
+import numpy as np
+
+from app import app
+from core.stats import RunningStats, P2Quantile, StreamingSummary, StrategyAggregator
+
+
+def test_running_stats_matches_numpy():
+    values = np.random.default_rng(0).normal(10.0, 2.0, size=1000)
+    stats = RunningStats()
+    for x in values:
+        stats.push(x)
+    assert stats.count == 1000
+    assert np.isclose(stats.mean, values.mean())
+    assert np.isclose(stats.variance, values.var(ddof=1))
+    assert stats.min == values.min() and stats.max == values.max()
+
+
+def test_p2_quantiles_track_numpy_percentiles():
+    values = np.random.default_rng(1).normal(0.0, 1.0, size=5000)
+    summary = StreamingSummary()
+    for x in values:
+        summary.push(x)
+    report = summary.to_dict()
+    for key, p in (('p5', 5), ('p50', 50), ('p95', 95)):
+        assert abs(report[key] - np.percentile(values, p)) < 0.05
+
+
+def test_p2_is_exact_for_small_samples():
+    q = P2Quantile(0.5)
+    for x in [3.0, 1.0, 2.0]:
+        q.push(x)
+    assert q.value == 2.0
+
+
+def test_strategy_aggregator_counts_wins_against_optimal():
+    agg = StrategyAggregator(['greedy', 'optimal'])
+    agg.add({'greedy': {'yield': 10.0, 'final_mass': 1.0}, 'optimal': {'yield': 10.0, 'final_mass': 1.0}})
+    agg.add({'greedy': {'yield': 8.0, 'final_mass': 1.0}, 'optimal': {'yield': 10.0, 'final_mass': 1.0}})
+    agg.add({'greedy': {'yield': 0.0, 'final_mass': 0.0, 'success': False},
+             'optimal': {'yield': 10.0, 'final_mass': 1.0}})
+    report = agg.to_dict()
+    versus = report['greedy']['versus_optimal']
+    assert (versus['wins'], versus['ties'], versus['losses']) == (0, 1, 1)
+    assert report['greedy']['yield']['count'] == 2
+    assert np.isclose(report['greedy']['relative_loss_percent']['mean'], 10.0)
+
+
+def test_multi_optimize_without_all_results():
+    rng = np.random.default_rng(2)
+    matrices = [rng.uniform(10, 20, size=(4, 4)).tolist() for _ in range(7)]
+    client = app.test_client()
+    response = client.post('/multi_optimize', json={'matrices': matrices, 'include_all_results': False})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert 'all_results' not in data
+    assert data['total_matrices'] == 7
+    assert data['statistics']['optimal']['yield']['count'] == 7
+    assert data['statistics']['greedy']['versus_optimal']['wins'] == 0
+    assert np.isclose(data['averages']['greedy']['yield'], data['statistics']['greedy']['yield']['mean'])
+
+
+def test_half_width_shrinks_with_sample_size():
+    rng = np.random.default_rng(3)
+    small, large = RunningStats(), RunningStats()
+    for x in rng.normal(0.0, 1.0, size=100):
+        small.push(x)
+    for x in rng.normal(0.0, 1.0, size=10000):
+        large.push(x)
+    assert abs(small.half_width(0.95) - 1.96 * small.std / 10) < 1e-3
+    assert large.half_width() < small.half_width()
+    assert RunningStats().half_width() == float('inf')
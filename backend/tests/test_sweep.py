@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from app import app
+from core.config import build_experiment_config
+from engine import ExperimentEngine
+from sweep import SweepCache, expand_cells, run_sweep, validate_sweep
+
+PLANT = {
+    'n': 8, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated',
+}
+STRATEGIES = ['greedy', 'optimal']
+
+
+def spec(**overrides):
+    return dict({'base': PLANT, 'grid': {'delta_k': [2, 4], 'growth_base': [1.029, 1.03]},
+                 'K': 6, 'strategies': STRATEGIES, 'seed': 11}, **overrides)
+
+
+def test_expand_cells_applies_grid_to_each_cell():
+    cells = expand_cells({'n': 8, 'm': 1.0}, {'delta_k': [2, 3]}, [{'n': 10}, {'n': 12}])
+    assert [(c['n'], c['delta_k']) for c in cells] == [(10, 2), (10, 3), (12, 2), (12, 3)]
+    assert all(c['m'] == 1.0 for c in cells)
+
+
+def test_validate_sweep_reports_bad_cells():
+    assert validate_sweep(spec()) == []
+    assert validate_sweep(spec(grid={'no_such_field': [1]}))
+    errors = validate_sweep(spec(cells=[{'n': 8}, {'n': 8, 'enable_ripening': True, 'v': 9}]))
+    assert len(errors) == 4 and 'v must satisfy' in errors[0]
+    assert validate_sweep(spec(), max_cells=3)
+    for bad in ({'confidence': 1.0}, {'confidence': True}, {'confidence': '0.9'},
+                {'seed': -1}, {'seed': 'x'}, {'seed': True}):
+        assert validate_sweep(spec(**bad))
+
+
+def test_cached_cells_follow_the_requested_confidence():
+    cache = SweepCache()
+    narrow = run_sweep(spec(confidence=0.5), cache=cache, workers=1)
+    wide = run_sweep(spec(confidence=0.99), cache=cache, workers=1)
+    fresh = run_sweep(spec(confidence=0.99), workers=1)
+    assert wide['cached_cells'] == 4
+    for a, b, c in zip(narrow['rows'], wide['rows'], fresh['rows']):
+        assert b['yield_ci_half_width'] > a['yield_ci_half_width']
+        assert b['yield_ci_half_width'] == pytest.approx(c['yield_ci_half_width'])
+        if c['relative_loss_ci_half_width'] is not None:
+            assert b['relative_loss_ci_half_width'] == pytest.approx(c['relative_loss_ci_half_width'])
+
+
+def test_sweep_rows_and_cache_reuse():
+    cache = SweepCache()
+    first = run_sweep(spec(), cache=cache, workers=1)
+    assert first['computed_cells'] == 4 and first['cached_cells'] == 0
+    assert len(first['rows']) == 8
+    row = first['rows'][0]
+    assert (row['delta_k'], row['growth_base'], row['strategy']) == (2, 1.029, 'greedy')
+    assert row['experiments'] == 6 and row['relative_loss_mean'] >= 0
+    optimal = first['rows'][1]
+    assert optimal['strategy'] == 'optimal' and optimal['win_rate'] is None
+
+    extended = run_sweep(spec(grid={'delta_k': [2, 3, 4], 'growth_base': [1.029, 1.03]}),
+                         cache=cache, workers=1)
+    assert extended['cached_cells'] == 4 and extended['computed_cells'] == 2
+    by_key = {(r['delta_k'], r['growth_base'], r['strategy']): r['yield_mean'] for r in extended['rows']}
+    for r in first['rows']:
+        assert by_key[(r['delta_k'], r['growth_base'], r['strategy'])] == r['yield_mean']
+
+
+def test_unseeded_sweeps_are_not_cached(tmp_path):
+    cache = SweepCache(str(tmp_path))
+    report = run_sweep(dict(spec(), seed=None), cache=cache, workers=1)
+    assert report['computed_cells'] == 4 and list(tmp_path.iterdir()) == []
+    run_sweep(spec(), cache=cache, workers=1)
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_pooled_cells_match_single_runs(tmp_path):
+    with ExperimentEngine(2, start_method='fork', chunk_size=2) as engine:
+        pooled = run_sweep(spec(common_random_numbers=False), engine=engine,
+                           cache=SweepCache(str(tmp_path)))
+    serial = run_sweep(spec(common_random_numbers=False), workers=1)
+    assert [r['yield_mean'] for r in pooled['rows']] == [r['yield_mean'] for r in serial['rows']]
+    assert len(list(tmp_path.glob('*.json'))) == 4
+
+    resumed = run_sweep(spec(common_random_numbers=False), cache=SweepCache(str(tmp_path)), workers=1)
+    assert resumed['computed_cells'] == 0
+
+
+def test_common_random_numbers_share_batches_across_cells():
+    cells = [(build_experiment_config(c), np.random.SeedSequence(5))
+             for c in (PLANT, dict(PLANT, growth_base=1.03))]
+    results = ExperimentEngine(1).run_cells(cells, 4, ['optimal'])
+    # growth_base влияет только на потери: при общих случайных числах S различаются мало
+    assert np.allclose(results[0].yields, results[1].yields, rtol=0.05)
+
+
+def test_sweep_endpoint():
+    client = app.test_client()
+    response = client.post('/sweep', json=spec())
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['columns'][:3] == ['delta_k', 'growth_base', 'strategy']
+    assert len(body['cells']) == 4
+
+    again = client.post('/sweep', json=spec()).get_json()
+    assert again['cached_cells'] == 4
+
+    bad = client.post('/sweep', json=spec(K=0))
+    assert bad.status_code == 400
+    assert client.post('/sweep', json=spec(confidence=1.0)).status_code == 400
+    assert client.post('/sweep', json=spec(seed='x')).status_code == 400
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+import app as backend
+from app import app
+from core.config import build_experiment_config
+from core.pipeline import ExperimentPipeline
+from core.store import ExperimentStore
+from core.tiles import block_edges, overview, window
+
+PLANT = {
+    'n': 40, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'uniform', 'seed': 5,
+}
+
+
+def test_window_clips_at_the_edge():
+    M = np.arange(35.0).reshape(5, 7)
+    assert np.array_equal(window(M, 1, 2, 2, 3), M[1:3, 2:5])
+    assert window(M, 4, 5, 10, 10).shape == (1, 2)
+    for args in ((5, 0, 1, 1), (-1, 0, 1, 1), (0, 0, 0, 3)):
+        with pytest.raises(ValueError):
+            window(M, *args)
+
+
+@pytest.mark.parametrize('shape, blocks', [((100, 37), (8, 5)), ((6, 4), (64, 64)), ((1, 1), (3, 3))])
+def test_overview_matches_blockwise_reduction(shape, blocks):
+    M = np.random.default_rng(0).random(shape)
+    summary = overview(M, *blocks)
+    r, c = summary['row_edges'], summary['col_edges']
+    assert r[0] == c[0] == 0 and r[-1] == shape[0] and c[-1] == shape[1]
+    assert summary['mean'].shape == (len(r) - 1, len(c) - 1)
+    for i in range(len(r) - 1):
+        for j in range(len(c) - 1):
+            block = M[r[i]:r[i + 1], c[j]:c[j + 1]]
+            assert summary['mean'][i, j] == pytest.approx(block.mean())
+            assert summary['min'][i, j] == block.min() and summary['max'][i, j] == block.max()
+    assert list(block_edges(10, 3)) == [0, 3, 7, 10]
+
+
+def test_store_round_trip_across_instances(tmp_path):
+    config = build_experiment_config(PLANT)
+    seq = np.random.SeedSequence(5).spawn(3)[2]
+    store = ExperimentStore(ExperimentPipeline(), str(tmp_path))
+    experiment_id = store.put(config, seq)
+    assert store.put(config, seq) == experiment_id
+    assert store.put(config, np.random.SeedSequence(6)) != experiment_id
+
+    fresh = ExperimentStore(ExperimentPipeline(), str(tmp_path))
+    assert fresh.describe(experiment_id)['shape'] == [40, 40]
+    expected, _ = ExperimentPipeline().run(config, seq)
+    restored, _ = fresh.get(experiment_id)
+    assert np.array_equal(restored['matrices']['S'], expected['matrices']['S'])
+    assert fresh.get('0' * 32) is None and fresh.get('../x') is None
+
+
+def test_tile_and_overview_endpoints():
+    client = app.test_client()
+    simulated = client.post('/simulate', json=dict(PLANT, store=True)).get_json()
+    S = np.array(simulated['matrices']['S'])
+    experiment_id = simulated['experiment_id']
+    lean = client.post('/simulate', json=dict(PLANT, store=True, include_matrices=False)).get_json()
+    assert 'matrices' not in lean and lean['experiment_id'] == experiment_id and lean['shape'] == [40, 40]
+
+    tile = client.get(f'/experiments/{experiment_id}/tile?matrix=S&row=30&col=5&rows=20&cols=4').get_json()
+    assert tile['shape'] == [40, 40]
+    assert np.allclose(tile['values'], S[30:40, 5:9])
+    summary = client.get(f'/experiments/{experiment_id}/overview?matrix=C&rows=8&cols=8&precision=3').get_json()
+    assert np.array(summary['mean']).shape == (8, 8)
+    assert client.get(f'/experiments/{experiment_id}').get_json()['seed'] == 5
+
+    assert client.get('/experiments/unknown/tile').status_code == 404
+    assert client.get(f'/experiments/{experiment_id}/tile?matrix=X').status_code == 400
+    assert client.get(f'/experiments/{experiment_id}/tile?row=99').status_code == 400
+    assert client.get(f'/experiments/{experiment_id}/overview?rows=0').status_code == 400
+
+
+def test_multi_simulate_stores_every_experiment():
+    client = app.test_client()
+    response = client.post('/multi_simulate', json=dict(PLANT, n=6, store=True)).get_json()
+    experiment = response['experiments'][7]
+    tile = client.get(f"/experiments/{experiment['experiment_id']}/tile?matrix=B&rows=6&cols=6").get_json()
+    assert np.allclose(tile['values'], experiment['matrices']['B'])
+    assert client.post('/multi_simulate', json=dict(PLANT, n=6, store=True, antithetic=True)).status_code == 400
+
+
+def test_stored_ids_resolve_in_other_workers():
+    client = app.test_client()
+    experiment_id = client.post('/simulate', json=dict(PLANT, seed=8, store=True)).get_json()['experiment_id']
+    # Другой воркер: свой кэш этапов и своё хранилище на той же папке
+    other_worker = ExperimentStore(ExperimentPipeline(), backend.EXPERIMENT_STORE.directory)
+    experiment, _ = other_worker.get(experiment_id)
+    tile = client.get(f'/experiments/{experiment_id}/tile?rows=3&cols=3').get_json()
+    assert np.allclose(tile['values'], experiment['matrices']['S'][:3, :3])
+
+
+def test_saved_matrices_are_served_without_the_pipeline(tmp_path):
+    config = build_experiment_config(dict(PLANT, n=12))
+    seq = np.random.SeedSequence(9)
+    experiment, _ = ExperimentPipeline().run(config, seq)
+    experiment_id = ExperimentStore(ExperimentPipeline(), str(tmp_path)).put(config, seq, experiment['matrices'])
+
+    # Другой воркер без кэша этапов: пересчёт был бы ошибкой
+    other_worker = ExperimentStore(None, str(tmp_path))
+    S = other_worker.matrix(experiment_id, 'S')
+    assert isinstance(S, np.memmap) and np.array_equal(S, experiment['matrices']['S'])
+    assert np.array_equal(window(other_worker.matrix(experiment_id, 'L'), 2, 3, 4, 5),
+                          experiment['matrices']['L'][2:6, 3:8])
+    assert other_worker.matrix('0' * 32, 'S') is None
@@ -0,0 +1,88 @@
+import numpy as np
+
+from app import app
+from core.config import build_experiment_config
+from core.generators import AntitheticRNG, MatrixGenerator
+from core.stats import antithetic_variance_reduction, paired_variance_reduction
+from engine import ExperimentEngine
+
+PLANT = {
+    'n': 10, 'm': 1000.0, 'a_min': 12.0, 'a_max': 22.0, 'beta1': 0.85, 'beta2': 0.95,
+    'distribution_type': 'concentrated',
+}
+STRATEGIES = ['greedy', 'optimal']
+
+
+def test_antithetic_rng_mirrors_uniform_draws():
+    plain = np.random.default_rng(3).uniform(2.0, 5.0, size=(4, 3))
+    mirrored = AntitheticRNG(np.random.default_rng(3)).uniform(2.0, 5.0, size=(4, 3))
+    assert np.allclose(plain + mirrored, 7.0)
+
+
+def test_antithetic_experiment_uses_mirrored_batches():
+    config = build_experiment_config(PLANT)
+    first = MatrixGenerator.generate_experiment(config, np.random.default_rng(1))
+    second = MatrixGenerator.generate_experiment(config, np.random.default_rng(1), antithetic=True)
+    a = np.array([b.initial_sugar for b in first['batches']])
+    b = np.array([b.initial_sugar for b in second['batches']])
+    assert np.allclose(a + b, PLANT['a_min'] + PLANT['a_max'])
+
+
+def test_variance_reduction_estimates():
+    rng = np.random.default_rng(0)
+    u = rng.random(200)
+    pairs = np.empty(400)
+    pairs[0::2], pairs[1::2] = u, 1 - u  # линейная функция: пары гасят дисперсию полностью
+    assert antithetic_variance_reduction(pairs)['variance_of_mean_antithetic'] < 1e-20
+    assert antithetic_variance_reduction([1.0]) is None
+
+    x = rng.normal(size=500)
+    paired = paired_variance_reduction(x, x + 0.5 + 0.1 * rng.normal(size=500))
+    assert abs(paired['mean_difference'] - 0.5) < 0.05
+    assert paired['reduction_factor'] > 10
+    assert paired['half_width'] < paired['half_width_independent']
+
+
+def test_compare_configs_shares_batches_under_crn():
+    configs = {
+        'concentrated': build_experiment_config(PLANT),
+        'uniform': build_experiment_config(dict(PLANT, distribution_type='uniform')),
+    }
+    with ExperimentEngine(1) as engine:
+        crn = engine.compare_configs(configs, 6, STRATEGIES, seed=5, return_batches=True)
+        independent = engine.compare_configs(configs, 6, STRATEGIES, seed=5, common_random_numbers=False,
+                                             return_batches=True)
+
+    def initial_sugar(result):
+        return [[b.initial_sugar for b in batches] for batches in result.batches]
+
+    assert initial_sugar(crn['concentrated']) == initial_sugar(crn['uniform'])
+    assert initial_sugar(independent['concentrated']) != initial_sugar(independent['uniform'])
+
+
+def test_compare_configs_endpoint():
+    response = app.test_client().post('/compare_configs', json={
+        'configs': {'uniform': dict(PLANT, distribution_type='uniform'), 'concentrated': PLANT},
+        'baseline': 'uniform', 'K': 20, 'strategies': STRATEGIES, 'seed': 2,
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['baseline'] == 'uniform'
+    assert set(body['configs']) == {'uniform', 'concentrated'}
+    assert body['differences']['concentrated']['greedy']['yield']['pairs'] == 20
+
+    bad = app.test_client().post('/compare_configs', json={
+        'configs': {'a': PLANT, 'b': dict(PLANT, n=11)}, 'K': 20,
+    })
+    assert bad.status_code == 400
+
+
+def test_multi_optimize_reports_antithetic_pairs():
+    client = app.test_client()
+    simulated = client.post('/multi_simulate', json=dict(PLANT, antithetic=True, seed=3)).get_json()
+    matrices = [experiment['matrices']['S'] for experiment in simulated['experiments']]
+    response = client.post('/multi_optimize', json={'matrices': matrices, 'antithetic_pairs': True})
+    assert response.status_code == 200
+    report = response.get_json()['variance_reduction']
+    assert report['greedy']['yield']['pairs'] == 25
+    assert 'relative_loss_percent' in report['greedy']
@@ -1,6 +1,10 @@
 const { app, BrowserWindow } = require('electron');
 const path = require('path');
 const { spawn } = require('child_process');
+const http = require('http');
+
+const BACKEND_HEALTH_URL = 'http://127.0.0.1:5000/health';
+const BACKEND_WAIT_TIMEOUT_MS = 30000;
 
 let mainWindow;
 let pythonProcess;
@@ -49,14 +53,31 @@ function startPythonBackend() {
         console.log('Starting development backend:', backendPath);
     }
     
+    // Server mode: packaged builds run the multi-worker production server,
+    // development uses the Flask debug server unless BACKEND_MODE overrides it
+    const backendMode = process.env.BACKEND_MODE || (app.isPackaged ? 'production' : 'dev');
+    const backendArgs = ['--mode', backendMode];
+    if (process.env.BACKEND_WORKERS) backendArgs.push('--workers', process.env.BACKEND_WORKERS);
+    if (process.env.BACKEND_THREADS) backendArgs.push('--threads', process.env.BACKEND_THREADS);
+
+    // Shared backend data dir: checkpoints of long runs, online sessions, stored
+    // experiments and the run catalog must be visible to every worker process
+    // and survive restarts, so they live in the per-user data folder
+    const backendEnv = Object.assign({}, process.env, {
+        BACKEND_CHECKPOINT_DIR: process.env.BACKEND_CHECKPOINT_DIR
+            || path.join(app.getPath('userData'), 'backend')
+    });
+
     // Start backend
     if (app.isPackaged) {
-        pythonProcess = spawn(pythonCommand, [], {
+        pythonProcess = spawn(pythonCommand, backendArgs, {
             cwd: path.dirname(backendPath),
+            env: backendEnv,
             stdio: 'pipe' // Use pipe to capture output
         });
     } else {
-        pythonProcess = spawn(pythonCommand, [backendPath], {
+        pythonProcess = spawn(pythonCommand, [backendPath, ...backendArgs], {
+            env: backendEnv,
             stdio: 'pipe' // Use pipe to capture output
         });
     }
@@ -92,9 +113,49 @@ function startPythonBackend() {
     });
 }
 
+// Poll /health until the backend reports warm solvers (or the timeout expires)
+function waitForBackend(onReady) {
+    const deadline = Date.now() + BACKEND_WAIT_TIMEOUT_MS;
+    let done = false;
+
+    const finish = (reason) => {
+        if (done) return;
+        done = true;
+        console.log(`Backend wait finished: ${reason}`);
+        onReady();
+    };
+
+    const poll = () => {
+        if (done) return;
+        if (Date.now() > deadline) {
+            finish('timeout');
+            return;
+        }
+        const req = http.get(BACKEND_HEALTH_URL, (res) => {
+            let body = '';
+            res.on('data', (chunk) => { body += chunk; });
+            res.on('end', () => {
+                try {
+                    if (JSON.parse(body).ready) {
+                        finish('ready');
+                        return;
+                    }
+                } catch (e) {
+                    // Not JSON yet - keep polling
+                }
+                setTimeout(poll, 200);
+            });
+        });
+        req.on('error', () => setTimeout(poll, 200));
+        req.setTimeout(1000, () => req.destroy());
+    };
+
+    poll();
+}
+
 app.on('ready', () => {
     startPythonBackend();
-    setTimeout(createWindow, 2000); // Wait for backend to init
+    waitForBackend(createWindow); // Open the window once the backend is warm
 });
 
 app.on('window-all-closed', function () {
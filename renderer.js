@@ -6,6 +6,7 @@ let currentConfig = null;
 let currentBatches = null;
 let currentExperiments = null; // For storing 50 experiments
 let currentExperimentIndex = 0; // For pagination
+let currentSeed = null; // Зерно последней генерации (для "Те же случайные партии")
 
 function _el(id) { return document.getElementById(id); }
 function _num(v, fallback = 0) { const x = Number(v); return Number.isFinite(x) ? x : fallback; }
@@ -38,8 +39,15 @@ async function runMultiSimulation() {
         use_losses: !!(useLossesEl && useLossesEl.checked),
         growth_base: _num(growthBaseEl ? growthBaseEl.value : null, 1.029),
         delta_k: _int(deltaKEl ? deltaKEl.value : null, 4),
+        precision: 6, // знаков после запятой в матрицах ответа
     };
 
+    // Те же случайные величины: backend пересчитает только изменившиеся этапы (core/pipeline.py)
+    const keepDrawsEl = _el('keepDraws');
+    if (keepDrawsEl && keepDrawsEl.checked && currentSeed !== null) {
+        config.seed = currentSeed;
+    }
+
     currentConfig = config;
 
     // Validate parameters according to experimental protocol (see provided spec)
@@ -87,6 +95,7 @@ async function runMultiSimulation() {
         const data = await response.json();
 
         if (data.experiments && data.experiments.length > 0) {
+            currentSeed = data.seed !== undefined ? data.seed : null;
             currentExperiments = data.experiments;
             currentExperimentIndex = 0;
             